@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+多项目批量生成 - 为多个项目补齐缺失的章节概要和正文
+
+所有项目共用一个并发上限和请求速率（BATCH_CONFIG），调度器在有待生成任务的项目间轮流取任务，
+章节多的项目不会让其他项目一直等待。同时选择概要和正文时，一章的概要生成成功后立即排入该章的正文。
+
+每个任务完成后立即写入所属项目（在事务中重新读取最新数据再合并），中途中断时已完成的结果不会丢失，
+再次运行只会生成仍然缺失的部分。运行结束后返回汇总报告，可写入JSON文件。
+
+用法:
+    python batch_generation.py summaries [novels] [--projects a b] [--concurrency N] [--rpm N] [--report report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from rich.table import Table
+from ui_utils import ui, console
+from config import BATCH_CONFIG
+from data_manager import DataManager
+
+# 支持的生成阶段及显示名称（按依赖顺序）
+STAGES = {
+    "summaries": "章节概要",
+    "novels": "章节正文",
+}
+
+
+@dataclass
+class BatchJob:
+    """一个章节的一次生成"""
+    project: str
+    stage: str
+    chapter_key: str
+    chapter_num: int
+    title: str
+    status: str = "pending"  # pending / done / failed
+    error: str = ""
+    words: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class BatchReport:
+    """批量生成的汇总结果"""
+    started_at: str
+    stages: List[str]
+    elapsed: float = 0.0
+    jobs: List[BatchJob] = field(default_factory=list)
+
+    def project_summary(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """{项目: {阶段: {"done": 成功数, "failed": 失败数, "words": 字数}}}"""
+        summary = {}
+        for job in self.jobs:
+            counts = summary.setdefault(job.project, {}).setdefault(job.stage, {"done": 0, "failed": 0, "words": 0})
+            counts[job.status] = counts.get(job.status, 0) + 1
+            counts["words"] += job.words
+        return summary
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for job in self.jobs if job.status == "done")
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for job in self.jobs if job.status == "failed")
+
+    def to_dict(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "stages": self.stages,
+            "elapsed": round(self.elapsed, 3),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "requests_per_minute": round(len(self.jobs) / self.elapsed * 60, 2) if self.elapsed else 0,
+            "projects": self.project_summary(),
+            "jobs": [asdict(job) for job in self.jobs],
+        }
+
+    def write(self, path: Path):
+        """把报告写入JSON文件"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+class RateLimiter:
+    """按固定间隔放行请求；等待者按先来后到的顺序放行"""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+
+class FairScheduler:
+    """各项目一个任务队列，在有任务的项目间轮流取任务"""
+
+    def __init__(self):
+        self._queues: Dict[str, deque] = {}
+        self._rotation = deque()
+
+    def push(self, job: BatchJob):
+        queue = self._queues.setdefault(job.project, deque())
+        if not queue and job.project not in self._rotation:
+            self._rotation.append(job.project)
+        queue.append(job)
+
+    def pop(self) -> Optional[BatchJob]:
+        while self._rotation:
+            project = self._rotation.popleft()
+            queue = self._queues[project]
+            if not queue:
+                continue
+            job = queue.popleft()
+            if queue:
+                self._rotation.append(project)
+            return job
+        return None
+
+    def __len__(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+
+class _ProjectContext:
+    """批量生成期间一个项目的数据、提示词和生成所需的信息"""
+
+    def __init__(self, name: str, project_path: Path, llm, search_index=None):
+        self.name = name
+        self.dm = DataManager(project_path)
+        if search_index is not None:
+            self.dm.attach_search_index(search_index, name)
+        self.llm = llm.for_project(project_path)
+        self.chapters = {}
+        self.summaries = {}
+        self.novel_keys = set()
+        self.context_info = None
+        self.snapshot_taken = False
+        # 同一项目的写入依次进行
+        self.write_lock = asyncio.Lock()
+
+
+class BatchOrchestrator:
+    """在多个项目间调度批量生成"""
+
+    def __init__(self, llm=None, max_concurrency: Optional[int] = None,
+                 requests_per_minute: Optional[float] = None, search_index=None,
+                 progress_callback: Optional[Callable[[str], None]] = None):
+        if llm is None:
+            from llm_service import llm_service
+            llm = llm_service
+        self.llm = llm
+        self.max_concurrency = max(1, max_concurrency or BATCH_CONFIG["max_concurrency"])
+        self.requests_per_minute = (
+            BATCH_CONFIG["requests_per_minute"] if requests_per_minute is None else requests_per_minute
+        )
+        self.search_index = search_index
+        self.progress_callback = progress_callback
+        self._contexts: Dict[str, _ProjectContext] = {}
+        self._stages: List[str] = []
+
+    # ===== 计划 =====
+    def plan(self, projects: Sequence[Tuple[str, Path]], stages: Sequence[str]) -> Tuple[List[BatchJob], int]:
+        """
+        找出各项目缺失的概要和正文
+
+        Returns:
+            (可以立即开始的任务, 预计任务总数)；同时选择概要和正文时，
+            概要尚未生成的章节的正文任务在概要完成后才加入，只计入预计总数
+        """
+        unknown = [stage for stage in stages if stage not in STAGES]
+        if unknown:
+            raise ValueError(f"未知的生成阶段: {', '.join(unknown)}")
+        self._contexts = {}
+        self._stages = [stage for stage in STAGES if stage in stages]
+        jobs, expected = [], 0
+        for name, project_path in projects:
+            ctx = _ProjectContext(name, Path(project_path), self.llm, self.search_index)
+            self._contexts[name] = ctx
+            summaries = ctx.dm.read_chapter_summaries()
+            novels = ctx.dm.read_novel_chapters()
+            ctx.summaries = summaries
+            ctx.novel_keys = set(novels)
+            for num, chapter in enumerate(ctx.dm.read_chapter_outline(), 1):
+                chapter = dict(chapter, order=num)
+                key = ctx.dm.chapter_key(chapter)
+                ctx.chapters[key] = chapter
+                title = chapter.get("title", f"第{num}章")
+                if "summaries" in self._stages and key not in summaries:
+                    jobs.append(BatchJob(name, "summaries", key, num, title))
+                    expected += 1
+                    if "novels" in self._stages and key not in novels:
+                        expected += 1
+                elif "novels" in self._stages and key in summaries and key not in novels:
+                    jobs.append(BatchJob(name, "novels", key, num, title))
+                    expected += 1
+        return jobs, expected
+
+    # ===== 执行 =====
+    async def run(self, jobs: List[BatchJob]) -> BatchReport:
+        """执行plan返回的任务，返回汇总报告"""
+        report = BatchReport(started_at=datetime.now().isoformat(), stages=list(self._stages))
+        started = time.perf_counter()
+        self._report = report
+        self._scheduler = FairScheduler()
+        for job in jobs:
+            self._scheduler.push(job)
+        self._limiter = RateLimiter(self.requests_per_minute)
+        self._cond = asyncio.Condition()
+        self._in_flight = 0
+        await asyncio.gather(*(self._worker() for _ in range(self.max_concurrency)))
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    async def _worker(self):
+        while True:
+            async with self._cond:
+                job = self._scheduler.pop()
+                while job is None and self._in_flight:
+                    # 进行中的任务可能排入后续阶段
+                    await self._cond.wait()
+                    job = self._scheduler.pop()
+                if job is None:
+                    return
+                self._in_flight += 1
+            try:
+                await self._run_job(job)
+            finally:
+                async with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    async def _run_job(self, job: BatchJob):
+        ctx = self._contexts[job.project]
+        chapter = ctx.chapters[job.chapter_key]
+        started = time.perf_counter()
+        try:
+            if ctx.context_info is None:
+                ctx.context_info = await ctx.dm.get_context_info_async()
+            await self._limiter.acquire()
+            if job.stage == "summaries":
+                result = await ctx.llm.generate_chapter_summary_async(chapter, job.chapter_num, ctx.context_info)
+            else:
+                result = await ctx.llm.generate_novel_chapter_async(
+                    chapter, ctx.summaries[job.chapter_key], job.chapter_num, ctx.context_info
+                )
+            if not result:
+                raise RuntimeError("AI未返回内容")
+            async with ctx.write_lock:
+                await asyncio.to_thread(self._save, ctx, job, result)
+            job.status = "done"
+            job.words = len(result)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        job.elapsed = time.perf_counter() - started
+        self._report.jobs.append(job)
+
+        if job.status == "done" and job.stage == "summaries" and "novels" in self._stages:
+            if job.chapter_key not in ctx.novel_keys:
+                self._scheduler.push(BatchJob(job.project, "novels", job.chapter_key, job.chapter_num, job.title))
+        if self.progress_callback:
+            label = f"《{job.project}》第{job.chapter_num}章{STAGES[job.stage]}"
+            self.progress_callback(f"{label}生成完成" if job.status == "done" else f"{label}生成失败: {job.error}")
+
+    @staticmethod
+    def _save(ctx: _ProjectContext, job: BatchJob, result: str):
+        """在事务中重新读取最新数据再合并，避免覆盖生成期间的其他修改"""
+        if not ctx.snapshot_taken:
+            ctx.dm.auto_snapshot("多项目批量生成前")
+            ctx.snapshot_taken = True
+        with ctx.dm.transaction():
+            if job.stage == "summaries":
+                summaries = ctx.dm.read_chapter_summaries()
+                summaries[job.chapter_key] = {"title": job.title, "summary": result}
+                ctx.dm.write_chapter_summaries(summaries)
+                ctx.summaries[job.chapter_key] = summaries[job.chapter_key]
+            else:
+                chapters = ctx.dm.read_novel_chapters()
+                chapters[job.chapter_key] = {"title": job.title, "content": result, "word_count": len(result)}
+                ctx.dm.write_novel_chapters(chapters)
+                ctx.novel_keys.add(job.chapter_key)
+
+
+def main():
+    """命令行入口：为所有（或指定的）项目补齐缺失的内容"""
+    from llm_service import llm_service
+    from project_manager import project_manager
+    from progress_utils import AsyncProgressManager
+
+    parser = argparse.ArgumentParser(description="为多个项目批量生成缺失的章节概要和正文")
+    parser.add_argument("stages", nargs="+", choices=list(STAGES), help="要生成的内容")
+    parser.add_argument("--projects", nargs="+", help="项目名称（默认所有项目）")
+    parser.add_argument("--concurrency", type=int, help="所有项目共用的并发请求数")
+    parser.add_argument("--rpm", type=float, help="所有项目共用的每分钟请求数（0表示不限制）")
+    parser.add_argument("--report", type=Path, help="把结果报告写入JSON文件")
+    args = parser.parse_args()
+
+    if not llm_service.is_async_available():
+        ui.print_error("AI服务不可用，请检查配置。")
+        return
+
+    projects = [(p.name, p.path) for p in project_manager.list_projects()
+                if not args.projects or p.name in args.projects]
+    if not projects:
+        ui.print_warning("没有找到要处理的项目")
+        return
+
+    orchestrator = BatchOrchestrator(
+        max_concurrency=args.concurrency, requests_per_minute=args.rpm,
+        search_index=project_manager.search_index
+    )
+    jobs, expected = orchestrator.plan(projects, args.stages)
+    if not jobs:
+        ui.print_info("所选项目中没有缺失的内容。")
+        return
+
+    ui.print_info(f"{len(projects)} 个项目共需生成约 {expected} 项")
+    progress = AsyncProgressManager()
+    orchestrator.progress_callback = progress.create_callback()
+    progress.start(expected, "开始批量生成...")
+    try:
+        report = asyncio.run(orchestrator.run(jobs))
+    finally:
+        progress.finish("批量生成结束")
+
+    print_report(report)
+    if args.report:
+        report.write(args.report)
+        ui.print_info(f"结果报告已写入: {args.report}")
+
+
+def print_report(report: BatchReport):
+    """以表格显示各项目的生成结果"""
+    table = Table(
+        title="📊 批量生成结果",
+        caption=f"成功 {report.succeeded}，失败 {report.failed}，耗时 {report.elapsed:.1f}s"
+    )
+    table.add_column("项目", style="cyan", no_wrap=True)
+    for stage in report.stages:
+        table.add_column(STAGES[stage], style="green")
+    table.add_column("字数", style="yellow")
+    for project, stages in sorted(report.project_summary().items()):
+        cells = []
+        for stage in report.stages:
+            counts = stages.get(stage, {"done": 0, "failed": 0})
+            cells.append(f"{counts['done']} 成功" + (f" / [red]{counts['failed']} 失败[/red]" if counts["failed"] else ""))
+        table.add_row(project, *cells, str(sum(counts["words"] for counts in stages.values())))
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+性能基准测试脚本
+
+使用合成的中文小说数据测量存储格式与数据路径的性能。
+用法:
+    python benchmark.py            # 运行所有基准测试
+    python benchmark.py drafts     # 只运行指定的基准测试
+"""
+
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 常用汉字与标点，用于生成合成正文
+_CJK_POOL = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经"
+    "十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严"
+)
+_PUNCTUATION = "，。！？、；："
+
+
+def _synthetic_text(rng: random.Random, length: int) -> str:
+    """生成指定长度的合成中文正文"""
+    chars = []
+    while len(chars) < length:
+        sentence_len = rng.randint(8, 30)
+        chars.extend(rng.choice(_CJK_POOL) for _ in range(sentence_len))
+        chars.append(rng.choice(_PUNCTUATION))
+    return "".join(chars[:length])
+
+
+def _mutate(rng: random.Random, text: str, ratio: float = 0.05) -> str:
+    """对正文做少量改写，模拟同一章节的多次生成"""
+    chars = list(text)
+    for _ in range(int(len(chars) * ratio)):
+        pos = rng.randrange(len(chars))
+        chars[pos] = rng.choice(_CJK_POOL)
+    return "".join(chars)
+
+
+def _report(title: str, rows):
+    """打印结果表格"""
+    print(f"\n== {title} ==")
+    width = max(len(r[0]) for r in rows)
+    for name, value in rows:
+        print(f"  {name.ljust(width)}  {value}")
+
+
+def bench_draft_archive(chapters: int = 20, versions: int = 10, chapter_length: int = 3000):
+    """比较旧版JSON草稿文件与压缩草稿归档的体积和读写吞吐量"""
+    from draft_archive import DraftArchive
+
+    rng = random.Random(42)
+    bases = [_synthetic_text(rng, chapter_length) for _ in range(chapters)]
+    entries = []
+    for version in range(versions):
+        for num, base in enumerate(bases, 1):
+            content = _mutate(rng, base)
+            entries.append((f"chapter_{num}", {
+                "timestamp": f"2025-01-01T00:{version:02d}:00",
+                "chapter_title": f"第{num}章",
+                "content": content,
+                "word_count": len(content)
+            }))
+    raw_bytes = sum(len(e["content"].encode('utf-8')) for _, e in entries)
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        # 旧版格式：每次追加都完整读写整个JSON文件
+        legacy_path = workdir / "legacy_drafts.json"
+        start = time.perf_counter()
+        for chapter_key, entry in entries:
+            drafts = {}
+            if legacy_path.exists():
+                with legacy_path.open('r', encoding='utf-8') as f:
+                    drafts = json.load(f)
+            drafts.setdefault(chapter_key, []).append(entry)
+            with legacy_path.open('w', encoding='utf-8') as f:
+                json.dump(drafts, f, ensure_ascii=False, indent=2)
+        legacy_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for num in range(1, chapters + 1):
+            with legacy_path.open('r', encoding='utf-8') as f:
+                json.load(f)[f"chapter_{num}"][-1]
+        legacy_read = time.perf_counter() - start
+        legacy_size = legacy_path.stat().st_size
+
+        # 压缩归档：追加写入 + 按条目随机读取
+        archive = DraftArchive(workdir / "initial_drafts.json", workdir / "drafts.zdict")
+        samples = bases[:8]
+        start = time.perf_counter()
+        for chapter_key, entry in entries:
+            archive.append(chapter_key, entry, samples)
+        archive_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for num in range(1, chapters + 1):
+            archive.get(f"chapter_{num}")
+        archive_read = time.perf_counter() - start
+        archive_size = archive.stats()["bytes"] + archive.dict_path.stat().st_size
+    finally:
+        shutil.rmtree(workdir)
+
+    mb = raw_bytes / (1024 * 1024)
+    _report(f"草稿归档 ({len(entries)} 条, 正文 {mb:.2f} MB)", [
+        ("旧版JSON 体积", f"{legacy_size / 1024:.1f} KB"),
+        ("压缩归档 体积", f"{archive_size / 1024:.1f} KB ({archive_size / legacy_size:.1%})"),
+        ("旧版JSON 追加写入", f"{legacy_write:.3f} s ({mb / legacy_write:.1f} MB/s)"),
+        ("压缩归档 追加写入", f"{archive_write:.3f} s ({mb / archive_write:.1f} MB/s)"),
+        ("旧版JSON 读取单章最新稿", f"{legacy_read / chapters * 1000:.2f} ms/次"),
+        ("压缩归档 读取单章最新稿", f"{archive_read / chapters * 1000:.2f} ms/次"),
+    ])
+
+
+def bench_chapter_view(chapters: int = 300, chapter_length: int = 4000):
+    """比较完整解析正文与通过偏移索引读取单章的延迟"""
+    from data_manager import DataManager
+
+    rng = random.Random(7)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        dm = DataManager(workdir)
+        dm.write_novel_chapters({
+            f"chapter_{i}": {"title": f"第{i}章", "content": text, "word_count": len(text)}
+            for i, text in ((i, _synthetic_text(rng, chapter_length)) for i in range(1, chapters + 1))
+        })
+        size = dm.get_path("novel_text").stat().st_size
+        samples = [rng.randint(1, chapters) for _ in range(50)]
+
+        start = time.perf_counter()
+        for num in samples:
+            dm.read_novel_chapters().get(f"chapter_{num}")
+        full_parse = (time.perf_counter() - start) / len(samples)
+
+        start = time.perf_counter()
+        for num in samples:
+            dm.get_novel_chapter(num)
+        indexed = (time.perf_counter() - start) / len(samples)
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"单章读取 ({chapters} 章, 正文文件 {size / (1024 * 1024):.1f} MB)", [
+        ("完整解析后取单章", f"{full_parse * 1000:.2f} ms/次"),
+        ("偏移索引读取单章", f"{indexed * 1000:.3f} ms/次"),
+    ])
+
+
+def bench_json_codec(chapters: int = 300, chapter_length: int = 4000, rounds: int = 5):
+    """比较旧版缩进格式、标准库紧凑格式与加速JSON库的体积和序列化吞吐量"""
+    from unittest.mock import patch
+    import json_codec
+
+    rng = random.Random(11)
+    project = {
+        "chapters": {
+            f"chapter_{i}": {"title": f"第{i}章", "content": text, "word_count": len(text)}
+            for i, text in ((i, _synthetic_text(rng, chapter_length)) for i in range(1, chapters + 1))
+        }
+    }
+
+    variants = [("旧版 json indent=4", lambda obj: json.dumps(obj, ensure_ascii=False, indent=4).encode('utf-8'),
+                 json.loads)]
+    backends = ["json"] + ([json_codec.BACKEND] if json_codec.BACKEND != "json" else [])
+    for backend in backends:
+        for pretty in (True, False):
+            def dumps(obj, backend=backend, pretty=pretty):
+                with patch.object(json_codec, 'BACKEND', backend):
+                    return json_codec.dumps(obj, pretty)
+
+            def loads(data, backend=backend):
+                with patch.object(json_codec, 'BACKEND', backend):
+                    return json_codec.loads(data)
+
+            variants.append((f"{backend} {'缩进' if pretty else '紧凑'}", dumps, loads))
+
+    rows = []
+    for name, dumps, loads in variants:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            payload = dumps(project)
+        dump_time = (time.perf_counter() - start) / rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            loads(payload)
+        load_time = (time.perf_counter() - start) / rounds
+        rows.append((name, f"{len(payload) / 1024:.0f} KB, 写 {dump_time * 1000:.1f} ms, 读 {load_time * 1000:.1f} ms"))
+
+    _report(f"JSON编解码 ({chapters} 章, 当前实现 {json_codec.BACKEND})", rows)
+
+
+def bench_typed_loading(chapters: int = 300, chapter_length: int = 4000, rounds: int = 5):
+    """比较原始字典读取与Pydantic模型验证读取的开销"""
+    from data_manager import DataManager
+
+    rng = random.Random(13)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        dm = DataManager(workdir)
+        dm.write_novel_chapters({
+            f"chapter_{i}": {"title": f"第{i}章", "content": text, "word_count": len(text)}
+            for i, text in ((i, _synthetic_text(rng, chapter_length)) for i in range(1, chapters + 1))
+        })
+        dm.write_chapter_summaries({
+            f"chapter_{i}": {"title": f"第{i}章", "summary": _synthetic_text(rng, 300)}
+            for i in range(1, chapters + 1)
+        })
+        dm.write_characters({f"角色{i}": {"description": _synthetic_text(rng, 200)} for i in range(50)})
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            dm.read_novel_chapters()
+            dm.read_chapter_summaries()
+            dm.read_characters()
+        raw = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            dm.typed._cache.clear()
+            dm.typed._project_cache = None
+            dm.typed.project_data()
+        typed = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            dm.typed.project_data()
+        cached = (time.perf_counter() - start) / rounds
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"类型化读取 ({chapters} 章正文 + 概要 + 50 个角色)", [
+        ("原始字典读取", f"{raw * 1000:.1f} ms"),
+        ("模型验证读取 (从字节解析)", f"{typed * 1000:.1f} ms ({typed / raw:.2f}x)"),
+        ("ProjectData 快照 (文件未变化)", f"{cached * 1000:.3f} ms"),
+    ])
+
+
+def bench_revision_store(chapters: int = 20, versions: int = 20, chapter_length: int = 4000):
+    """比较增量修订历史与保存完整副本的体积，以及重建任意版本的延迟"""
+    from revision_store import RevisionStore
+
+    rng = random.Random(17)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        store = RevisionStore(workdir / "revisions.pack")
+        start = time.perf_counter()
+        for num in range(1, chapters + 1):
+            text = _synthetic_text(rng, chapter_length)
+            for _ in range(versions):
+                store.record(f"novel_text/chapter_{num}", text)
+                text = _mutate(rng, text, ratio=0.01)
+        record_time = time.perf_counter() - start
+        stats = store.stats()
+
+        reopened = RevisionStore(workdir / "revisions.pack")
+        samples = [(rng.randint(1, chapters), rng.randrange(versions)) for _ in range(50)]
+        start = time.perf_counter()
+        for num, revision in samples:
+            reopened.get(f"novel_text/chapter_{num}", revision)
+        read_time = (time.perf_counter() - start) / len(samples)
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"修订历史 ({chapters} 章 × {versions} 个版本)", [
+        ("完整副本 体积", f"{stats['full_bytes'] / 1024:.1f} KB"),
+        ("增量存储 体积", f"{stats['bytes'] / 1024:.1f} KB ({stats['bytes'] / stats['full_bytes']:.1%}, "
+                      f"关键帧 {stats['keyframes']} 个)"),
+        ("记录全部版本", f"{record_time:.3f} s"),
+        ("重建任意版本", f"{read_time * 1000:.2f} ms/次"),
+    ])
+
+
+def bench_menu_redraw(projects: int = 50, calls_per_screen: int = 20, rounds: int = 200):
+    """比较每次访问都重新解析 config.json 与按文件状态缓存时一次菜单重绘的延迟"""
+    from unittest.mock import patch
+    import json_codec
+    import project_data_manager as pdm_module
+    from project_manager import ProjectManager
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        config = {"version": "1.0", "active_project": "project_0", "projects": {}}
+        for i in range(projects):
+            name = f"project_{i}"
+            (workdir / "projects" / name).mkdir(parents=True)
+            config["projects"][name] = {
+                "name": name, "display_name": f"小说{i}", "description": "合成项目",
+                "created_at": "2024-01-01T00:00:00", "last_accessed": "2024-01-01T00:00:00"
+            }
+        json_codec.dump_file(workdir / "config.json", config, pretty=True)
+        pm = ProjectManager(base_dir=workdir)
+
+        def redraw(pdm):
+            # 与主菜单和工作台一致：显示名称、项目状态，以及界面代码中多次获取数据管理器
+            pdm.get_current_project_display_name()
+            for _ in range(calls_per_screen):
+                dm = pdm.get_data_manager()
+            dm.get_project_status_details()
+
+        def measure(pdm):
+            redraw(pdm)
+            start = time.perf_counter()
+            for _ in range(rounds):
+                redraw(pdm)
+            return (time.perf_counter() - start) / rounds
+
+        with patch.object(pdm_module, "project_manager", pm):
+            pdm = pdm_module.ProjectDataManager()
+            with patch.object(pm, "_config_signature", return_value=None):
+                uncached = measure(pdm)
+            cached = measure(pdm)
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"菜单重绘 ({projects} 个项目, 每屏 {calls_per_screen} 次 get_data_manager)", [
+        ("每次重新解析 config.json", f"{uncached * 1000:.3f} ms"),
+        ("按文件状态缓存", f"{cached * 1000:.3f} ms ({uncached / cached:.1f}x)"),
+    ])
+
+
+def bench_project_registry(projects: int = 5000, page_size: int = 20, rounds: int = 50):
+    """比较在 config.json 中保存项目列表与SQLite注册表的列表和切换项目开销"""
+    import json_codec
+    from datetime import datetime
+    from project_manager import ProjectManager
+
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        legacy = {"version": "1.0", "active_project": "project_0", "projects": {}}
+        for i in range(projects):
+            name = f"project_{i}"
+            (workdir / "projects" / name).mkdir(parents=True)
+            legacy["projects"][name] = {
+                "name": name, "display_name": f"小说{i}", "description": "合成项目",
+                "created_at": "2024-01-01T00:00:00", "last_accessed": f"2024-01-01T00:00:{i % 60:02d}"
+            }
+        legacy_file = workdir / "legacy_config.json"
+        json_codec.dump_file(legacy_file, legacy, pretty=True)
+        json_codec.dump_file(workdir / "config.json", legacy, pretty=True)
+        pm = ProjectManager(base_dir=workdir)
+
+        def legacy_list():
+            # 旧实现：解析整个配置，检查每个项目目录并排序
+            config = json_codec.load_file(legacy_file)
+            listed = [info for name, info in config["projects"].items() if pm.project_exists(name)]
+            return sorted(listed, key=lambda x: x["last_accessed"], reverse=True)[:page_size]
+
+        def legacy_switch(i):
+            # 旧实现：读取、修改并重写整个配置
+            config = json_codec.load_file(legacy_file)
+            config["active_project"] = f"project_{i}"
+            config["projects"][f"project_{i}"]["last_accessed"] = datetime.now().isoformat()
+            json_codec.dump_file(legacy_file, config, pretty=True)
+
+        def timed(func):
+            start = time.perf_counter()
+            for i in range(rounds):
+                func(i)
+            return (time.perf_counter() - start) / rounds
+
+        legacy_list_time = timed(lambda i: legacy_list())
+        page_time = timed(lambda i: (pm.count_projects(), pm.list_projects_page(page_size * i, page_size)))
+        legacy_switch_time = timed(legacy_switch)
+        switch_time = timed(lambda i: pm.set_active_project(f"project_{i}"))
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"项目注册表 ({projects} 个项目, 每页 {page_size} 个)", [
+        ("config.json 列出一页", f"{legacy_list_time * 1000:.2f} ms"),
+        ("注册表分页查询", f"{page_time * 1000:.2f} ms ({legacy_list_time / page_time:.1f}x)"),
+        ("config.json 切换项目", f"{legacy_switch_time * 1000:.2f} ms"),
+        ("注册表切换项目", f"{switch_time * 1000:.2f} ms ({legacy_switch_time / switch_time:.1f}x)"),
+    ])
+
+
+def bench_search_index(projects: int = 20, chapters: int = 30, chapter_chars: int = 3000, rounds: int = 20):
+    """比较逐个读取项目文件查找与倒排索引搜索的开销，以及修改一章后的增量更新"""
+    import json_codec
+    from data_manager import DataManager
+    from search_index import SearchIndex
+
+    rng = random.Random(19)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        index = SearchIndex(workdir / "search.db")
+        paths = []
+        for p in range(projects):
+            project_path = workdir / f"project_{p}"
+            dm = DataManager(project_path)
+            novel = {"chapters": {
+                f"ch_{c}": {"title": f"第{c + 1}章", "content": _synthetic_text(rng, chapter_chars), "word_count": chapter_chars}
+                for c in range(chapters)
+            }}
+            dm.write_json_file(dm.file_paths["novel_text"], novel)
+            paths.append(dm.file_paths["novel_text"])
+
+        start = time.perf_counter()
+        for p, path in enumerate(paths):
+            index.refresh_project(f"project_{p}", path.parent.parent)
+        build_time = time.perf_counter() - start
+
+        # 从正文中截取的四字查询，保证有结果
+        contents = [chapter["content"] for chapter in novel["chapters"].values()]
+        queries = []
+        for _ in range(rounds):
+            content = rng.choice(contents)
+            offset = rng.randrange(len(content) - 4)
+            queries.append(content[offset:offset + 4])
+
+        def scan(query):
+            # 无索引：读取每个项目的正文并逐章查找
+            return [
+                key for path in paths
+                for key, chapter in json_codec.load_file(path)["chapters"].items()
+                if query in chapter["content"]
+            ]
+
+        start = time.perf_counter()
+        for query in queries:
+            scan(query)
+        scan_time = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        search_time = (time.perf_counter() - start) / rounds
+
+        novel["chapters"]["ch_0"]["content"] = _mutate(rng, novel["chapters"]["ch_0"]["content"])
+        start = time.perf_counter()
+        index.update_source(f"project_{projects - 1}", "novel_text", novel)
+        update_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"全文搜索 ({projects} 个项目 × {chapters} 章 × {chapter_chars} 字)", [
+        ("建立索引", f"{build_time:.2f} s"),
+        ("逐个文件查找", f"{scan_time * 1000:.2f} ms"),
+        ("倒排索引搜索", f"{search_time * 1000:.2f} ms ({scan_time / search_time:.1f}x)"),
+        ("修改一章后增量更新", f"{update_time * 1000:.2f} ms"),
+    ])
+
+
+
+def bench_legacy_migration(directories: int = 8, files: int = 100, file_chars: int = 20000):
+    """比较逐个复制旧版数据文件与并行校验迁移的吞吐量"""
+    from migrate_to_multi_project import MigrationEngine
+    from project_manager import ProjectManager
+
+    rng = random.Random(23)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        roots = []
+        for d in range(directories):
+            meta = workdir / f"legacy_{d}" / "meta"
+            meta.mkdir(parents=True)
+            for f in range(files):
+                (meta / f"file_{f}.json").write_text(_synthetic_text(rng, file_chars), encoding='utf-8')
+            roots.append(meta.parent)
+        total_mb = sum(p.stat().st_size for root in roots for p in (root / "meta").iterdir()) / (1024 * 1024)
+
+        # 旧实现：逐个目录逐个文件复制，不校验
+        start = time.perf_counter()
+        for d, root in enumerate(roots):
+            target = workdir / "sequential" / str(d)
+            target.mkdir(parents=True)
+            for item in (root / "meta").iterdir():
+                shutil.copy2(item, target / item.name)
+        sequential = time.perf_counter() - start
+
+        engine = MigrationEngine(ProjectManager(base_dir=workdir / "app"))
+        report = engine.migrate([(root, f"迁移{d}") for d, root in enumerate(roots)])
+        resumed = engine.migrate([(root, f"迁移{d}") for d, root in enumerate(roots)])
+    finally:
+        shutil.rmtree(workdir)
+
+    _report(f"旧数据迁移 ({directories} 个目录 × {files} 个文件, 共 {total_mb:.1f} MB)", [
+        ("逐个复制（不校验）", f"{sequential:.2f} s ({total_mb / sequential:.1f} MB/s)"),
+        (f"并行复制并校验 ({report.workers} 线程)", f"{report.elapsed:.2f} s ({report.throughput()[0]:.1f} MB/s)"),
+        ("再次运行（已完成）", f"{resumed.elapsed * 1000:.1f} ms"),
+    ])
+
+BENCHMARKS = {
+    "drafts": bench_draft_archive,
+    "chapters": bench_chapter_view,
+    "codec": bench_json_codec,
+    "typed": bench_typed_loading,
+    "revisions": bench_revision_store,
+    "menu": bench_menu_redraw,
+    "registry": bench_project_registry,
+    "search": bench_search_index,
+    "migration": bench_legacy_migration,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"未知的基准测试: {name}，可选: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+章节标识 - 分章细纲中每章的稳定ID
+
+章节概要、正文、草稿和生成历史都以章节ID为键，章节的先后顺序只由细纲中的
+列表顺序决定。插入、删除或调整章节顺序时只需改写细纲，其他文件不受影响。
+
+旧项目按位置命名的键 ``chapter_N`` 直接作为对应章节的ID沿用，无需改写已有数据；
+之后插入的章节使用随机生成的新ID，不会与任何位置编号混淆。
+"""
+
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+LEGACY_PREFIX = "chapter_"
+ID_PREFIX = "ch_"
+
+
+def legacy_chapter_id(order: int) -> str:
+    """按位置命名的旧键"""
+    return f"{LEGACY_PREFIX}{order}"
+
+
+def legacy_chapter_number(chapter_id: str) -> Optional[int]:
+    """chapter_N -> N，其他ID返回None"""
+    prefix, _, number = chapter_id.partition("_")
+    return int(number) if prefix + "_" == LEGACY_PREFIX and number.isdigit() else None
+
+
+def new_chapter_id(existing: Iterable[str] = ()) -> str:
+    """生成不与existing重复的新ID"""
+    existing = set(existing)
+    while True:
+        chapter_id = f"{ID_PREFIX}{uuid.uuid4().hex[:8]}"
+        if chapter_id not in existing:
+            return chapter_id
+
+
+def assign_chapter_ids(chapters: List[Dict]) -> List[Dict]:
+    """
+    为缺少ID的章节分配ID，并按列表顺序重新编号order（原地修改）
+
+    缺少ID的章节优先沿用其序号对应的旧键 chapter_N（与旧版本中概要和正文的键一致），
+    该键已被其他章节使用时生成新ID。
+    """
+    used = {ch["id"] for ch in chapters if isinstance(ch, dict) and ch.get("id")}
+    for i, chapter in enumerate(chapters, 1):
+        if not isinstance(chapter, dict):
+            continue
+        if not chapter.get("id"):
+            legacy_id = legacy_chapter_id(chapter.get("chapter_number") or chapter.get("order") or i)
+            chapter["id"] = legacy_id if legacy_id not in used else new_chapter_id(used)
+            used.add(chapter["id"])
+        chapter["order"] = i
+        chapter.pop("chapter_number", None)
+    return chapters
@@ -0,0 +1,147 @@
+"""
+章节偏移索引 - 按需读取单个章节，无需解析整本小说
+
+novel_text.json 由 DataManager 通过 json_codec 以固定格式（紧凑或两空格缩进）写出，
+因此可以在写入后计算每个章节对象在文件中的字节偏移和长度，保存到 novel_text.idx。
+读取单章时只需 seek 到对应位置读取该章节的JSON片段。索引记录了正文文件的大小和
+修改时间，文件被外部修改后索引自动失效，调用方回退到完整解析。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+import json_codec
+
+
+def _layout(pretty: bool):
+    """返回 {"chapters": {...}} 的外层结构：(开头, 分隔符, 结尾, 键值分隔, 章节缩进)"""
+    if not pretty:
+        return b'{"chapters":{', b',', b'}}', b':', b''
+    indent = b' ' * json_codec.PRETTY_INDENT
+    return b'{\n' + indent + b'"chapters": {\n', b',\n', b'\n' + indent + b'}\n}', b': ', indent * 2
+
+
+def compute_chapter_offsets(data, pretty: bool = False) -> Optional[Dict[str, list]]:
+    """
+    计算 {"chapters": {...}} 经 json_codec.dumps 写出时各章节对象的字节偏移
+
+    Returns:
+        {chapter_key: [offset, length]}，以及键 "__size__" 表示整个文件的字节数；
+        数据结构不是纯 {"chapters": {...}} 时返回None
+    """
+    if not isinstance(data, dict) or list(data.keys()) != ["chapters"]:
+        return None
+    chapters = data["chapters"]
+    if not isinstance(chapters, dict):
+        return None
+    if not chapters:
+        return {"__size__": [0, len(json_codec.dumps(data, pretty))]}
+
+    prefix, separator, suffix, colon, entry_indent = _layout(pretty)
+    offsets = {}
+    position = len(prefix)
+    for i, (key, value) in enumerate(chapters.items()):
+        if i:
+            position += len(separator)
+        position += len(entry_indent + json_codec.dumps(key) + colon)
+        body = json_codec.dumps(value, pretty)
+        if entry_indent:
+            body = body.replace(b'\n', b'\n' + entry_indent)
+        offsets[key] = [position, len(body)]
+        position += len(body)
+    position += len(suffix)
+    offsets["__size__"] = [0, position]
+    return offsets
+
+
+class ChapterIndex:
+    """小说正文的章节偏移索引"""
+
+    def __init__(self, text_path: Path, index_path: Path):
+        self.text_path = Path(text_path)
+        self.index_path = Path(index_path)
+        self._index = None
+
+    def rebuild(self, data, pretty: bool = False) -> bool:
+        """正文写入后重建索引；计算出的文件大小与实际不符时删除索引"""
+        offsets = compute_chapter_offsets(data, pretty)
+        try:
+            stat = self.text_path.stat()
+        except OSError:
+            offsets = None
+        if offsets is None or offsets.pop("__size__")[1] != stat.st_size:
+            self.invalidate()
+            return False
+
+        chapters = data["chapters"]
+        entries = {}
+        for key, (offset, length) in offsets.items():
+            chapter = chapters[key] if isinstance(chapters[key], dict) else {}
+            entries[key] = {
+                "offset": offset,
+                "length": length,
+                "title": chapter.get("title", ""),
+                "word_count": chapter.get("word_count", 0)
+            }
+        self._index = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "chapters": entries}
+        tmp_path = self.index_path.with_suffix(".idx.tmp")
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        return True
+
+    def invalidate(self):
+        """删除索引"""
+        self._index = None
+        self.index_path.unlink(missing_ok=True)
+
+    def _valid_index(self) -> Optional[Dict]:
+        """返回与当前正文文件匹配的索引，不匹配时返回None"""
+        if self._index is None:
+            if not self.index_path.exists():
+                return None
+            try:
+                with self.index_path.open('r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return None
+        try:
+            stat = self.text_path.stat()
+        except OSError:
+            return None
+        if stat.st_mtime_ns != self._index.get("mtime_ns") or stat.st_size != self._index.get("size"):
+            self._index = None
+            return None
+        return self._index
+
+    def is_valid(self) -> bool:
+        """索引是否可用"""
+        return self._valid_index() is not None
+
+    def list_chapters(self) -> Optional[Dict[str, Dict]]:
+        """列出章节元数据（标题、字数），不读取正文；索引不可用时返回None"""
+        index = self._valid_index()
+        if index is None:
+            return None
+        return {
+            key: {"title": entry.get("title", ""), "word_count": entry.get("word_count", 0)}
+            for key, entry in index["chapters"].items()
+        }
+
+    def read_chapter(self, chapter_key: str):
+        """
+        读取单个章节
+
+        Returns:
+            章节字典；章节不存在时返回空字典；索引不可用时返回None
+        """
+        index = self._valid_index()
+        if index is None:
+            return None
+        entry = index["chapters"].get(chapter_key)
+        if entry is None:
+            return {}
+        with self.text_path.open('rb') as f:
+            f.seek(entry["offset"])
+            return json_codec.loads(f.read(entry["length"]))
@@ -229,7 +229,12 @@ FILE_PATHS = {
     "critiques": META_DIR / "critiques.json",
     "refinement_history": META_DIR / "refinement_history.json",
     "initial_drafts": META_DIR / "initial_drafts.json",
-    "refined_drafts": META_DIR / "refined_drafts.json"
+    "refined_drafts": META_DIR / "refined_drafts.json",
+    "draft_dictionary": META_DIR / "drafts.zdict",
+    "manifest": META_DIR / "manifest.json",
+    "novel_index": META_DIR / "novel_text.idx",
+    "schema": META_DIR / "schema.json",
+    "revisions": META_DIR / "revisions.pack"
 }
 
 def get_project_paths(project_path: Optional[Path] = None) -> Dict[str, Path]:
@@ -266,7 +271,12 @@ def get_project_paths(project_path: Optional[Path] = None) -> Dict[str, Path]:
         "critiques": meta_dir / "critiques.json",
         "refinement_history": meta_dir / "refinement_history.json",
         "initial_drafts": meta_dir / "initial_drafts.json",
-        "refined_drafts": meta_dir / "refined_drafts.json"
+        "refined_drafts": meta_dir / "refined_drafts.json",
+        "draft_dictionary": meta_dir / "drafts.zdict",
+        "manifest": meta_dir / "manifest.json",
+        "novel_index": meta_dir / "novel_text.idx",
+        "schema": meta_dir / "schema.json",
+        "revisions": meta_dir / "revisions.pack"
     }
 
 # --- 生成内容配置 ---
@@ -284,7 +294,98 @@ GENERATION_CONFIG = {
     "show_critique_to_user": bool(os.getenv("SHOW_CRITIQUE_TO_USER", "true").lower() == "true"),
     "refinement_mode": os.getenv("REFINEMENT_MODE", "auto"),  # auto, manual, disabled
     "save_intermediate_data": bool(os.getenv("SAVE_INTERMEDIATE_DATA", "true").lower() == "true"),
-    "save_initial_drafts": bool(os.getenv("SAVE_INITIAL_DRAFTS", "false").lower() == "true")
+    "save_initial_drafts": bool(os.getenv("SAVE_INITIAL_DRAFTS", "false").lower() == "true"),
+    "compress_draft_archives": bool(os.getenv("COMPRESS_DRAFT_ARCHIVES", "true").lower() == "true")
+}
+
+# --- 生成历史保留策略 ---
+# critiques / refinement_history / initial_drafts / refined_drafts 的清理规则：
+# 满足任一条件的记录会被保留；当前正文所对应的版本始终保留
+RETENTION_CONFIG = {
+    "keep_last": int(os.getenv("HISTORY_KEEP_LAST", "5")),     # 每章保留最近N条，0表示不按数量保留
+    "keep_days": int(os.getenv("HISTORY_KEEP_DAYS", "30")),    # 保留最近X天内的记录，0表示不按时间保留
+}
+
+# --- 修订历史 ---
+# 章节正文和大纲的每次修改以增量形式保存，可查看或恢复任意历史版本
+REVISION_CONFIG = {
+    "enabled": bool(os.getenv("ENABLE_REVISION_HISTORY", "true").lower() == "true"),
+    "keyframe_interval": int(os.getenv("REVISION_KEYFRAME_INTERVAL", "10")),  # 每隔N个版本保存一次完整文本
+}
+
+# --- 项目快照 ---
+# 批量生成、删除、清理等破坏性操作前自动把 meta/ 增量备份到 meta_backup/
+SNAPSHOT_CONFIG = {
+    "auto_snapshot": bool(os.getenv("AUTO_SNAPSHOT", "true").lower() == "true"),
+    "keep": int(os.getenv("SNAPSHOT_KEEP", "20")),    # 保留最近N个快照，0表示不清理
+}
+
+# --- 项目存储配额 ---
+# 按分类增量统计每个项目 meta/ 和 meta_backup/ 的占用。超过软配额时在后台按保留策略清理生成历史，
+# 超过硬配额时不再保存新的草稿；0表示不限制
+QUOTA_CONFIG = {
+    "soft_mb": float(os.getenv("PROJECT_SOFT_QUOTA_MB", "0")),
+    "hard_mb": float(os.getenv("PROJECT_HARD_QUOTA_MB", "0")),
+}
+
+# --- JSON存储格式 ---
+# 以下文件体积大且由程序生成，写出为紧凑格式；其余文件保留缩进便于人工查看。
+# 编解码实现由 json_codec 自动选择（orjson > msgspec > json），可用 JSON_CODEC 环境变量指定
+STORAGE_CONFIG = {
+    "compact_json": bool(os.getenv("COMPACT_JSON", "true").lower() == "true"),
+    "compact_files": [
+        "novel_text", "chapter_summary", "critiques", "refinement_history",
+        "initial_drafts", "refined_drafts"
+    ],
+}
+
+# --- 跨进程文件锁 ---
+# 多个进程共用同一项目目录时，写入 meta/*.json 和全局 config.json 前先获取文件锁
+LOCK_CONFIG = {
+    "timeout": float(os.getenv("FILE_LOCK_TIMEOUT", "10")),          # 等待锁的最长时间（秒）
+    "stale_after": float(os.getenv("FILE_LOCK_STALE_AFTER", "300")),  # 无fcntl时锁文件超过该时间视为失效（秒）
+}
+
+# --- 文件变更监视 ---
+# 在后台轮询当前项目的 meta/ 和各层提示词文件，被其他进程或编辑器修改时丢弃相关缓存并重新加载提示词
+WATCH_CONFIG = {
+    "enabled": bool(os.getenv("ENABLE_FILE_WATCHER", "true").lower() == "true"),
+    "interval": float(os.getenv("FILE_WATCH_INTERVAL", "1.0")),        # 轮询间隔（秒）
+    "status_cache_ttl": float(os.getenv("WATCHED_STATUS_CACHE_TTL", "60")),  # 监视期间项目状态缓存的有效期（秒）
+}
+
+# --- 数据管理器缓存池 ---
+# 最近使用的几个项目的数据管理器（及其缓存）保留在内存中，切换回来时只检查 meta/ 中的文件是否变化
+POOL_CONFIG = {
+    "size": int(os.getenv("DATA_MANAGER_POOL_SIZE", "4")),  # 最多保留的项目数
+}
+
+# --- 异步持久化 ---
+# 异步生成时草稿、批评等记录经有界队列交给写入线程保存，队列满时生成任务等待
+PERSISTENCE_CONFIG = {
+    "queue_size": int(os.getenv("PERSIST_QUEUE_SIZE", "64")),  # 队列中最多等待的写入数
+}
+
+# --- 项目注册表 ---
+# 项目元数据保存在应用数据目录下的SQLite注册表中，项目列表按页显示
+REGISTRY_CONFIG = {
+    "filename": "projects.db",
+    "page_size": int(os.getenv("PROJECT_PAGE_SIZE", "20")),  # 项目列表每页显示的项目数
+}
+
+# --- 全文搜索 ---
+# 所有项目的正文、概要、大纲和设定保存在应用数据目录下的倒排索引中，写入数据时同步更新
+SEARCH_CONFIG = {
+    "filename": "search.db",
+    "max_results": int(os.getenv("SEARCH_MAX_RESULTS", "20")),    # 每次搜索最多显示的结果数
+    "snippet_chars": int(os.getenv("SEARCH_SNIPPET_CHARS", "60")),  # 结果片段的长度（字符）
+}
+
+# --- 多项目批量生成 ---
+# 所有项目共用同一个并发上限和请求速率，各项目轮流发出请求
+BATCH_CONFIG = {
+    "max_concurrency": int(os.getenv("BATCH_MAX_CONCURRENCY", "4")),             # 同时进行的生成请求数
+    "requests_per_minute": float(os.getenv("BATCH_REQUESTS_PER_MINUTE", "30")),  # 每分钟最多发出的请求数（0表示不限制）
 }
 
 # --- 智能重试机制配置 ---
@@ -1,13 +1,110 @@
+import asyncio
+import functools
 import json
+import os
+import sqlite3
+import threading
 from pathlib import Path
-from config import FILE_PATHS, ensure_directories, get_project_paths
+from config import (
+    FILE_PATHS, GENERATION_CONFIG, REVISION_CONFIG, SNAPSHOT_CONFIG, STORAGE_CONFIG,
+    ensure_directories, get_project_paths
+)
+from disk_usage import LEDGER_NAME, DiskUsage, QuotaExceeded, format_size, quota_limits
+from draft_archive import DraftArchive
+from chapter_index import ChapterIndex
+from chapter_ids import assign_chapter_ids, legacy_chapter_id, legacy_chapter_number, new_chapter_id
+from file_lock import FileLock, FileLockTimeout
+from revision_store import RevisionStore
+from snapshot_manager import SnapshotManager
+import json_codec
+from schema_migrations import current_version, migration_keys, pending_migrations
 from datetime import datetime
 from typing import Optional, Dict
+from contextlib import contextmanager
 import time
 
+
+class Transaction:
+    """DataManager的工作单元，暂存写入并在提交时一次性落盘"""
+    
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        # file_path -> (data, 序列化后的字节串)
+        self.staged = {}
+        # file_path -> 本事务中修改过的章节键（None表示未知，提交后记录全部章节）
+        self.changed = {}
+    
+    def stage(self, file_path, data, changed_chapters=None):
+        """暂存一次写入（立即序列化，之后修改data不会影响暂存内容）"""
+        try:
+            self.staged[file_path] = (data, self.data_manager._dumps(file_path, data))
+        except (TypeError, ValueError):
+            return False
+        previous = self.changed.get(file_path, set())
+        if changed_chapters is None or previous is None:
+            self.changed[file_path] = None
+        else:
+            self.changed[file_path] = previous | set(changed_chapters)
+        return True
+    
+    def commit(self):
+        """
+        提交所有暂存写入
+        
+        先把所有新内容写入临时文件并刷盘，再写入事务日志，最后逐个原子替换。
+        替换过程中崩溃时，下次创建DataManager会根据日志完成剩余替换。
+        """
+        if not self.staged:
+            return
+        dm = self.data_manager
+        pending = []
+        for file_path, (_, payload) in self.staged.items():
+            tmp_path = file_path.with_suffix(file_path.suffix + ".txn")
+            dm._write_bytes_durable(tmp_path, payload)
+            pending.append((str(tmp_path), str(file_path)))
+        
+        journal_path = dm._journal_path
+        journal_tmp = journal_path.with_suffix(".tmp")
+        dm._write_bytes_durable(journal_tmp, json_codec.dumps(pending))
+        os.replace(journal_tmp, journal_path)
+        
+        for tmp_name, target_name in pending:
+            os.replace(tmp_name, target_name)
+        journal_path.unlink(missing_ok=True)
+        
+        for file_path, (data, _) in self.staged.items():
+            dm._after_write(file_path, data, self.changed.get(file_path))
+        self.staged = {}
+        self.changed = {}
+
+
+def _locked(method):
+    """在写入锁内执行读改写；等待跨进程锁超时时返回False"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            with self._write_lock:
+                return method(self, *args, **kwargs)
+        except FileLockTimeout:
+            return False
+    return wrapper
+
+
 class DataManager:
     """数据管理类，封装所有文件读写操作"""
     
+    # 记录修订历史的文件
+    REVISION_SOURCES = ("novel_text", "story_outline", "chapter_outline")
+    
+    # 状态清单跟踪的文件
+    MANIFEST_KEYS = (
+        "theme_one_line", "theme_paragraph", "characters", "locations", "items",
+        "story_outline", "chapter_outline", "chapter_summary", "novel_text"
+    )
+    
+    # 随数据文件写入而更新的派生文件
+    DERIVED_KEYS = ("manifest", "novel_index", "schema")
+    
     def __init__(self, project_path: Optional[Path] = None):
         """
         初始化数据管理器
@@ -23,6 +120,61 @@ class DataManager:
         self._status_cache = None
         self._status_cache_time = None
         self._cache_ttl = 2  # 缓存2秒
+        
+        # 草稿归档实例（按需创建）
+        self._draft_archives = {}
+        # 写入锁：事务、生成历史追加与后台压缩互斥；同时是跨进程文件锁，
+        # 多个进程写同一项目时串行化读改写
+        self._write_lock = FileLock(self.file_paths["meta_dir"] / ".lock")
+        # 当前线程的事务（事务中的写入只对本线程可见）
+        self._local = threading.local()
+        
+        # 上下文缓存及各文件在本进程内的写入次数
+        self._write_versions = {}
+        self._context_cache = None
+        self._context_lock = threading.Lock()
+        
+        # 项目状态清单（由每次写入增量维护）
+        self._manifest = None
+        self._manifest_keys = {self.file_paths[key]: key for key in self.MANIFEST_KEYS}
+        
+        # 小说正文的章节偏移索引
+        self._chapter_index = ChapterIndex(self.file_paths["novel_text"], self.file_paths["novel_index"])
+        
+        # 类型化只读视图（首次访问dm.typed时创建）
+        self._typed = None
+        
+        # 正文和大纲的修订历史（按需创建）
+        self._revision_store = None
+        self._revision_sources = {self.file_paths[key]: key for key in self.REVISION_SOURCES}
+        
+        # 数据格式版本（meta/schema.json，首次使用时加载）及需要懒迁移的文件
+        self._schema = None
+        self._migration_keys = {self.file_paths[key]: key for key in migration_keys()}
+        
+        # 细纲中的章节顺序：(细纲文件版本, 按顺序排列的章节ID, ID -> 章节号)
+        self._chapter_order = None
+        
+        # 本进程最近写入的文件的 (修改时间, 大小)，用于区分自身写入和外部修改
+        self._own_signatures = {}
+        
+        # 跨项目全文搜索索引（由项目管理器挂接，单项目模式下为None）
+        self._search_index = None
+        self._search_project = None
+        
+        # 磁盘占用记录（按需加载）；超过软配额后是否已触发过后台清理
+        self._disk_usage = None
+        self._soft_quota_triggered = False
+        
+        # 完成上次中断的事务提交（持有写入锁，不会干扰其他进程正在进行的提交）
+        meta_dir = self.file_paths["meta_dir"]
+        if self._journal_path.exists() or any(meta_dir.glob("*.txn")):
+            try:
+                with self._write_lock:
+                    self._recover_transaction()
+            except FileLockTimeout:
+                # 其他进程正持有锁，日志留给之后打开项目的实例处理
+                pass
     
     def _clear_status_cache(self):
         """清除状态缓存"""
@@ -34,29 +186,623 @@ class DataManager:
         return self.file_paths.get(key)
     
     def read_json_file(self, file_path):
-        """读取JSON文件"""
+        """读取JSON文件（事务中优先返回本事务暂存的数据）"""
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is not None and file_path in transaction.staged:
+            return json_codec.loads(transaction.staged[file_path][1])
+        migrated = self._ensure_migrated(file_path)
+        if migrated is not None:
+            return migrated
         try:
             if file_path.exists():
-                with file_path.open('r', encoding='utf-8') as f:
-                    return json.load(f)
+                return json_codec.load_file(file_path)
             return {}
-        except (json.JSONDecodeError, IOError) as e:
+        except (ValueError, IOError) as e:
             # 静默处理文件读取错误，避免在启动时显示错误信息
             return {}
     
-    def write_json_file(self, file_path, data):
-        """写入JSON文件"""
+    def is_staged(self, file_path):
+        """当前线程的事务中是否暂存了该文件"""
+        transaction = getattr(self._local, "transaction", None)
+        return transaction is not None and file_path in transaction.staged
+    
+    def read_file_bytes(self, file_path):
+        """读取文件的原始字节（事务中返回暂存内容），文件不存在时返回None"""
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is not None and file_path in transaction.staged:
+            return transaction.staged[file_path][1]
+        migrated = self._ensure_migrated(file_path)
+        if migrated is not None:
+            return self._dumps(file_path, migrated)
+        try:
+            return file_path.read_bytes()
+        except OSError:
+            return None
+    
+    @property
+    def typed(self):
+        """类型化只读视图（返回models.py中的Pydantic模型），首次访问时创建"""
+        if self._typed is None:
+            from typed_data import TypedDataView
+            self._typed = TypedDataView(self)
+        return self._typed
+    
+    def _is_pretty(self, file_path):
+        """按STORAGE_CONFIG决定文件以缩进格式还是紧凑格式写出"""
+        if not STORAGE_CONFIG.get("compact_json", True):
+            return True
+        return not any(
+            self.file_paths.get(key) == file_path for key in STORAGE_CONFIG.get("compact_files", [])
+        )
+    
+    def _dumps(self, file_path, data):
+        return json_codec.dumps(data, pretty=self._is_pretty(file_path))
+    
+    @staticmethod
+    def _write_bytes_durable(file_path, payload):
+        """写入文件并刷新到磁盘"""
+        with file_path.open('wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _after_write(self, file_path, data, changed_chapters=None):
+        """
+        文件落盘后更新写入版本、状态清单并清除缓存
+        
+        Args:
+            changed_chapters: 正文中修改过的章节键，只为这些章节记录修订；None时检查全部章节
+        """
+        self._write_versions[file_path] = self._write_versions.get(file_path, 0) + 1
+        self._update_manifest(file_path, data)
+        if file_path == self.file_paths["novel_text"]:
+            self._chapter_index.rebuild(data, self._is_pretty(file_path))
+            self._remember_signature(self.file_paths["novel_index"])
+        if file_path in self._migration_keys:
+            # 通过DataManager写入的数据已是最新格式
+            self._set_schema_version(self._migration_keys[file_path], current_version())
+        if file_path in self._revision_sources and REVISION_CONFIG.get("enabled", True):
+            self._record_revisions(self._revision_sources[file_path], data, changed_chapters)
+        self._remember_signature(file_path)
+        # 状态清单、章节索引和版本记录随写入一起更新
+        self._account_usage([file_path] + [self.file_paths[key] for key in self.DERIVED_KEYS])
+        self._update_search_index(file_path, data)
+        self._clear_status_cache()
+    
+    def _write_now(self, file_path, data, changed_chapters=None):
+        """立即原子写入（不经过事务暂存）"""
+        payload = self._dumps(file_path, data)
+        with self._write_lock:
+            tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+            self._write_bytes_durable(tmp_path, payload)
+            os.replace(tmp_path, file_path)
+            self._after_write(file_path, data, changed_chapters)
+    
+    def write_json_file(self, file_path, data, changed_chapters=None):
+        """
+        写入JSON文件（先写临时文件再原子替换；事务中只暂存到内存）
+        
+        Args:
+            changed_chapters: 写入正文时修改过的章节键，None表示未知（记录修订时检查全部章节）
+        """
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is not None:
+            return transaction.stage(file_path, data, changed_chapters)
+        
         try:
-            with file_path.open('w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            # 清除缓存，因为数据可能已更改
-            self._clear_status_cache()
+            self._write_now(file_path, data, changed_chapters)
             return True
-        except IOError as e:
+        except (IOError, TypeError, ValueError) as e:
             # 静默处理文件写入错误，避免在启动时显示错误信息
             return False
     
+    # ===== 修订历史 =====
+    def get_revision_store(self) -> RevisionStore:
+        """获取修订历史存储"""
+        if self._revision_store is None:
+            self._revision_store = RevisionStore(
+                self.file_paths["revisions"], REVISION_CONFIG.get("keyframe_interval", 10)
+            )
+        return self._revision_store
+    
+    def chapter_revision_key(self, chapter_num):
+        """章节正文在修订历史中的文档名"""
+        return f"novel_text/{self.chapter_key(chapter_num)}"
+    
+    def _record_revisions(self, key, data, changed_chapters=None):
+        """
+        写入正文或大纲后记录发生变化的文档版本（未变化的文档按校验和跳过）
+        
+        正文只检查changed_chapters中的章节；为None时（整体写入）检查全部章节。
+        """
+        if not isinstance(data, dict):
+            return
+        store = self.get_revision_store()
+        try:
+            if key == "novel_text":
+                chapters = data.get("chapters", {})
+                if changed_chapters is not None:
+                    chapters = {k: chapters[k] for k in changed_chapters if k in chapters}
+                for chapter_key, chapter in chapters.items():
+                    content = chapter.get("content") if isinstance(chapter, dict) else None
+                    if content and isinstance(content, str):
+                        store.record(f"novel_text/{chapter_key}", content, {"title": chapter.get("title", "")})
+            elif key == "story_outline":
+                if data.get("outline") and isinstance(data["outline"], str):
+                    store.record("story_outline", data["outline"])
+            elif key == "chapter_outline":
+                if data.get("chapters"):
+                    store.record("chapter_outline", json_codec.dumps(data["chapters"], pretty=True).decode('utf-8'))
+        except (OSError, TypeError, ValueError):
+            # 修订历史是附加功能，记录失败不影响已完成的写入
+            pass
+        self._remember_signature(store.data_path)
+        self._remember_signature(store.index_path)
+        self._account_usage([store.data_path, store.index_path])
+    
+    def list_revisions(self, document):
+        """列出文档的历史版本"""
+        return self.get_revision_store().list_revisions(document)
+    
+    def read_revision(self, document, revision=-1):
+        """读取文档的指定版本；分章细纲返回章节列表"""
+        text = self.get_revision_store().get(document, revision)
+        if text is not None and document == "chapter_outline":
+            return json_codec.loads(text)
+        return text
+    
+    # ===== 快照 =====
+    def get_snapshot_manager(self) -> SnapshotManager:
+        """获取快照管理器"""
+        return SnapshotManager(self.file_paths["meta_dir"], self.file_paths["backup_dir"])
+    
+    def create_snapshot(self, reason="", prune=True):
+        """把meta/的当前状态备份到meta_backup/（创建、清理和回收对象都持有写入锁，保证快照内容一致）"""
+        manager = self.get_snapshot_manager()
+        with self._write_lock:
+            snapshot = manager.create(reason)
+            usage = self.get_disk_usage()
+            usage.add_backups(snapshot.get("new_bytes", 0))
+            if prune and manager.prune(SNAPSHOT_CONFIG.get("keep", 20)):
+                usage.set_backups(manager.stats()["stored_bytes"])
+        return snapshot
+    
+    def auto_snapshot(self, reason):
+        """破坏性操作前的自动快照；未启用或备份失败时返回None"""
+        if not SNAPSHOT_CONFIG.get("auto_snapshot", True):
+            return None
+        try:
+            return self.create_snapshot(reason)
+        except OSError:
+            return None
+    
+    def list_snapshots(self):
+        """列出快照（最新在前）"""
+        return self.get_snapshot_manager().list_snapshots()
+    
+    def restore_snapshot(self, snapshot_id):
+        """
+        一步恢复到指定快照
+        
+        恢复前先为当前状态创建快照，恢复操作本身也可以撤销。
+        """
+        manager = self.get_snapshot_manager()
+        with self._write_lock:
+            if manager.get_snapshot(snapshot_id) is None:
+                return False
+            manager.create(f"恢复快照 {snapshot_id} 前自动备份")
+            manager.restore(snapshot_id)
+            self._reload_after_restore()
+            # meta/ 被整体替换，重新统计占用
+            self.get_disk_usage().rebuild()
+        return True
+    
+    # ===== 全文搜索 =====
+    def attach_search_index(self, index, project_name):
+        """写入正文、概要、大纲和设定后同步更新全文搜索索引"""
+        self._search_index = index
+        self._search_project = project_name
+    
+    def _update_search_index(self, file_path, data):
+        """增量更新刚写入文件的索引；索引失败不影响写入"""
+        if self._search_index is None or file_path not in self._manifest_keys:
+            return
+        try:
+            self._search_index.update_source(
+                self._search_project, self._manifest_keys[file_path], data,
+                self._own_signatures.get(file_path)
+            )
+        except sqlite3.Error:
+            # 签名未记录，下次打开搜索时会按文件重新索引
+            pass
+    
+    # ===== 磁盘占用与配额 =====
+    def get_disk_usage(self) -> DiskUsage:
+        """获取项目的磁盘占用记录"""
+        if self._disk_usage is None:
+            self._disk_usage = DiskUsage(
+                self.file_paths["meta_dir"], self.file_paths["backup_dir"], self._write_lock
+            )
+        return self._disk_usage
+    
+    def _account_usage(self, paths):
+        """文件写入后更新占用记录；统计失败不影响写入"""
+        try:
+            self.get_disk_usage().update(paths)
+        except OSError:
+            pass
+    
+    def _check_quota_before_draft(self):
+        """超过硬配额时拒绝保存新的草稿"""
+        hard = quota_limits()["hard"]
+        if hard:
+            usage = self.get_disk_usage()
+            usage.refresh()
+            total = usage.total()
+            if total >= hard:
+                raise QuotaExceeded(
+                    f"项目占用 {format_size(total)} 已超过硬配额 {format_size(hard)}，未保存新的草稿"
+                )
+    
+    def _check_soft_quota(self):
+        """
+        超过软配额时在后台按保留策略清理一次生成历史
+        
+        回落到软配额以下之后才会再次触发。
+        """
+        soft = quota_limits()["soft"]
+        if not soft:
+            return
+        if self.get_disk_usage().total() < soft:
+            self._soft_quota_triggered = False
+            return
+        if self._soft_quota_triggered:
+            return
+        from history_compactor import HistoryCompactor
+        compactor = HistoryCompactor(self)
+        if compactor.policy.is_active:
+            self._soft_quota_triggered = True
+            compactor.start_background()
+    
+    # ===== 外部修改 =====
+    def _remember_signature(self, file_path):
+        """记录本进程写入后文件的 (修改时间, 大小)"""
+        try:
+            stat = file_path.stat()
+            self._own_signatures[file_path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            self._own_signatures.pop(file_path, None)
+    
+    def _remember_signatures(self, paths):
+        for path in paths:
+            self._remember_signature(path)
+    
+    def invalidate_external_changes(self, paths):
+        """
+        其他进程或编辑器修改了文件后丢弃相关缓存
+        
+        持有写入锁执行，不会与其他线程的写入同时修改缓存；等待跨进程锁超时时抛出FileLockTimeout。
+        
+        Args:
+            paths: 发生变化的文件；与本进程最近一次写入后状态相同的文件会被跳过
+            
+        Returns:
+            list: 确认来自外部的修改
+        """
+        with self._write_lock:
+            return self._invalidate_external_changes(paths)
+    
+    def _invalidate_external_changes(self, paths):
+        external = []
+        for path in map(Path, paths):
+            if path.name == LEDGER_NAME:
+                # 占用记录不影响任何缓存，由DiskUsage自行按文件状态重新读取
+                continue
+            try:
+                stat = path.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature = None
+            if signature is None or self._own_signatures.get(path) != signature:
+                external.append(path)
+        if not external:
+            return []
+        
+        for path in external:
+            self._own_signatures.pop(path, None)
+            self._write_versions[path] = self._write_versions.get(path, 0) + 1
+        self._account_usage(external)
+        changed = set(external)
+        if self.file_paths["manifest"] in changed:
+            self._manifest = None
+        if self.file_paths["schema"] in changed:
+            self._schema = None
+        revisions_path = self.file_paths["revisions"]
+        if changed & {revisions_path, revisions_path.with_suffix(".pack.idx")}:
+            self._revision_store = None
+        draft_stems = {self.file_paths[kind].stem for kind in self.DRAFT_KINDS}
+        if any(path.name.split(".")[0] in draft_stems for path in changed) \
+                or self.file_paths["draft_dictionary"] in changed:
+            self._draft_archives = {}
+        with self._context_lock:
+            self._context_cache = None
+        self._clear_status_cache()
+        
+        novel_path = self.file_paths["novel_text"]
+        if novel_path in changed:
+            self._chapter_index.invalidate()
+            if novel_path.exists() and not self.is_staged(novel_path):
+                self._chapter_index.rebuild(self.read_json_file(novel_path), self._is_pretty(novel_path))
+                self._remember_signature(self.file_paths["novel_index"])
+        return external
+    
+    def _reload_after_restore(self):
+        """meta/被整体替换后丢弃所有缓存并重建派生数据"""
+        for file_path in self.file_paths.values():
+            self._write_versions[file_path] = self._write_versions.get(file_path, 0) + 1
+        self._manifest = None
+        self._schema = None
+        self._typed = None
+        self._draft_archives = {}
+        self._revision_store = None
+        with self._context_lock:
+            self._context_cache = None
+        self._clear_status_cache()
+        novel_path = self.file_paths["novel_text"]
+        self._chapter_index.invalidate()
+        if novel_path.exists():
+            self._chapter_index.rebuild(self.read_json_file(novel_path), self._is_pretty(novel_path))
+        # 恢复的文件由本进程写入，监视器不应再把它们当作外部修改
+        self._remember_signatures(self.file_paths.values())
+    
+    # ===== 数据格式版本 =====
+    def _load_schema(self):
+        """加载schema.json；不存在时视为版本0（旧项目）"""
+        if self._schema is None:
+            schema = None
+            path = self.file_paths["schema"]
+            if path.exists():
+                try:
+                    schema = json_codec.load_file(path)
+                except (ValueError, IOError):
+                    schema = None
+            if not isinstance(schema, dict):
+                schema = {}
+            schema.setdefault("schema_version", 0)
+            schema.setdefault("files", {})
+            self._schema = schema
+        return self._schema
+    
+    def get_schema_version(self, key=None):
+        """项目的数据格式版本；指定key时返回该文件的版本"""
+        schema = self._load_schema()
+        if key is None:
+            return schema["schema_version"]
+        return schema["files"].get(key, schema["schema_version"])
+    
+    def _set_schema_version(self, key, version):
+        """记录文件的格式版本；所有文件都升级到最新版本后提升项目版本"""
+        with self._write_lock:
+            if self.get_schema_version(key) >= version:
+                return
+            schema = self._load_schema()
+            schema["files"][key] = version
+            latest = current_version()
+            if all(self.get_schema_version(k) >= latest for k in self._migration_keys.values()):
+                schema["schema_version"] = latest
+                schema["files"] = {}
+            path = self.file_paths["schema"]
+            tmp_path = path.with_suffix(".json.tmp")
+            self._write_bytes_durable(tmp_path, json_codec.dumps(schema, pretty=True))
+            os.replace(tmp_path, path)
+            self._remember_signature(path)
+    
+    def _ensure_migrated(self, file_path):
+        """
+        首次读取文件前执行其未应用的迁移步骤
+        
+        Returns:
+            等待写入锁超时（其他进程正在写入）时返回在内存中迁移后的数据，不写回，
+            下次读取时重试；其余情况返回None，由调用方读取磁盘上的文件
+        """
+        key = self._migration_keys.get(file_path)
+        if key is None or not pending_migrations(key, self.get_schema_version(key)):
+            return None
+        try:
+            self.migrate_file(key)
+        except FileLockTimeout:
+            try:
+                data = json_codec.load_file(file_path)
+            except (ValueError, IOError):
+                return None
+            for step in pending_migrations(key, self.get_schema_version(key)):
+                data = step.apply(data)
+            return data
+        return None
+    
+    def migrate_file(self, key):
+        """
+        将单个文件升级到最新格式
+        
+        Returns:
+            bool: 是否执行了迁移步骤
+        """
+        with self._write_lock:
+            steps = pending_migrations(key, self.get_schema_version(key))
+            if not steps:
+                return False
+            file_path = self.file_paths[key]
+            if file_path.exists():
+                try:
+                    data = json_codec.load_file(file_path)
+                except (ValueError, IOError):
+                    # 损坏的文件保持原样，由读取方按空数据处理
+                    return False
+                for step in steps:
+                    data = step.apply(data)
+                self._write_now(file_path, data)
+            else:
+                self._set_schema_version(key, current_version())
+            return True
+    
+    # ===== 事务 =====
+    @property
+    def _journal_path(self):
+        return self.file_paths["meta_dir"] / ".transaction.journal"
+    
+    @contextmanager
+    def transaction(self):
+        """
+        工作单元：在with块中暂存对多个文件的写入，正常退出时一次性原子提交
+        
+        事务期间持有写入锁（跨进程文件锁），其他线程和进程的写入与事务会等待提交完成，因此
+        "读取 → 修改 → 写入" 不会丢失并发更新。块内抛出异常时丢弃全部暂存写入。
+        嵌套调用会并入外层事务。事务块内不应等待耗时的网络请求。
+        
+        用法:
+            with dm.transaction():
+                summaries = dm.read_chapter_summaries()
+                summaries.update(results)
+                dm.write_chapter_summaries(summaries)
+        """
+        outer = getattr(self._local, "transaction", None)
+        if outer is not None:
+            yield outer
+            return
+        
+        with self._write_lock:
+            transaction = Transaction(self)
+            self._local.transaction = transaction
+            try:
+                yield transaction
+            finally:
+                self._local.transaction = None
+            transaction.commit()
+    
+    def _recover_transaction(self):
+        """根据事务日志完成中断的提交，并清理未提交的临时文件"""
+        journal_path = self._journal_path
+        if journal_path.exists():
+            try:
+                with journal_path.open('r', encoding='utf-8') as f:
+                    pending = json.load(f)
+                for tmp_name, target_name in pending:
+                    tmp_path = Path(tmp_name)
+                    if tmp_path.exists():
+                        os.replace(tmp_path, Path(target_name))
+            except (json.JSONDecodeError, IOError):
+                pass
+            journal_path.unlink(missing_ok=True)
+        
+        meta_dir = self.file_paths["meta_dir"]
+        if meta_dir.exists():
+            for leftover in meta_dir.glob("*.txn"):
+                leftover.unlink(missing_ok=True)
+    
+    # ===== 项目状态清单 =====
+    @staticmethod
+    def _artifact_stats(key, data):
+        """根据文件内容计算清单中记录的统计信息"""
+        if key == "theme_one_line":
+            if isinstance(data, dict):
+                return {"set": bool(data.get("theme"))}
+            return {"set": isinstance(data, str) and bool(data)}
+        if not isinstance(data, dict):
+            return {}
+        if key == "theme_paragraph":
+            return {"length": len(data.get("theme_paragraph", ""))}
+        if key == "story_outline":
+            return {"length": len(data.get("outline", ""))}
+        if key in ("characters", "locations", "items"):
+            return {"count": len(data)}
+        if key == "chapter_outline":
+            return {"count": len(data.get("chapters", []))}
+        if key == "chapter_summary":
+            return {"count": len(data.get("summaries", {}))}
+        if key == "novel_text":
+            chapters = data.get("chapters", {})
+            return {
+                "count": len(chapters),
+                "total_words": sum(ch.get("word_count", 0) for ch in chapters.values() if isinstance(ch, dict))
+            }
+        return {}
+    
+    def _load_manifest(self):
+        """加载状态清单"""
+        if self._manifest is None:
+            manifest = {}
+            path = self.file_paths["manifest"]
+            if path.exists():
+                try:
+                    with path.open('r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except (json.JSONDecodeError, IOError):
+                    manifest = {}
+            manifest.setdefault("artifacts", {})
+            self._manifest = manifest
+        return self._manifest
+    
+    def _save_manifest(self):
+        """原子写入状态清单"""
+        path = self.file_paths["manifest"]
+        tmp_path = path.with_suffix(".json.tmp")
+        try:
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._remember_signature(path)
+        except OSError:
+            # 清单只是加速用的缓存，写入失败时下次会重新计算
+            pass
+    
+    def _manifest_entry(self, key, file_path, data):
+        stat = file_path.stat()
+        entry = self._artifact_stats(key, data)
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+        entry["updated_at"] = datetime.now().isoformat()
+        return entry
+    
+    def _update_manifest(self, file_path, data):
+        """文件写入后更新对应条目，无需重新读取文件"""
+        key = self._manifest_keys.get(file_path)
+        if key is None:
+            return
+        manifest = self._load_manifest()
+        manifest["artifacts"][key] = self._manifest_entry(key, file_path, data)
+        manifest["updated_at"] = manifest["artifacts"][key]["updated_at"]
+        self._save_manifest()
+    
+    def get_manifest(self):
+        """
+        获取项目状态清单
+        
+        每个文件只做一次stat检查；只有在文件被外部修改（大小或修改时间与清单不符）时
+        才重新解析该文件，因此开销与小说篇幅无关。
+        """
+        manifest = self._load_manifest()
+        artifacts = manifest["artifacts"]
+        changed = False
+        for key in self.MANIFEST_KEYS:
+            file_path = self.file_paths[key]
+            try:
+                stat = file_path.stat()
+            except OSError:
+                if artifacts.pop(key, None) is not None:
+                    changed = True
+                continue
+            entry = artifacts.get(key)
+            if entry and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size:
+                continue
+            artifacts[key] = self._manifest_entry(key, file_path, self.read_json_file(file_path))
+            changed = True
+        if changed:
+            manifest["updated_at"] = datetime.now().isoformat()
+            self._save_manifest()
+        return artifacts
+    
     # ===== 通用CRUD方法 =====
+    @_locked
     def add_item_to_dict(self, file_path, key, value):
         """向字典类型的JSON文件添加项目"""
         data = self.read_json_file(file_path)
@@ -66,6 +812,7 @@ class DataManager:
         data[key] = value
         return self.write_json_file(file_path, data)
     
+    @_locked
     def update_item_in_dict(self, file_path, key, value):
         """更新字典类型的JSON文件中的项目"""
         data = self.read_json_file(file_path)
@@ -78,6 +825,7 @@ class DataManager:
             return self.write_json_file(file_path, data)
         return False
     
+    @_locked
     def delete_item_from_dict(self, file_path, key):
         """从字典类型的JSON文件删除项目"""
         data = self.read_json_file(file_path)
@@ -97,27 +845,9 @@ class DataManager:
     
     # ===== 主题相关 =====
     def read_theme_one_line(self):
-        """读取一句话主题数据（支持新旧格式）"""
+        """读取一句话主题数据（旧的字符串格式已由 schema_migrations 迁移为字典）"""
         data = self.read_json_file(self.file_paths["theme_one_line"])
-        
-        # 如果文件不存在或为空，返回None
-        if not data:
-            return None
-        
-        # 如果是新格式（包含novel_name和theme的字典），直接返回
-        if isinstance(data, dict) and ("novel_name" in data or "theme" in data):
-            return data
-        
-        # 如果是旧格式（只有theme字段的字典），转换为新格式
-        if isinstance(data, dict) and "theme" in data:
-            return data
-        
-        # 如果是字符串格式（更旧的版本），转换为新格式
-        if isinstance(data, str):
-            return data
-        
-        # 其他情况返回空字符串
-        return ""
+        return data or None
     
     def write_theme_one_line(self, data):
         """写入一句话主题数据（支持字符串和字典格式）"""
@@ -259,6 +989,61 @@ class DataManager:
         """删除故事大纲"""
         return self.write_json_file(self.file_paths["story_outline"], {})
     
+    # ===== 章节标识 =====
+    def _load_chapter_order(self):
+        """细纲中的章节顺序（按细纲文件版本缓存；事务中暂存了细纲时不缓存）"""
+        file_path = self.file_paths["chapter_outline"]
+        version = self._file_version("chapter_outline")
+        if self.is_staged(file_path) or self._chapter_order is None or self._chapter_order[0] != version:
+            ids = [
+                (ch.get("id") if isinstance(ch, dict) else None) or legacy_chapter_id(i)
+                for i, ch in enumerate(self.read_chapter_outline(), 1)
+            ]
+            order = (version, ids, {chapter_id: i for i, chapter_id in enumerate(ids, 1)})
+            if self.is_staged(file_path):
+                return order
+            self._chapter_order = order
+        return self._chapter_order
+    
+    def chapter_ids(self):
+        """按细纲顺序排列的章节ID"""
+        return list(self._load_chapter_order()[1])
+    
+    def chapter_key(self, chapter):
+        """
+        章节在概要、正文、草稿和生成历史中的键
+        
+        Args:
+            chapter: 章节号（细纲中的位置，从1开始）、章节ID或细纲中的章节字典。
+                     细纲中没有该位置时使用旧的 chapter_N 键。
+        """
+        if isinstance(chapter, dict):
+            if chapter.get("id"):
+                return chapter["id"]
+            chapter = chapter.get("order")
+        if isinstance(chapter, str):
+            return chapter
+        ids = self._load_chapter_order()[1]
+        if 1 <= chapter <= len(ids):
+            return ids[chapter - 1]
+        return legacy_chapter_id(chapter)
+    
+    def chapter_number(self, chapter_key):
+        """
+        章节ID在细纲中的位置（从1开始）
+        
+        不在细纲中时返回None；尚无细纲时旧键 chapter_N 按位置解析为N。
+        """
+        _, ids, positions = self._load_chapter_order()
+        if ids:
+            return positions.get(chapter_key)
+        return legacy_chapter_number(chapter_key)
+    
+    def sorted_chapter_keys(self, keys):
+        """按细纲顺序排列章节键，不在细纲中的排在最后"""
+        positions = self._load_chapter_order()[2]
+        return sorted(keys, key=lambda k: (k not in positions, positions.get(k) or legacy_chapter_number(k) or 0, str(k)))
+    
     # ===== 分章细纲相关 =====
     def read_chapter_outline(self):
         """读取分章细纲"""
@@ -266,7 +1051,8 @@ class DataManager:
         return data.get("chapters", [])
     
     def write_chapter_outline(self, chapters):
-        """写入分章细纲"""
+        """写入分章细纲（为新章节分配ID，并按列表顺序重新编号）"""
+        chapters = assign_chapter_ids(chapters)
         data = {
             "chapters": chapters,
             "total_chapters": len(chapters),
@@ -278,6 +1064,43 @@ class DataManager:
         """删除分章细纲"""
         return self.write_json_file(self.file_paths["chapter_outline"], {})
     
+    @_locked
+    def insert_chapter_outline(self, position, title, outline):
+        """
+        在指定位置（从1开始，超出范围时追加到末尾）插入新章节
+        
+        已有章节的ID不变，概要和正文无需改动。
+        
+        Returns:
+            新章节的ID，写入失败时返回None
+        """
+        chapters = self.read_chapter_outline()
+        chapter_id = new_chapter_id(ch.get("id") for ch in chapters if isinstance(ch, dict))
+        position = min(max(int(position), 1), len(chapters) + 1)
+        chapters.insert(position - 1, {"id": chapter_id, "title": title, "outline": outline})
+        return chapter_id if self.write_chapter_outline(chapters) else None
+    
+    @_locked
+    def move_chapter_outline(self, chapter_id, position):
+        """把章节移动到指定位置（从1开始）"""
+        chapters = self.read_chapter_outline()
+        index = next((i for i, ch in enumerate(chapters) if self.chapter_key(ch) == chapter_id), None)
+        if index is None:
+            return False
+        chapter = chapters.pop(index)
+        position = min(max(int(position), 1), len(chapters) + 1)
+        chapters.insert(position - 1, chapter)
+        return self.write_chapter_outline(chapters)
+    
+    @_locked
+    def remove_chapter_outline(self, chapter_id):
+        """从细纲中删除章节（该章节的概要和正文保留在原键下）"""
+        chapters = self.read_chapter_outline()
+        remaining = [ch for ch in chapters if self.chapter_key(ch) != chapter_id]
+        if len(remaining) == len(chapters):
+            return False
+        return self.write_chapter_outline(remaining)
+    
     # ===== 章节概要相关 =====
     def read_chapter_summaries(self):
         """读取所有章节概要"""
@@ -292,20 +1115,22 @@ class DataManager:
     def get_chapter_summary(self, chapter_num):
         """获取单个章节概要"""
         summaries = self.read_chapter_summaries()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         return summaries.get(chapter_key, {})
     
+    @_locked
     def set_chapter_summary(self, chapter_num, title, summary):
         """设置单个章节概要"""
         summaries = self.read_chapter_summaries()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         summaries[chapter_key] = {"title": title, "summary": summary}
         return self.write_chapter_summaries(summaries)
     
+    @_locked
     def delete_chapter_summary(self, chapter_num):
         """删除单个章节概要"""
         summaries = self.read_chapter_summaries()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         if chapter_key in summaries:
             del summaries[chapter_key]
             return self.write_chapter_summaries(summaries)
@@ -317,74 +1142,260 @@ class DataManager:
         data = self.read_json_file(self.file_paths["novel_text"])
         return data.get("chapters", {})
     
-    def write_novel_chapters(self, chapters):
-        """写入小说章节"""
+    def write_novel_chapters(self, chapters, changed_chapters=None):
+        """写入小说章节（changed_chapters为修改过的章节键，用于只记录这些章节的修订）"""
         data = {"chapters": chapters}
-        return self.write_json_file(self.file_paths["novel_text"], data)
+        return self.write_json_file(self.file_paths["novel_text"], data, changed_chapters)
     
     def get_novel_chapter(self, chapter_num):
-        """获取单个小说章节"""
+        """获取单个小说章节（通过偏移索引只读取该章节）"""
+        chapter_key = self.chapter_key(chapter_num)
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is None or self.file_paths["novel_text"] not in transaction.staged:
+            chapter = self._chapter_index.read_chapter(chapter_key)
+            if chapter is not None:
+                return chapter
         chapters = self.read_novel_chapters()
-        chapter_key = f"chapter_{chapter_num}"
         return chapters.get(chapter_key, {})
     
+    def list_novel_chapters(self):
+        """列出所有章节的标题和字数（通过偏移索引，不读取正文）"""
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is None or self.file_paths["novel_text"] not in transaction.staged:
+            chapters = self._chapter_index.list_chapters()
+            if chapters is not None:
+                return chapters
+        return {
+            key: {"title": ch.get("title", ""), "word_count": ch.get("word_count", 0)}
+            for key, ch in self.read_novel_chapters().items()
+        }
+    
+    @_locked
     def set_novel_chapter(self, chapter_num, title, content):
         """设置单个小说章节"""
         chapters = self.read_novel_chapters()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         chapters[chapter_key] = {
             "title": title,
             "content": content,
             "word_count": len(content)
         }
-        return self.write_novel_chapters(chapters)
+        return self.write_novel_chapters(chapters, changed_chapters=[chapter_key])
     
+    @_locked
     def delete_novel_chapter(self, chapter_num):
         """删除单个小说章节"""
         chapters = self.read_novel_chapters()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         if chapter_key in chapters:
             del chapters[chapter_key]
-            return self.write_novel_chapters(chapters)
+            return self.write_novel_chapters(chapters, changed_chapters=[])
         return False
     
+    # ===== 草稿归档相关 =====
+    DRAFT_KINDS = ("initial_drafts", "refined_drafts")
+    
+    def get_draft_archive(self, kind) -> DraftArchive:
+        """获取指定类型（initial_drafts / refined_drafts）的压缩草稿归档"""
+        if kind not in self.DRAFT_KINDS:
+            raise ValueError(f"未知的草稿类型: {kind}")
+        if kind not in self._draft_archives:
+            self._draft_archives[kind] = DraftArchive(
+                self.file_paths[kind],
+                self.file_paths["draft_dictionary"]
+            )
+        return self._draft_archives[kind]
+    
+    def _draft_dictionary_samples(self):
+        """收集用于训练共享压缩字典的项目文本"""
+        chapters = self.read_novel_chapters()
+        return [ch.get("content", "") for ch in chapters.values() if isinstance(ch, dict)]
+    
+    def append_draft(self, kind, chapter_num, entry):
+        """追加一条草稿记录（启用压缩时写入归档，否则写入旧版JSON文件）"""
+        chapter_key = self.chapter_key(chapter_num)
+        self._check_quota_before_draft()
+        with self._write_lock:
+            if not GENERATION_CONFIG.get("compress_draft_archives", True):
+                drafts = self.read_json_file(self.file_paths[kind])
+                drafts.setdefault(chapter_key, []).append(entry)
+                saved = self.write_json_file(self.file_paths[kind], drafts)
+            else:
+                archive = self.get_draft_archive(kind)
+                samples = None
+                if not self.file_paths["draft_dictionary"].exists():
+                    samples = self._draft_dictionary_samples()
+                if self.file_paths[kind].exists():
+                    archive.import_legacy(samples)
+                archive.append(chapter_key, entry, samples)
+                self._remember_signatures(self._draft_files(kind))
+                self._account_usage(self._draft_files(kind))
+                self._clear_status_cache()
+                saved = True
+        self._check_soft_quota()
+        return saved
+    
+    def _draft_files(self, kind):
+        """一类草稿当前使用的所有文件（旧版JSON、归档数据和索引、共享字典）"""
+        return [self.file_paths[kind], self.file_paths["draft_dictionary"]] + self.get_draft_archive(kind).files()
+    
+    def read_drafts(self, kind, chapter_num=None):
+        """
+        读取草稿记录，兼容压缩归档与旧版JSON文件
+        
+        Args:
+            kind: initial_drafts 或 refined_drafts
+            chapter_num: 章节号或章节ID，为None时返回所有章节
+        """
+        archive = self.get_draft_archive(kind)
+        legacy = self.read_json_file(self.file_paths[kind])
+        
+        if chapter_num is not None:
+            chapter_key = self.chapter_key(chapter_num)
+            drafts = list(legacy.get(chapter_key, []))
+            if archive.exists():
+                drafts.extend(archive.read_chapter(chapter_key))
+            return drafts
+        
+        drafts = {key: list(entries) for key, entries in legacy.items()}
+        if archive.exists():
+            for key, entries in archive.read_all().items():
+                drafts.setdefault(key, []).extend(entries)
+        return drafts
+    
+    def get_latest_draft(self, kind, chapter_num):
+        """随机读取某章节最新的一条草稿"""
+        archive = self.get_draft_archive(kind)
+        if archive.exists():
+            entry = archive.get(self.chapter_key(chapter_num))
+            if entry:
+                return entry
+        drafts = self.read_json_file(self.file_paths[kind]).get(self.chapter_key(chapter_num), [])
+        return drafts[-1] if drafts else None
+    
+    # ===== 生成历史相关 =====
+    HISTORY_KINDS = ("critiques", "refinement_history")
+    
+    def append_history_entry(self, kind, chapter_num, entry):
+        """向critiques或refinement_history追加一条记录"""
+        if kind not in self.HISTORY_KINDS:
+            raise ValueError(f"未知的历史类型: {kind}")
+        with self._write_lock:
+            history = self.read_json_file(self.file_paths[kind])
+            history.setdefault(self.chapter_key(chapter_num), []).append(entry)
+            return self.write_json_file(self.file_paths[kind], history)
+    
+    def read_history(self, kind):
+        """读取critiques或refinement_history的全部记录"""
+        if kind not in self.HISTORY_KINDS:
+            raise ValueError(f"未知的历史类型: {kind}")
+        return self.read_json_file(self.file_paths[kind])
+    
+    def compact_history(self, kind, select):
+        """
+        按保留策略重写一类生成历史
+        
+        Args:
+            kind: critiques、refinement_history、initial_drafts 或 refined_drafts
+            select: 接收章节键和条目列表，返回同样长度的保留标记列表
+            
+        Returns:
+            Tuple[int, int]: 压缩前后的条目数量
+        """
+        before = after = 0
+        with self._write_lock:
+            if kind in self.DRAFT_KINDS and self.get_draft_archive(kind).exists():
+                old_files = self._draft_files(kind)
+                archive_before, archive_after = self.get_draft_archive(kind).compact(select)
+                before += archive_before
+                after += archive_after
+                # 压缩后数据写入了新文件，旧文件已删除
+                self._remember_signatures(old_files + self._draft_files(kind))
+                self._account_usage(old_files + self._draft_files(kind))
+            
+            path = self.file_paths[kind]
+            if path.exists():
+                history = self.read_json_file(path)
+                compacted = {}
+                removed = 0
+                for chapter_key, entries in history.items():
+                    flags = select(chapter_key, entries)
+                    kept = [entry for entry, keep in zip(entries, flags) if keep]
+                    before += len(entries)
+                    after += len(kept)
+                    removed += len(entries) - len(kept)
+                    if kept:
+                        compacted[chapter_key] = kept
+                if removed:
+                    self.write_json_file(path, compacted)
+        return before, after
+    
     # ===== 综合信息获取 =====
-    def get_context_info(self):
-        """获取上下文信息，用于AI生成"""
-        context_parts = []
+    # get_context_info 依赖的文件
+    CONTEXT_DEPENDENCIES = ("theme_one_line", "characters", "locations", "items", "story_outline")
+    
+    def _file_version(self, key):
+        """文件版本：本进程内的写入次数 + 文件大小和修改时间（用于发现外部修改）"""
+        file_path = self.file_paths[key]
+        try:
+            stat = file_path.stat()
+            disk_version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            disk_version = None
+        return (self._write_versions.get(file_path, 0), disk_version)
+    
+    def _build_context_sections(self):
+        """读取依赖文件并构建上下文的各个部分"""
+        sections = {}
         
         # 读取主题信息
         theme = self.read_theme_one_line()
         if theme:
-            context_parts.append(f"主题：{theme}")
+            sections["theme"] = f"主题：{theme}"
         
-        # 读取角色信息
-        characters_data = self.read_characters()
-        if characters_data:
-            context_parts.append("主要角色：")
-            for char_name, char_data in characters_data.items():
-                context_parts.append(f"- {char_name}: {char_data.get('description', '无描述')}")
-        
-        # 读取场景信息
-        locations_data = self.read_locations()
-        if locations_data:
-            context_parts.append("重要场景：")
-            for loc_name, loc_data in locations_data.items():
-                context_parts.append(f"- {loc_name}: {loc_data.get('description', '无描述')}")
-        
-        # 读取道具信息
-        items_data = self.read_items()
-        if items_data:
-            context_parts.append("重要道具：")
-            for item_name, item_data in items_data.items():
-                context_parts.append(f"- {item_name}: {item_data.get('description', '无描述')}")
+        # 读取角色、场景、道具信息
+        for section, reader, heading in (
+            ("characters", self.read_characters, "主要角色："),
+            ("locations", self.read_locations, "重要场景："),
+            ("items", self.read_items, "重要道具："),
+        ):
+            entities = reader()
+            if entities:
+                lines = [heading]
+                for name, data in entities.items():
+                    lines.append(f"- {name}: {data.get('description', '无描述')}")
+                sections[section] = "\n".join(lines)
         
         # 读取故事大纲
         outline = self.read_story_outline()
         if outline:
-            context_parts.append(f"故事大纲：{outline}")
+            sections["story_outline"] = f"故事大纲：{outline}"
         
-        return "\n".join(context_parts)
+        return sections
+    
+    def get_context_sections(self) -> Dict[str, str]:
+        """
+        获取按部分拆分的上下文信息（theme、characters、locations、items、story_outline）
+        
+        结果按依赖文件的版本缓存：只有这些文件被写入或在外部被修改后才会重新读取。
+        多个线程或异步任务同时请求时只计算一次，其余调用方等待并共享结果。
+        当前线程的事务中暂存了依赖文件时直接计算，不读取也不更新缓存。
+        """
+        if any(self.is_staged(self.file_paths[dep]) for dep in self.CONTEXT_DEPENDENCIES):
+            return self._build_context_sections()
+        with self._context_lock:
+            key = tuple(self._file_version(dep) for dep in self.CONTEXT_DEPENDENCIES)
+            if self._context_cache is None or self._context_cache[0] != key:
+                self._context_cache = (key, self._build_context_sections())
+            return dict(self._context_cache[1])
+    
+    def get_context_info(self):
+        """获取上下文信息，用于AI生成"""
+        return "\n".join(self.get_context_sections().values())
+    
+    async def get_context_info_async(self):
+        """在工作线程中获取上下文信息，避免首次读取文件时阻塞事件循环"""
+        return await asyncio.to_thread(self.get_context_info)
     
     def get_characters_info_string(self):
         """获取角色信息字符串，用于AI生成"""
@@ -429,29 +1440,31 @@ class DataManager:
         data = self.read_json_file(self.file_paths["novel_text"])
         return data.get("chapters", {})
     
-    def write_novel_chapters(self, chapters_data):
-        """写入小说正文数据"""
+    def write_novel_chapters(self, chapters_data, changed_chapters=None):
+        """写入小说正文数据（changed_chapters为修改过的章节键，用于只记录这些章节的修订）"""
         data = {"chapters": chapters_data}
-        return self.write_json_file(self.file_paths["novel_text"], data)
+        return self.write_json_file(self.file_paths["novel_text"], data, changed_chapters)
     
+    @_locked
     def set_novel_chapter(self, chapter_num, title, content):
         """设置单个章节的正文"""
         chapters = self.read_novel_chapters()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         chapters[chapter_key] = {
             "title": title,
             "content": content,
             "word_count": len(content)
         }
-        return self.write_novel_chapters(chapters)
+        return self.write_novel_chapters(chapters, changed_chapters=[chapter_key])
     
+    @_locked
     def delete_novel_chapter(self, chapter_num):
         """删除单个章节的正文"""
         chapters = self.read_novel_chapters()
-        chapter_key = f"chapter_{chapter_num}"
+        chapter_key = self.chapter_key(chapter_num)
         if chapter_key in chapters:
             del chapters[chapter_key]
-            return self.write_novel_chapters(chapters)
+            return self.write_novel_chapters(chapters, changed_chapters=[])
         return False
 
     def get_project_status_details(self) -> Dict[str, Dict]:
@@ -474,88 +1487,63 @@ class DataManager:
         return status
     
     def _calculate_project_status_details(self) -> Dict[str, Dict]:
-        """计算项目各阶段的详细完成状态"""
-        # 快速预检查：如果没有任何meta文件，直接返回空状态
-        meta_files = [
-            self.file_paths['theme_one_line'],
-            self.file_paths['theme_paragraph'], 
-            self.file_paths['characters'],
-            self.file_paths['locations'],
-            self.file_paths['items'],
-            self.file_paths['story_outline'],
-            self.file_paths['chapter_outline'],
-            self.file_paths['chapter_summary'],  # 修复：使用正确的键名
-            self.file_paths['novel_text']        # 修复：使用正确的键名
-        ]
-        
-        # 如果没有任何文件存在，返回默认状态（避免多次文件访问）
-        if not any(Path(f).exists() for f in meta_files):
-            return {
-                "theme_one_line": {"completed": False, "details": "未设置"},
-                "theme_paragraph": {"completed": False, "details": "未生成"},
-                "world_settings": {"completed": False, "details": "未设定"},
-                "story_outline": {"completed": False, "details": "未生成"},
-                "chapter_outline": {"completed": False, "details": "未生成"},
-                "chapter_summaries": {"completed": False, "details": "未生成"},
-                "novel_chapters": {"completed": False, "details": "未生成"}
-            }
+        """根据状态清单计算项目各阶段的详细完成状态"""
+        artifacts = self.get_manifest()
+        
+        def stat(key, field, default=0):
+            return artifacts.get(key, {}).get(field, default)
         
-        # 正常详细检查
         status = {}
 
         # 1. 小说名称与主题
-        theme_data = self.read_theme_one_line()
-        if theme_data and (theme_data.get("theme") or (isinstance(theme_data, str) and theme_data)):
+        if stat("theme_one_line", "set", False):
             status["theme_one_line"] = {"completed": True, "details": "已设置"}
         else:
             status["theme_one_line"] = {"completed": False, "details": "未设置"}
 
         # 2. 段落主题
-        paragraph = self.read_theme_paragraph()
-        if paragraph:
-            status["theme_paragraph"] = {"completed": True, "details": f"已生成，{len(paragraph)}字"}
+        paragraph_length = stat("theme_paragraph", "length")
+        if paragraph_length:
+            status["theme_paragraph"] = {"completed": True, "details": f"已生成，{paragraph_length}字"}
         else:
             status["theme_paragraph"] = {"completed": False, "details": "未生成"}
 
         # 3. 世界设定
-        characters = self.read_characters()
-        locations = self.read_locations()
-        items = self.read_items()
         ws_details = []
-        if characters: ws_details.append(f"角色({len(characters)})")
-        if locations: ws_details.append(f"场景({len(locations)})")  
-        if items: ws_details.append(f"道具({len(items)})")
+        if stat("characters", "count"): ws_details.append(f"角色({stat('characters', 'count')})")
+        if stat("locations", "count"): ws_details.append(f"场景({stat('locations', 'count')})")
+        if stat("items", "count"): ws_details.append(f"道具({stat('items', 'count')})")
         if ws_details:
             status["world_settings"] = {"completed": True, "details": "、".join(ws_details)}
         else:
             status["world_settings"] = {"completed": False, "details": "未设定"}
             
         # 4. 故事大纲
-        outline = self.read_story_outline()
-        if outline:
-            status["story_outline"] = {"completed": True, "details": f"已生成，{len(outline)}字"}
+        outline_length = stat("story_outline", "length")
+        if outline_length:
+            status["story_outline"] = {"completed": True, "details": f"已生成，{outline_length}字"}
         else:
             status["story_outline"] = {"completed": False, "details": "未生成"}
             
         # 5. 分章细纲
-        chapters = self.read_chapter_outline()
-        if chapters:
-            status["chapter_outline"] = {"completed": True, "details": f"共 {len(chapters)} 章"}
+        chapter_count = stat("chapter_outline", "count")
+        if chapter_count:
+            status["chapter_outline"] = {"completed": True, "details": f"共 {chapter_count} 章"}
         else:
             status["chapter_outline"] = {"completed": False, "details": "未生成"}
             
         # 6. 章节概要
-        summaries = self.read_chapter_summaries()
-        if summaries:
-            status["chapter_summaries"] = {"completed": True, "details": f"已生成 {len(summaries)}/{len(chapters) if chapters else '?'} 章"}
+        summary_count = stat("chapter_summary", "count")
+        if summary_count:
+            status["chapter_summaries"] = {"completed": True, "details": f"已生成 {summary_count}/{chapter_count or '?'} 章"}
         else:
             status["chapter_summaries"] = {"completed": False, "details": "未生成"}
             
         # 7. 小说正文
-        novel_chapters = self.read_novel_chapters()
-        if novel_chapters:
-            total_words = sum(ch.get('word_count', 0) for ch in novel_chapters.values())
-            status["novel_chapters"] = {"completed": True, "details": f"已生成 {len(novel_chapters)} 章，共 {total_words} 字"}
+        novel_count = stat("novel_text", "count")
+        if novel_count:
+            total_words = stat("novel_text", "total_words")
+            status["novel_chapters"] = {"completed": True, "details": f"已生成 {novel_count} 章，共 {total_words} 字"}
         else:
             status["novel_chapters"] = {"completed": False, "details": "未生成"}
             
@@ -0,0 +1,236 @@
+"""
+项目磁盘占用统计与存储配额
+
+每个项目在 ``meta/.usage.json`` 中记录 meta/ 下每个文件的大小以及快照对象的总大小。
+DataManager 每次写入、追加草稿、记录修订、创建快照后只对涉及的文件做一次stat并更新记录，
+查看占用时直接按文件名分类汇总，不需要遍历目录。记录不存在（新导入或迁移的项目）时
+遍历一次重建。
+
+快照目录中的文件是指向 objects/ 的硬链接，只统计对象的大小。
+
+同一项目可能同时被多个DataManager或进程写入：每次修改记录前持有项目的写入锁，
+并在记录文件被改写过（修改时间或大小不同）时重新读取，不会用过期的副本覆盖其他实例的更新。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from contextlib import nullcontext
+from typing import Dict, Iterable, Optional, Tuple
+from config import QUOTA_CONFIG, get_project_paths
+from file_lock import FileLock
+from snapshot_manager import SnapshotManager
+
+LEDGER_NAME = ".usage.json"
+
+# 占用分类及显示名称
+USAGE_CATEGORIES = {
+    "content": "正文与设定",
+    "drafts": "草稿归档",
+    "history": "批评与修正记录",
+    "revisions": "修订历史",
+    "backups": "快照备份",
+}
+
+# 不计入占用的临时文件
+_SKIPPED_NAMES = {LEDGER_NAME, ".lock", ".transaction.journal"}
+_SKIPPED_SUFFIXES = (".tmp", ".txn")
+
+MB = 1024 * 1024
+
+
+class QuotaExceeded(OSError):
+    """项目占用超过硬配额，拒绝保存新的草稿"""
+
+
+def categorize(name: str) -> str:
+    """按 meta/ 中的文件名确定占用分类"""
+    if name.startswith(("initial_drafts", "refined_drafts")) or name == "drafts.zdict":
+        return "drafts"
+    if name.startswith(("critiques", "refinement_history")):
+        return "history"
+    if name.startswith("revisions.pack"):
+        return "revisions"
+    return "content"
+
+
+def format_size(num_bytes: int) -> str:
+    """格式化字节数"""
+    if num_bytes < MB:
+        return f"{num_bytes / 1024:.1f} KB"
+    return f"{num_bytes / MB:.1f} MB"
+
+
+def quota_limits() -> Dict[str, int]:
+    """软、硬配额的字节数（0表示不限制）"""
+    return {
+        "soft": int(QUOTA_CONFIG.get("soft_mb", 0) * MB),
+        "hard": int(QUOTA_CONFIG.get("hard_mb", 0) * MB),
+    }
+
+
+def quota_state(total: int) -> str:
+    """占用相对配额的状态：ok、soft 或 hard"""
+    limits = quota_limits()
+    if limits["hard"] and total >= limits["hard"]:
+        return "hard"
+    if limits["soft"] and total >= limits["soft"]:
+        return "soft"
+    return "ok"
+
+
+class DiskUsage:
+    """单个项目的增量占用记录"""
+
+    def __init__(self, meta_dir: Path, backup_dir: Path, write_lock=None):
+        """
+        Args:
+            meta_dir: 项目的 meta/ 目录
+            backup_dir: 项目的 meta_backup/ 目录
+            write_lock: 项目的写入锁（FileLock），修改记录时持有；为None时只使用线程锁
+        """
+        self.meta_dir = Path(meta_dir)
+        self.backup_dir = Path(backup_dir)
+        self.ledger_path = self.meta_dir / LEDGER_NAME
+        self._lock = threading.RLock()
+        self._write_lock = write_lock
+        self._ledger = None
+        # 加载或保存记录时记录文件的 (修改时间, 大小)
+        self._ledger_signature = None
+
+    def _locked(self):
+        return self._write_lock if self._write_lock is not None else nullcontext()
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.ledger_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> Dict:
+        """加载记录；记录文件被其他实例或进程改写过时重新读取"""
+        signature = self._file_signature()
+        if self._ledger is None or signature != self._ledger_signature:
+            try:
+                with self.ledger_path.open('r', encoding='utf-8') as f:
+                    ledger = json.load(f)
+                if not isinstance(ledger.get("files"), dict):
+                    raise ValueError("占用记录格式错误")
+                self._ledger = ledger
+                self._ledger_signature = signature
+            except (OSError, ValueError):
+                self.rebuild()
+        return self._ledger
+
+    def _save(self):
+        tmp_path = self.ledger_path.with_suffix(".json.tmp")
+        try:
+            with tmp_path.open('w', encoding='utf-8') as f:
+                json.dump(self._ledger, f, ensure_ascii=False)
+            os.replace(tmp_path, self.ledger_path)
+            self._ledger_signature = self._file_signature()
+        except OSError:
+            # 记录只是缓存，保存失败时下次重新统计
+            pass
+
+    def rebuild(self) -> Dict[str, int]:
+        """遍历 meta/ 和快照对象重新统计"""
+        with self._locked(), self._lock:
+            files = {}
+            if self.meta_dir.exists():
+                for path in self.meta_dir.rglob("*"):
+                    if path.is_file() and path.name not in _SKIPPED_NAMES \
+                            and not path.name.endswith(_SKIPPED_SUFFIXES):
+                        files[path.relative_to(self.meta_dir).as_posix()] = path.stat().st_size
+            backups = SnapshotManager(self.meta_dir, self.backup_dir).stats()["stored_bytes"]
+            self._ledger = {"files": files, "backups": backups}
+            if self.meta_dir.exists():
+                self._save()
+            return self.totals()
+
+    def update(self, paths: Iterable[Path]) -> int:
+        """
+        重新stat给定的 meta/ 文件并更新记录
+
+        Returns:
+            int: 占用的变化量（字节）
+        """
+        with self._locked(), self._lock:
+            files = self._load()["files"]
+            delta = 0
+            for path in map(Path, paths):
+                if path.name in _SKIPPED_NAMES or path.name.endswith(_SKIPPED_SUFFIXES):
+                    continue
+                try:
+                    key = path.relative_to(self.meta_dir).as_posix()
+                except ValueError:
+                    continue
+                try:
+                    size = path.stat().st_size
+                except OSError:
+                    size = None
+                old = files.get(key)
+                if size == old:
+                    continue
+                if size is None:
+                    del files[key]
+                else:
+                    files[key] = size
+                delta += (size or 0) - (old or 0)
+            if delta:
+                self._save()
+            return delta
+
+    def add_backups(self, delta: int):
+        """快照新增（或清理）了对象"""
+        if not delta:
+            return
+        with self._locked(), self._lock:
+            ledger = self._load()
+            ledger["backups"] = max(0, ledger.get("backups", 0) + delta)
+            self._save()
+
+    def set_backups(self, total: int):
+        """清理快照后记录对象的实际总大小"""
+        with self._locked(), self._lock:
+            self._load()["backups"] = total
+            self._save()
+
+    def refresh(self) -> int:
+        """
+        重新stat记录中的每个文件，修正未经本记录的修改（每个文件一次stat，不遍历目录）
+
+        Returns:
+            int: 修正的变化量（字节）
+        """
+        with self._locked(), self._lock:
+            keys = list(self._load()["files"])
+            return self.update(self.meta_dir / key for key in keys)
+
+    def totals(self) -> Dict[str, int]:
+        """各分类的占用（字节）"""
+        with self._lock:
+            ledger = self._load()
+            totals = dict.fromkeys(USAGE_CATEGORIES, 0)
+            for key, size in ledger["files"].items():
+                totals[categorize(Path(key).name)] += size
+            totals["backups"] = ledger.get("backups", 0)
+            return totals
+
+    def total(self) -> int:
+        """项目总占用（字节）"""
+        return sum(self.totals().values())
+
+    def summary(self) -> Dict:
+        """分类占用、总占用、配额及状态"""
+        totals = self.totals()
+        total = sum(totals.values())
+        return {"categories": totals, "total": total, "limits": quota_limits(), "state": quota_state(total)}
+
+
+def project_usage(project_path: Optional[Path]) -> DiskUsage:
+    """按项目路径创建占用记录（不需要创建DataManager），修改时持有项目的写入锁"""
+    paths = get_project_paths(project_path)
+    return DiskUsage(paths["meta_dir"], paths["backup_dir"], FileLock(paths["meta_dir"] / ".lock"))
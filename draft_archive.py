@@ -0,0 +1,360 @@
+"""
+草稿归档模块 - 使用共享字典压缩存储章节草稿历史
+
+每个归档由两个文件组成：
+- ``<name>.pack``: 逐条追加的压缩正文数据
+- ``<name>.pack.idx``: JSON索引，记录每个章节条目的偏移量、长度和元数据
+
+正文使用zlib压缩，并共享一份由项目自身文本训练出的预设字典（``drafts.zdict``），
+因此大量近似的中文草稿可以获得远高于单条压缩的压缩率，同时支持按章节条目随机读取。
+"""
+
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Iterable, Tuple
+
+# zlib预设字典最多使用32KB窗口
+MAX_DICT_SIZE = 32 * 1024
+ARCHIVE_VERSION = 1
+# 索引元数据中不属于草稿记录本身的字段
+_INTERNAL_KEYS = ("offset", "length", "plain")
+
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICT_SIZE) -> bytes:
+    """
+    根据项目文本样本生成zlib共享字典
+
+    从每个样本中截取等长的片段拼接成字典。zlib优先匹配靠近字典末尾的内容，
+    因此样本按给定顺序排列，越靠后的样本（通常是最新的文本）匹配优先级越高。
+    """
+    encoded = [s.encode('utf-8') for s in samples if s]
+    if not encoded:
+        return b""
+
+    per_sample = max(size // len(encoded), 1)
+    parts = []
+    for data in encoded:
+        if len(data) <= per_sample:
+            parts.append(data)
+        else:
+            # 取样本中段，避开章节开头结尾的特殊内容
+            start = (len(data) - per_sample) // 2
+            parts.append(data[start:start + per_sample])
+    return b"".join(parts)[-size:]
+
+
+class DraftArchive:
+    """压缩草稿归档，支持按章节条目追加和随机访问"""
+
+    def __init__(self, legacy_path: Path, dict_path: Path):
+        """
+        初始化草稿归档
+
+        Args:
+            legacy_path: 旧版未压缩JSON文件路径（如 initial_drafts.json）
+            dict_path: 项目共享字典文件路径
+        """
+        self.legacy_path = Path(legacy_path)
+        self.data_path = self.legacy_path.with_suffix(".pack")
+        self.index_path = self.legacy_path.with_suffix(".pack.idx")
+        self.dict_path = Path(dict_path)
+        self._lock = threading.RLock()
+        self._index = None
+        # 加载索引时索引文件的 (修改时间, 大小)
+        self._index_loaded = None
+        self._zdict = None
+
+    # ===== 索引与字典 =====
+    def exists(self) -> bool:
+        """归档是否已创建"""
+        return self.index_path.exists()
+
+    def _index_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self) -> Dict:
+        """加载索引；索引文件被其他实例或进程改写过时重新读取"""
+        signature = self._index_signature()
+        if self._index is None or signature != self._index_loaded:
+            if signature is not None:
+                with self.index_path.open('r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {"version": ARCHIVE_VERSION, "dict_id": None, "entries": {}}
+            self._index_loaded = signature
+        return self._index
+
+    def _data_file(self) -> Path:
+        """当前索引指向的数据文件（压缩后会切换到新文件）"""
+        return self.data_path.parent / self._load_index().get("data_file", self.data_path.name)
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".idx.tmp")
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._index_loaded = self._index_signature()
+
+    def _load_dictionary(self, samples: Optional[List[str]] = None) -> bytes:
+        """加载共享字典，不存在时用给定样本训练并保存"""
+        if self._zdict is None:
+            if self.dict_path.exists():
+                self._zdict = self.dict_path.read_bytes()
+            else:
+                zdict = train_dictionary(samples or [])
+                if not zdict:
+                    # 没有可用样本时不缓存，等待下次有文本时再训练
+                    return b""
+                self.dict_path.parent.mkdir(parents=True, exist_ok=True)
+                self.dict_path.write_bytes(zdict)
+                self._zdict = zdict
+        return self._zdict
+
+    @staticmethod
+    def _dict_id(zdict: bytes) -> Optional[int]:
+        return zlib.crc32(zdict) if zdict else None
+
+    # ===== 压缩与解压 =====
+    def _compress(self, content: str, zdict: bytes) -> bytes:
+        if zdict:
+            compressor = zlib.compressobj(level=9, zdict=zdict)
+        else:
+            compressor = zlib.compressobj(level=9)
+        return compressor.compress(content.encode('utf-8')) + compressor.flush()
+
+    def _decompress(self, data: bytes, zdict: bytes) -> str:
+        if zdict:
+            decompressor = zlib.decompressobj(zdict=zdict)
+        else:
+            decompressor = zlib.decompressobj()
+        return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+
+    # ===== 读写接口 =====
+    def append(self, chapter_key: str, entry: Dict, dictionary_samples: Optional[List[str]] = None) -> bool:
+        """
+        追加一条草稿记录
+
+        Args:
+            chapter_key: 章节键（如 chapter_1）
+            entry: 草稿记录，包含 content 以及 timestamp、chapter_title 等元数据
+            dictionary_samples: 首次写入时用于训练共享字典的项目文本样本
+        """
+        with self._lock:
+            index = self._load_index()
+            content = entry.get("content") or ""
+            zdict = self._prepare_dictionary(index, list(dictionary_samples or []) + [content])
+            for key, meta in self._write_entries([(chapter_key, entry)], zdict):
+                index["entries"].setdefault(key, []).append(meta)
+            self._save_index()
+            return True
+
+    def _prepare_dictionary(self, index: Dict, samples: List[str]) -> bytes:
+        """
+        加载（必要时训练）共享字典并与索引核对
+
+        字典训练出来之前写入的条目不使用字典压缩，标记为 plain；
+        之后训练出字典时把索引中的 dict_id 从None升级为新字典。
+        """
+        zdict = self._load_dictionary(samples)
+        dict_id = self._dict_id(zdict)
+        if index["dict_id"] is None and dict_id is not None:
+            for metas in index["entries"].values():
+                for meta in metas:
+                    meta.setdefault("plain", True)
+            index["dict_id"] = dict_id
+        elif dict_id != index["dict_id"]:
+            raise ValueError(f"共享字典与归档索引不匹配: {self.dict_path}")
+        return zdict
+
+    def _write_entries(self, items: List[Tuple[str, Dict]], zdict: bytes) -> List[Tuple[str, Dict]]:
+        """把条目正文压缩后追加到数据文件并刷盘，返回 (章节键, 索引元数据) 列表（尚未写入索引）"""
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        written = []
+        with self._data_file().open('ab') as f:
+            for chapter_key, entry in items:
+                payload = self._compress(entry.get("content") or "", zdict)
+                meta = {k: v for k, v in entry.items() if k != "content"}
+                meta["offset"] = f.tell()
+                meta["length"] = len(payload)
+                if not zdict:
+                    meta["plain"] = True
+                f.write(payload)
+                written.append((chapter_key, meta))
+            f.flush()
+            os.fsync(f.fileno())
+        return written
+
+    def _read_payload(self, meta: Dict, f=None) -> str:
+        zdict = b"" if meta.get("plain") else self._load_dictionary()
+        if f is None:
+            with self._data_file().open('rb') as data_file:
+                data_file.seek(meta["offset"])
+                payload = data_file.read(meta["length"])
+        else:
+            f.seek(meta["offset"])
+            payload = f.read(meta["length"])
+        return self._decompress(payload, zdict)
+
+    def _materialize(self, meta: Dict, content: str) -> Dict:
+        entry = {k: v for k, v in meta.items() if k not in _INTERNAL_KEYS}
+        entry["content"] = content
+        return entry
+
+    def list_entries(self, chapter_key: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """列出条目元数据（不解压正文）"""
+        with self._lock:
+            entries = self._load_index()["entries"]
+            if chapter_key is not None:
+                entries = {chapter_key: entries.get(chapter_key, [])}
+            return {
+                key: [{k: v for k, v in meta.items() if k not in _INTERNAL_KEYS} for meta in metas]
+                for key, metas in entries.items()
+            }
+
+    def get(self, chapter_key: str, position: int = -1) -> Optional[Dict]:
+        """随机读取某章节的单条草稿（默认最新一条）"""
+        with self._lock:
+            metas = self._load_index()["entries"].get(chapter_key, [])
+            try:
+                meta = metas[position]
+            except IndexError:
+                return None
+            return self._materialize(meta, self._read_payload(meta))
+
+    def read_chapter(self, chapter_key: str) -> List[Dict]:
+        """读取某章节的全部草稿"""
+        with self._lock:
+            metas = self._load_index()["entries"].get(chapter_key, [])
+            if not metas:
+                return []
+            with self._data_file().open('rb') as f:
+                return [self._materialize(meta, self._read_payload(meta, f)) for meta in metas]
+
+    def read_all(self) -> Dict[str, List[Dict]]:
+        """读取全部草稿，返回与旧版JSON文件相同的结构"""
+        with self._lock:
+            entries = self._load_index()["entries"]
+            if not entries:
+                return {}
+            with self._data_file().open('rb') as f:
+                return {
+                    key: [self._materialize(meta, self._read_payload(meta, f)) for meta in metas]
+                    for key, metas in entries.items()
+                }
+
+    def import_legacy(self, dictionary_samples: Optional[List[str]] = None) -> int:
+        """
+        将旧版未压缩JSON文件导入归档，导入完成后删除旧文件
+
+        所有条目先写入数据文件，再一次性原子替换索引，索引中同时记录已导入的旧文件
+        (修改时间, 大小)。在删除旧文件之前中断时，再次调用只会删除旧文件而不会重复导入；
+        在替换索引之前中断时，数据文件中多出的内容不被索引引用，压缩时会被丢弃。
+
+        Returns:
+            int: 导入的条目数量
+        """
+        with self._lock:
+            try:
+                stat = self.legacy_path.stat()
+            except OSError:
+                return 0
+            legacy_signature = [stat.st_mtime_ns, stat.st_size]
+            index = self._load_index()
+            if index.get("legacy_imported", {}).get(self.legacy_path.name) == legacy_signature:
+                self.legacy_path.unlink()
+                return 0
+            try:
+                with self.legacy_path.open('r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                return 0
+
+            samples = list(dictionary_samples or [])
+            for entries in legacy.values():
+                samples.extend(e.get("content", "") for e in entries[-1:])
+
+            new_index = json.loads(json.dumps(index))
+            zdict = self._prepare_dictionary(new_index, samples)
+            items = [(chapter_key, entry) for chapter_key, entries in legacy.items() for entry in entries]
+            for chapter_key, meta in self._write_entries(items, zdict):
+                new_index["entries"].setdefault(chapter_key, []).append(meta)
+            new_index.setdefault("legacy_imported", {})[self.legacy_path.name] = legacy_signature
+
+            self._index = new_index
+            self._save_index()
+            self.legacy_path.unlink()
+            return len(items)
+
+    def files(self) -> List[Path]:
+        """归档当前使用的数据文件和索引"""
+        with self._lock:
+            return [self._data_file(), self.index_path]
+
+    def stats(self) -> Dict[str, int]:
+        """归档的条目数与磁盘占用"""
+        with self._lock:
+            entries = self._load_index()["entries"]
+            size = 0
+            for path in (self._data_file(), self.index_path):
+                if path.exists():
+                    size += path.stat().st_size
+            return {
+                "entries": sum(len(v) for v in entries.values()),
+                "bytes": size
+            }
+
+    def compact(self, select: Callable[[str, List[Dict]], List[bool]]) -> Tuple[int, int]:
+        """
+        按保留策略重写归档，丢弃未被选中的条目
+
+        保留的条目直接复制压缩数据，无需重新压缩。新数据写入新文件后再原子替换索引，
+        中途中断时旧索引和旧数据文件依然完整可用。
+
+        Args:
+            select: 接收章节键和该章节的条目元数据列表，返回同样长度的保留标记列表
+
+        Returns:
+            Tuple[int, int]: 压缩前后的条目数量
+        """
+        with self._lock:
+            index = self._load_index()
+            before = sum(len(v) for v in index["entries"].values())
+            if not before:
+                return 0, 0
+
+            old_file = self._data_file()
+            generation = index.get("generation", 0) + 1
+            new_name = f"{self.data_path.stem}.{generation}.pack"
+            new_file = self.data_path.parent / new_name
+
+            new_entries = {}
+            with old_file.open('rb') as src, new_file.open('wb') as dst:
+                for chapter_key, metas in index["entries"].items():
+                    flags = select(chapter_key, [dict(m) for m in metas])
+                    kept = []
+                    for meta, keep in zip(metas, flags):
+                        if not keep:
+                            continue
+                        src.seek(meta["offset"])
+                        payload = src.read(meta["length"])
+                        new_meta = dict(meta)
+                        new_meta["offset"] = dst.tell()
+                        dst.write(payload)
+                        kept.append(new_meta)
+                    if kept:
+                        new_entries[chapter_key] = kept
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            self._index = dict(index, entries=new_entries, data_file=new_name, generation=generation)
+            self._save_index()
+            if old_file != new_file and old_file.exists():
+                old_file.unlink()
+            return before, sum(len(v) for v in new_entries.values())
@@ -4,6 +4,7 @@ from ui_utils import ui
 from project_data_manager import project_data_manager
 from config import get_export_base_dir
 from project_manager import project_manager
+from chapter_ids import legacy_chapter_id, legacy_chapter_number
 
 def get_novel_name():
     """Helper to get the current novel's name."""
@@ -26,6 +27,24 @@ def get_export_dir():
         os.makedirs(export_dir, exist_ok=True)
         return export_dir
 
+def _numbered_chapters(chapters, novel_chapters):
+    """
+    按细纲顺序列出已有正文的章节：[(章节键, 章节号, 标题)]
+    
+    章节号为章节在细纲中的位置；没有细纲时按旧键 chapter_N 中的编号排列。
+    """
+    if chapters:
+        entries = []
+        for i, ch in enumerate(chapters, 1):
+            key = ch.get('id') or legacy_chapter_id(i)
+            if key in novel_chapters:
+                entries.append((key, i, novel_chapters[key].get('title') or ch.get('title', f'第{i}章')))
+        return entries
+    numbered = sorted(
+        (legacy_chapter_number(key), key) for key in novel_chapters if legacy_chapter_number(key) is not None
+    )
+    return [(key, num, novel_chapters[key].get('title', '无标题')) for num, key in numbered]
+
 def handle_novel_export():
     """Main UI handler for exporting the novel."""
     dm = project_data_manager.get_data_manager()
@@ -56,10 +75,9 @@ def handle_novel_export():
 
 def export_single_chapter(chapters, novel_chapters):
     """Exports a single chapter."""
-    chapter_map = {f"chapter_{i+1}": ch.get('title', f'第{i+1}章') for i, ch in enumerate(chapters)}
-    available_chapters = [title for key, title in chapter_map.items() if key in novel_chapters]
+    available_chapters = _numbered_chapters(chapters, novel_chapters)
     
-    choice_str = ui.display_menu("请选择要导出的章节：", available_chapters + ["返回"])
+    choice_str = ui.display_menu("请选择要导出的章节：", [title for _, _, title in available_chapters] + ["返回"])
     
     # 优先处理返回选项
     if choice_str == '0':
@@ -67,9 +85,7 @@ def export_single_chapter(chapters, novel_chapters):
 
     if choice_str.isdigit() and int(choice_str) <= len(available_chapters):
         choice_index = int(choice_str) - 1
-        # Find the correct chapter key
-        selected_title = available_chapters[choice_index]
-        chapter_key = next(key for key, title in chapter_map.items() if title == selected_title)
+        chapter_key, chapter_num, selected_title = available_chapters[choice_index]
         
         export_dir = get_export_dir()
         chapter_data = novel_chapters.get(chapter_key, {})
@@ -94,8 +110,6 @@ def export_single_chapter(chapters, novel_chapters):
                 f.write(f"《{novel_name}》\n")
                 f.write("=" * 30 + "\n")
                 f.write(f"导出时间: {display_timestamp}\n")
-                # 获取章节号码
-                chapter_num = int(chapter_key.split('_')[1])
                 f.write(f"导出章节: 第{chapter_num}章 {title}\n")
                 f.write(f"字数: {word_count} 字\n")
                 f.write("=" * 30 + "\n\n")
@@ -122,8 +136,7 @@ def export_single_chapter(chapters, novel_chapters):
 
 def export_chapter_range(chapters, novel_chapters):
     """Exports a range of chapters."""
-    chapter_map = {f"chapter_{i+1}": ch.get('title', f'第{i+1}章') for i, ch in enumerate(chapters)}
-    available_chapters = [(key, title) for key, title in chapter_map.items() if key in novel_chapters]
+    available_chapters = _numbered_chapters(chapters, novel_chapters)
     
     if len(available_chapters) < 2:
         ui.print_warning("需要至少2个章节才能使用范围导出功能。")
@@ -131,7 +144,7 @@ def export_chapter_range(chapters, novel_chapters):
         return
     
     ui.print_info("可用章节:")
-    for i, (key, title) in enumerate(available_chapters, 1):
+    for i, (_, _, title) in enumerate(available_chapters, 1):
         ui.print_info(f"{i}. {title}")
     
     try:
@@ -187,7 +200,7 @@ def export_chapter_range(chapters, novel_chapters):
         # 使用已有的字数数据计算总字数和生成章节列表
         total_word_count = 0
         chapter_titles = []
-        for key, title in selected_chapters:
+        for key, _, title in selected_chapters:
             chapter_data = novel_chapters[key]
             # 使用已有的字数数据，如果没有则重新计算
             word_count = chapter_data.get('word_count', 0)
@@ -214,19 +227,18 @@ def export_chapter_range(chapters, novel_chapters):
             f.write(f"导出时间: {display_timestamp}\n")
             # 根据章节范围显示不同的导出信息
             if start_idx == end_idx:
-                chapter_num = int(selected_chapters[0][0].split('_')[1])
-                f.write(f"导出章节: 第{chapter_num}章 {selected_chapters[0][1]}\n")
+                _, chapter_num, title = selected_chapters[0]
+                f.write(f"导出章节: 第{chapter_num}章 {title}\n")
             else:
-                start_num = int(selected_chapters[0][0].split('_')[1])
-                end_num = int(selected_chapters[-1][0].split('_')[1])
+                start_num = selected_chapters[0][1]
+                end_num = selected_chapters[-1][1]
                 f.write(f"导出章节: 第{start_num}章到第{end_num}章\n")
             f.write(f"字数: {total_word_count} 字\n")
             f.write("=" * 30 + "\n\n")
             
             # 直接写入章节内容，不重复作品名
-            for key, title in selected_chapters:
+            for key, chapter_num, title in selected_chapters:
                 chapter_data = novel_chapters[key]
-                chapter_num = int(key.split('_')[1])
                 f.write(f"第{chapter_num}章 {title}\n")
                 f.write("=" * 30 + "\n\n")
                 f.write(chapter_data.get('content', ''))
@@ -260,9 +272,9 @@ def export_complete_novel(chapters, novel_chapters):
     
     # 使用已有的字数数据计算总字数
     total_word_count = 0
-    sorted_keys = sorted(novel_chapters.keys(), key=lambda k: int(k.split('_')[1]))
+    numbered_chapters = _numbered_chapters(chapters, novel_chapters)
     chapter_titles = []
-    for key in sorted_keys:
+    for key, _, _ in numbered_chapters:
         chapter_data = novel_chapters[key]
         # 使用已有的字数数据，如果没有则重新计算
         word_count = chapter_data.get('word_count', 0)
@@ -274,9 +286,8 @@ def export_complete_novel(chapters, novel_chapters):
     
     # 生成章节列表字符串（包含章节号）
     chapters_with_numbers = []
-    for key in sorted_keys:
+    for key, chapter_num, _ in numbered_chapters:
         chapter_data = novel_chapters[key]
-        chapter_num = int(key.split('_')[1])
         chapter_title = chapter_data.get('title', '无标题')
         chapters_with_numbers.append(f"第{chapter_num}章 {chapter_title}")
     
@@ -293,9 +304,8 @@ def export_complete_novel(chapters, novel_chapters):
             f.write("=" * 30 + "\n\n")
             
             # 直接写入章节内容，不重复作品名
-            for key in sorted_keys:
+            for key, chapter_num, _ in numbered_chapters:
                 chapter_data = novel_chapters[key]
-                chapter_num = int(key.split('_')[1])
                 chapter_title = chapter_data.get('title', '无标题')
                 f.write(f"第{chapter_num}章 {chapter_title}\n")
                 f.write("=" * 30 + "\n\n")
@@ -0,0 +1,155 @@
+"""
+跨进程文件锁 - 多个CLI进程或批处理任务共用同一项目目录时保护读改写
+
+优先使用 fcntl.flock（进程退出时由内核自动释放，不会留下失效的锁）；
+不支持fcntl的平台回退为 O_EXCL 锁文件，持有者进程已退出或锁文件超过
+stale_after 秒未更新时视为失效锁并清除。
+
+锁在同一实例内可重入，同时也是线程锁：同一进程中的其他线程会等待。
+锁文件中记录持有者的PID和获取时间，超时时的错误信息会指出持有者。
+"""
+
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from config import LOCK_CONFIG
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLockTimeout(TimeoutError):
+    """等待文件锁超时"""
+
+
+def _pid_alive(pid: int) -> bool:
+    """本机进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class FileLock:
+    """可重入的跨进程排他锁"""
+
+    def __init__(self, path: Path, timeout: Optional[float] = None, stale_after: Optional[float] = None,
+                 poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.timeout = LOCK_CONFIG["timeout"] if timeout is None else timeout
+        self.stale_after = LOCK_CONFIG["stale_after"] if stale_after is None else stale_after
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    # ===== 持有者信息 =====
+    def _owner_record(self) -> bytes:
+        return f"{os.getpid()} {socket.gethostname()} {time.time():.0f}\n".encode('utf-8')
+
+    def owner(self) -> Optional[str]:
+        """锁文件中记录的持有者（PID、主机、获取时间）"""
+        try:
+            return self.path.read_text(encoding='utf-8').strip() or None
+        except OSError:
+            return None
+
+    def _is_stale(self) -> bool:
+        """O_EXCL模式下判断锁文件是否失效"""
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except OSError:
+            return False
+        if self.stale_after and age > self.stale_after:
+            return True
+        parts = (self.owner() or "").split()
+        if len(parts) >= 2 and parts[0].isdigit() and parts[1] == socket.gethostname():
+            return not _pid_alive(int(parts[0]))
+        return False
+
+    # ===== 获取与释放 =====
+    def _try_acquire(self) -> bool:
+        if fcntl is not None:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            os.ftruncate(self._fd, 0)
+            os.pwrite(self._fd, self._owner_record(), 0)
+            return True
+
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            if self._is_stale():
+                self.path.unlink(missing_ok=True)
+            return False
+        os.write(fd, self._owner_record())
+        os.close(fd)
+        return True
+
+    def acquire(self, timeout: Optional[float] = None):
+        """获取锁，超时抛出FileLockTimeout"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=max(timeout, 0)):
+            raise FileLockTimeout(f"等待文件锁超时: {self.path}")
+        if self._depth:
+            self._depth += 1
+            return self
+
+        try:
+            while not self._try_acquire():
+                if time.monotonic() >= deadline:
+                    raise FileLockTimeout(f"等待文件锁超时: {self.path}（持有者: {self.owner() or '未知'}）")
+                time.sleep(self.poll_interval)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._depth = 1
+        return self
+
+    def release(self):
+        """释放一层锁，最外层释放时解除文件锁"""
+        if self._depth == 0:
+            raise RuntimeError("释放未持有的文件锁")
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                self.path.unlink(missing_ok=True)
+        self._thread_lock.release()
+
+    @property
+    def is_locked(self) -> bool:
+        """当前实例是否持有锁"""
+        return self._depth > 0
+
+    def close(self):
+        """关闭锁文件描述符（不删除锁文件）"""
+        if self._fd is not None and not self._depth:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
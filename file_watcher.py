@@ -0,0 +1,137 @@
+"""
+文件变更监视 - 发现其他进程或编辑器对项目文件的修改
+
+在后台线程中按固定间隔轮询被监视的文件和目录（目录只检查第一层文件），
+比较每个文件的修改时间和大小，发生变化（新增、修改、删除）时以变化的
+文件列表调用对应的回调。锁文件、临时文件等由写入过程自身产生的文件会被忽略。
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from config import WATCH_CONFIG
+
+# 写入过程产生的文件，变化不代表数据变化
+IGNORED_NAMES = {".lock", ".transaction.journal"}
+IGNORED_SUFFIXES = (".tmp", ".txn")
+
+Signature = Dict[Path, Tuple[int, int]]
+
+
+def scan_signature(path: Path) -> Signature:
+    """文件或目录（第一层）中每个文件的 (修改时间, 大小)"""
+    signature = {}
+    try:
+        if path.is_dir():
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name in IGNORED_NAMES or entry.name.endswith(IGNORED_SUFFIXES):
+                        continue
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            signature[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        elif path.exists():
+            stat = path.stat()
+            signature[path] = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        pass
+    return signature
+
+
+def changed_files(old: Signature, new: Signature) -> List[Path]:
+    """新增、修改或删除的文件"""
+    return sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+
+
+class FileWatcher:
+    """轮询式文件变更监视器"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = WATCH_CONFIG["interval"] if interval is None else interval
+        # 被监视的路径 -> (回调, 上次扫描结果)
+        self._targets: Dict[Path, Tuple[Callable[[List[Path]], None], Signature]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def watch(self, path: Path, callback: Callable[[List[Path]], None]):
+        """监视文件或目录，以当前状态为基准"""
+        path = Path(path)
+        with self._lock:
+            self._targets[path] = (callback, scan_signature(path))
+
+    def unwatch(self, path: Path):
+        """停止监视某个路径"""
+        with self._lock:
+            self._targets.pop(Path(path), None)
+
+    def unwatch_all(self):
+        """停止监视所有路径"""
+        with self._lock:
+            self._targets.clear()
+
+    @property
+    def watched_paths(self) -> List[Path]:
+        """被监视的路径"""
+        with self._lock:
+            return list(self._targets)
+
+    def check(self) -> Dict[Path, List[Path]]:
+        """
+        立即扫描一次并调用发生变化的路径的回调
+
+        Returns:
+            Dict[Path, List[Path]]: 被监视的路径 -> 变化的文件
+        """
+        with self._lock:
+            targets = list(self._targets.items())
+
+        changes = {}
+        for path, (callback, old_signature) in targets:
+            new_signature = scan_signature(path)
+            changed = changed_files(old_signature, new_signature)
+            if not changed:
+                continue
+            with self._lock:
+                # 扫描期间被取消或重新监视的路径不再通知
+                if self._targets.get(path, (None, None))[1] is not old_signature:
+                    continue
+                self._targets[path] = (callback, new_signature)
+            changes[path] = changed
+            try:
+                callback(changed)
+            except Exception:
+                # 回调出错不影响后续监视；恢复上次的扫描结果，下次扫描时重新通知
+                with self._lock:
+                    if self._targets.get(path, (None, None))[1] is new_signature:
+                        self._targets[path] = (callback, old_signature)
+        return changes
+
+    # ===== 后台线程 =====
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    @property
+    def is_running(self) -> bool:
+        """后台线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """启动后台轮询线程（已启动时忽略）"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台轮询线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+生成历史清理工具
+
+按保留策略压缩 critiques、refinement_history、initial_drafts、refined_drafts，
+避免项目在多轮重新生成后加载和备份越来越慢。
+
+用法:
+    python history_compactor.py             # 清理所有项目
+    python history_compactor.py 项目名 ...   # 只清理指定项目
+"""
+
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from config import RETENTION_CONFIG
+
+HISTORY_KINDS = ("critiques", "refinement_history", "initial_drafts", "refined_drafts")
+
+
+@dataclass
+class RetentionPolicy:
+    """历史保留策略：满足任一条件的记录被保留"""
+    keep_last: int = 5
+    keep_days: int = 30
+
+    @classmethod
+    def from_config(cls) -> "RetentionPolicy":
+        """从RETENTION_CONFIG创建策略"""
+        return cls(
+            keep_last=RETENTION_CONFIG.get("keep_last", 5),
+            keep_days=RETENTION_CONFIG.get("keep_days", 30)
+        )
+
+    @property
+    def is_active(self) -> bool:
+        """两个条件都关闭时不清理任何记录"""
+        return self.keep_last > 0 or self.keep_days > 0
+
+    def select(self, entries: List[Dict], protected: Set[str], now: Optional[datetime] = None) -> List[bool]:
+        """
+        计算一章历史记录的保留标记
+
+        Args:
+            entries: 按时间顺序排列的历史记录
+            protected: 必须保留的记录时间戳（当前正文对应的版本）
+            now: 当前时间，便于测试
+        """
+        if not self.is_active:
+            return [True] * len(entries)
+
+        now = now or datetime.now()
+        cutoff = now - timedelta(days=self.keep_days) if self.keep_days > 0 else None
+        first_recent = len(entries) - self.keep_last if self.keep_last > 0 else len(entries)
+
+        flags = []
+        for position, entry in enumerate(entries):
+            timestamp = entry.get("timestamp", "")
+            keep = position >= first_recent or timestamp in protected
+            if not keep and cutoff is not None:
+                try:
+                    keep = datetime.fromisoformat(timestamp) >= cutoff
+                except (TypeError, ValueError):
+                    keep = False
+            flags.append(keep)
+        return flags
+
+
+class HistoryCompactor:
+    """按保留策略清理单个项目的生成历史"""
+
+    def __init__(self, data_manager, policy: Optional[RetentionPolicy] = None):
+        self.data_manager = data_manager
+        self.policy = policy or RetentionPolicy.from_config()
+
+    def _protected_timestamps(self) -> Dict[str, Set[str]]:
+        """找出与当前正文内容一致的草稿时间戳，同一轮生成的批评和修正记录共享该时间戳"""
+        protected = {}
+        novel_chapters = self.data_manager.read_novel_chapters()
+        for chapter_key, chapter in novel_chapters.items():
+            content = chapter.get("content") if isinstance(chapter, dict) else None
+            if not content:
+                continue
+            for kind in self.data_manager.DRAFT_KINDS:
+                for entry in reversed(self.data_manager.read_drafts(kind, chapter_key)):
+                    if entry.get("content") == content:
+                        protected.setdefault(chapter_key, set()).add(entry.get("timestamp", ""))
+                        break
+        return protected
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, Tuple[int, int]]:
+        """
+        执行清理
+
+        Returns:
+            Dict[str, Tuple[int, int]]: 每类历史清理前后的记录数量
+        """
+        if not self.policy.is_active:
+            return {}
+
+        self.data_manager.auto_snapshot("清理生成历史前")
+        protected = self._protected_timestamps()
+
+        def select(chapter_key, entries):
+            return self.policy.select(entries, protected.get(chapter_key, set()), now)
+
+        return {kind: self.data_manager.compact_history(kind, select) for kind in HISTORY_KINDS}
+
+    def start_background(self, callback: Optional[Callable[[Dict], None]] = None) -> threading.Thread:
+        """在后台线程中执行清理，完成后调用callback"""
+        def worker():
+            result = self.compact()
+            if callback:
+                callback(result)
+
+        thread = threading.Thread(target=worker, name="history-compactor", daemon=True)
+        thread.start()
+        return thread
+
+
+def format_compaction_result(result: Dict[str, Tuple[int, int]]) -> str:
+    """格式化清理结果"""
+    if not result:
+        return "保留策略未启用，未清理任何记录"
+    lines = [f"{kind}: {before} → {after} 条" for kind, (before, after) in result.items()]
+    return "\n".join(lines)
+
+
+def main():
+    """命令行入口：清理所有项目或指定项目"""
+    from data_manager import DataManager
+    from project_manager import project_manager
+    from ui_utils import ui
+
+    names = sys.argv[1:] or [p.name for p in project_manager.list_projects()]
+    if not names:
+        ui.print_warning("未找到任何项目")
+        return
+
+    for name in names:
+        project_path = project_manager.get_project_path(name)
+        if not project_path:
+            ui.print_error(f"项目 '{name}' 不存在")
+            continue
+        result = HistoryCompactor(DataManager(project_path)).compact()
+        ui.print_success(f"已清理项目: {name}")
+        ui.print_info(format_compaction_result(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+JSON编解码层 - 优先使用 orjson / msgspec，未安装时回退到标准库 json
+
+所有输出均为UTF-8字节串，中文不做转义。支持两种格式：
+- 紧凑格式：无多余空白，适合体积大、由程序生成的文件（正文、概要、历史记录）
+- 缩进格式：两个空格缩进，适合需要人工查看或编辑的小文件
+
+可通过环境变量 JSON_CODEC=orjson|msgspec|json 强制指定实现。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+PRETTY_INDENT = 2
+
+
+def _select_backend(preferred: str) -> str:
+    """根据偏好和已安装的库选择实现"""
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+    if preferred in available and available[preferred]:
+        return preferred
+    for name in ("orjson", "msgspec", "json"):
+        if available[name]:
+            return name
+    return "json"
+
+
+BACKEND = _select_backend(os.getenv("JSON_CODEC", "auto").lower())
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """序列化为UTF-8字节串"""
+    if BACKEND == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if BACKEND == "msgspec":
+        encoded = msgspec.json.encode(obj)
+        return msgspec.json.format(encoded, indent=PRETTY_INDENT) if pretty else encoded
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=PRETTY_INDENT)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    return text.encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """反序列化，格式错误时抛出ValueError"""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def load_file(path: Path) -> Any:
+    """读取并解析JSON文件"""
+    with Path(path).open('rb') as f:
+        return loads(f.read())
+
+
+def dump_file(path: Path, obj: Any, pretty: bool = True) -> None:
+    """序列化并写入JSON文件"""
+    with Path(path).open('wb') as f:
+        f.write(dumps(obj, pretty))
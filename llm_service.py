@@ -1,14 +1,22 @@
+import copy
 import os
 import json
 import re
 import httpx
 import asyncio
 from datetime import datetime
-from pathlib import Path
 from openai import OpenAI, APIStatusError, AsyncOpenAI
 from openai.types.chat import ChatCompletion
 from config import API_CONFIG, AI_CONFIG, GENERATION_CONFIG, PROXY_CONFIG, validate_config
 from retry_utils import retry_manager, RetryError
+from chapter_ids import legacy_chapter_id
+from persistence_queue import persistence_queue
+from prompt_layers import prompt_resolver
+
+def _chapter_key(chapter, chapter_num):
+    """细纲章节在概要和正文中的键（稳定ID，缺少时使用旧的位置键）"""
+    return chapter.get("id") or legacy_chapter_id(chapter_num)
+
 
 class LLMService:
     """AI大语言模型服务类，封装所有AI交互逻辑"""
@@ -21,59 +29,35 @@ class LLMService:
         self._initialize_clients()
     
     def _load_prompts(self):
-        """加载提示词配置"""
-        try:
-            # 获取当前项目的prompts.json路径
-            prompts_path = self._get_prompts_path()
-            with open(prompts_path, 'r', encoding='utf-8') as f:
-                self.prompts = json.load(f)
-        except FileNotFoundError:
-            # 静默处理文件未找到，避免在启动时显示错误信息
-            self.prompts = {}
-        except json.JSONDecodeError as e:
-            # 静默处理JSON格式错误，避免在启动时显示错误信息
-            self.prompts = {}
+        """加载提示词配置（内置默认 → 全局 → 当前项目的覆盖）"""
+        self.prompts = prompt_resolver.resolve(self._get_project_path())
     
-    def _get_prompts_path(self):
-        """获取当前项目的prompts.json路径"""
+    def _get_project_path(self):
+        """获取当前项目的路径，单项目模式下返回None"""
         try:
             # 导入放在方法内部，避免循环导入
             from project_data_manager import project_data_manager
             data_manager = project_data_manager.get_data_manager()
             
             if data_manager and data_manager.project_path:
-                # 多项目模式：使用项目路径下的prompts.json
-                prompts_path = data_manager.project_path / 'prompts.json'
-                
-                # 如果项目路径下不存在prompts.json，从根目录复制默认的
-                if not prompts_path.exists():
-                    import shutil
-                    # 优先从根目录的 prompts.json 复制
-                    root_prompts = Path('prompts.json')
-                    if root_prompts.exists():
-                        shutil.copy2(root_prompts, prompts_path)
-                        print(f"已为项目复制默认prompts.json到: {prompts_path}")
-                    else:
-                        # 如果根目录也没有，尝试从默认模板复制
-                        default_prompts = Path('prompts.default.json')
-                        if default_prompts.exists():
-                            shutil.copy2(default_prompts, prompts_path)
-                            print(f"已为项目复制默认prompts模板到: {prompts_path}")
-                
-                return prompts_path
+                return data_manager.project_path
         except ImportError:
             # 在某些测试或启动场景下，可能无法导入 project_data_manager
             pass
         except Exception as e:
             # 记录错误，但不影响核心逻辑
-            print(f"获取项目特定prompts路径时出错: {e}，将使用默认路径。")
-
-        # 单项目模式或回退方案：使用根目录的prompts.json
-        return Path('prompts.json')
+            print(f"获取当前项目路径时出错: {e}，将只使用全局提示词。")
+        return None
     
     def reload_prompts(self):
         """重新加载prompts配置，用于项目切换时"""
         self._load_prompts()
+
+    def for_project(self, project_path):
+        """与本实例共用客户端、使用指定项目提示词的服务实例（同时为多个项目生成时使用）"""
+        service = copy.copy(self)
+        service.prompts = prompt_resolver.resolve(project_path)
+        return service
     
     def _get_prompt(self, prompt_type, user_prompt="", **kwargs):
         """获取格式化的提示词"""
@@ -146,72 +130,46 @@ class LLMService:
         """检查异步AI服务是否可用"""
         return self.async_client is not None
     
-    def _save_critique_data(self, chapter_num, chapter_title, critique_data, timestamp=None):
-        """保存批评数据到文件"""
+    def _current_data_manager(self):
+        """当前项目的数据管理器"""
+        from project_data_manager import project_data_manager
+        return project_data_manager.get_data_manager()
+    
+    def _save_critique_data(self, chapter_num, chapter_title, critique_data, timestamp=None, data_manager=None):
+        """保存批评数据到文件（data_manager为None时保存到当前项目）"""
         if not GENERATION_CONFIG.get('save_intermediate_data', True):
             return
         
         try:
-            from project_data_manager import project_data_manager
-            data_manager = project_data_manager.get_data_manager()
+            data_manager = data_manager or self._current_data_manager()
             
             if timestamp is None:
                 timestamp = datetime.now().isoformat()
             
-            # 读取现有的critiques数据
-            critiques_path = data_manager.get_path("critiques")
-            if critiques_path.exists():
-                with open(critiques_path, 'r', encoding='utf-8') as f:
-                    critiques = json.load(f)
-            else:
-                critiques = {}
-            
-            # 添加新的critique数据
-            chapter_key = f"chapter_{chapter_num}"
-            if chapter_key not in critiques:
-                critiques[chapter_key] = []
-            
             critique_entry = {
                 "timestamp": timestamp,
                 "chapter_title": chapter_title,
                 "critique_data": critique_data
             }
             
-            critiques[chapter_key].append(critique_entry)
-            
-            # 保存到文件
-            critiques_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(critiques_path, 'w', encoding='utf-8') as f:
-                json.dump(critiques, f, ensure_ascii=False, indent=2)
+            # 追加到critiques历史
+            data_manager.append_history_entry("critiques", chapter_num, critique_entry)
                 
         except Exception as e:
             print(f"保存critique数据时出错: {e}")
     
-    def _save_refinement_history(self, chapter_num, chapter_title, initial_content, refined_content, critique_data, timestamp=None):
+    def _save_refinement_history(self, chapter_num, chapter_title, initial_content, refined_content, critique_data, timestamp=None, data_manager=None):
         """保存修正历史到文件（只保存摘要信息，不保存完整内容）"""
         if not GENERATION_CONFIG.get('save_intermediate_data', True):
             return
         
         try:
-            from project_data_manager import project_data_manager
-            data_manager = project_data_manager.get_data_manager()
+            data_manager = data_manager or self._current_data_manager()
             
             if timestamp is None:
                 timestamp = datetime.now().isoformat()
             
-            # 读取现有的refinement历史数据
-            history_path = data_manager.get_path("refinement_history")
-            if history_path.exists():
-                with open(history_path, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-            else:
-                history = {}
-            
-            # 添加新的refinement记录（只保存摘要）
-            chapter_key = f"chapter_{chapter_num}"
-            if chapter_key not in history:
-                history[chapter_key] = []
-            
+            # 只保存摘要信息
             refinement_entry = {
                 "timestamp": timestamp,
                 "chapter_title": chapter_title,
@@ -222,12 +180,8 @@ class LLMService:
                 "improvement_percentage": round(((len(refined_content) - len(initial_content)) / len(initial_content)) * 100, 2) if initial_content else 0
             }
             
-            history[chapter_key].append(refinement_entry)
-            
-            # 保存到文件
-            history_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(history_path, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
+            # 追加到refinement历史
+            data_manager.append_history_entry("refinement_history", chapter_num, refinement_entry)
                 
         except Exception as e:
             print(f"保存refinement历史时出错: {e}")
@@ -249,31 +203,17 @@ class LLMService:
         except:
             return {"raw_critique": str(critique_data)[:200] + "..." if len(str(critique_data)) > 200 else str(critique_data)}
     
-    def _save_initial_draft(self, chapter_num, chapter_title, content, timestamp=None):
+    def _save_initial_draft(self, chapter_num, chapter_title, content, timestamp=None, data_manager=None):
         """保存初稿内容到单独文件"""
         if not GENERATION_CONFIG.get('save_intermediate_data', True):
             return
         
         try:
-            from project_data_manager import project_data_manager
-            data_manager = project_data_manager.get_data_manager()
+            data_manager = data_manager or self._current_data_manager()
             
             if timestamp is None:
                 timestamp = datetime.now().isoformat()
             
-            # 读取现有的初稿数据
-            drafts_path = data_manager.get_path("initial_drafts")
-            if drafts_path.exists():
-                with open(drafts_path, 'r', encoding='utf-8') as f:
-                    drafts = json.load(f)
-            else:
-                drafts = {}
-            
-            # 添加新的初稿数据
-            chapter_key = f"chapter_{chapter_num}"
-            if chapter_key not in drafts:
-                drafts[chapter_key] = []
-            
             draft_entry = {
                 "timestamp": timestamp,
                 "chapter_title": chapter_title,
@@ -281,41 +221,23 @@ class LLMService:
                 "word_count": len(content) if content else 0
             }
             
-            drafts[chapter_key].append(draft_entry)
-            
-            # 保存到文件
-            drafts_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(drafts_path, 'w', encoding='utf-8') as f:
-                json.dump(drafts, f, ensure_ascii=False, indent=2)
+            # 追加到草稿归档（默认压缩存储）
+            data_manager.append_draft("initial_drafts", chapter_num, draft_entry)
                 
         except Exception as e:
             print(f"保存初稿数据时出错: {e}")
     
-    def _save_refined_draft(self, chapter_num, chapter_title, content, timestamp=None):
+    def _save_refined_draft(self, chapter_num, chapter_title, content, timestamp=None, data_manager=None):
         """保存修订内容到单独文件"""
         if not GENERATION_CONFIG.get('save_intermediate_data', True):
             return
         
         try:
-            from project_data_manager import project_data_manager
-            data_manager = project_data_manager.get_data_manager()
+            data_manager = data_manager or self._current_data_manager()
             
             if timestamp is None:
                 timestamp = datetime.now().isoformat()
             
-            # 读取现有的修订数据
-            refined_path = data_manager.get_path("refined_drafts")
-            if refined_path.exists():
-                with open(refined_path, 'r', encoding='utf-8') as f:
-                    refined = json.load(f)
-            else:
-                refined = {}
-            
-            # 添加新的修订数据
-            chapter_key = f"chapter_{chapter_num}"
-            if chapter_key not in refined:
-                refined[chapter_key] = []
-            
             refined_entry = {
                 "timestamp": timestamp,
                 "chapter_title": chapter_title,
@@ -323,12 +245,8 @@ class LLMService:
                 "word_count": len(content) if content else 0
             }
             
-            refined[chapter_key].append(refined_entry)
-            
-            # 保存到文件
-            refined_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(refined_path, 'w', encoding='utf-8') as f:
-                json.dump(refined, f, ensure_ascii=False, indent=2)
+            # 追加到草稿归档（默认压缩存储）
+            data_manager.append_draft("refined_drafts", chapter_num, refined_entry)
                 
         except Exception as e:
             print(f"保存修订数据时出错: {e}")
@@ -960,7 +878,7 @@ class LLMService:
                     if progress_callback:
                         progress_callback(f"第{i}章概要生成异常: {summary}")
                 elif summary:
-                    results[f"chapter_{i}"] = {
+                    results[_chapter_key(chapter, i)] = {
                         "title": chapter.get('title', f'第{i}章'),
                         "summary": summary
                     }
@@ -986,10 +904,9 @@ class LLMService:
         
         # 创建所有任务
         tasks = []
-        for i in range(1, len(chapters) + 1):
-            chapter_key = f"chapter_{i}"
+        for i, chapter in enumerate(chapters, 1):
+            chapter_key = _chapter_key(chapter, i)
             if chapter_key in summaries:
-                chapter = chapters[i-1]
                 summary_info = summaries[chapter_key]
                 task = self.generate_novel_chapter_async(chapter, summary_info, i, context_info, user_prompt, progress_callback)
                 tasks.append((i, chapter, task))
@@ -1015,7 +932,7 @@ class LLMService:
                     if progress_callback:
                         progress_callback(f"第{i}章正文生成异常: {content}")
                 elif content:
-                    results[f"chapter_{i}"] = {
+                    results[_chapter_key(chapter, i)] = {
                         "title": chapter.get('title', f'第{i}章'),
                         "content": content,
                         "word_count": len(content)
@@ -1042,10 +959,9 @@ class LLMService:
         
         # 创建所有任务
         tasks = []
-        for i in range(1, len(chapters) + 1):
-            chapter_key = f"chapter_{i}"
+        for i, chapter in enumerate(chapters, 1):
+            chapter_key = _chapter_key(chapter, i)
             if chapter_key in summaries:
-                chapter = chapters[i-1]
                 summary_info = summaries[chapter_key]
                 task = self.generate_novel_chapter_with_refinement_async(
                     chapter, summary_info, i, context_info, user_prompt, progress_callback
@@ -1073,7 +989,7 @@ class LLMService:
                     if progress_callback:
                         progress_callback(f"第{i}章智能生成异常: {content}")
                 elif content:
-                    results[f"chapter_{i}"] = {
+                    results[_chapter_key(chapter, i)] = {
                         "title": chapter.get('title', f'第{i}章'),
                         "content": content,
                         "word_count": len(content)
@@ -1091,6 +1007,8 @@ class LLMService:
             # 如果整体失败，将所有待生成的章节标记为失败
             failed_chapters = [i for i, _, _ in tasks]
         
+        # 返回前确保草稿和批评记录已全部写入
+        await persistence_queue.flush_async()
         return results, failed_chapters
     
     def generate_novel_critique(self, chapter_title, chapter_num, chapter_content, context_info, user_prompt=""):
@@ -1352,6 +1270,9 @@ class LLMService:
         """异步生成小说章节正文，包含反思修正流程"""
         timestamp = datetime.now().isoformat()
         chapter_title = chapter.get('title', f'第{chapter_num}章')
+        # 中间数据写入开始生成时的项目和章节：写入在队列中排队期间用户可能已切换项目或调整细纲
+        data_manager = self._current_data_manager()
+        chapter_key = _chapter_key(chapter, chapter_num)
         
         # 首先生成初稿
         if progress_callback:
@@ -1362,8 +1283,8 @@ class LLMService:
         if not initial_content:
             return None
         
-        # 保存初稿内容到单独文件
-        self._save_initial_draft(chapter_num, chapter_title, initial_content, timestamp)
+        # 保存初稿内容到单独文件（由持久化队列的写入线程执行，不阻塞事件循环）
+        await persistence_queue.submit_async(self._save_initial_draft, chapter_key, chapter_title, initial_content, timestamp, data_manager=data_manager)
         
         # 检查是否启用反思修正
         if not GENERATION_CONFIG.get('enable_refinement', True):
@@ -1383,10 +1304,10 @@ class LLMService:
         # 保存critique数据
         try:
             critique_data = json.loads(critique) if isinstance(critique, str) else critique
-            self._save_critique_data(chapter_num, chapter_title, critique_data, timestamp)
         except:
             # 如果critique不是有效的JSON，保存原始文本
-            self._save_critique_data(chapter_num, chapter_title, {"raw_critique": critique}, timestamp)
+            critique_data = {"raw_critique": critique}
+        await persistence_queue.submit_async(self._save_critique_data, chapter_key, chapter_title, critique_data, timestamp, data_manager=data_manager)
         
         # 显示批评反馈（如果配置允许）
         if GENERATION_CONFIG.get('show_critique_to_user', True):
@@ -1422,7 +1343,7 @@ class LLMService:
             return initial_content
         
         # 保存修订内容到单独文件
-        self._save_refined_draft(chapter_num, chapter_title, refined_content, timestamp)
+        await persistence_queue.submit_async(self._save_refined_draft, chapter_key, chapter_title, refined_content, timestamp, data_manager=data_manager)
         
         # 保存refinement历史（不再保存完整内容，只保存摘要）
         try:
@@ -1430,7 +1351,10 @@ class LLMService:
         except:
             critique_data = {"raw_critique": critique}
         
-        self._save_refinement_history(chapter_num, chapter_title, initial_content, refined_content, critique_data, timestamp)
+        await persistence_queue.submit_async(
+            self._save_refinement_history, chapter_key, chapter_title, initial_content, refined_content, critique_data, timestamp,
+            data_manager=data_manager
+        )
         
         if progress_callback:
             progress_callback(f"第{chapter_num}章：反思修正流程完成")
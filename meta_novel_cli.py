@@ -11,6 +11,14 @@ def main():
     # 设置优雅退出处理
     setup_graceful_exit()
     
+    # 在后台把所有项目升级到最新数据格式，不阻塞启动（未迁移的文件在首次读取时也会按需迁移）
+    from project_manager import project_manager
+    from schema_migrations import start_background_migration
+    start_background_migration([p.path for p in project_manager.list_projects()])
+    
+    # 监视当前项目文件，其他进程或编辑器修改后自动刷新缓存和提示词
+    project_data_manager.start_watching()
+    
     try:
         while True:
             console.clear()
@@ -29,6 +37,7 @@ def main():
             # 主菜单
             menu_options = [
                 "项目管理",
+                "全文搜索",
                 "系统设置", # This will be wired up later
                 "退出"
             ]
@@ -39,6 +48,9 @@ def main():
             if choice == '1':
                 handle_project_management()
             elif choice == '2':
+                from search_ui import handle_full_text_search
+                handle_full_text_search()
+            elif choice == '3':
                 # This will be replaced by a call to settings_ui.py
                 from settings_ui import handle_system_settings
                 handle_system_settings()
@@ -1,20 +1,51 @@
 #!/usr/bin/env python3
 """
 数据迁移脚本：从单项目模式迁移到多项目模式
+
+每个旧版数据目录（包含 meta/ 和 meta_backup/）迁移为一个项目：
+- 多个目录的所有文件在线程池中并行复制
+- 复制时计算SHA-256，写入后重新读取目标文件比对，校验通过才改名为正式文件
+- 已校验的文件记录在项目目录的迁移日志中，中断后再次运行只复制尚未完成的文件
+- 旧快照中互为硬链接的文件只复制一次，目标中同样以硬链接保存
+- 结束时报告每个目录的文件数、字节数和吞吐量
+
+用法:
+    python migrate_to_multi_project.py                 # 交互式迁移当前目录下的旧数据
+    python migrate_to_multi_project.py DIR [DIR ...]   # 批量迁移多个旧版数据目录
+        [--workers N] [--report report.json]
 """
 
+import argparse
+import hashlib
+import json
 import os
 import shutil
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from datetime import datetime
-from project_manager import project_manager
-from ui_utils import ui
+from typing import Dict, List, Optional, Tuple
+from rich.table import Table
+from project_manager import project_manager, ProjectManager
+from snapshot_manager import EXCLUDED_NAMES, EXCLUDED_SUFFIXES
+from ui_utils import ui, console
+
+LEGACY_DIRS = ("meta", "meta_backup")
+JOURNAL_NAME = ".migration.json"
+CHUNK_SIZE = 1024 * 1024
+# 每记录这么多个文件保存一次迁移日志
+JOURNAL_FLUSH_EVERY = 64
 
-def check_legacy_data():
+
+class MigrationError(Exception):
+    """文件复制后校验失败"""
+
+
+def check_legacy_data(root: Path = Path(".")):
     """检查是否存在旧版本的数据"""
-    legacy_meta_dir = Path("meta")
-    legacy_backup_dir = Path("meta_backup")
+    legacy_meta_dir = Path(root) / "meta"
+    legacy_backup_dir = Path(root) / "meta_backup"
     
     has_legacy_data = False
     legacy_files = []
@@ -27,9 +58,9 @@ def check_legacy_data():
     
     return has_legacy_data, legacy_files, legacy_meta_dir, legacy_backup_dir
 
-def get_legacy_project_name():
+def get_legacy_project_name(root: Path = Path(".")):
     """从旧数据中获取项目名称"""
-    theme_file = Path("meta/theme_one_line.json")
+    theme_file = Path(root) / "meta" / "theme_one_line.json"
     
     if theme_file.exists():
         try:
@@ -62,18 +93,358 @@ def get_legacy_project_name():
     
     return "我的小说"
 
+# ===== 迁移引擎 =====
+@dataclass
+class MigrationResult:
+    """一个旧版数据目录的迁移结果"""
+    source: str
+    project: str = ""
+    status: str = "pending"  # done / already / failed
+    files: int = 0
+    copied: int = 0
+    linked: int = 0
+    resumed: int = 0  # 上次运行已校验，本次跳过
+    bytes_copied: int = 0
+    failed: List[str] = field(default_factory=list)
+    error: str = ""
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **counts):
+        """多个线程同时累加计数"""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def add_failure(self, message: str):
+        with self._lock:
+            self.failed.append(message)
+
+
+@dataclass
+class MigrationReport:
+    """一次迁移的汇总"""
+    results: List[MigrationResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    workers: int = 0
+
+    @property
+    def bytes_copied(self) -> int:
+        return sum(r.bytes_copied for r in self.results)
+
+    @property
+    def files_copied(self) -> int:
+        return sum(r.copied + r.linked for r in self.results)
+
+    @property
+    def ok(self) -> bool:
+        return all(r.status in ("done", "already") for r in self.results)
+
+    def throughput(self) -> Tuple[float, float]:
+        """(MB/s, 文件/s)"""
+        if not self.elapsed:
+            return 0.0, 0.0
+        return self.bytes_copied / (1024 * 1024) / self.elapsed, self.files_copied / self.elapsed
+
+    def to_dict(self) -> Dict:
+        mb_per_s, files_per_s = self.throughput()
+        return {
+            "elapsed": round(self.elapsed, 3),
+            "workers": self.workers,
+            "bytes_copied": self.bytes_copied,
+            "files_copied": self.files_copied,
+            "mb_per_second": round(mb_per_s, 2),
+            "files_per_second": round(files_per_s, 2),
+            "results": [
+                {f.name: getattr(r, f.name) for f in fields(r) if not f.name.startswith("_")} for r in self.results
+            ],
+        }
+
+
+def legacy_files(root: Path) -> List[str]:
+    """旧版数据目录中需要迁移的文件（posix相对路径），不含锁和临时文件"""
+    files = []
+    for directory in LEGACY_DIRS:
+        base = Path(root) / directory
+        if not base.is_dir():
+            continue
+        for path in base.rglob("*"):
+            if path.is_file() and path.name not in EXCLUDED_NAMES and not path.name.endswith(EXCLUDED_SUFFIXES):
+                files.append(path.relative_to(root).as_posix())
+    return sorted(files)
+
+
+def _hash_file(path: Path) -> Tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+
+def copy_verified(source: Path, target: Path) -> Tuple[int, str]:
+    """
+    复制文件并校验：边复制边计算SHA-256，写入后重新读取目标比对
+
+    Returns:
+        (字节数, SHA-256)
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + ".tmp")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+                dst.write(chunk)
+        if _hash_file(tmp_path) != (size, digest.hexdigest()):
+            raise MigrationError(f"校验失败: {source}")
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return size, digest.hexdigest()
+
+
+class _Journal:
+    """项目目录中的迁移日志：源目录及每个已校验文件的大小、修改时间和哈希"""
+
+    def __init__(self, project_path: Path, source: str):
+        self.path = project_path / JOURNAL_NAME
+        self.data = self.read(project_path)
+        if self.data.get("source") != source:
+            self.data = {"source": source, "completed": False, "files": {}}
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @staticmethod
+    def read(project_path: Path) -> Dict:
+        try:
+            with open(Path(project_path) / JOURNAL_NAME, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def is_verified(self, rel: str, source_stat: os.stat_result, target: Path) -> bool:
+        """文件上次已校验且源文件和目标文件都没有变化"""
+        entry = self.data["files"].get(rel)
+        if not entry or entry["size"] != source_stat.st_size or entry["mtime_ns"] != source_stat.st_mtime_ns:
+            return False
+        try:
+            return target.stat().st_size == entry["size"]
+        except OSError:
+            return False
+
+    def record(self, rel: str, source_stat: os.stat_result, digest: str):
+        with self._lock:
+            self.data["files"][rel] = {
+                "size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns, "sha256": digest
+            }
+            self._pending += 1
+            if self._pending >= JOURNAL_FLUSH_EVERY:
+                self._save_locked()
+
+    def save(self, completed: bool = False):
+        with self._lock:
+            self.data["completed"] = completed
+            self._save_locked()
+
+    def _save_locked(self):
+        # 先让已复制的文件落盘，日志中记录的文件在断电后也一定完整；
+        # 比每个文件单独fsync快得多
+        if hasattr(os, "sync"):
+            os.sync()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+
+
+class MigrationEngine:
+    """把多个旧版数据目录并行迁移为项目"""
+
+    def __init__(self, manager: Optional[ProjectManager] = None, workers: Optional[int] = None):
+        self.manager = manager or project_manager
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+
+    def prepare_project(self, root: Path, name: str) -> Tuple[str, Path, bool]:
+        """
+        为旧版数据目录找到或创建目标项目
+
+        已有项目的迁移日志指向同一源目录时继续使用该项目（续传），
+        名称被其他项目占用时依次尝试 名称-2、名称-3 ...
+
+        Returns:
+            (项目名称, 项目目录, 是否为继续上次的迁移)
+        """
+        source = str(Path(root).resolve())
+        base_name = self.manager._clean_project_name(name.strip())
+        if not base_name:
+            raise ValueError(f"无效的项目名称: {name}")
+        for i in range(1, 1000):
+            candidate = base_name if i == 1 else f"{base_name}-{i}"
+            path = self.manager.projects_dir / candidate
+            if path.exists():
+                if _Journal.read(path).get("source") == source:
+                    return candidate, path, True
+                continue
+            if not self.manager.create_project(candidate, name.strip(), "从旧版本迁移的项目"):
+                raise OSError(f"创建项目 '{candidate}' 失败")
+            return candidate, path, False
+        raise OSError(f"没有可用的项目名称: {base_name}")
+
+    def migrate(self, sources: List[Tuple[Path, str]]) -> MigrationReport:
+        """
+        迁移多个旧版数据目录
+
+        Args:
+            sources: [(旧版数据目录, 项目名称)]
+
+        Returns:
+            迁移报告
+        """
+        report = MigrationReport(workers=self.workers)
+        started = time.perf_counter()
+        jobs: List[_FileJob] = []
+        journals = []
+        for root, name in sources:
+            root = Path(root)
+            result = MigrationResult(source=str(root))
+            report.results.append(result)
+            try:
+                result.project, project_path, _ = self.prepare_project(root, name)
+                journal = _Journal(project_path, str(root.resolve()))
+                if journal.data.get("completed"):
+                    result.status = "already"
+                    continue
+                # 先写入日志，中断后再次运行能认出这个项目
+                journal.save()
+                journals.append((result, journal))
+                jobs.extend(self._plan(root, project_path, result, journal))
+            except (OSError, ValueError) as e:
+                result.status = "failed"
+                result.error = str(e)
+
+        # 所有目录的文件一起并行复制；互为硬链接的文件等第一个复制完成后再链接
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._copy, [job for job in jobs if job.link_rel is None]))
+        for job in jobs:
+            if job.link_rel is not None:
+                self._link(job)
+
+        for result, journal in journals:
+            completed = not result.failed
+            journal.save(completed=completed)
+            result.status = "done" if completed else "failed"
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _plan(root: Path, project_path: Path, result: MigrationResult, journal: "_Journal") -> List["_FileJob"]:
+        """列出目录中的文件；同一inode的文件只复制第一个，其余记为硬链接"""
+        jobs = []
+        first_by_inode = {}
+        for rel in legacy_files(root):
+            source = root / rel
+            stat = source.stat()
+            link_rel = None
+            if stat.st_nlink > 1:
+                inode = (stat.st_dev, stat.st_ino)
+                link_rel = first_by_inode.setdefault(inode, rel)
+                if link_rel == rel:
+                    link_rel = None
+            jobs.append(_FileJob(result, journal, project_path, rel, source, project_path / rel, link_rel))
+        result.files = len(jobs)
+        return jobs
+
+    def _copy(self, job: "_FileJob"):
+        try:
+            source_stat = job.source.stat()
+            if job.journal.is_verified(job.rel, source_stat, job.target):
+                job.result.add(resumed=1)
+                return
+            size, digest = copy_verified(job.source, job.target)
+            job.journal.record(job.rel, source_stat, digest)
+            job.result.add(copied=1, bytes_copied=size)
+        except (OSError, MigrationError) as e:
+            job.result.add_failure(f"{job.rel}: {e}")
+
+    def _link(self, job: "_FileJob"):
+        """在目标中创建硬链接（文件系统不支持时复制）"""
+        try:
+            source_stat = job.source.stat()
+            if job.journal.is_verified(job.rel, source_stat, job.target):
+                job.result.add(resumed=1)
+                return
+            job.target.parent.mkdir(parents=True, exist_ok=True)
+            job.target.unlink(missing_ok=True)
+            try:
+                os.link(job.project_path / job.link_rel, job.target)
+                digest = job.journal.data["files"].get(job.link_rel, {}).get("sha256", "")
+                job.result.add(linked=1)
+            except OSError:
+                size, digest = copy_verified(job.source, job.target)
+                job.result.add(copied=1, bytes_copied=size)
+            job.journal.record(job.rel, source_stat, digest)
+        except (OSError, MigrationError) as e:
+            job.result.add_failure(f"{job.rel}: {e}")
+
+
+@dataclass
+class _FileJob:
+    """一个待迁移的文件"""
+    result: MigrationResult
+    journal: _Journal
+    project_path: Path
+    rel: str
+    source: Path
+    target: Path
+    link_rel: Optional[str] = None  # 同一inode中第一个文件的相对路径
+
+
+def print_migration_report(report: MigrationReport):
+    """以表格显示迁移结果和吞吐量"""
+    mb_per_s, files_per_s = report.throughput()
+    table = Table(
+        title="📦 迁移结果",
+        caption=(f"{report.files_copied} 个文件，{report.bytes_copied / (1024 * 1024):.1f} MB，"
+                 f"耗时 {report.elapsed:.2f}s（{mb_per_s:.1f} MB/s，{files_per_s:.0f} 文件/s，{report.workers} 线程）")
+    )
+    table.add_column("源目录", style="cyan")
+    table.add_column("项目", style="green")
+    table.add_column("状态", style="magenta")
+    table.add_column("文件", style="white")
+    table.add_column("复制 / 链接 / 续传", style="yellow")
+    labels = {"done": "完成", "already": "此前已完成", "failed": "失败"}
+    for r in report.results:
+        status = labels.get(r.status, r.status)
+        if r.failed:
+            status = f"[red]{status}（{len(r.failed)} 个文件失败）[/red]"
+        elif r.error:
+            status = f"[red]{status}: {r.error}[/red]"
+        table.add_row(r.source, r.project, status, str(r.files), f"{r.copied} / {r.linked} / {r.resumed}")
+    console.print(table)
+    for r in report.results:
+        for failure in r.failed[:5]:
+            ui.print_error(f"{r.source}: {failure}")
+
 def migrate_legacy_data():
-    """迁移旧版本数据到多项目模式"""
+    """迁移当前目录下的旧版本数据到多项目模式"""
     ui.print_info("🔄 检查是否存在旧版本数据...")
     
-    has_legacy, legacy_files, legacy_meta_dir, legacy_backup_dir = check_legacy_data()
+    has_legacy, legacy_files_found, legacy_meta_dir, legacy_backup_dir = check_legacy_data()
     
     if not has_legacy:
         ui.print_success("✅ 未发现旧版本数据，无需迁移")
         return True
     
-    ui.print_info(f"📁 发现旧版本数据文件 {len(legacy_files)} 个:")
-    for file_path in legacy_files:
+    ui.print_info(f"📁 发现旧版本数据文件 {len(legacy_files_found)} 个:")
+    for file_path in legacy_files_found:
         ui.print_info(f"   - {file_path}")
     
     # 获取项目名称
@@ -100,76 +471,79 @@ def migrate_legacy_data():
     
     final_name = final_name.strip()
     
-    # 创建新项目
-    ui.print_info(f"🏗️ 创建新项目: {final_name}")
-    if not project_manager.create_project(final_name, final_name, "从旧版本迁移的项目"):
-        ui.print_error("❌ 创建项目失败")
+    ui.print_info("📂 迁移数据文件并逐个校验...")
+    report = MigrationEngine().migrate([(Path("."), final_name)])
+    print_migration_report(report)
+    result = report.results[0]
+    if not report.ok:
+        ui.print_error("❌ 部分文件迁移失败，再次运行将继续未完成的部分")
         return False
     
-    # 获取项目路径
-    project_path = project_manager.get_project_path(final_name)
-    if not project_path:
-        ui.print_error("❌ 获取项目路径失败")
+    # 设置为活动项目
+    project_manager.set_active_project(result.project)
+    ui.print_success(f"✅ 数据迁移完成！项目 '{result.project}' 已设为活动项目")
+
+    # 询问是否删除旧数据
+    if ui.confirm(
+        "是否删除原始的旧版本数据目录？（建议保留作为备份）",
+        default=False
+    ):
+        ui.print_info("🗑️ 删除旧版本数据...")
+        if legacy_meta_dir.exists():
+            shutil.rmtree(legacy_meta_dir)
+            ui.print_success("   ✅ 已删除旧版本 meta 目录")
+
+        if legacy_backup_dir.exists():
+            shutil.rmtree(legacy_backup_dir)
+            ui.print_success("   ✅ 已删除旧版本 meta_backup 目录")
+    else:
+        ui.print_info("📁 旧版本数据已保留，您可以稍后手动删除")
+
+    return True
+
+def migrate_directories(directories: List[Path], workers: Optional[int] = None,
+                        report_path: Optional[Path] = None) -> bool:
+    """批量迁移多个旧版数据目录（项目名称取自各目录中的小说名）"""
+    sources = []
+    for directory in directories:
+        if not check_legacy_data(directory)[0]:
+            ui.print_warning(f"跳过 {directory}：未发现旧版本数据")
+            continue
+        sources.append((directory, get_legacy_project_name(directory)))
+    if not sources:
         return False
     
-    target_meta_dir = project_path / "meta"
-    target_backup_dir = project_path / "meta_backup"
+    ui.print_info(f"📂 正在迁移 {len(sources)} 个目录...")
+    report = MigrationEngine(workers=workers).migrate(sources)
+    print_migration_report(report)
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
+        ui.print_info(f"迁移报告已写入: {report_path}")
     
-    try:
-        # 迁移数据文件
-        ui.print_info("📂 迁移数据文件...")
-        if legacy_meta_dir.exists():
-            for item in legacy_meta_dir.iterdir():
-                if item.is_file():
-                    target_file = target_meta_dir / item.name
-                    shutil.copy2(item, target_file)
-                    ui.print_success(f"   ✅ 已迁移: {item.name}")
-        
-        # 迁移备份文件
-        if legacy_backup_dir.exists() and legacy_backup_dir.is_dir():
-            ui.print_info("📂 迁移备份文件...")
-            for item in legacy_backup_dir.iterdir():
-                if item.is_file():
-                    target_file = target_backup_dir / item.name
-                    shutil.copy2(item, target_file)
-                    ui.print_success(f"   ✅ 已迁移备份: {item.name}")
-        
-        # 设置为活动项目
-        project_manager.set_active_project(final_name)
-        
-        ui.print_success(f"✅ 数据迁移完成！项目 '{final_name}' 已设为活动项目")
-        
-        # 询问是否删除旧数据
-        if ui.confirm(
-            "是否删除原始的旧版本数据目录？（建议保留作为备份）",
-            default=False
-        ):
-            ui.print_info("🗑️ 删除旧版本数据...")
-            if legacy_meta_dir.exists():
-                shutil.rmtree(legacy_meta_dir)
-                ui.print_success("   ✅ 已删除旧版本 meta 目录")
-            
-            if legacy_backup_dir.exists():
-                shutil.rmtree(legacy_backup_dir)
-                ui.print_success("   ✅ 已删除旧版本 meta_backup 目录")
-        else:
-            ui.print_info("📁 旧版本数据已保留，您可以稍后手动删除")
-        
-        return True
-        
-    except Exception as e:
-        ui.print_error(f"❌ 迁移过程中出现错误: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    if not project_manager.get_active_project():
+        migrated = [r.project for r in report.results if r.status == "done"]
+        if migrated:
+            project_manager.set_active_project(migrated[0])
+    return report.ok
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="把旧版单项目数据迁移为多项目模式")
+    parser.add_argument("directories", nargs="*", type=Path, help="旧版数据目录（包含 meta/），默认当前目录（交互式）")
+    parser.add_argument("--workers", type=int, help="并行复制的线程数")
+    parser.add_argument("--report", type=Path, help="把迁移报告写入JSON文件")
+    args = parser.parse_args()
+
     ui.print_info("🚀 MetaNovel-Engine 数据迁移工具")
     ui.print_info("=" * 50)
     
     try:
-        if migrate_legacy_data():
+        if args.directories:
+            succeeded = migrate_directories(args.directories, args.workers, args.report)
+        else:
+            succeeded = migrate_legacy_data()
+        if succeeded:
             ui.print_success("\n🎉 迁移成功完成！")
             ui.print_info("现在您可以使用 python meta_novel_cli.py 启动程序")
             ui.print_info("程序将自动运行在多项目模式下")
@@ -177,7 +551,7 @@ def main():
             ui.print_warning("\n⚠️ 迁移未完成")
     
     except KeyboardInterrupt:
-        ui.print_warning("\n\n⏹️ 用户中断操作")
+        ui.print_warning("\n\n⏹️ 用户中断操作，再次运行将继续未完成的部分")
     except Exception as e:
         ui.print_error(f"\n💥 迁移过程中出现异常: {e}")
         import traceback
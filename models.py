@@ -2,7 +2,7 @@
 数据模型定义 - 使用Pydantic进行数据验证和类型安全
 """
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 import json
@@ -51,6 +51,7 @@ class Chapter(BaseModel):
         str_strip_whitespace=True
     )
     
+    id: Optional[str] = Field(None, description="稳定的章节ID，概要和正文以此为键")
     title: str = Field(..., description="章节标题")
     outline: str = Field(..., description="章节大纲")
     order: int = Field(..., description="章节序号")
@@ -84,6 +85,13 @@ class NovelChapter(BaseModel):
     word_count: Optional[int] = Field(default=0, description="字数统计")
     created_at: Optional[datetime] = Field(default_factory=datetime.now, description="创建时间")
     updated_at: Optional[datetime] = Field(default_factory=datetime.now, description="更新时间")
+    
+    @model_validator(mode="after")
+    def _derive_word_count(self):
+        """未提供字数时按正文长度计算"""
+        if not self.word_count:
+            self.word_count = len(self.content)
+        return self
 
 
 class ThemeOneLine(BaseModel):
@@ -120,6 +128,13 @@ class StoryOutline(BaseModel):
     outline: str = Field(..., description="故事大纲")
     word_count: Optional[int] = Field(default=0, description="字数统计")
     created_at: Optional[datetime] = Field(default_factory=datetime.now, description="创建时间")
+    
+    @model_validator(mode="after")
+    def _derive_word_count(self):
+        """未提供字数时按大纲长度计算"""
+        if not self.word_count:
+            self.word_count = len(self.outline)
+        return self
 
 
 class ChapterOutline(BaseModel):
@@ -0,0 +1,110 @@
+"""
+异步持久化通道 - 把生成过程中的磁盘写入移出事件循环
+
+异步生成时，草稿、批评和修正历史的保存会读写整个JSON文件或归档；
+直接在事件循环中执行会阻塞其他并发生成的章节。这里用一个有界队列
+和专用的写入线程按提交顺序执行这些写入：
+
+- 队列已满时，同步提交会阻塞、异步提交会在不阻塞事件循环的前提下等待（背压）
+- flush() 等待已提交的写入全部完成；程序退出时自动flush，保证不丢失已提交的数据
+- 写入出错只记录，不影响后续写入
+"""
+
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+from config import PERSISTENCE_CONFIG
+
+_STOP = object()
+
+
+class PersistenceQueue:
+    """有界写入队列及其写入线程"""
+
+    def __init__(self, maxsize: Optional[int] = None):
+        maxsize = PERSISTENCE_CONFIG["queue_size"] if maxsize is None else maxsize
+        self._queue = queue.Queue(maxsize=max(int(maxsize), 1))
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # 最近的写入错误 (任务名, 异常)
+        self.errors: List[Tuple[str, BaseException]] = []
+
+    # ===== 写入线程 =====
+    def _ensure_thread(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                func, args, kwargs = item
+                try:
+                    func(*args, **kwargs)
+                except Exception as e:
+                    self.errors = (self.errors + [(getattr(func, "__name__", str(func)), e)])[-20:]
+            finally:
+                self._queue.task_done()
+
+    # ===== 提交 =====
+    def submit(self, func: Callable[..., Any], *args, **kwargs):
+        """提交一次写入；队列已满时阻塞等待"""
+        self._ensure_thread()
+        self._queue.put((func, args, kwargs))
+
+    async def submit_async(self, func: Callable[..., Any], *args, **kwargs):
+        """在协程中提交写入；队列已满时在工作线程中等待，不阻塞事件循环"""
+        self._ensure_thread()
+        item = (func, args, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.to_thread(self._queue.put, item)
+
+    @property
+    def pending(self) -> int:
+        """尚未完成的写入数"""
+        return self._queue.unfinished_tasks
+
+    # ===== 等待完成 =====
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已提交的写入全部完成
+
+        Returns:
+            bool: 是否在超时前完成
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return self.pending == 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    async def flush_async(self, timeout: Optional[float] = None) -> bool:
+        """在协程中等待已提交的写入全部完成"""
+        return await asyncio.to_thread(self.flush, timeout)
+
+    def shutdown(self, timeout: Optional[float] = None) -> bool:
+        """完成已提交的写入后停止写入线程"""
+        if self._thread is None or not self._thread.is_alive():
+            return self.pending == 0
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+
+# 全局持久化队列实例，程序退出时写完所有已提交的数据
+persistence_queue = PersistenceQueue()
+atexit.register(persistence_queue.shutdown)
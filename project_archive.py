@@ -0,0 +1,288 @@
+"""
+项目归档 - 把整个项目导出为单个归档文件，或从归档导入
+
+归档包含项目目录中的全部数据（meta/ 中的设定、正文和生成历史，提示词覆盖，
+project_info.json），不含 meta_backup/ 快照以及锁、临时文件和可重建的索引。
+最后一项是清单 ``metanovel-archive.json``，记录每个文件的大小和SHA-256。
+
+两种格式：
+- ``.tar.zst``: zstd压缩的tar流（需要安装 zstandard）
+- ``.zip``: 标准库zipfile，无需额外依赖
+
+导出和导入都按块流式读写，计算校验和与读写在同一遍中完成，
+项目再大也不需要整体读入内存。导入先解到项目根目录下的临时目录，
+全部文件通过校验后再原子地改名为项目目录。
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import zipfile
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, Iterator, List, Tuple
+from file_lock import FileLock
+from snapshot_manager import EXCLUDED_NAMES, EXCLUDED_SUFFIXES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_VERSION = 1
+MANIFEST_NAME = "metanovel-archive.json"
+# 不进入归档的目录（快照可以在新机器上重新创建）
+EXCLUDED_DIRS = {"meta_backup"}
+CHUNK_SIZE = 1024 * 1024
+
+_ZIP_MAGIC = b"PK\x03\x04"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class ArchiveError(ValueError):
+    """归档格式错误或校验失败"""
+
+
+def default_format() -> str:
+    """已安装 zstandard 时使用 tar.zst，否则使用 zip"""
+    return "tar.zst" if zstandard is not None else "zip"
+
+
+def _format_of(path: Path) -> str:
+    """按文件名判断导出格式"""
+    name = path.name.lower()
+    if name.endswith(".tar.zst"):
+        return "tar.zst"
+    if name.endswith(".zip"):
+        return "zip"
+    raise ArchiveError(f"不支持的归档格式: {path.name}（可用 .tar.zst 或 .zip）")
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ArchiveError("tar.zst 归档需要安装 zstandard（pip install zstandard），或改用 .zip")
+
+
+def project_files(project_path: Path) -> List[str]:
+    """项目中需要归档的文件（posix相对路径）"""
+    files = []
+    for root, dirs, names in os.walk(project_path):
+        rel_root = Path(root).relative_to(project_path)
+        if rel_root == Path("."):
+            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+        for name in names:
+            if name in EXCLUDED_NAMES or name.endswith(EXCLUDED_SUFFIXES):
+                continue
+            files.append((rel_root / name).as_posix())
+    return sorted(files)
+
+
+def _safe_member_path(name: str) -> str:
+    """拒绝绝对路径和包含 .. 的条目"""
+    path = PurePosixPath(name)
+    if path.is_absolute() or ".." in path.parts or not path.parts or ":" in path.parts[0]:
+        raise ArchiveError(f"归档中包含不安全的路径: {name}")
+    return path.as_posix()
+
+
+class _HashingReader:
+    """读取时同时计算SHA-256和字节数"""
+
+    def __init__(self, f: BinaryIO):
+        self._f = f
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._f.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+
+def _copy_hashed(source: BinaryIO, target: BinaryIO) -> Tuple[int, str]:
+    """分块复制，返回 (字节数, SHA-256)"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+        target.write(chunk)
+    return size, digest.hexdigest()
+
+
+# ===== 导出 =====
+def export_project(project_path: Path, archive_path: Path, project_info: Dict) -> Dict:
+    """
+    导出项目为归档文件
+
+    导出期间持有项目的写入锁，归档中的各文件彼此一致。
+
+    Args:
+        project_path: 项目目录
+        archive_path: 归档文件路径，按扩展名选择格式
+        project_info: 写入清单的项目信息（name、display_name 等）
+
+    Returns:
+        清单
+    """
+    project_path = Path(project_path)
+    archive_path = Path(archive_path)
+    fmt = _format_of(archive_path)
+    if fmt == "tar.zst":
+        _require_zstandard()
+
+    manifest = {
+        "format": "metanovel-project",
+        "version": ARCHIVE_VERSION,
+        "exported_at": datetime.now().isoformat(),
+        "project": project_info,
+        "files": {}
+    }
+    tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with FileLock(project_path / "meta" / ".lock"), open(tmp_path, 'wb') as raw:
+            if fmt == "zip":
+                _write_zip(raw, project_path, manifest)
+            else:
+                with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as compressed:
+                    _write_tar(compressed, project_path, manifest)
+        os.replace(tmp_path, archive_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return manifest
+
+
+def _manifest_bytes(manifest: Dict) -> bytes:
+    return json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _write_zip(raw: BinaryIO, project_path: Path, manifest: Dict):
+    with zipfile.ZipFile(raw, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for rel in project_files(project_path):
+            with open(project_path / rel, 'rb') as source, zf.open(rel, 'w', force_zip64=True) as target:
+                size, digest = _copy_hashed(source, target)
+            manifest["files"][rel] = {"size": size, "sha256": digest}
+        zf.writestr(MANIFEST_NAME, _manifest_bytes(manifest))
+
+
+def _write_tar(stream: BinaryIO, project_path: Path, manifest: Dict):
+    with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tf:
+        for rel in project_files(project_path):
+            source_path = project_path / rel
+            with open(source_path, 'rb') as source:
+                info = tf.gettarinfo(fileobj=source, arcname=rel)
+                reader = _HashingReader(source)
+                tf.addfile(info, reader)
+            manifest["files"][rel] = {"size": reader.size, "sha256": reader.digest.hexdigest()}
+        data = _manifest_bytes(manifest)
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(data)
+        info.mtime = int(datetime.now().timestamp())
+        tf.addfile(info, io.BytesIO(data))
+
+
+# ===== 导入 =====
+def _iter_members(archive_path: Path) -> Iterator[Tuple[str, BinaryIO]]:
+    """按顺序流式读取归档中的文件条目 (名称, 文件对象)"""
+    with open(archive_path, 'rb') as raw:
+        magic = raw.read(4)
+        raw.seek(0)
+        if magic == _ZIP_MAGIC:
+            with zipfile.ZipFile(raw) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    with zf.open(info) as member:
+                        yield info.filename, member
+        elif magic == _ZSTD_MAGIC:
+            _require_zstandard()
+            with zstandard.ZstdDecompressor().stream_reader(raw) as stream, \
+                    tarfile.open(fileobj=stream, mode="r|") as tf:
+                for info in tf:
+                    if info.isdir():
+                        continue
+                    if not info.isfile():
+                        raise ArchiveError(f"归档中包含不支持的条目类型: {info.name}")
+                    yield info.name, tf.extractfile(info)
+        else:
+            raise ArchiveError(f"无法识别的归档文件: {archive_path.name}")
+
+
+def read_manifest(archive_path: Path) -> Dict:
+    """只读取归档的清单（tar.zst需要顺序读到最后）"""
+    for name, member in _iter_members(Path(archive_path)):
+        if name == MANIFEST_NAME:
+            return _parse_manifest(member.read())
+    raise ArchiveError("归档中缺少清单")
+
+
+def _parse_manifest(data: bytes) -> Dict:
+    try:
+        manifest = json.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ArchiveError(f"归档清单格式错误: {e}")
+    if manifest.get("format") != "metanovel-project" or not isinstance(manifest.get("files"), dict):
+        raise ArchiveError("不是MetaNovel项目归档")
+    if manifest.get("version", 0) > ARCHIVE_VERSION:
+        raise ArchiveError(f"归档版本 {manifest.get('version')} 高于当前支持的版本 {ARCHIVE_VERSION}")
+    return manifest
+
+
+def import_project(archive_path: Path, staging_parent: Path,
+                   target_for: Callable[[Dict], Path]) -> Tuple[Dict, Path]:
+    """
+    从归档导入项目
+
+    文件先写入 staging_parent 下的临时目录并逐个计算校验和；清单中的每个文件都存在、
+    大小和SHA-256一致且没有清单以外的文件时，才把临时目录改名为
+    target_for(清单) 返回的目录（该目录不能已存在）。
+
+    Returns:
+        (清单, 项目目录)
+    """
+    archive_path = Path(archive_path)
+    staging = Path(staging_parent) / f".importing-{os.getpid()}-{archive_path.stem}"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    try:
+        manifest = None
+        received = {}
+        for name, member in _iter_members(archive_path):
+            if name == MANIFEST_NAME:
+                manifest = _parse_manifest(member.read())
+                continue
+            rel = _safe_member_path(name)
+            destination = staging / rel
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with open(destination, 'wb') as target:
+                received[rel] = _copy_hashed(member, target)
+
+        if manifest is None:
+            raise ArchiveError("归档中缺少清单")
+        expected = manifest["files"]
+        missing = sorted(set(expected) - set(received))
+        extra = sorted(set(received) - set(expected))
+        if missing or extra:
+            raise ArchiveError(f"归档内容与清单不符（缺少 {missing[:5]}，多出 {extra[:5]}）")
+        corrupted = [
+            rel for rel, (size, digest) in received.items()
+            if size != expected[rel].get("size") or digest != expected[rel].get("sha256")
+        ]
+        if corrupted:
+            raise ArchiveError(f"以下文件校验失败: {', '.join(corrupted[:5])}")
+
+        target_path = Path(target_for(manifest))
+        if target_path.exists():
+            raise FileExistsError(f"目标目录已存在: {target_path}")
+        for directory in ("meta", "meta_backup"):
+            (staging / directory).mkdir(exist_ok=True)
+        os.replace(staging, target_path)
+        return manifest, target_path
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
@@ -1,6 +1,11 @@
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
+from config import POOL_CONFIG, WATCH_CONFIG
 from data_manager import DataManager
+from file_lock import FileLockTimeout
+from file_watcher import FileWatcher, Signature, changed_files, scan_signature
+from prompt_layers import prompt_resolver
 from project_manager import project_manager
 
 class ProjectDataManager:
@@ -9,25 +14,29 @@ class ProjectDataManager:
     def __init__(self):
         self._current_data_manager: Optional[DataManager] = None
         self._current_project: Optional[str] = None
+        # 最近使用的项目的数据管理器（最近使用的在最后），切换回来时直接复用其缓存
+        self._pool: "OrderedDict[Optional[str], DataManager]" = OrderedDict()
+        # 项目离开当前状态时 meta/ 中文件的签名，重新激活时据此找出期间被修改的文件
+        self._parked: Dict[Optional[str], Signature] = {}
+        # 文件变更监视器（start_watching后创建）
+        self._watcher: Optional[FileWatcher] = None
         self.refresh_data_manager()
     
     def refresh_data_manager(self):
         """刷新数据管理器实例"""
         active_project = project_manager.get_active_project()
         
-        # 如果活动项目发生变化或者数据管理器尚未创建，重新创建数据管理器
+        # 如果活动项目发生变化或者数据管理器尚未创建，切换数据管理器
         if active_project != self._current_project or self._current_data_manager is None:
+            if self._current_data_manager is not None:
+                self._park(self._current_project, self._current_data_manager)
             self._current_project = active_project
+            self._current_data_manager = self._activate(active_project)
             
-            if active_project:
-                # 多项目模式：使用项目路径
-                project_path = project_manager.get_project_path(active_project)
-                self._current_data_manager = DataManager(project_path)
-            else:
-                # 单项目模式：使用默认路径
-                self._current_data_manager = DataManager()
+            if self._watcher is not None:
+                self._watch_current_project()
             
-            # 通知LLM服务重新加载prompts
+            # 通知LLM服务重新加载prompts（各层文件未变化时直接使用已合并的缓存）
             try:
                 # 使用延迟导入避免循环引用
                 from llm_service import llm_service
@@ -36,8 +45,106 @@ class ProjectDataManager:
                 # 静默处理错误，避免在启动时显示错误信息
                 pass
     
+    # ===== 数据管理器缓存池 =====
+    def _park(self, project: Optional[str], dm: DataManager):
+        """项目不再是当前项目：记录 meta/ 的签名，数据管理器留在池中"""
+        if self._watcher is not None:
+            # 先处理监视器尚未发现的修改，签名与数据管理器的缓存保持一致
+            self._watcher.check()
+        self._parked[project] = scan_signature(dm.file_paths["meta_dir"])
+    
+    def _activate(self, project: Optional[str]) -> DataManager:
+        """
+        取出项目的数据管理器：池中已有时复用（只丢弃离开期间被修改的文件的缓存），否则新建
+        
+        池中超过 POOL_CONFIG["size"] 个项目时移除最久未使用的。
+        """
+        dm = self._pool.pop(project, None)
+        parked = self._parked.pop(project, None)
+        if dm is not None and project is not None and not project_manager.project_exists(project):
+            # 项目已被删除
+            dm = None
+        if dm is not None:
+            changed = changed_files(parked or {}, scan_signature(dm.file_paths["meta_dir"]))
+            if changed:
+                try:
+                    dm.invalidate_external_changes(changed)
+                except FileLockTimeout:
+                    # 其他进程正在写入该项目，放弃池中的缓存
+                    dm = None
+        if dm is None:
+            dm = self._create_data_manager(project)
+        
+        self._pool[project] = dm
+        while len(self._pool) > max(POOL_CONFIG["size"], 1):
+            evicted, _ = self._pool.popitem(last=False)
+            self._parked.pop(evicted, None)
+        return dm
+    
+    @staticmethod
+    def _create_data_manager(project: Optional[str]) -> DataManager:
+        if project:
+            # 多项目模式：使用项目路径
+            project_path = project_manager.get_project_path(project)
+            dm = DataManager(project_path)
+            if project_path is not None:
+                dm.attach_search_index(project_manager.search_index, project)
+            return dm
+        # 单项目模式：使用默认路径
+        return DataManager()
+    
+    # ===== 文件变更监视 =====
+    def start_watching(self, interval: Optional[float] = None) -> bool:
+        """
+        在后台监视当前项目的 meta/ 和各层提示词文件
+        
+        外部修改会使数据缓存失效并重新加载提示词；监视期间项目状态缓存可以保留更久。
+        
+        Returns:
+            bool: 是否已启动（WATCH_CONFIG 中禁用时返回False）
+        """
+        if not WATCH_CONFIG["enabled"]:
+            return False
+        if self._watcher is None:
+            self._watcher = FileWatcher(interval)
+            self._watch_current_project()
+        self._watcher.start()
+        return True
+    
+    def stop_watching(self):
+        """停止监视"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+    
+    def _watch_current_project(self):
+        """把监视目标切换到当前项目"""
+        dm = self._current_data_manager
+        self._watcher.unwatch_all()
+        if dm is None:
+            return
+        # 外部修改会被发现，状态缓存不再需要很短的有效期
+        dm._cache_ttl = max(dm._cache_ttl, WATCH_CONFIG["status_cache_ttl"])
+        self._watcher.watch(dm.file_paths["meta_dir"], lambda paths: self._on_meta_changed(dm, paths))
+        # 提示词的每一层（内置默认、全局、项目覆盖）变化都要重新合并
+        for prompts_path in prompt_resolver.layer_paths(dm.project_path):
+            self._watcher.watch(prompts_path, lambda paths: self._on_prompts_changed(dm, paths))
+    
+    # 以下回调在监视线程中执行，不能经过 refresh_data_manager（会在后台切换当前项目）
+    def _on_meta_changed(self, dm: DataManager, paths: List[Path]):
+        """meta/中的文件变化（持有写入锁丢弃缓存；锁超时时监视器在下次扫描时重新通知）"""
+        if dm is self._current_data_manager:
+            dm.invalidate_external_changes(paths)
+    
+    def _on_prompts_changed(self, dm: DataManager, paths: List[Path]):
+        """任一层提示词文件变化时按注册时的项目重新合并提示词"""
+        if dm is not self._current_data_manager:
+            return
+        from llm_service import llm_service
+        llm_service.prompts = prompt_resolver.resolve(dm.project_path)
+    
     def get_data_manager(self) -> DataManager:
-        """获取当前的数据管理器实例"""
+        """获取当前的数据管理器实例（config.json未变化时只做一次stat检查）"""
         self.refresh_data_manager()
         return self._current_data_manager
     
@@ -1,10 +1,15 @@
-import json
 import os
+import sqlite3
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
-from config import get_app_data_dir
+from config import get_app_data_dir, REGISTRY_CONFIG, SEARCH_CONFIG
+import json_codec
+from file_lock import FileLock, FileLockTimeout
+from project_registry import ProjectRegistry
+from search_index import SearchIndex
+import project_archive
 from ui_utils import ui
 
 @dataclass
@@ -38,6 +43,18 @@ class ProjectManager:
         # 确保目录存在
         self._ensure_directories()
         
+        # 全局配置的跨进程锁：读取 → 修改 → 保存期间持有
+        self._config_lock = FileLock(self.base_dir / "config.json.lock")
+        
+        # 全局配置的内存缓存：(配置文件签名, 配置)，文件变化后才重新解析
+        self._config_cache = None
+        
+        # 项目元数据注册表（config.json 只保存活动项目等全局设置）
+        self.registry = ProjectRegistry(self.base_dir / REGISTRY_CONFIG["filename"])
+        
+        # 所有项目的全文搜索索引
+        self.search_index = SearchIndex(self.base_dir / SEARCH_CONFIG["filename"])
+        
         # 初始化配置
         self._init_config()
     
@@ -47,30 +64,61 @@ class ProjectManager:
         self.projects_dir.mkdir(exist_ok=True)
     
     def _init_config(self):
-        """初始化全局配置文件"""
-        if not self.config_file.exists():
-            default_config = {
-                "version": "1.0",
-                "active_project": None,
-                "projects": {},
-                "created_at": datetime.now().isoformat()
-            }
-            self._save_config(default_config)
+        """初始化全局配置文件，并把旧版本配置中的项目列表迁移到注册表"""
+        with self._config_lock:
+            if not self.config_file.exists():
+                default_config = {
+                    "version": "1.0",
+                    "active_project": None,
+                    "created_at": datetime.now().isoformat()
+                }
+                self._save_config(default_config)
+                return
+            
+            config = self._load_config()
+            if "projects" in config:
+                self.registry.import_records(
+                    dict(info, name=info.get("name") or name)
+                    for name, info in config["projects"].items()
+                )
+                del config["projects"]
+                self._save_config(config)
     
     def _load_config(self) -> Dict[str, Any]:
         """加载全局配置"""
         try:
-            with self.config_file.open('r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
+            return json_codec.load_file(self.config_file)
+        except (ValueError, IOError) as e:
             ui.print_error(f"加载配置文件时出错: {e}")
             return {}
     
+    def _config_signature(self):
+        """配置文件的 (inode, 修改时间, 大小)；每次保存都会替换文件，inode随之变化"""
+        try:
+            stat = self.config_file.stat()
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _read_config(self) -> Dict[str, Any]:
+        """只读访问全局配置：文件未变化时返回缓存（调用方不得修改返回值）"""
+        signature = self._config_signature()
+        cache = self._config_cache
+        if signature is not None and cache is not None and cache[0] == signature:
+            return cache[1]
+        config = self._load_config()
+        if signature is not None and config:
+            self._config_cache = (signature, config)
+        return config
+    
     def _save_config(self, config: Dict[str, Any]) -> bool:
-        """保存全局配置"""
+        """保存全局配置（先写临时文件再原子替换，其他进程不会读到写了一半的文件）"""
         try:
-            with self.config_file.open('w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=4)
+            with self._config_lock:
+                tmp_path = self.config_file.with_suffix(".json.tmp")
+                json_codec.dump_file(tmp_path, config, pretty=True)
+                os.replace(tmp_path, self.config_file)
+                self._config_cache = None
             return True
         except IOError as e:
             ui.print_error(f"保存配置文件时出错: {e}")
@@ -123,18 +171,17 @@ class ProjectManager:
             }
             
             info_file = project_path / "project_info.json"
-            with info_file.open('w', encoding='utf-8') as f:
-                json.dump(project_info, f, ensure_ascii=False, indent=4)
+            json_codec.dump_file(info_file, project_info, pretty=True)
             
-            # 更新全局配置
-            config = self._load_config()
-            config["projects"][clean_name] = project_info
+            # 登记项目
+            self.registry.put(project_info)
             
             # 如果这是第一个项目，设为活动项目
-            if not config.get("active_project"):
-                config["active_project"] = clean_name
-            
-            self._save_config(config)
+            with self._config_lock:
+                config = self._load_config()
+                if not config.get("active_project"):
+                    config["active_project"] = clean_name
+                    self._save_config(config)
             
             ui.print_success(f"项目 '{display_name or clean_name}' 创建成功")
             return True
@@ -157,27 +204,59 @@ class ProjectManager:
         project_path = self.projects_dir / name
         return project_path.exists() and project_path.is_dir()
     
+    def _to_project_info(self, record: Dict[str, Any]) -> ProjectInfo:
+        """注册表记录 -> ProjectInfo"""
+        return ProjectInfo(
+            name=record["name"],
+            display_name=record.get("display_name") or record["name"],
+            path=self.projects_dir / record["name"],
+            created_at=record.get("created_at", ""),
+            last_accessed=record.get("last_accessed", ""),
+            description=record.get("description", "")
+        )
+    
     def list_projects(self) -> List[ProjectInfo]:
-        """列出所有项目"""
-        config = self._load_config()
-        projects = []
-        
-        for name, info in config.get("projects", {}).items():
-            if self.project_exists(name):
-                projects.append(ProjectInfo(
-                    name=info["name"],
-                    display_name=info.get("display_name", name),
-                    path=self.projects_dir / name,
-                    created_at=info.get("created_at", ""),
-                    last_accessed=info.get("last_accessed", ""),
-                    description=info.get("description", "")
-                ))
+        """列出所有项目目录仍然存在的项目（按最后访问时间降序）"""
+        return [
+            self._to_project_info(record) for record in self.registry.page()
+            if self.project_exists(record["name"])
+        ]
+    
+    def list_projects_page(self, offset: int = 0, limit: Optional[int] = None,
+                           sort_by: str = "last_accessed", descending: bool = True) -> List[ProjectInfo]:
+        """
+        按页列出项目，直接来自注册表的索引查询，不检查项目目录
         
-        return sorted(projects, key=lambda x: x.last_accessed, reverse=True)
+        Args:
+            offset: 跳过的项目数
+            limit: 每页项目数，默认使用 REGISTRY_CONFIG["page_size"]
+            sort_by: 排序字段（last_accessed / created_at / display_name / name）
+            descending: 是否降序
+        """
+        if limit is None:
+            limit = REGISTRY_CONFIG["page_size"]
+        records = self.registry.page(offset, limit, sort_by=sort_by, descending=descending)
+        return [self._to_project_info(record) for record in records]
     
+    def count_projects(self) -> int:
+        """注册表中的项目数"""
+        return self.registry.count()
+
+    def refresh_search_index(self) -> int:
+        """
+        让搜索索引与磁盘上的项目一致：重新索引外部修改过的文件，删除已不存在的项目
+
+        Returns:
+            重新索引的条目数
+        """
+        projects = self.list_projects()
+        changed = sum(self.search_index.refresh_project(p.name, p.path) for p in projects)
+        self.search_index.prune_projects(p.name for p in projects)
+        return changed
+
     def get_active_project(self) -> Optional[str]:
-        """获取当前活动项目"""
-        config = self._load_config()
+        """获取当前活动项目（配置文件未变化时不重新读取）"""
+        config = self._read_config()
         return config.get("active_project")
     
     def set_active_project(self, name: str) -> bool:
@@ -186,14 +265,19 @@ class ProjectManager:
             ui.print_warning(f"项目 '{name}' 不存在")
             return False
         
-        config = self._load_config()
-        config["active_project"] = name
-        
-        # 更新最后访问时间
-        if name in config["projects"]:
-            config["projects"][name]["last_accessed"] = datetime.now().isoformat()
-        
-        return self._save_config(config)
+        try:
+            # 更新最后访问时间只修改注册表中的一行
+            self.registry.touch(name)
+            
+            if self._read_config().get("active_project") == name:
+                return True
+            with self._config_lock:
+                config = self._load_config()
+                config["active_project"] = name
+                return self._save_config(config)
+        except FileLockTimeout as e:
+            ui.print_error(f"切换项目时出错: {e}")
+            return False
     
     def delete_project(self, name: str) -> bool:
         """删除项目"""
@@ -207,18 +291,17 @@ class ProjectManager:
             project_path = self.projects_dir / name
             shutil.rmtree(project_path)
             
-            # 更新全局配置
-            config = self._load_config()
-            if name in config["projects"]:
-                del config["projects"][name]
-            
-            # 如果删除的是活动项目，清除活动项目
-            if config.get("active_project") == name:
-                # 如果还有其他项目，选择第一个作为活动项目
-                remaining_projects = list(config["projects"].keys())
-                config["active_project"] = remaining_projects[0] if remaining_projects else None
+            # 从注册表和搜索索引中移除
+            self.registry.remove(name)
+            self.search_index.remove_project(name)
             
-            self._save_config(config)
+            with self._config_lock:
+                config = self._load_config()
+                # 如果删除的是活动项目，选择最近访问的其他项目作为活动项目
+                if config.get("active_project") == name:
+                    remaining_projects = self.registry.page(0, 1)
+                    config["active_project"] = remaining_projects[0]["name"] if remaining_projects else None
+                    self._save_config(config)
             
             ui.print_success(f"✅ 项目 '{name}' 已删除")
             return True
@@ -242,18 +325,8 @@ class ProjectManager:
     
     def get_project_info(self, name: str) -> Optional[ProjectInfo]:
         """获取项目信息"""
-        config = self._load_config()
-        if name in config.get("projects", {}):
-            info = config["projects"][name]
-            return ProjectInfo(
-                name=info["name"],
-                display_name=info.get("display_name", name),
-                path=self.projects_dir / name,
-                created_at=info.get("created_at", ""),
-                last_accessed=info.get("last_accessed", ""),
-                description=info.get("description", "")
-            )
-        return None
+        record = self.registry.get(name) if name else None
+        return self._to_project_info(record) if record else None
     
     def update_project_info(self, name: str, display_name: str = None, description: str = None) -> bool:
         """更新项目信息"""
@@ -261,36 +334,108 @@ class ProjectManager:
             ui.print_warning(f"项目 '{name}' 不存在")
             return False
         
-        config = self._load_config()
-        if name not in config["projects"]:
-            ui.print_warning(f"项目配置中未找到 '{name}'")
-            return False
-        
-        # 更新配置
-        project_info = config["projects"][name]
+        fields = {"updated_at": datetime.now().isoformat()}
         if display_name is not None:
-            project_info["display_name"] = display_name
+            fields["display_name"] = display_name
         if description is not None:
-            project_info["description"] = description
-        project_info["updated_at"] = datetime.now().isoformat()
+            fields["description"] = description
         
-        # 更新项目目录中的项目信息文件
-        project_path = self.projects_dir / name
-        info_file = project_path / "project_info.json"
         try:
-            with info_file.open('w', encoding='utf-8') as f:
-                json.dump(project_info, f, ensure_ascii=False, indent=4)
+            project_info = self.registry.update(name, **fields)
+        except sqlite3.Error as e:
+            ui.print_error(f"❌ 保存项目信息时出错: {e}")
+            return False
+        if project_info is None:
+            ui.print_warning(f"项目注册表中未找到 '{name}'")
+            return False
+        
+        try:
+            # 更新项目目录中的项目信息文件
+            info_file = self.projects_dir / name / "project_info.json"
+            json_codec.dump_file(info_file, project_info, pretty=True)
         except OSError as e:
             ui.print_error(f"更新项目信息文件时出错: {e}")
             return False
         
-        # 保存全局配置
-        if self._save_config(config):
-            ui.print_success(f"✅ 项目 '{display_name or name}' 信息已更新")
-            return True
-        else:
-            ui.print_error("❌ 保存配置时出错")
+        ui.print_success(f"✅ 项目 '{display_name or name}' 信息已更新")
+        return True
+
+    def export_project(self, name: str, archive_path: Path) -> bool:
+        """
+        把项目导出为单个归档文件（.tar.zst 或 .zip），便于在机器间迁移
+        
+        Args:
+            name: 项目名称
+            archive_path: 归档文件路径，按扩展名选择格式
+        """
+        project_path = self.get_project_path(name)
+        if project_path is None:
+            ui.print_warning(f"项目 '{name}' 不存在")
+            return False
+        
+        info = self.get_project_info(name)
+        project_info = {
+            "name": name,
+            "display_name": info.display_name if info else name,
+            "description": info.description if info else "",
+            "created_at": info.created_at if info else ""
+        }
+        try:
+            manifest = project_archive.export_project(project_path, archive_path, project_info)
+        except (project_archive.ArchiveError, FileLockTimeout, OSError) as e:
+            ui.print_error(f"导出项目时出错: {e}")
             return False
+        
+        ui.print_success(f"项目 '{project_info['display_name']}' 已导出到 {archive_path}（{len(manifest['files'])} 个文件）")
+        return True
+    
+    def import_project(self, archive_path: Path, name: Optional[str] = None) -> Optional[str]:
+        """
+        从归档导入项目，全部文件校验通过后才会出现在项目列表中
+        
+        Args:
+            archive_path: 归档文件路径
+            name: 新项目名称，默认使用归档中记录的名称
+            
+        Returns:
+            导入的项目名称，失败时返回None
+        """
+        def target_for(manifest):
+            project_name = self._clean_project_name(
+                name or manifest["project"].get("name") or Path(archive_path).stem
+            )
+            if not project_name:
+                raise project_archive.ArchiveError("项目名称包含非法字符")
+            if self.project_exists(project_name) or self.registry.get(project_name):
+                raise FileExistsError(f"项目 '{project_name}' 已存在，请指定其他名称")
+            return self.projects_dir / project_name
+        
+        try:
+            manifest, project_path = project_archive.import_project(archive_path, self.projects_dir, target_for)
+        except (project_archive.ArchiveError, OSError) as e:
+            ui.print_error(f"导入项目时出错: {e}")
+            return None
+        
+        project_name = project_path.name
+        now = datetime.now().isoformat()
+        project_info = dict(manifest["project"], name=project_name, last_accessed=now)
+        project_info["display_name"] = project_info.get("display_name") or project_name
+        project_info["created_at"] = project_info.get("created_at") or now
+        try:
+            json_codec.dump_file(project_path / "project_info.json", project_info, pretty=True)
+        except OSError as e:
+            ui.print_warning(f"更新项目信息文件时出错: {e}")
+        self.registry.put(project_info)
+        
+        # 如果这是第一个项目，设为活动项目
+        with self._config_lock:
+            config = self._load_config()
+            if not config.get("active_project"):
+                config["active_project"] = project_name
+                self._save_config(config)
+        
+        ui.print_success(f"已导入项目 '{project_info['display_name']}'（{len(manifest['files'])} 个文件）")
+        return project_name
 
 # 全局项目管理器实例
 project_manager = ProjectManager() 
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+项目注册表 - 用SQLite保存所有项目的元数据
+
+项目很多时，把项目列表放在 config.json 中意味着每次列出项目都要解析整个文件、
+检查每个项目目录并在内存中排序，每次切换项目都要重写整个文件。注册表为排序字段
+建立索引，支持分页排序查询；更新最后访问时间只修改一行。
+
+SQLite自身负责跨进程的并发控制。config.json 只保留活动项目等全局设置，
+旧版本 config.json 中的项目列表在首次启动时导入注册表。
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from config import LOCK_CONFIG
+
+FIELDS = ("name", "display_name", "description", "created_at", "last_accessed", "updated_at")
+# 允许排序的字段（均有索引）
+SORT_FIELDS = ("last_accessed", "created_at", "display_name", "name")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    name TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT '',
+    last_accessed TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_projects_last_accessed ON projects(last_accessed, name);
+CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at, name);
+CREATE INDEX IF NOT EXISTS idx_projects_display_name ON projects(display_name, name);
+"""
+
+
+def _normalize(record: Dict) -> Dict:
+    """只保留注册表字段，缺失的字段补空字符串"""
+    normalized = {field: record.get(field) or "" for field in FIELDS}
+    normalized["display_name"] = normalized["display_name"] or normalized["name"]
+    return normalized
+
+
+class ProjectRegistry:
+    """基于SQLite的项目注册表"""
+
+    def __init__(self, db_path: Path, timeout: Optional[float] = None):
+        self.db_path = Path(db_path)
+        self.timeout = LOCK_CONFIG["timeout"] if timeout is None else timeout
+        # 每个线程复用自己的连接，避免每次查询都重新打开数据库
+        self._local = threading.local()
+        with self._connect() as conn:
+            # WAL模式下读取不会被其他进程的写入阻塞
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """当前线程的连接，在一个事务中执行"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        with conn:
+            yield conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ===== 查询 =====
+    def get(self, name: str) -> Optional[Dict]:
+        """读取单个项目，不存在时返回None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM projects WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def count(self) -> int:
+        """项目总数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def page(self, offset: int = 0, limit: Optional[int] = None,
+             sort_by: str = "last_accessed", descending: bool = True) -> List[Dict]:
+        """
+        按字段排序后取一页项目
+
+        Args:
+            offset: 跳过的项目数
+            limit: 最多返回的项目数，None表示全部
+            sort_by: 排序字段，见 SORT_FIELDS
+            descending: 是否降序
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"不支持的排序字段: {sort_by}")
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT * FROM projects ORDER BY {sort_by} {direction}, name {direction} LIMIT ? OFFSET ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, (-1 if limit is None else max(int(limit), 0), max(int(offset), 0))).fetchall()
+        return [dict(row) for row in rows]
+
+    # ===== 修改 =====
+    def put(self, record: Dict):
+        """新增或整体替换一个项目"""
+        record = _normalize(record)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO projects ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                [record[field] for field in FIELDS]
+            )
+
+    def update(self, name: str, **fields) -> Optional[Dict]:
+        """修改项目的部分字段，返回修改后的记录；项目不存在时返回None"""
+        unknown = set(fields) - set(FIELDS[1:])
+        if unknown:
+            raise ValueError(f"未知的项目字段: {', '.join(sorted(unknown))}")
+        with self._connect() as conn:
+            if fields:
+                assignments = ", ".join(f"{field} = ?" for field in fields)
+                conn.execute(f"UPDATE projects SET {assignments} WHERE name = ?", [*fields.values(), name])
+            row = conn.execute("SELECT * FROM projects WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def touch(self, name: str, when: Optional[str] = None) -> bool:
+        """更新最后访问时间，返回项目是否存在"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE projects SET last_accessed = ? WHERE name = ?",
+                (when or datetime.now().isoformat(), name)
+            )
+        return cursor.rowcount > 0
+
+    def remove(self, name: str) -> bool:
+        """删除项目，返回项目是否存在"""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM projects WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def import_records(self, records: Iterable[Dict]) -> int:
+        """在一个事务中导入项目，已存在的项目保持不变；返回新增的项目数"""
+        rows = [[record[field] for field in FIELDS] for record in map(_normalize, records) if record["name"]]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO projects ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                rows
+            )
+            return conn.total_changes - before
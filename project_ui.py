@@ -4,6 +4,10 @@ from rich.table import Table
 from rich.text import Text
 from datetime import datetime
 from project_manager import project_manager
+from pathlib import Path
+from config import REGISTRY_CONFIG, get_export_base_dir
+from disk_usage import USAGE_CATEGORIES, format_size, project_usage
+from project_archive import default_format
 from project_data_manager import project_data_manager
 from ui_utils import ui, console
 from workbench_ui import show_workbench
@@ -26,6 +30,7 @@ def handle_project_management():
                 "选择并进入项目",
                 "创建新项目",
                 "管理项目列表",
+                "多项目批量生成",
                 "返回主菜单"
             ]
             
@@ -37,6 +42,8 @@ def handle_project_management():
                 create_new_project()
             elif choice == '3':
                 manage_project_list()
+            elif choice == '4':
+                batch_generate_projects()
             elif choice == '0':
                 break
     
@@ -46,29 +53,16 @@ def handle_project_management():
 
 def select_and_enter_project():
     """选择一个项目并进入其工作台"""
-    projects = project_manager.list_projects()
-    if not projects:
+    if not project_manager.count_projects():
         ui.print_warning("暂无项目。请先创建一个新项目。")
         ui.pause()
         return
 
-    current_project = project_manager.get_active_project()
-    
-    choices = []
-    for p in projects:
-        status = " (当前)" if p.name == current_project else ""
-        choices.append(f"{p.display_name}{status}")
-    choices.append("返回")
-
-    choice_str = ui.display_menu("请选择要进入的项目:", choices)
-    
-    if choice_str.isdigit() and choice_str != '0':
-        choice_index = int(choice_str) - 1
-        if 0 <= choice_index < len(projects):
-            selected_project = projects[choice_index]
-            project_data_manager.switch_project(selected_project.name)
-            ui.print_success(f"已进入项目: 《{selected_project.display_name}》")
-            show_workbench() # 进入项目工作台
+    selected_project = _choose_project("请选择要进入的项目:")
+    if selected_project:
+        project_data_manager.switch_project(selected_project.name)
+        ui.print_success(f"已进入项目: 《{selected_project.display_name}》")
+        show_workbench() # 进入项目工作台
     
 def manage_project_list():
     """提供编辑、删除、查看详情等项目管理功能"""
@@ -80,6 +74,8 @@ def manage_project_list():
                 "编辑项目信息",
                 "删除项目",
                 "查看项目详情",
+                "导出项目归档",
+                "导入项目归档",
                 "返回"
             ]
             choice = ui.display_menu("管理项目列表", menu_options)
@@ -90,6 +86,10 @@ def manage_project_list():
                 delete_project()
             elif choice == '3':
                 show_project_details()
+            elif choice == '4':
+                export_project_archive()
+            elif choice == '5':
+                import_project_archive()
             elif choice == '0':
                 break
     
@@ -97,16 +97,55 @@ def manage_project_list():
         # 重新抛出 KeyboardInterrupt 让上层处理
         raise
 
-def list_all_projects():
-    """列出所有项目"""
-    projects = project_manager.list_projects()
-    
-    if not projects:
-        console.print("[yellow]暂无项目。请先创建一个项目。[/yellow]")
-        return
-    
-    # 创建表格
-    table = Table(title="📚 所有项目")
+def _page_count(total, page_size):
+    """总页数（至少1页）"""
+    return max((total + page_size - 1) // page_size, 1)
+
+def _choose_project(title, back_label="返回"):
+    """
+    分页显示项目供用户选择（最近访问在前）
+
+    Returns:
+        选中的 ProjectInfo；用户返回或没有项目时为 None
+    """
+    page_size = REGISTRY_CONFIG["page_size"]
+    page = 0
+    while True:
+        total = project_manager.count_projects()
+        if total == 0:
+            ui.print_warning("暂无项目。")
+            return None
+        pages = _page_count(total, page_size)
+        page = min(page, pages - 1)
+        projects = project_manager.list_projects_page(page * page_size, page_size)
+        current_project = project_manager.get_active_project()
+
+        choices = [f"{p.display_name}{' (当前)' if p.name == current_project else ''}" for p in projects]
+        actions = []
+        if page + 1 < pages:
+            actions.append("next")
+            choices.append("下一页")
+        if page > 0:
+            actions.append("prev")
+            choices.append("上一页")
+        choices.append(back_label)
+
+        page_title = title if pages == 1 else f"{title} (第 {page + 1}/{pages} 页，共 {total} 个项目)"
+        choice_str = ui.display_menu(page_title, choices)
+        if not choice_str or not choice_str.isdigit() or choice_str == '0':
+            return None
+        index = int(choice_str) - 1
+        if index < len(projects):
+            return projects[index]
+        action = actions[index - len(projects)] if index - len(projects) < len(actions) else None
+        if action == "next":
+            page += 1
+        elif action == "prev":
+            page -= 1
+
+def _print_projects_table(projects, current_project, caption=None):
+    """以表格显示一页项目"""
+    table = Table(title="📚 所有项目", caption=caption)
     table.add_column("项目名称", style="cyan", no_wrap=True)
     table.add_column("显示名称", style="green")
     table.add_column("描述", style="white")
@@ -114,8 +153,6 @@ def list_all_projects():
     table.add_column("最后访问", style="magenta")
     table.add_column("状态", style="red")
     
-    current_project = project_manager.get_active_project()
-    
     for project in projects:
         # 格式化时间
         try:
@@ -142,6 +179,37 @@ def list_all_projects():
     
     console.print(table)
 
+def list_all_projects():
+    """按页列出所有项目（最近访问在前），多于一页时可以翻页"""
+    total = project_manager.count_projects()
+    if not total:
+        console.print("[yellow]暂无项目。请先创建一个项目。[/yellow]")
+        return
+    
+    page_size = REGISTRY_CONFIG["page_size"]
+    pages = _page_count(total, page_size)
+    current_project = project_manager.get_active_project()
+    page = 0
+    while True:
+        projects = project_manager.list_projects_page(page * page_size, page_size)
+        caption = f"第 {page + 1}/{pages} 页，共 {total} 个项目" if pages > 1 else None
+        _print_projects_table(projects, current_project, caption)
+        if pages == 1:
+            return
+        
+        options, actions = [], []
+        if page + 1 < pages:
+            options.append("下一页")
+            actions.append(1)
+        if page > 0:
+            options.append("上一页")
+            actions.append(-1)
+        options.append("结束浏览")
+        choice = ui.display_menu("翻页:", options)
+        if not choice or not choice.isdigit() or choice == '0' or int(choice) > len(actions):
+            return
+        page += actions[int(choice) - 1]
+
 def create_new_project():
     """创建新项目"""
     console.print(Panel("📝 创建新项目", border_style="green"))
@@ -184,31 +252,13 @@ def switch_project():
 
 def delete_project():
     """删除项目"""
-    selected_project = None
-    
     # Let user select which project to delete
-    projects = project_manager.list_projects()
-    if not projects:
+    if not project_manager.count_projects():
         ui.print_warning("没有可删除的项目。")
         return
 
-    choices = [p.display_name for p in projects]
-    choices.append("取消")
-    
-    choice_str = ui.display_menu("请选择要删除的项目:", choices)
-
-    if choice_str.isdigit() and choice_str != '0':
-        choice_index = int(choice_str) - 1
-        if 0 <= choice_index < len(projects):
-            selected_project = projects[choice_index]
-        else:
-            ui.print_warning("无效的选择。")
-            return
-    else: # User cancelled
-        return
-        
-    if not selected_project:
-        ui.print_error("未找到选中的项目。")
+    selected_project = _choose_project("请选择要删除的项目:", "取消")
+    if not selected_project: # User cancelled
         return
     
     # 确认删除
@@ -226,29 +276,15 @@ def delete_project():
 
 def show_project_details():
     """显示项目详情"""
-    projects = project_manager.list_projects()
-    if not projects:
+    if not project_manager.count_projects():
         ui.print_warning("暂无项目。")
         ui.pause()
         return
     
     # 让用户选择要查看的项目
-    choices = [p.display_name for p in projects]
-    choices.append("返回")
-    
-    choice_str = ui.display_menu("请选择要查看详情的项目:", choices)
-    
-    if choice_str == "0":
-        return
-    
-    if choice_str and choice_str.isdigit():
-        choice_index = int(choice_str) - 1
-        if 0 <= choice_index < len(projects):
-            selected_project = projects[choice_index]
-            _display_project_details(selected_project)
-        else:
-            ui.print_warning("无效的选择。")
-            ui.pause()
+    selected_project = _choose_project("请选择要查看详情的项目:")
+    if selected_project:
+        _display_project_details(selected_project)
 
 def _display_project_details(project_info):
     """显示指定项目的详细信息"""
@@ -263,38 +299,94 @@ def _display_project_details(project_info):
 [cyan]项目路径:[/cyan] {project_info.path}
 [cyan]创建时间:[/cyan] {project_info.created_at}
 [cyan]最后访问:[/cyan] {project_info.last_accessed}
+[cyan]磁盘占用:[/cyan] {_format_disk_usage(project_info.path)}
     """.strip()
     
     console.print(Panel(details, title=f"📊 项目详情 - {project_display_name}", border_style="cyan"))
     ui.pause()
 
+def _format_disk_usage(project_path):
+    """项目的分类占用及配额状态"""
+    try:
+        usage = project_usage(project_path)
+        usage.refresh()
+        usage = usage.summary()
+    except OSError as e:
+        return f"[red]无法统计: {e}[/red]"
+
+    limits = usage["limits"]
+    total = format_size(usage["total"])
+    quotas = []
+    if limits["soft"]:
+        quotas.append(f"软配额 {format_size(limits['soft'])}")
+    if limits["hard"]:
+        quotas.append(f"硬配额 {format_size(limits['hard'])}")
+    if usage["state"] == "hard":
+        total = f"[red]{total}（已超过硬配额，不再保存新的草稿）[/red]"
+    elif usage["state"] == "soft":
+        total = f"[yellow]{total}（已超过软配额）[/yellow]"
+    if quotas:
+        total += f" / {'，'.join(quotas)}"
+
+    lines = [total] + [
+        f"  {label}: {format_size(usage['categories'][key])}" for key, label in USAGE_CATEGORIES.items()
+    ]
+    return "\n".join(lines)
+
+def export_project_archive():
+    """把项目导出为单个归档文件"""
+    if not project_manager.count_projects():
+        ui.print_warning("没有可导出的项目。")
+        return
+
+    selected_project = _choose_project("请选择要导出的项目:", "取消")
+    if not selected_project:
+        return
+
+    default_path = get_export_base_dir() / (
+        f"{selected_project.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{default_format()}"
+    )
+    archive_path = ui.prompt("请输入归档文件路径（.tar.zst 或 .zip）", default=str(default_path))
+    if not archive_path:
+        console.print("[yellow]操作已取消[/yellow]")
+        return
+
+    ui.print_info("正在导出项目...")
+    project_manager.export_project(selected_project.name, Path(archive_path.strip()).expanduser())
+    ui.pause()
+
+def import_project_archive():
+    """从归档文件导入项目"""
+    archive_path = ui.prompt("请输入要导入的归档文件路径")
+    if not archive_path:
+        console.print("[yellow]操作已取消[/yellow]")
+        return
+    archive_path = Path(archive_path.strip()).expanduser()
+    if not archive_path.is_file():
+        ui.print_error(f"文件不存在: {archive_path}")
+        ui.pause()
+        return
+
+    new_name = ui.prompt("请输入新项目名称（留空使用归档中的名称）", default="")
+    if new_name is None:
+        console.print("[yellow]操作已取消[/yellow]")
+        return
+
+    ui.print_info("正在导入项目并校验文件...")
+    project_name = project_manager.import_project(archive_path, new_name.strip() or None)
+    if project_name and ui.confirm("是否切换到导入的项目？", default=True):
+        project_data_manager.switch_project(project_name)
+    ui.pause()
+
 def edit_project():
     """编辑项目信息"""
-    selected_project = None
-    
     # Let user select which project to edit
-    projects = project_manager.list_projects()
-    if not projects:
+    if not project_manager.count_projects():
         ui.print_warning("没有可编辑的项目。")
         return
 
-    choices = [p.display_name for p in projects]
-    choices.append("取消")
-    
-    choice_str = ui.display_menu("请选择要编辑的项目:", choices)
-    
-    if choice_str.isdigit() and choice_str != '0':
-        choice_index = int(choice_str) - 1
-        if 0 <= choice_index < len(projects):
-            selected_project = projects[choice_index]
-        else:
-            ui.print_warning("无效的选择。")
-            return
-    else: # User cancelled
-        return
-
-    if not selected_project:
-        ui.print_error("未找到选中的项目。")
+    selected_project = _choose_project("请选择要编辑的项目:", "取消")
+    if not selected_project: # User cancelled
         return
         
     console.print(Panel(f"📝 正在编辑项目: {selected_project.display_name}", border_style="yellow"))
@@ -337,4 +429,86 @@ def edit_project():
     else:
         ui.print_error("❌ 更新项目信息失败")
     
-    ui.pause() 
\ No newline at end of file
+    ui.pause()
+
+
+def _choose_batch_projects():
+    """选择批量生成的项目：全部项目，或逐个选择"""
+    if ui.confirm("是否为所有项目生成？", default=True):
+        return project_manager.list_projects()
+    selected = {}
+    while True:
+        title = f"请选择项目（已选 {len(selected)} 个）:"
+        project = _choose_project(title, "完成选择")
+        if not project:
+            return list(selected.values())
+        selected[project.name] = project
+
+def batch_generate_projects():
+    """为多个项目批量补齐缺失的章节概要和正文"""
+    import asyncio
+    from batch_generation import BatchOrchestrator, STAGES, print_report
+    from llm_service import llm_service
+    from progress_utils import AsyncProgressManager
+
+    if not llm_service.is_async_available():
+        ui.print_error("AI服务不可用，请检查配置。")
+        ui.pause()
+        return
+    if not project_manager.count_projects():
+        ui.print_warning("暂无项目。请先创建一个新项目。")
+        ui.pause()
+        return
+
+    stage_choices = [["summaries"], ["novels"], ["summaries", "novels"]]
+    choice = ui.display_menu("请选择要批量生成的内容:", ["补齐章节概要", "补齐章节正文", "补齐概要和正文", "返回"])
+    if not choice or not choice.isdigit() or choice == '0':
+        return
+    stages = stage_choices[int(choice) - 1]
+
+    projects = _choose_batch_projects()
+    if not projects:
+        return
+
+    orchestrator = BatchOrchestrator(search_index=project_manager.search_index)
+    jobs, expected = orchestrator.plan([(p.name, p.path) for p in projects], stages)
+    if not jobs:
+        ui.print_info("所选项目中没有缺失的内容。")
+        ui.pause()
+        return
+
+    counts = {}
+    for job in jobs:
+        counts[job.project] = counts.get(job.project, 0) + 1
+    for project in projects:
+        if project.name in counts:
+            console.print(f"  《{project.display_name}》: 待生成 {counts[project.name]} 项")
+    stage_label = "和".join(STAGES[stage] for stage in stages)
+    if not ui.confirm(
+        f"将为 {len(counts)} 个项目生成约 {expected} 项{stage_label}"
+        f"（并发 {orchestrator.max_concurrency}，每分钟最多 {orchestrator.requests_per_minute:g} 次请求），确定吗？"
+    ):
+        ui.print_warning("操作已取消。")
+        ui.pause()
+        return
+
+    progress = AsyncProgressManager()
+    orchestrator.progress_callback = progress.create_callback()
+    progress.start(expected, "开始批量生成...")
+    try:
+        report = asyncio.run(orchestrator.run(jobs))
+    finally:
+        progress.finish("批量生成结束")
+    # 批量生成可能修改了当前项目的概要和正文
+    dm = project_data_manager.get_data_manager()
+    if dm:
+        dm.invalidate_external_changes([dm.file_paths["chapter_summary"], dm.file_paths["novel_text"]])
+
+    print_report(report)
+    failed = [job for job in report.jobs if job.status == "failed"]
+    for job in failed[:10]:
+        ui.print_warning(f"《{job.project}》第{job.chapter_num}章{STAGES[job.stage]}失败: {job.error}")
+    report_path = get_export_base_dir() / f"batch-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    report.write(report_path)
+    ui.print_info(f"详细报告已写入: {report_path}")
+    ui.pause()
@@ -0,0 +1,181 @@
+"""
+分层提示词 - 内置默认 → 全局 → 项目覆盖
+
+提示词按三层合并得到：
+1. 内置默认 ``prompts.default.json``
+2. 全局 ``prompts.json``
+3. 项目目录下的 ``prompts.override.json``，只保存该项目修改过的项
+
+同一项在上层出现时覆盖下层（字典逐项合并）。项目不再保存整份副本，
+修改全局提示词后所有未覆盖该项的项目立即生效。合并结果按各层文件的
+(修改时间, 大小) 缓存，文件未变化时不重新读取。
+
+旧版本复制到项目中的整份 ``prompts.json`` 仍可读取：以复制时记录的
+``prompts.base.json``（没有时以当前的全局提示词）为基准，只有与之不同的项
+被视为项目覆盖。项目在界面中保存提示词或运行 sync_prompts.py 时转换为覆盖文件。
+"""
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULTS_PATH = Path('prompts.default.json')
+GLOBAL_PATH = Path('prompts.json')
+OVERRIDE_NAME = 'prompts.override.json'
+# 旧版本复制到项目中的整份提示词及其复制时的全局版本
+LEGACY_NAME = 'prompts.json'
+LEGACY_BASE_NAME = 'prompts.base.json'
+LEGACY_BACKUP_NAME = 'prompts.json.backup'
+
+
+def merge_layers(base: Dict, override: Dict) -> Dict:
+    """把override合并到base上，返回新字典（字典逐项合并，其他值直接覆盖）"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_layers(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def diff_layers(base: Dict, full: Dict) -> Dict:
+    """full中与base不同的项（merge_layers(base, diff_layers(base, full)) 包含full的全部内容）"""
+    delta = {}
+    for key, value in full.items():
+        if key not in base:
+            delta[key] = value
+        elif isinstance(value, dict) and isinstance(base[key], dict):
+            nested = diff_layers(base[key], value)
+            if nested:
+                delta[key] = nested
+        elif value != base[key]:
+            delta[key] = value
+    return delta
+
+
+def _load_json(path: Path) -> Dict:
+    """读取JSON对象；文件不存在或格式错误时返回空字典"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class PromptResolver:
+    """按层合并提示词并缓存结果"""
+
+    def __init__(self, defaults_path: Path = DEFAULTS_PATH, global_path: Path = GLOBAL_PATH):
+        self.defaults_path = Path(defaults_path)
+        self.global_path = Path(global_path)
+        # 项目路径（None表示无项目） -> (各层签名, 合并结果)
+        self._cache: Dict[Optional[str], Tuple[Tuple, Dict]] = {}
+        self._lock = threading.Lock()
+
+    # ===== 各层文件 =====
+    def layer_paths(self, project_path: Optional[Path] = None) -> List[Path]:
+        """参与合并的文件（由低到高）；项目的旧版整份副本也包含在内"""
+        paths = [self.defaults_path, self.global_path]
+        if project_path is not None:
+            project_path = Path(project_path)
+            paths += [
+                project_path / LEGACY_BASE_NAME, project_path / LEGACY_NAME, project_path / OVERRIDE_NAME
+            ]
+        return paths
+
+    def base_prompts(self) -> Dict:
+        """项目覆盖所基于的提示词（内置默认 + 全局）"""
+        return self.resolve(None)
+
+    def load_overrides(self, project_path: Path) -> Dict:
+        """项目覆盖的项；只有旧版整份副本时从副本中推算"""
+        project_path = Path(project_path)
+        override_path = project_path / OVERRIDE_NAME
+        if override_path.exists():
+            return _load_json(override_path)
+        legacy_path = project_path / LEGACY_NAME
+        if legacy_path.exists():
+            base_path = project_path / LEGACY_BASE_NAME
+            base = _load_json(base_path) if base_path.exists() else self.base_prompts()
+            return diff_layers(base, _load_json(legacy_path))
+        return {}
+
+    # ===== 合并 =====
+    def resolve(self, project_path: Optional[Path] = None) -> Dict:
+        """
+        合并后的提示词；各层文件未变化时返回缓存
+
+        调用方不得修改返回值，需要修改时先复制。
+        """
+        key = str(project_path) if project_path is not None else None
+        signature = tuple(_signature(path) for path in self.layer_paths(project_path))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if project_path is None:
+            resolved = merge_layers(_load_json(self.defaults_path), _load_json(self.global_path))
+        else:
+            resolved = merge_layers(self.base_prompts(), self.load_overrides(project_path))
+        with self._lock:
+            self._cache[key] = (signature, resolved)
+        return resolved
+
+    def invalidate(self):
+        """丢弃所有缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    # ===== 保存 =====
+    def save_project_prompts(self, project_path: Path, prompts: Dict) -> Dict:
+        """
+        保存项目的完整提示词：只把与全局不同的项写入覆盖文件
+
+        旧版整份副本在保存后改名为备份。
+
+        Returns:
+            写入的覆盖项
+        """
+        project_path = Path(project_path)
+        overrides = diff_layers(self.base_prompts(), prompts)
+        override_path = project_path / OVERRIDE_NAME
+        tmp_path = override_path.with_name(override_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(overrides, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, override_path)
+        self.retire_legacy_copy(project_path)
+        return overrides
+
+    def retire_legacy_copy(self, project_path: Path):
+        """把旧版整份副本改名为备份并删除其基准"""
+        legacy_path = Path(project_path) / LEGACY_NAME
+        if legacy_path.exists():
+            os.replace(legacy_path, legacy_path.with_name(LEGACY_BACKUP_NAME))
+        (Path(project_path) / LEGACY_BASE_NAME).unlink(missing_ok=True)
+
+    def reset_project(self, project_path: Path):
+        """删除项目的所有覆盖，恢复为全局提示词"""
+        (Path(project_path) / OVERRIDE_NAME).unlink(missing_ok=True)
+        self.retire_legacy_copy(project_path)
+
+    def project_prompts(self, project_path: Optional[Path] = None) -> Dict:
+        """可以修改的合并结果副本"""
+        return copy.deepcopy(self.resolve(project_path))
+
+
+# 全局提示词解析器实例
+prompt_resolver = PromptResolver()
@@ -1,59 +1,37 @@
 import json
-from pathlib import Path
 from ui_utils import ui, console
+from prompt_layers import prompt_resolver
+from llm_service import llm_service
 from rich.panel import Panel
 
-def get_prompts_path():
-    """获取当前项目的prompts.json路径"""
+def get_project_path():
+    """获取当前项目的路径，单项目模式下返回None"""
     try:
         # 使用延迟导入避免循环引用
         import project_data_manager
         data_manager = project_data_manager.project_data_manager.get_data_manager()
-        
-        if data_manager.project_path:
-            # 多项目模式：使用项目路径下的prompts.json
-            prompts_path = data_manager.project_path / 'prompts.json'
-            
-            # 如果项目路径下不存在prompts.json，从根目录复制默认的
-            if not prompts_path.exists():
-                import shutil
-                root_prompts = Path('prompts.json')
-                if root_prompts.exists():
-                    shutil.copy2(root_prompts, prompts_path)
-                    ui.print_info(f"已为项目复制默认prompts.json到: {prompts_path}")
-                else:
-                    # 如果根目录也没有，尝试从默认模板复制
-                    default_prompts = Path('prompts.default.json')
-                    if default_prompts.exists():
-                        shutil.copy2(default_prompts, prompts_path)
-                        ui.print_info(f"已为项目复制默认prompts模板到: {prompts_path}")
-            
-            return prompts_path
-        else:
-            # 单项目模式：使用根目录的prompts.json
-            return Path('prompts.json')
+        return data_manager.project_path if data_manager else None
     except Exception as e:
-        ui.print_warning(f"获取prompts.json路径时出错: {e}，使用默认路径")
-        return Path('prompts.json')
+        ui.print_warning(f"获取当前项目时出错: {e}，使用全局提示词")
+        return None
 
 def get_default_prompts_path():
     """获取默认prompts模板路径"""
-    return Path('prompts.default.json')
+    return prompt_resolver.defaults_path
 
 def get_prompts():
-    """加载prompts"""
-    try:
-        prompts_file = get_prompts_path()
-        with open(prompts_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    """加载合并后的prompts（内置默认 → 全局 → 项目覆盖）"""
+    return prompt_resolver.project_prompts(get_project_path())
 
 def save_prompts(prompts):
-    """保存prompts"""
-    prompts_file = get_prompts_path()
-    with open(prompts_file, 'w', encoding='utf-8') as f:
-        json.dump(prompts, f, indent=2, ensure_ascii=False)
+    """保存prompts：项目中只保存与全局不同的项，单项目模式下写入全局prompts.json"""
+    project_path = get_project_path()
+    if project_path:
+        prompt_resolver.save_project_prompts(project_path, prompts)
+    else:
+        with open(prompt_resolver.global_path, 'w', encoding='utf-8') as f:
+            json.dump(prompts, f, indent=2, ensure_ascii=False)
+    llm_service.reload_prompts()
 
 def handle_prompts_management():
     """处理prompts管理的UI"""
@@ -125,7 +103,22 @@ def edit_prompt():
 
 
 def reset_prompts():
-    """恢复默认prompts"""
+    """恢复默认prompts：项目中删除所有自定义，单项目模式下恢复为内置模板"""
+    project_path = get_project_path()
+    if project_path:
+        if not ui.confirm("确定要删除本项目对Prompts的所有修改、恢复为全局设置吗？此操作无法撤销。"):
+            ui.print_warning("操作已取消。")
+            ui.pause()
+            return
+        try:
+            prompt_resolver.reset_project(project_path)
+            llm_service.reload_prompts()
+            ui.print_success("本项目的Prompts已恢复为全局设置。")
+        except OSError as e:
+            ui.print_error(f"恢复默认设置时发生错误: {e}")
+        ui.pause()
+        return
+
     if not ui.confirm("确定要将所有Prompts恢复到默认设置吗？此操作无法撤销。"):
         ui.print_warning("操作已取消。")
         ui.pause()
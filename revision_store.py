@@ -0,0 +1,215 @@
+"""
+修订历史存储 - 以增量方式保存章节正文和大纲的每个版本
+
+与草稿归档相同，由追加写入的数据文件和JSON索引组成：
+- ``revisions.pack``: 压缩后的版本数据
+- ``revisions.pack.idx``: 每个文档的版本列表（偏移、长度、类型、校验和、时间戳）
+
+每个版本保存为相对上一版本的增量（按句子切分后比较，只记录新增文本和沿用的区间），
+每隔 keyframe_interval 个版本或增量不比全文小时保存一次完整关键帧。
+重建任意版本只需从最近的关键帧开始应用不超过 keyframe_interval 个增量。
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import json_codec
+
+STORE_VERSION = 1
+_SENTENCE = re.compile(r'[^。！？!?\n]*[。！？!?\n]+|[^。！？!?\n]+')
+
+
+def _tokenize(text: str) -> List[str]:
+    """按句子切分（保留标点和换行），中文正文的修改通常以句子为单位"""
+    return _SENTENCE.findall(text)
+
+
+def compute_delta(base: str, target: str) -> List[Union[List[int], str]]:
+    """
+    计算从base到target的增量
+
+    Returns:
+        操作列表：[start, end] 表示沿用base的字符区间，字符串表示新增文本
+    """
+    base_tokens, target_tokens = _tokenize(base), _tokenize(target)
+    base_offsets = [0]
+    for token in base_tokens:
+        base_offsets.append(base_offsets[-1] + len(token))
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_tokens, target_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            start, end = base_offsets[i1], base_offsets[i2]
+            if ops and isinstance(ops[-1], list) and ops[-1][1] == start:
+                ops[-1][1] = end
+            else:
+                ops.append([start, end])
+        elif j2 > j1:
+            text = "".join(target_tokens[j1:j2])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += text
+            else:
+                ops.append(text)
+    return ops
+
+
+def apply_delta(base: str, ops: List[Union[List[int], str]]) -> str:
+    """把增量应用到base上"""
+    return "".join(base[op[0]:op[1]] if isinstance(op, list) else op for op in ops)
+
+
+class RevisionStore:
+    """按文档保存版本历史的增量存储"""
+
+    def __init__(self, data_path: Path, keyframe_interval: int = 10):
+        self.data_path = Path(data_path)
+        self.index_path = self.data_path.with_suffix(".pack.idx")
+        self.keyframe_interval = max(int(keyframe_interval), 1)
+        self._lock = threading.RLock()
+        self._index = None
+        # 加载索引时索引文件的 (修改时间, 大小)
+        self._index_loaded = None
+        # 文档 -> 最新版本的文本，避免连续记录时重复重建
+        self._latest = {}
+
+    # ===== 索引 =====
+    def _index_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self) -> Dict:
+        """加载索引；索引文件被其他实例或进程改写过时重新读取"""
+        signature = self._index_signature()
+        if self._index is None or signature != self._index_loaded:
+            if signature is not None:
+                with self.index_path.open('r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            else:
+                self._index = {"version": STORE_VERSION, "documents": {}}
+            self._index_loaded = signature
+            self._latest = {}
+        return self._index
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".idx.tmp")
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._index_loaded = self._index_signature()
+
+    # ===== 读写 =====
+    def _read_payload(self, entry: Dict) -> bytes:
+        with self.data_path.open('rb') as f:
+            f.seek(entry["offset"])
+            return zlib.decompress(f.read(entry["length"]))
+
+    def _append_payload(self, payload: bytes) -> Tuple[int, int]:
+        data = zlib.compress(payload, 9)
+        with self.data_path.open('ab') as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return offset, len(data)
+
+    def record(self, document: str, text: str, metadata: Optional[Dict] = None) -> Optional[int]:
+        """
+        记录文档的新版本
+
+        Returns:
+            新版本号（从0开始）；内容与最新版本相同时返回None
+        """
+        raw = text.encode('utf-8')
+        checksum = zlib.crc32(raw)
+        with self._lock:
+            revisions = self._load_index()["documents"].setdefault(document, [])
+            if revisions and revisions[-1]["crc"] == checksum:
+                return None
+
+            payload, kind = raw, "full"
+            since_keyframe = next(
+                (i for i, entry in enumerate(reversed(revisions)) if entry["type"] == "full"), len(revisions)
+            )
+            if revisions and since_keyframe + 1 < self.keyframe_interval:
+                delta = json_codec.dumps(compute_delta(self._text_at(document, len(revisions) - 1), text))
+                if len(delta) < len(payload):
+                    payload, kind = delta, "delta"
+
+            offset, length = self._append_payload(payload)
+            entry = {
+                "offset": offset,
+                "length": length,
+                "type": kind,
+                "crc": checksum,
+                "size": len(text),
+                "raw_bytes": len(raw),
+                "timestamp": datetime.now().isoformat()
+            }
+            if metadata:
+                entry["meta"] = metadata
+            revisions.append(entry)
+            self._save_index()
+            self._latest[document] = text
+            return len(revisions) - 1
+
+    def _text_at(self, document: str, revision: int) -> str:
+        """从最近的关键帧开始重建指定版本"""
+        revisions = self._load_index()["documents"][document]
+        if revision == len(revisions) - 1 and document in self._latest:
+            return self._latest[document]
+
+        start = revision
+        while revisions[start]["type"] != "full":
+            start -= 1
+        text = self._read_payload(revisions[start]).decode('utf-8')
+        for entry in revisions[start + 1:revision + 1]:
+            text = apply_delta(text, json_codec.loads(self._read_payload(entry)))
+        if zlib.crc32(text.encode('utf-8')) != revisions[revision]["crc"]:
+            raise ValueError(f"修订历史校验失败: {document} 版本 {revision}")
+        if revision == len(revisions) - 1:
+            self._latest[document] = text
+        return text
+
+    def get(self, document: str, revision: int = -1) -> Optional[str]:
+        """读取指定版本（负数从最新版本倒数），不存在时返回None"""
+        with self._lock:
+            revisions = self._load_index()["documents"].get(document, [])
+            if not -len(revisions) <= revision < len(revisions):
+                return None
+            return self._text_at(document, revision % len(revisions))
+
+    def list_revisions(self, document: str) -> List[Dict]:
+        """列出文档的版本（版本号、时间、字数、元数据），不读取正文"""
+        with self._lock:
+            revisions = self._load_index()["documents"].get(document, [])
+            return [
+                {"revision": i, "timestamp": e["timestamp"], "size": e["size"], "meta": e.get("meta", {})}
+                for i, e in enumerate(revisions)
+            ]
+
+    def documents(self) -> List[str]:
+        """有版本历史的文档"""
+        with self._lock:
+            return list(self._load_index()["documents"].keys())
+
+    def stats(self) -> Dict[str, int]:
+        """版本数、存储字节数以及全部保存完整副本时的字节数"""
+        with self._lock:
+            documents = self._load_index()["documents"]
+            entries = [e for revisions in documents.values() for e in revisions]
+            return {
+                "revisions": len(entries),
+                "keyframes": sum(1 for e in entries if e["type"] == "full"),
+                "bytes": self.data_path.stat().st_size if self.data_path.exists() else 0,
+                "full_bytes": sum(e["raw_bytes"] for e in entries)
+            }
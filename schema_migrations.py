@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+数据格式版本与迁移
+
+每个项目在 meta/schema.json 中记录数据格式版本。格式变化以迁移步骤的形式注册到
+MIGRATIONS，每个步骤有一个全局递增的版本号并只针对一个文件。DataManager 在首次
+读取某个文件时按需执行该文件尚未应用的步骤（懒迁移），也可以在后台一次迁移全部
+项目，避免启动时阻塞升级。
+
+新增迁移：
+    @migration(3, "novel_text", "说明")
+    def _xxx(data):
+        return 新格式的数据
+
+用法:
+    python schema_migrations.py             # 迁移所有项目
+    python schema_migrations.py 项目名 ...   # 只迁移指定项目
+"""
+
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from chapter_ids import assign_chapter_ids
+
+
+@dataclass(frozen=True)
+class Migration:
+    """一个迁移步骤"""
+    version: int
+    file_key: str
+    description: str
+    apply: Callable[[Any], Any]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, file_key: str, description: str):
+    """注册迁移步骤的装饰器，版本号必须唯一"""
+    def decorator(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"迁移版本号重复: {version}")
+        MIGRATIONS.append(Migration(version, file_key, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+def current_version() -> int:
+    """最新的数据格式版本"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def migration_keys() -> List[str]:
+    """有迁移步骤的文件"""
+    return sorted({m.file_key for m in MIGRATIONS})
+
+
+def pending_migrations(file_key: str, from_version: int) -> List[Migration]:
+    """文件从指定版本升级到最新版本需要执行的步骤"""
+    return [m for m in MIGRATIONS if m.file_key == file_key and m.version > from_version]
+
+
+# ===== 迁移步骤 =====
+@migration(1, "theme_one_line", "一句话主题统一为 {theme, novel_name} 字典格式")
+def _theme_one_line_to_dict(data):
+    if isinstance(data, dict):
+        return data
+    if isinstance(data, str) and data.strip():
+        return {"theme": data}
+    return {}
+
+
+@migration(2, "chapter_outline", "分章细纲的每章补充 order 字段")
+def _chapter_outline_order(data):
+    if not isinstance(data, dict) or not isinstance(data.get("chapters"), list):
+        return data
+    for i, chapter in enumerate(data["chapters"]):
+        if not isinstance(chapter, dict):
+            continue
+        if chapter.get("chapter_number"):
+            chapter["order"] = chapter["chapter_number"]
+        elif not chapter.get("order"):
+            chapter["order"] = i + 1
+    return data
+
+
+@migration(3, "chapter_outline", "分章细纲的每章分配稳定ID（沿用旧键 chapter_N）")
+def _chapter_outline_ids(data):
+    if not isinstance(data, dict) or not isinstance(data.get("chapters"), list):
+        return data
+    assign_chapter_ids(data["chapters"])
+    return data
+
+
+# ===== 批量迁移 =====
+def migrate_project(data_manager) -> Dict[str, bool]:
+    """
+    迁移一个项目的所有文件
+
+    Returns:
+        Dict[str, bool]: 每个文件是否执行了迁移
+    """
+    return {key: data_manager.migrate_file(key) for key in migration_keys()}
+
+
+def start_background_migration(project_paths: List, callback: Optional[Callable[[Dict], None]] = None) -> threading.Thread:
+    """在后台线程中依次迁移多个项目，完成后以 {项目路径: 结果} 调用callback"""
+    from data_manager import DataManager
+
+    def worker():
+        results = {}
+        for path in project_paths:
+            results[str(path)] = migrate_project(DataManager(path))
+        if callback:
+            callback(results)
+
+    thread = threading.Thread(target=worker, name="schema-migration", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    """命令行入口：迁移所有项目或指定项目"""
+    from data_manager import DataManager
+    from project_manager import project_manager
+    from ui_utils import ui
+
+    names = sys.argv[1:] or [p.name for p in project_manager.list_projects()]
+    if not names:
+        ui.print_warning("未找到任何项目")
+        return
+
+    for name in names:
+        project_path = project_manager.get_project_path(name)
+        if not project_path:
+            ui.print_error(f"项目 '{name}' 不存在")
+            continue
+        dm = DataManager(project_path)
+        migrated = [key for key, done in migrate_project(dm).items() if done]
+        ui.print_success(f"项目 {name} 数据格式版本: {dm.get_schema_version()}")
+        if migrated:
+            ui.print_info(f"已迁移: {', '.join(migrated)}")
+
+
+if __name__ == "__main__":
+    main()
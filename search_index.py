@@ -0,0 +1,389 @@
+"""
+全文搜索索引 - 跨项目的中文倒排索引
+
+索引覆盖所有项目的正文、章节概要、分章细纲、故事大纲、主题和世界设定（角色、场景、道具）。
+中文按相邻两字切分（bigram），英文和数字按单词切分；每段连续中文的最后一个字额外作为单字词项，
+单字查询按前缀范围匹配所有以该字开头的词项，不会漏掉任何位置。
+
+索引保存在应用数据目录下的SQLite数据库中，以 (项目, 数据文件, 条目) 为文档：
+- DataManager 写入文件后调用 update_source，只重新切分内容有变化的条目
+- refresh_project 按文件的 (修改时间, 大小) 发现外部修改或尚未建立索引的项目
+
+搜索时取包含所有查询词项的文档，按BM25排序，完整包含查询文本的结果排在前面，并返回片段。
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import json_codec
+from config import LOCK_CONFIG, SEARCH_CONFIG, get_project_paths
+
+# 参与索引的数据文件及显示名称
+SOURCES = {
+    "novel_text": "正文",
+    "chapter_summary": "章节概要",
+    "chapter_outline": "分章细纲",
+    "story_outline": "故事大纲",
+    "theme_one_line": "一句话主题",
+    "theme_paragraph": "段落主题",
+    "characters": "角色",
+    "locations": "场景",
+    "items": "道具",
+}
+
+# BM25参数
+K1 = 1.2
+B = 0.75
+
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_RUN_RE = re.compile(rf'[{_CJK}]+|[0-9A-Za-z]+')
+_CJK_RE = re.compile(rf'[{_CJK}]')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    project TEXT NOT NULL,
+    source TEXT NOT NULL,
+    signature TEXT,
+    PRIMARY KEY (project, source)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    source TEXT NOT NULL,
+    key TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    digest TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    UNIQUE (project, source, key)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class SearchHit:
+    """一条搜索结果"""
+    project: str
+    source: str
+    key: str
+    title: str
+    snippet: str
+    score: float
+    exact: bool = False
+
+
+# ===== 切分 =====
+def index_terms(text: str) -> List[str]:
+    """文档的词项：中文bigram加每段末字，英文数字小写单词"""
+    terms = []
+    for run in _RUN_RE.findall(text):
+        if _CJK_RE.match(run):
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            terms.append(run[-1])
+        else:
+            terms.append(run.lower())
+    return terms
+
+
+def query_terms(query: str) -> List[str]:
+    """查询的词项：中文只用bigram，单个汉字保留为单字（按前缀匹配）"""
+    terms = []
+    for run in _RUN_RE.findall(query):
+        if _CJK_RE.match(run):
+            terms.extend([run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)])
+        else:
+            terms.append(run.lower())
+    return list(dict.fromkeys(terms))
+
+
+def _document_terms(title: str, content: str) -> List[str]:
+    return index_terms(f"{title}\n{content}")
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def extract_documents(source: str, data) -> Dict[str, Tuple[str, str]]:
+    """从数据文件内容中取出文档 {条目: (标题, 正文)}"""
+    if not isinstance(data, dict):
+        return {}
+    if source == "novel_text":
+        chapters = data.get("chapters", {})
+        return {key: (_text(ch.get("title")), _text(ch.get("content")))
+                for key, ch in chapters.items() if isinstance(ch, dict)}
+    if source == "chapter_summary":
+        summaries = data.get("summaries", {})
+        return {key: (_text(s.get("title")), _text(s.get("summary")))
+                for key, s in summaries.items() if isinstance(s, dict)}
+    if source == "chapter_outline":
+        chapters = [ch for ch in data.get("chapters", []) if isinstance(ch, dict)]
+        return {(ch.get("id") or str(i)): (_text(ch.get("title")), _text(ch.get("outline")))
+                for i, ch in enumerate(chapters, 1)}
+    if source == "story_outline":
+        return {"outline": ("故事大纲", _text(data.get("outline")))} if data.get("outline") else {}
+    if source == "theme_one_line":
+        return {"theme": ("一句话主题", _text(data.get("theme")))} if data.get("theme") else {}
+    if source == "theme_paragraph":
+        paragraph = data.get("theme_paragraph")
+        return {"theme_paragraph": ("段落主题", _text(paragraph))} if paragraph else {}
+    if source in ("characters", "locations", "items"):
+        return {name: (name, _text(item.get("description")) if isinstance(item, dict) else _text(item))
+                for name, item in data.items()}
+    return {}
+
+
+def _signature_of(path: Path) -> Optional[str]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class SearchIndex:
+    """基于SQLite的跨项目倒排索引"""
+
+    def __init__(self, db_path: Path, timeout: Optional[float] = None):
+        self.db_path = Path(db_path)
+        self.timeout = LOCK_CONFIG["timeout"] if timeout is None else timeout
+        # 每个线程复用自己的连接
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """当前线程的连接，在一个事务中执行"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
+            # 索引可以随时重建，提交时不必等待落盘
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        with conn:
+            yield conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ===== 更新 =====
+    def update_source(self, project: str, source: str, data, signature=None) -> int:
+        """
+        用数据文件的最新内容更新索引，只重新切分变化的条目
+
+        Args:
+            project: 项目名称
+            source: 数据文件键（见 SOURCES）
+            data: 文件内容
+            signature: 文件的 (修改时间, 大小)，供 refresh_project 判断是否需要重新读取
+
+        Returns:
+            重新索引的条目数
+        """
+        if source not in SOURCES:
+            return 0
+        documents = extract_documents(source, data)
+        if isinstance(signature, tuple):
+            signature = f"{signature[0]}:{signature[1]}"
+        changed = 0
+        with self._connect() as conn:
+            existing = {
+                row[1]: row for row in conn.execute(
+                    "SELECT id, key, digest, title, content FROM documents WHERE project = ? AND source = ?",
+                    (project, source)
+                )
+            }
+            for key in existing.keys() - documents.keys():
+                self._delete_document(conn, existing[key])
+            for key, (title, content) in documents.items():
+                digest = hashlib.sha1(f"{title}\0{content}".encode('utf-8')).hexdigest()
+                if key in existing and existing[key][2] == digest:
+                    continue
+                if key in existing:
+                    self._delete_document(conn, existing[key])
+                terms = Counter(_document_terms(title, content))
+                cursor = conn.execute(
+                    "INSERT INTO documents (project, source, key, title, content, digest, length) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (project, source, key, title, content, digest, sum(terms.values()))
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, cursor.lastrowid, tf) for term, tf in terms.items()]
+                )
+                changed += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO sources (project, source, signature) VALUES (?, ?, ?)",
+                (project, source, signature)
+            )
+        return changed
+
+    @staticmethod
+    def _delete_document(conn, row):
+        """删除文档及其倒排项（按保存的正文重新切分得到词项，postings不需要按文档的二级索引）"""
+        doc_id, _, _, title, content = row
+        conn.executemany(
+            "DELETE FROM postings WHERE term = ? AND doc_id = ?",
+            [(term, doc_id) for term in set(_document_terms(title, content))]
+        )
+        conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def refresh_project(self, project: str, project_path: Path) -> int:
+        """重新索引自上次索引后变化过（或从未索引）的数据文件，返回重新索引的条目数"""
+        paths = get_project_paths(project_path)
+        with self._connect() as conn:
+            indexed = dict(conn.execute("SELECT source, signature FROM sources WHERE project = ?", (project,)))
+        changed = 0
+        for source in SOURCES:
+            path = paths[source]
+            signature = _signature_of(path)
+            if source in indexed and indexed[source] == signature:
+                continue
+            try:
+                data = json_codec.load_file(path) if signature else {}
+            except (ValueError, OSError):
+                continue
+            changed += self.update_source(project, source, data, signature)
+        return changed
+
+    def remove_project(self, project: str):
+        """删除项目的全部索引"""
+        with self._connect() as conn:
+            # 整个项目一次扫描倒排表，比逐个文档重新切分快
+            conn.execute(
+                "DELETE FROM postings WHERE doc_id IN (SELECT id FROM documents WHERE project = ?)", (project,)
+            )
+            conn.execute("DELETE FROM documents WHERE project = ?", (project,))
+            conn.execute("DELETE FROM sources WHERE project = ?", (project,))
+
+    def prune_projects(self, keep: Iterable[str]) -> List[str]:
+        """删除不在keep中的项目的索引，返回被删除的项目"""
+        keep = set(keep)
+        with self._connect() as conn:
+            indexed = [row[0] for row in conn.execute("SELECT DISTINCT project FROM sources")]
+        removed = [project for project in indexed if project not in keep]
+        for project in removed:
+            self.remove_project(project)
+        return removed
+
+    # ===== 搜索 =====
+    def _postings(self, conn, term: str) -> Dict[int, int]:
+        if len(term) == 1 and _CJK_RE.match(term):
+            # 单个汉字：所有以它开头的bigram以及作为段末的单字
+            rows = conn.execute(
+                "SELECT doc_id, SUM(tf) FROM postings WHERE term >= ? AND term < ? GROUP BY doc_id",
+                (term, chr(ord(term) + 1))
+            )
+        else:
+            rows = conn.execute("SELECT doc_id, tf FROM postings WHERE term = ?", (term,))
+        return dict(rows)
+
+    def search(self, query: str, limit: Optional[int] = None, project: Optional[str] = None) -> List[SearchHit]:
+        """
+        搜索包含查询中所有词项的条目
+
+        Args:
+            query: 查询文本
+            limit: 最多返回的结果数，默认 SEARCH_CONFIG["max_results"]
+            project: 只搜索指定项目
+
+        Returns:
+            按相关度排序的结果，完整包含查询文本的在前
+        """
+        limit = SEARCH_CONFIG["max_results"] if limit is None else limit
+        terms = query_terms(query)
+        if not terms or limit <= 0:
+            return []
+
+        with self._connect() as conn:
+            postings = []
+            for term in terms:
+                term_postings = self._postings(conn, term)
+                if not term_postings:
+                    return []
+                postings.append(term_postings)
+            candidates = set.intersection(*(set(p) for p in postings))
+            if not candidates:
+                return []
+
+            total, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM documents").fetchone()
+            lengths = {}
+            candidate_list = list(candidates)
+            for i in range(0, len(candidate_list), 500):
+                chunk = candidate_list[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                sql = f"SELECT id, length FROM documents WHERE id IN ({marks})"
+                params = chunk
+                if project is not None:
+                    sql += " AND project = ?"
+                    params = chunk + [project]
+                lengths.update(conn.execute(sql, params))
+
+            scores = {}
+            for term_postings in postings:
+                idf = math.log(1 + (total - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                for doc_id, length in lengths.items():
+                    tf = term_postings[doc_id]
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / (avg_length or 1)))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+
+            # 只为排名靠前的文档读取正文，检查是否完整包含查询文本
+            ranked = sorted(scores, key=scores.get, reverse=True)[:limit * 5]
+            hits = []
+            needle = query.strip().lower()
+            for doc_id in ranked:
+                project_name, source, key, title, content = conn.execute(
+                    "SELECT project, source, key, title, content FROM documents WHERE id = ?", (doc_id,)
+                ).fetchone()
+                exact = needle in title.lower() or needle in content.lower()
+                hits.append(SearchHit(
+                    project=project_name, source=source, key=key, title=title,
+                    snippet=make_snippet(content or title, query), score=scores[doc_id], exact=exact
+                ))
+
+        hits.sort(key=lambda hit: (hit.exact, hit.score), reverse=True)
+        return hits[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        """已索引的项目数、文档数和词项数"""
+        with self._connect() as conn:
+            projects = conn.execute("SELECT COUNT(DISTINCT project) FROM sources").fetchone()[0]
+            documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            postings = conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"projects": projects, "documents": documents, "postings": postings}
+
+
+def make_snippet(content: str, query: str, width: Optional[int] = None) -> str:
+    """取查询文本（找不到时取第一个词项）附近的片段"""
+    width = SEARCH_CONFIG["snippet_chars"] if width is None else width
+    lowered = content.lower()
+    position = lowered.find(query.strip().lower())
+    if position < 0:
+        for term in query_terms(query):
+            position = lowered.find(term)
+            if position >= 0:
+                break
+    position = max(position, 0)
+    start = max(position - width // 2, 0)
+    end = min(start + width, len(content))
+    snippet = content[start:end].replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(content) else "")
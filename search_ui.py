@@ -0,0 +1,74 @@
+import time
+from rich.markup import escape
+from rich.table import Table
+from ui_utils import ui, console
+from project_manager import project_manager
+from search_index import SOURCES, query_terms
+
+
+def _highlight(snippet: str, query: str) -> str:
+    """转义片段并高亮其中的查询文本（找不到时高亮各词项）"""
+    needles = [query.strip()] if query.strip() and query.strip().lower() in snippet.lower() else query_terms(query)
+    lowered = snippet.lower()
+    marks = []
+    for needle in needles:
+        start = lowered.find(needle.lower())
+        while needle and start >= 0:
+            marks.append((start, start + len(needle)))
+            start = lowered.find(needle.lower(), start + len(needle))
+    marks.sort()
+
+    parts, position = [], 0
+    for start, end in marks:
+        start = max(start, position)
+        if start >= end:
+            continue
+        parts.append(escape(snippet[position:start]))
+        parts.append(f"[bold yellow]{escape(snippet[start:end])}[/bold yellow]")
+        position = end
+    parts.append(escape(snippet[position:]))
+    return "".join(parts)
+
+
+def _project_names():
+    """项目名称 -> 显示名称"""
+    return {p.name: p.display_name for p in project_manager.list_projects()}
+
+
+def handle_full_text_search():
+    """在所有项目的正文、概要、大纲和设定中搜索"""
+    # 补上其他进程或编辑器的修改以及尚未索引的项目
+    changed = project_manager.refresh_search_index()
+    if changed:
+        ui.print_info(f"已重新索引 {changed} 个条目")
+    names = _project_names()
+    stats = project_manager.search_index.stats()
+    ui.print_info(f"索引中共有 {stats['projects']} 个项目、{stats['documents']} 个条目")
+
+    while True:
+        query = ui.prompt("\n请输入要搜索的内容（直接回车返回）", default="")
+        if not query or not query.strip():
+            break
+
+        started = time.perf_counter()
+        hits = project_manager.search_index.search(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        if not hits:
+            ui.print_warning(f"没有找到包含「{query}」的内容（{elapsed:.1f} ms）")
+            continue
+
+        table = Table(title=f"🔍 「{escape(query)}」的搜索结果", caption=f"共 {len(hits)} 条结果，用时 {elapsed:.1f} ms")
+        table.add_column("序号", style="cyan", no_wrap=True)
+        table.add_column("项目", style="green", no_wrap=True)
+        table.add_column("类型", style="magenta", no_wrap=True)
+        table.add_column("标题", style="yellow")
+        table.add_column("片段", style="white")
+        for i, hit in enumerate(hits, 1):
+            table.add_row(
+                str(i),
+                escape(names.get(hit.project, hit.project)),
+                SOURCES.get(hit.source, hit.source),
+                escape(hit.title),
+                _highlight(hit.snippet, query)
+            )
+        console.print(table)
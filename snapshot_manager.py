@@ -0,0 +1,225 @@
+"""
+项目快照 - 把 meta/ 的当前状态增量备份到 meta_backup/
+
+meta_backup 的结构：
+- ``objects/ab/abcdef...``: 按内容SHA-256寻址的文件副本，同样的内容只保存一份
+- ``snapshots/<id>/``: 与 meta/ 相同的目录结构，每个文件都是指向 objects 的硬链接，
+  可以直接浏览（不支持硬链接的文件系统上回退为复制）
+- ``snapshots/<id>.json``: 快照清单，记录每个文件的哈希、大小和修改时间
+
+未修改的文件按上一个快照记录的大小和修改时间跳过哈希计算，并复用已有的对象，
+因此增量快照几乎不占空间。恢复时把快照中的文件复制回 meta/ 并删除快照之后新增的文件。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 不进入快照的文件：锁、临时文件、事务日志、迁移日志、占用记录以及可以从正文重建的索引
+EXCLUDED_NAMES = {".lock", ".transaction.journal", ".migration.json", ".usage.json", "novel_text.idx"}
+EXCLUDED_SUFFIXES = (".tmp", ".txn")
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotManager:
+    """单个项目的快照管理"""
+
+    def __init__(self, meta_dir: Path, backup_dir: Path):
+        self.meta_dir = Path(meta_dir)
+        self.backup_dir = Path(backup_dir)
+        self.objects_dir = self.backup_dir / "objects"
+        self.snapshots_dir = self.backup_dir / "snapshots"
+
+    # ===== 内部工具 =====
+    @staticmethod
+    def _is_excluded(path: Path) -> bool:
+        return path.name in EXCLUDED_NAMES or path.name.endswith(EXCLUDED_SUFFIXES)
+
+    def _meta_files(self) -> List[Path]:
+        """meta/ 中需要备份的文件（相对路径）"""
+        if not self.meta_dir.exists():
+            return []
+        return sorted(
+            path.relative_to(self.meta_dir) for path in self.meta_dir.rglob("*")
+            if path.is_file() and not self._is_excluded(path)
+        )
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _store_object(self, source: Path, digest: str) -> bool:
+        """保存对象，已存在时跳过；返回是否新建"""
+        target = self._object_path(digest)
+        if target.exists():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_suffix(".tmp")
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+        return True
+
+    @staticmethod
+    def _link(source: Path, target: Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+
+    def _new_snapshot_id(self) -> str:
+        base = datetime.now().strftime("%Y%m%d-%H%M%S")
+        snapshot_id, counter = base, 1
+        while (self.snapshots_dir / f"{snapshot_id}.json").exists():
+            counter += 1
+            snapshot_id = f"{base}-{counter}"
+        return snapshot_id
+
+    # ===== 快照 =====
+    def list_snapshots(self) -> List[Dict]:
+        """列出快照清单（最新在前）"""
+        if not self.snapshots_dir.exists():
+            return []
+        snapshots = []
+        for path in self.snapshots_dir.glob("*.json"):
+            try:
+                with path.open('r', encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (json.JSONDecodeError, IOError):
+                continue
+        return sorted(snapshots, key=lambda s: s.get("created_at", ""), reverse=True)
+
+    def get_snapshot(self, snapshot_id: str) -> Optional[Dict]:
+        """读取快照清单"""
+        path = self.snapshots_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            return None
+        with path.open('r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def create(self, reason: str = "") -> Dict:
+        """
+        创建快照；与最近一个快照内容完全相同时直接返回该快照
+
+        Returns:
+            快照清单，另含本次新增的对象数 new_objects 和字节数 new_bytes
+        """
+        snapshots = self.list_snapshots()
+        previous = snapshots[0]["files"] if snapshots else {}
+
+        files = {}
+        new_objects = new_bytes = 0
+        for rel in self._meta_files():
+            source = self.meta_dir / rel
+            stat = source.stat()
+            key = rel.as_posix()
+            cached = previous.get(key)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size \
+                    and self._object_path(cached["sha256"]).exists():
+                digest = cached["sha256"]
+            else:
+                digest = _hash_file(source)
+                if self._store_object(source, digest):
+                    new_objects += 1
+                    new_bytes += stat.st_size
+            files[key] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        if snapshots and {k: v["sha256"] for k, v in files.items()} == \
+                {k: v["sha256"] for k, v in previous.items()}:
+            return dict(snapshots[0], new_objects=0, new_bytes=0)
+
+        snapshot_id = self._new_snapshot_id()
+        tree = self.snapshots_dir / snapshot_id
+        for key, entry in files.items():
+            self._link(self._object_path(entry["sha256"]), tree / key)
+
+        snapshot = {
+            "id": snapshot_id,
+            "created_at": datetime.now().isoformat(),
+            "reason": reason,
+            "total_bytes": sum(entry["size"] for entry in files.values()),
+            "files": files
+        }
+        manifest_path = self.snapshots_dir / f"{snapshot_id}.json"
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        return dict(snapshot, new_objects=new_objects, new_bytes=new_bytes)
+
+    def restore(self, snapshot_id: str) -> int:
+        """
+        把 meta/ 恢复到快照状态
+
+        Returns:
+            恢复的文件数
+        """
+        snapshot = self.get_snapshot(snapshot_id)
+        if snapshot is None:
+            raise FileNotFoundError(f"快照不存在: {snapshot_id}")
+        for key, entry in snapshot["files"].items():
+            source = self._object_path(entry["sha256"])
+            if not source.exists():
+                raise FileNotFoundError(f"快照对象缺失: {key}")
+
+        # 先写入所有文件再删除多余文件，中途失败时meta/中不会缺少快照内的文件
+        for key, entry in snapshot["files"].items():
+            target = self.meta_dir / key
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(target.name + ".tmp")
+            shutil.copyfile(self._object_path(entry["sha256"]), tmp_path)
+            os.replace(tmp_path, target)
+        for rel in self._meta_files():
+            if rel.as_posix() not in snapshot["files"]:
+                (self.meta_dir / rel).unlink()
+        return len(snapshot["files"])
+
+    def delete(self, snapshot_id: str):
+        """删除快照（对象由 collect_garbage 清理）"""
+        shutil.rmtree(self.snapshots_dir / snapshot_id, ignore_errors=True)
+        (self.snapshots_dir / f"{snapshot_id}.json").unlink(missing_ok=True)
+
+    def prune(self, keep: int) -> int:
+        """只保留最近keep个快照并清理不再引用的对象，返回删除的快照数"""
+        if keep <= 0:
+            return 0
+        removed = self.list_snapshots()[keep:]
+        for snapshot in removed:
+            self.delete(snapshot["id"])
+        if removed:
+            self.collect_garbage()
+        return len(removed)
+
+    def collect_garbage(self) -> int:
+        """删除没有被任何快照引用的对象，返回删除数量"""
+        if not self.objects_dir.exists():
+            return 0
+        referenced = {
+            entry["sha256"] for snapshot in self.list_snapshots() for entry in snapshot["files"].values()
+        }
+        removed = 0
+        for path in self.objects_dir.glob("*/*"):
+            if path.name not in referenced:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """快照数、对象实际占用字节数以及各快照文件大小之和"""
+        snapshots = self.list_snapshots()
+        stored = sum(p.stat().st_size for p in self.objects_dir.glob("*/*")) if self.objects_dir.exists() else 0
+        return {
+            "snapshots": len(snapshots),
+            "stored_bytes": stored,
+            "logical_bytes": sum(s.get("total_bytes", 0) for s in snapshots)
+        }
@@ -1,14 +1,37 @@
 #!/usr/bin/env python3
 """
 同步prompts.json到所有用户项目
-将更新后的prompts.json分发到~/.metanovel/projects/下的所有项目
+
+提示词按 内置默认 → 全局prompts.json → 项目覆盖 分层合并（见 prompt_layers），
+全局修改无需复制即对所有项目生效。本脚本把旧版本复制到项目中的整份prompts.json
+转换为只含项目修改项的覆盖文件：
+
+- 副本与全局文件内容相同（按SHA-256比较）的项目直接删除副本
+- 有复制时基准 prompts.base.json 的项目以它做三方比较：项目未修改的提示词跟随全局，
+  项目自定义过的提示词保留为覆盖；全局也修改了同一项时保留项目的版本并记为冲突
+- 没有基准的项目把与全局不同的项全部保留为覆盖，不丢失任何内容
+- 原副本改名为 prompts.json.backup；多个项目在线程池中并行处理
+
+用法:
+    python sync_prompts.py [--dry-run] [--report report.json] [--workers N]
 """
 
-import shutil
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from ui_utils import ui, console
 from rich.panel import Panel
 from config import get_app_data_dir
+from prompt_layers import (
+    PromptResolver, prompt_resolver, diff_layers, OVERRIDE_NAME, LEGACY_NAME, LEGACY_BASE_NAME
+)
+
+# 合并时表示"键不存在"
+_MISSING = object()
 
 def get_projects_dir():
     """获取项目目录"""
@@ -19,65 +42,167 @@ def get_all_projects():
     projects_dir = get_projects_dir()
     if not projects_dir.exists():
         return []
-    
+
     # 返回所有子目录
     return [p for p in projects_dir.iterdir() if p.is_dir()]
 
-def sync_prompts_to_projects():
-    """同步prompts.json到所有项目"""
-    source_prompts = Path('prompts.json')
-    
+def merge_prompts(base: Any, ours: Any, theirs: Any, path: str = "") -> Tuple[Any, List[str]]:
+    """
+    三方合并提示词
+
+    Args:
+        base: 上次同步时的源文件内容
+        ours: 项目当前的内容
+        theirs: 新的源文件内容
+
+    Returns:
+        (合并结果, 冲突项路径列表)；冲突项保留项目的版本，
+        合并结果为 _MISSING 表示该项应删除
+    """
+    if ours == theirs or theirs == base:
+        return ours, []
+    if ours == base:
+        return theirs, []
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        # 逐项合并；基准不是字典时视为空
+        base = base if isinstance(base, dict) else {}
+        merged, conflicts = {}, []
+        for key in list(ours) + [k for k in theirs if k not in ours]:
+            value, key_conflicts = merge_prompts(
+                base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING),
+                f"{path}.{key}" if path else key
+            )
+            conflicts.extend(key_conflicts)
+            if value is not _MISSING:
+                merged[key] = value
+        return merged, conflicts
+    return ours, [path]
+
+def _sha256(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def _load(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def sync_project(project_path: Path, resolver: PromptResolver = prompt_resolver,
+                 source_hash: Optional[str] = None, dry_run: bool = False) -> Dict:
+    """
+    把单个项目的整份提示词副本转换为覆盖文件
+
+    Returns:
+        结果字典：project, action（layered / removed / converted / error），
+        overrides（保留为覆盖的提示词），conflicts，error
+    """
+    legacy_path = project_path / LEGACY_NAME
+    base_path = project_path / LEGACY_BASE_NAME
+    result = {"project": project_path.name, "action": "layered", "overrides": [], "conflicts": [], "error": None}
+
+    try:
+        if not legacy_path.exists():
+            return result
+
+        source_hash = source_hash or _sha256(resolver.global_path)
+        if _sha256(legacy_path) == source_hash and not (project_path / OVERRIDE_NAME).exists():
+            # 副本与全局相同：没有任何自定义
+            result["action"] = "removed"
+            if not dry_run:
+                legacy_path.unlink()
+                base_path.unlink(missing_ok=True)
+            return result
+
+        ours = _load(legacy_path)
+        if base_path.exists():
+            _, result["conflicts"] = merge_prompts(_load(base_path), ours, resolver.base_prompts())
+        overrides = diff_layers(resolver.base_prompts(), resolver.resolve(project_path))
+        result["action"] = "converted"
+        result["overrides"] = sorted(overrides)
+        if not dry_run:
+            resolver.save_project_prompts(project_path, resolver.project_prompts(project_path))
+    except (OSError, ValueError) as e:
+        result["action"] = "error"
+        result["error"] = str(e)
+    return result
+
+def sync_prompts_to_projects(dry_run: bool = False, report_path: Optional[Path] = None,
+                             workers: Optional[int] = None, resolver: PromptResolver = prompt_resolver) -> bool:
+    """把所有项目转换为分层提示词"""
+    source_prompts = resolver.global_path
+
     if not source_prompts.exists():
         ui.print_error("未找到源prompts.json文件")
         return False
-    
+
     projects = get_all_projects()
     if not projects:
         ui.print_warning("未找到任何项目")
         return False
-    
-    ui.print_info(f"找到 {len(projects)} 个项目")
-    
-    success_count = 0
-    error_count = 0
-    
-    for project_path in projects:
-        project_name = project_path.name
-        target_prompts = project_path / 'prompts.json'
-        
-        try:
-            # 备份现有的prompts.json（如果存在）
-            if target_prompts.exists():
-                backup_path = project_path / 'prompts.json.backup'
-                shutil.copy2(target_prompts, backup_path)
-                ui.print_info(f"已备份 {project_name} 的prompts.json")
-            
-            # 复制新的prompts.json
-            shutil.copy2(source_prompts, target_prompts)
-            ui.print_success(f"✅ 已同步到项目: {project_name}")
-            success_count += 1
-            
-        except Exception as e:
-            ui.print_error(f"❌ 同步到项目 {project_name} 失败: {e}")
-            error_count += 1
-    
+
+    ui.print_info(f"找到 {len(projects)} 个项目" + ("（试运行，不写入任何文件）" if dry_run else ""))
+
+    source_hash = _sha256(source_prompts)
+    workers = workers or min(8, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda path: sync_project(path, resolver, source_hash, dry_run), projects
+        ))
+
+    labels = {
+        "layered": "已使用分层提示词", "removed": "已删除无修改的副本",
+        "converted": "已转换为覆盖文件（原副本已备份）"
+    }
+    counts = {}
+    for result in results:
+        counts[result["action"]] = counts.get(result["action"], 0) + 1
+        if result["action"] == "error":
+            ui.print_error(f"❌ 同步到项目 {result['project']} 失败: {result['error']}")
+        elif result["action"] != "layered":
+            ui.print_success(f"✅ {result['project']}: {labels[result['action']]}")
+        if result["overrides"]:
+            ui.print_info(f"   {result['project']} 保留的自定义: {', '.join(result['overrides'])}")
+        if result["conflicts"]:
+            ui.print_warning(f"⚠️  {result['project']} 与全局同时修改的项（保留项目版本）: {', '.join(result['conflicts'])}")
+
+    error_count = counts.get("error", 0)
+    if report_path:
+        report = {
+            "source": str(source_prompts.resolve()),
+            "source_sha256": source_hash,
+            "dry_run": dry_run,
+            "counts": counts,
+            "projects": results
+        }
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        ui.print_info(f"同步报告已写入: {report_path}")
+
     # 显示结果统计
+    summary = "\n".join(f"{labels.get(action, '失败')}: {count} 个项目" for action, count in sorted(counts.items()))
     console.print(Panel(
-        f"同步完成!\n成功: {success_count} 个项目\n失败: {error_count} 个项目",
+        f"{'试运行' if dry_run else '同步'}完成!\n{summary}",
         title="同步结果",
         border_style="green" if error_count == 0 else "yellow"
     ))
-    
+
     return error_count == 0
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="同步prompts.json到所有项目")
+    parser.add_argument("--dry-run", action="store_true", help="只显示将要进行的修改，不写入文件")
+    parser.add_argument("--report", type=Path, help="把同步结果写入JSON文件")
+    parser.add_argument("--workers", type=int, help="并行处理的线程数")
+    args = parser.parse_args()
+
     ui.print_info("开始同步prompts.json到所有项目...")
-    
-    if sync_prompts_to_projects():
+
+    if sync_prompts_to_projects(dry_run=args.dry_run, report_path=args.report, workers=args.workers):
         ui.print_success("所有项目同步完成！")
     else:
         ui.print_warning("部分项目同步失败，请检查错误信息")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+"""
+Unit tests for batch_generation module
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_generation import BatchOrchestrator, FairScheduler, BatchJob, RateLimiter
+from data_manager import DataManager
+
+
+class FakeLLM:
+    """记录调用顺序的假AI服务"""
+
+    def __init__(self, fail_titles=()):
+        self.calls = []
+        self.fail_titles = set(fail_titles)
+
+    def for_project(self, project_path):
+        return self
+
+    async def generate_chapter_summary_async(self, chapter, chapter_num, context_info, user_prompt="", progress_callback=None):
+        await asyncio.sleep(0)
+        self.calls.append(("summaries", chapter["title"]))
+        return None if chapter["title"] in self.fail_titles else f"{chapter['title']}的概要"
+
+    async def generate_novel_chapter_async(self, chapter, summary_info, chapter_num, context_info, user_prompt="", progress_callback=None):
+        await asyncio.sleep(0)
+        self.calls.append(("novels", chapter["title"]))
+        return f"{summary_info['summary']}展开的正文"
+
+
+class TestBatchGeneration(unittest.TestCase):
+    """测试多项目批量生成"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _project(self, name, chapters, summarized=()):
+        path = self.temp_dir / name
+        dm = DataManager(path)
+        dm.write_chapter_outline([{"title": f"{name}{i}", "outline": "大纲"} for i in range(1, chapters + 1)])
+        keys = [dm.chapter_key(i) for i in range(1, chapters + 1)]
+        dm.write_chapter_summaries({keys[i - 1]: {"title": f"{name}{i}", "summary": "已有"} for i in summarized})
+        return name, path
+
+    def test_round_robin_between_projects(self):
+        """测试章节多的项目不会让其他项目一直等待"""
+        llm = FakeLLM()
+        orchestrator = BatchOrchestrator(llm=llm, max_concurrency=1, requests_per_minute=0)
+        jobs, expected = orchestrator.plan([self._project("甲", 3), self._project("乙", 1)], ["summaries"])
+        self.assertEqual(expected, 4)
+
+        report = asyncio.run(orchestrator.run(jobs))
+        self.assertEqual([title for _, title in llm.calls], ["甲1", "乙1", "甲2", "甲3"])
+        self.assertEqual(report.succeeded, 4)
+        self.assertEqual(len(DataManager(self.temp_dir / "甲").read_chapter_summaries()), 3)
+
+    def test_novels_follow_summaries_and_failures_are_reported(self):
+        """测试概要完成后排入正文，失败的章节记入报告且不生成正文"""
+        llm = FakeLLM(fail_titles={"甲2"})
+        orchestrator = BatchOrchestrator(llm=llm, max_concurrency=3, requests_per_minute=0)
+        jobs, expected = orchestrator.plan([self._project("甲", 3, summarized=[3])], ["summaries", "novels"])
+        self.assertEqual(len(jobs), 3)
+        self.assertEqual(expected, 5)
+
+        report = asyncio.run(orchestrator.run(jobs))
+        novels = DataManager(self.temp_dir / "甲").read_novel_chapters()
+        self.assertEqual(sorted(chapter["title"] for chapter in novels.values()), ["甲1", "甲3"])
+        self.assertIn("甲1的概要", next(ch["content"] for ch in novels.values() if ch["title"] == "甲1"))
+
+        summary = report.to_dict()
+        self.assertEqual((summary["succeeded"], summary["failed"]), (3, 1))
+        self.assertEqual(summary["projects"]["甲"]["summaries"], {"done": 1, "failed": 1, "words": 5})
+
+        # 再次运行只生成仍缺失的内容
+        jobs, _ = BatchOrchestrator(llm=FakeLLM(), requests_per_minute=0).plan(
+            [("甲", self.temp_dir / "甲")], ["summaries", "novels"]
+        )
+        self.assertEqual([(job.stage, job.title) for job in jobs], [("summaries", "甲2")])
+
+    def test_unknown_stage_rejected(self):
+        """测试未知阶段"""
+        with self.assertRaises(ValueError):
+            BatchOrchestrator(llm=FakeLLM()).plan([], ["outline"])
+
+
+class TestSchedulingPrimitives(unittest.TestCase):
+    """测试调度器和限速器"""
+
+    def test_fair_scheduler_rotation(self):
+        """测试轮流从各项目取任务，新任务重新加入轮转"""
+        scheduler = FairScheduler()
+        for project, n in (("a", 2), ("b", 1)):
+            for i in range(n):
+                scheduler.push(BatchJob(project, "summaries", f"{project}{i}", i + 1, ""))
+        order = [scheduler.pop().chapter_key for _ in range(3)]
+        self.assertEqual(order, ["a0", "b0", "a1"])
+        self.assertIsNone(scheduler.pop())
+        scheduler.push(BatchJob("b", "novels", "b0", 1, ""))
+        self.assertEqual(scheduler.pop().stage, "novels")
+
+    def test_rate_limiter_spacing(self):
+        """测试请求按固定间隔放行"""
+        async def acquire_all():
+            limiter = RateLimiter(1200)  # 每0.05秒一个
+            await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+
+        start = time.perf_counter()
+        asyncio.run(acquire_all())
+        self.assertGreaterEqual(time.perf_counter() - start, 0.14)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -87,5 +87,316 @@ class TestDataManager(unittest.TestCase):
         final_characters = self.data_manager.read_characters()
         self.assertNotIn(char_name, final_characters)
 
+    def test_draft_archive_roundtrip(self):
+        """测试草稿追加写入压缩归档并可读回"""
+        entry = {"timestamp": "2025-01-01T00:00:00", "chapter_title": "第1章",
+                 "content": "夜色渐深，城市的灯火一盏盏熄灭。", "word_count": 16}
+        self.assertTrue(self.data_manager.append_draft("initial_drafts", 1, entry))
+        self.assertFalse(self.data_manager.get_path("initial_drafts").exists())
+        self.assertEqual(self.data_manager.read_drafts("initial_drafts", 1), [entry])
+        self.assertEqual(self.data_manager.get_latest_draft("initial_drafts", 1)["content"], entry["content"])
+
+    def test_manifest_tracks_writes(self):
+        """测试状态清单随写入增量更新，并能发现外部修改"""
+        self.data_manager.set_novel_chapter(1, "第1章", "一" * 120)
+        self.data_manager.set_novel_chapter(2, "第2章", "二" * 80)
+        manifest = self.data_manager.get_manifest()
+        self.assertEqual(manifest["novel_text"]["count"], 2)
+        self.assertEqual(manifest["novel_text"]["total_words"], 200)
+        status = self.data_manager.get_project_status_details()
+        self.assertEqual(status["novel_chapters"]["details"], "已生成 2 章，共 200 字")
+
+        # 模拟外部进程直接修改文件
+        import json
+        with self.data_manager.get_path("characters").open('w', encoding='utf-8') as f:
+            json.dump({"甲": {}, "乙": {}}, f)
+        self.assertEqual(self.data_manager.get_manifest()["characters"]["count"], 2)
+
+    def test_context_info_memoised_and_invalidated(self):
+        """测试上下文信息按依赖文件缓存，写入后自动失效"""
+        self.data_manager.write_theme_one_line("一个关于勇气的故事")
+        self.data_manager.add_character("林舟", "年轻的船夫")
+        context = self.data_manager.get_context_info()
+        self.assertIn("主要角色：\n- 林舟: 年轻的船夫", context)
+
+        with patch.object(self.data_manager, 'read_characters', wraps=self.data_manager.read_characters) as reader:
+            self.assertEqual(self.data_manager.get_context_info(), context)
+            reader.assert_not_called()
+            # 写入无关文件不影响缓存
+            self.data_manager.set_chapter_summary(1, "第1章", "概要")
+            self.data_manager.get_context_info()
+            reader.assert_not_called()
+
+        self.data_manager.add_location("渡口", "江边的老渡口")
+        sections = self.data_manager.get_context_sections()
+        self.assertEqual(sections["locations"], "重要场景：\n- 渡口: 江边的老渡口")
+        self.assertIn("重要场景：", self.data_manager.get_context_info())
+
+    def test_context_info_sees_staged_writes_and_rollback(self):
+        """测试事务中读取上下文看到暂存内容，回滚后不保留暂存内容"""
+        dm = self.data_manager
+        dm.write_characters({"甲": {"description": "已提交"}})
+        self.assertIn("- 甲: 已提交", dm.get_context_info())
+
+        with self.assertRaises(RuntimeError):
+            with dm.transaction():
+                dm.write_characters({"乙": {"description": "暂存"}})
+                context = dm.get_context_info()
+                self.assertIn("- 乙: 暂存", context)
+                self.assertNotIn("甲", context)
+                raise RuntimeError("回滚")
+
+        context = dm.get_context_info()
+        self.assertIn("- 甲: 已提交", context)
+        self.assertNotIn("乙", context)
+
+        dm._context_cache = None
+        with self.assertRaises(RuntimeError):
+            with dm.transaction():
+                dm.write_characters({"乙": {"description": "暂存"}})
+                dm.get_context_info()
+                raise RuntimeError("回滚")
+        self.assertNotIn("乙", dm.get_context_info())
+
+    def test_transaction_commits_atomically(self):
+        """测试事务暂存多文件写入并一次性提交"""
+        summary_path = self.data_manager.get_path("chapter_summary")
+        with self.data_manager.transaction():
+            self.data_manager.set_chapter_summary(1, "第1章", "概要一")
+            self.data_manager.set_novel_chapter(1, "第1章", "正文一")
+            # 事务内可以读到自己的写入，但尚未落盘
+            self.assertEqual(self.data_manager.get_chapter_summary(1)["summary"], "概要一")
+            self.assertFalse(summary_path.exists())
+        self.assertTrue(summary_path.exists())
+        self.assertEqual(self.data_manager.get_novel_chapter(1)["content"], "正文一")
+
+    def test_transaction_rollback_on_error(self):
+        """测试事务中出现异常时丢弃所有写入"""
+        with self.assertRaises(RuntimeError):
+            with self.data_manager.transaction():
+                self.data_manager.set_chapter_summary(1, "第1章", "概要一")
+                raise RuntimeError("boom")
+        self.assertEqual(self.data_manager.read_chapter_summaries(), {})
+
+    def test_concurrent_transactions_do_not_lose_updates(self):
+        """测试并发的读-改-写不会互相覆盖"""
+        import threading
+
+        def worker(chapter_num):
+            for _ in range(5):
+                with self.data_manager.transaction():
+                    summaries = self.data_manager.read_chapter_summaries()
+                    summaries[f"chapter_{chapter_num}"] = {"title": "t", "summary": str(chapter_num)}
+                    self.data_manager.write_chapter_summaries(summaries)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, 6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.data_manager.read_chapter_summaries()), 5)
+
+    def test_recover_interrupted_transaction(self):
+        """测试根据事务日志完成中断的提交"""
+        import json
+        target = self.data_manager.get_path("story_outline")
+        tmp = target.with_suffix(".json.txn")
+        tmp.write_text(json.dumps({"outline": "恢复的大纲"}, ensure_ascii=False), encoding='utf-8')
+        self.data_manager._journal_path.write_text(json.dumps([[str(tmp), str(target)]]), encoding='utf-8')
+
+        recovered = DataManager(self.data_manager.project_path)
+        self.assertEqual(recovered.read_story_outline(), "恢复的大纲")
+        self.assertFalse(recovered._journal_path.exists())
+
+    def test_get_novel_chapter_uses_offset_index(self):
+        """测试通过偏移索引读取单章，无需解析整本小说"""
+        for i in range(1, 4):
+            self.data_manager.set_novel_chapter(i, f"第{i}章", f"第{i}章的\"正文\"\n内容" * 10)
+        with patch.object(self.data_manager, 'read_novel_chapters') as full_reader:
+            chapter = self.data_manager.get_novel_chapter(2)
+            listing = self.data_manager.list_novel_chapters()
+            full_reader.assert_not_called()
+        self.assertEqual(chapter["content"], "第2章的\"正文\"\n内容" * 10)
+        self.assertEqual(listing["chapter_3"]["title"], "第3章")
+        self.assertEqual(self.data_manager.get_novel_chapter(9), {})
+
+        # 外部修改正文后索引失效，回退到完整解析
+        import json
+        with self.data_manager.get_path("novel_text").open('w', encoding='utf-8') as f:
+            json.dump({"chapters": {"chapter_1": {"title": "新", "content": "外部修改"}}}, f)
+        self.assertEqual(self.data_manager.get_novel_chapter(1)["content"], "外部修改")
+
+    def test_per_file_json_format(self):
+        """测试大文件以紧凑格式写出，小文件保留缩进，且两种格式下偏移索引均可用"""
+        self.data_manager.write_theme_one_line("一句话主题")
+        self.data_manager.set_novel_chapter(1, "第1章", "正文\n内容")
+        theme_text = self.data_manager.get_path("theme_one_line").read_text(encoding='utf-8')
+        novel_text = self.data_manager.get_path("novel_text").read_text(encoding='utf-8')
+        self.assertIn("\n", theme_text)
+        self.assertNotIn("\n", novel_text)
+        self.assertTrue(self.data_manager._chapter_index.is_valid())
+
+        with patch.dict('data_manager.STORAGE_CONFIG', {"compact_json": False}):
+            self.data_manager.set_novel_chapter(2, "第2章", "第二章")
+            self.assertIn("\n", self.data_manager.get_path("novel_text").read_text(encoding='utf-8'))
+            with patch.object(self.data_manager, 'read_novel_chapters') as full_reader:
+                self.assertEqual(self.data_manager.get_novel_chapter(2)["content"], "第二章")
+                full_reader.assert_not_called()
+
+    def test_revisions_recorded_on_write(self):
+        """测试写入正文和大纲时记录修订历史，未修改的章节不新增版本"""
+        self.data_manager.set_novel_chapter(1, "第1章", "初稿。")
+        self.data_manager.set_novel_chapter(2, "第2章", "第二章。")
+        self.data_manager.set_novel_chapter(1, "第1章", "修改稿。")
+        self.data_manager.write_chapter_outline([{"title": "起", "outline": "开端", "order": 1}])
+
+        key = self.data_manager.chapter_revision_key(1)
+        self.assertEqual(len(self.data_manager.list_revisions(key)), 2)
+        self.assertEqual(self.data_manager.read_revision(key, 0), "初稿。")
+        self.assertEqual(len(self.data_manager.list_revisions(self.data_manager.chapter_revision_key(2))), 1)
+        self.assertEqual(self.data_manager.read_revision("chapter_outline")[0]["title"], "起")
+
+    def test_revisions_only_checked_for_changed_chapters(self):
+        """测试单章写入和事务只检查修改过的章节，整体写入时检查全部章节"""
+        from revision_store import RevisionStore
+        dm = self.data_manager
+        for num in range(1, 6):
+            dm.set_novel_chapter(num, f"第{num}章", f"第{num}章正文。")
+
+        with patch.object(RevisionStore, 'record', autospec=True, return_value=None) as record:
+            dm.set_novel_chapter(3, "第3章", "改写。")
+            self.assertEqual([c.args[1] for c in record.call_args_list], [dm.chapter_revision_key(3)])
+
+            record.reset_mock()
+            with dm.transaction():
+                dm.set_novel_chapter(1, "第1章", "改写。")
+                dm.set_novel_chapter(4, "第4章", "改写。")
+                dm.delete_novel_chapter(5)
+            self.assertEqual(sorted(c.args[1] for c in record.call_args_list),
+                             [dm.chapter_revision_key(1), dm.chapter_revision_key(4)])
+
+            record.reset_mock()
+            dm.write_novel_chapters(dm.read_novel_chapters())
+            self.assertEqual(record.call_count, 4)
+
+    def test_active_project_cached_until_config_changes(self):
+        """测试config.json未变化时不重新解析，外部修改或切换项目后立即生效"""
+        self.test_pm.create_project("second", display_name="Second")
+        with patch.object(self.test_pm, '_load_config', wraps=self.test_pm._load_config) as loader:
+            for _ in range(10):
+                self.pdm.get_data_manager()
+                self.pdm.get_current_project_display_name()
+            self.assertLessEqual(loader.call_count, 1)
+
+        # 另一个进程修改了活动项目
+        import json
+        config = json.loads(self.test_pm.config_file.read_text(encoding='utf-8'))
+        config["active_project"] = "second"
+        self.test_pm.config_file.write_text(json.dumps(config, ensure_ascii=False, indent=4), encoding='utf-8')
+        self.assertEqual(self.pdm.get_data_manager().project_path.name, "second")
+
+        self.assertTrue(self.pdm.switch_project(self.test_project_name))
+        self.assertEqual(self.pdm.get_data_manager().project_path.name, self.test_project_name)
+
+    def test_stable_chapter_ids_survive_insert_and_reorder(self):
+        """测试插入、调整顺序和删除章节只改写细纲，概要和正文仍对应原章节"""
+        dm = self.data_manager
+        dm.write_chapter_outline([{"title": "起", "outline": "开端"}, {"title": "承", "outline": "发展"}])
+        self.assertEqual(dm.chapter_ids(), ["chapter_1", "chapter_2"])
+        dm.set_chapter_summary(1, "起", "起的概要")
+        dm.set_novel_chapter(2, "承", "承的正文")
+        versions = {key: dm._file_version(key) for key in ("chapter_summary", "novel_text")}
+
+        new_id = dm.insert_chapter_outline(1, "序", "楔子")
+        self.assertEqual(dm.chapter_ids(), [new_id, "chapter_1", "chapter_2"])
+        self.assertEqual(dm.get_chapter_summary(2)["summary"], "起的概要")
+        self.assertEqual(dm.get_novel_chapter(3)["content"], "承的正文")
+        self.assertEqual(dm.get_novel_chapter(1), {})
+
+        self.assertTrue(dm.move_chapter_outline("chapter_2", 1))
+        self.assertEqual([ch["title"] for ch in dm.read_chapter_outline()], ["承", "序", "起"])
+        self.assertEqual([ch["order"] for ch in dm.read_chapter_outline()], [1, 2, 3])
+        self.assertEqual(dm.get_novel_chapter(1)["content"], "承的正文")
+        self.assertEqual(dm.typed.novel_chapters()[1].content, "承的正文")
+
+        self.assertTrue(dm.remove_chapter_outline(new_id))
+        self.assertEqual(dm.get_chapter_summary(2)["summary"], "起的概要")
+        self.assertEqual(dm.chapter_number("chapter_1"), 2)
+        self.assertIsNone(dm.chapter_number(new_id))
+        # 概要和正文文件未被改写
+        self.assertEqual({key: dm._file_version(key) for key in versions}, versions)
+
+
+class TestDataManagerPool(unittest.TestCase):
+    """测试项目切换时复用数据管理器"""
+
+    def setUp(self):
+        self.test_base_dir = Path(tempfile.mkdtemp())
+        self.test_pm = ProjectManager(base_dir=self.test_base_dir)
+        self.patcher = patch('project_data_manager.project_manager', self.test_pm)
+        self.patcher.start()
+        for name in ("甲", "乙", "丙"):
+            self.test_pm.create_project(name)
+        self.pdm = pdm_module.ProjectDataManager()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.test_base_dir)
+
+    def _switch(self, name):
+        self.assertTrue(self.pdm.switch_project(name))
+        return self.pdm.get_data_manager()
+
+    def test_switching_back_reuses_warm_caches(self):
+        """测试切回项目时复用同一实例，未变化的缓存保留，外部修改的文件重新读取"""
+        dm = self._switch("甲")
+        dm.set_novel_chapter(1, "第1章", "正文")
+        dm.add_character("林舟", "主角")
+        dm.get_characters_info_string()
+        self._switch("乙")
+
+        # 离开期间外部修改了角色文件
+        path = dm.file_paths["characters"]
+        path.write_text('{"苏晚": {"description": "外部添加"}}', encoding='utf-8')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with patch.object(DataManager, "read_json_file", wraps=dm.read_json_file) as reads:
+            self.assertIs(self._switch("甲"), dm)
+            self.assertEqual(dm.get_novel_chapter(1)["content"], "正文")
+            self.assertIn("苏晚", dm.get_characters_info_string())
+        self.assertEqual([call.args[0] for call in reads.call_args_list], [path])
+
+    def test_least_recently_used_is_evicted(self):
+        """测试超过池大小时移除最久未使用的项目"""
+        with patch.dict(pdm_module.POOL_CONFIG, {"size": 2}):
+            first = self._switch("甲")
+            self._switch("乙")
+            self._switch("丙")
+            self.assertEqual(list(self.pdm._pool), ["乙", "丙"])
+            self.assertIsNot(self._switch("甲"), first)
+
+    def test_watcher_callbacks_do_not_switch_projects(self):
+        """测试监视线程的回调按注册时的项目处理，不会在后台切换当前项目"""
+        from file_watcher import FileWatcher
+        from llm_service import llm_service
+        from prompt_layers import OVERRIDE_NAME, prompt_resolver
+        dm = self._switch("甲")
+        self.pdm._watcher = FileWatcher()
+        self.pdm._watch_current_project()
+        # 其他进程切换了活动项目，主线程尚未刷新
+        self.test_pm.set_active_project("乙")
+
+        (dm.project_path / OVERRIDE_NAME).write_text('{"测试项": {"system_prompt": "甲的覆盖"}}', encoding='utf-8')
+        dm.file_paths["characters"].write_text('{"苏晚": {"description": "外部添加"}}', encoding='utf-8')
+        with patch.object(llm_service, "prompts", {}), \
+                patch.object(pdm_module.ProjectDataManager, "refresh_data_manager", side_effect=AssertionError("不应刷新")):
+            self.pdm._watcher.check()
+            self.assertEqual(llm_service.prompts, prompt_resolver.resolve(dm.project_path))
+            self.assertEqual(llm_service.prompts["测试项"]["system_prompt"], "甲的覆盖")
+        self.assertEqual(self.pdm.get_current_project_name(), "甲")
+        self.assertIs(self.pdm._current_data_manager, dm)
+        self.assertIn("苏晚", dm.get_characters_info_string())
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+"""
+Unit tests for disk_usage module
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disk_usage
+from data_manager import DataManager
+from disk_usage import DiskUsage, QuotaExceeded, categorize, project_usage
+
+
+def _draft(content):
+    return {"timestamp": datetime.now().isoformat(), "chapter_title": "第1章", "content": content}
+
+
+class TestDiskUsage(unittest.TestCase):
+    """测试项目磁盘占用的增量统计与配额"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.dm = DataManager(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_categorize(self):
+        """测试按文件名分类"""
+        self.assertEqual(categorize("novel_text.json"), "content")
+        self.assertEqual(categorize("initial_drafts.3.pack"), "drafts")
+        self.assertEqual(categorize("drafts.zdict"), "drafts")
+        self.assertEqual(categorize("critiques.json"), "history")
+        self.assertEqual(categorize("revisions.pack.idx"), "revisions")
+
+    def test_incremental_totals_match_full_scan(self):
+        """测试写入、草稿、修订和快照后增量记录与重新遍历的结果一致"""
+        self.dm.set_novel_chapter(1, "第1章", "正文" * 500)
+        self.dm.add_character("林舟", "主角")
+        self.dm.append_history_entry("critiques", 1, {"timestamp": "t", "critique": "批评" * 100})
+        self.dm.append_draft("initial_drafts", 1, _draft("草稿" * 800))
+        self.dm.create_snapshot("测试")
+        self.dm.set_novel_chapter(1, "第1章", "修改后的正文" * 300)
+
+        with patch.object(DiskUsage, "rebuild", side_effect=AssertionError("不应遍历目录")):
+            totals = project_usage(self.test_dir).totals()
+        self.assertEqual(totals, DiskUsage(self.dm.file_paths["meta_dir"], self.dm.file_paths["backup_dir"]).rebuild())
+        for category in ("content", "drafts", "history", "revisions", "backups"):
+            self.assertGreater(totals[category], 0, category)
+
+    def test_instances_sharing_project_keep_each_others_entries(self):
+        """测试多个实例写入同一项目时不会用过期的记录覆盖对方"""
+        other = DataManager(self.test_dir)
+        self.dm.get_disk_usage().totals()
+        other.get_disk_usage().totals()
+        self.dm.set_novel_chapter(1, "第1章", "正文" * 100000)
+        other.set_chapter_summary(1, "第1章", "概要")
+
+        novel_size = self.dm.file_paths["novel_text"].stat().st_size
+        self.assertGreaterEqual(project_usage(self.test_dir).totals()["content"], novel_size)
+
+    def test_refresh_corrects_unrecorded_changes(self):
+        """测试重新stat记录中的文件修正未记录的修改"""
+        self.dm.set_novel_chapter(1, "第1章", "正文")
+        with self.dm.file_paths["novel_text"].open('ab') as f:
+            f.write(b" " * 5000)
+        usage = project_usage(self.test_dir)
+        self.assertEqual(usage.refresh(), 5000)
+        self.assertEqual(usage.totals(), usage.rebuild())
+
+    def test_missing_ledger_is_rebuilt(self):
+        """测试没有占用记录的项目（导入、迁移）首次查看时统计一次"""
+        self.dm.set_novel_chapter(1, "第1章", "正文")
+        (self.dm.file_paths["meta_dir"] / disk_usage.LEDGER_NAME).unlink()
+        size = self.dm.file_paths["novel_text"].stat().st_size
+        self.assertGreaterEqual(project_usage(self.test_dir).totals()["content"], size)
+
+    def test_hard_quota_refuses_new_drafts(self):
+        """测试超过硬配额时拒绝保存草稿"""
+        self.dm.set_novel_chapter(1, "第1章", "正文" * 1000)
+        with patch.dict(disk_usage.QUOTA_CONFIG, {"hard_mb": 0.001}):
+            with self.assertRaises(QuotaExceeded):
+                self.dm.append_draft("initial_drafts", 1, _draft("草稿"))
+            self.assertEqual(project_usage(self.test_dir).summary()["state"], "hard")
+        self.assertEqual(self.dm.read_drafts("initial_drafts", 1), [])
+
+    def test_soft_quota_triggers_compaction_once(self):
+        """测试超过软配额时只触发一次后台清理"""
+        self.dm.set_novel_chapter(1, "第1章", "正文" * 1000)
+        with patch.dict(disk_usage.QUOTA_CONFIG, {"soft_mb": 0.001}), \
+                patch("history_compactor.HistoryCompactor.start_background") as start:
+            self.assertTrue(self.dm.append_draft("initial_drafts", 1, _draft("草稿一")))
+            self.assertTrue(self.dm.append_draft("initial_drafts", 1, _draft("草稿二")))
+        self.assertEqual(start.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
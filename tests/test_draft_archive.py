@@ -0,0 +1,114 @@
+"""
+Unit tests for draft_archive module
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from draft_archive import DraftArchive, train_dictionary
+
+
+def _entry(content, title="第1章", timestamp="2025-01-01T00:00:00"):
+    return {
+        "timestamp": timestamp,
+        "chapter_title": title,
+        "content": content,
+        "word_count": len(content)
+    }
+
+
+class TestDraftArchive(unittest.TestCase):
+    """测试压缩草稿归档"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.legacy_path = self.test_dir / "initial_drafts.json"
+        self.dict_path = self.test_dir / "drafts.zdict"
+        self.archive = DraftArchive(self.legacy_path, self.dict_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_append_and_random_access(self):
+        """测试追加与按条目随机读取"""
+        self.archive.append("chapter_1", _entry("月光洒在青石板路上。" * 50))
+        self.archive.append("chapter_1", _entry("月光洒在青石板路上，他停下脚步。" * 50))
+        self.archive.append("chapter_2", _entry("第二章的开头。", title="第2章"))
+
+        latest = self.archive.get("chapter_1")
+        self.assertEqual(latest["content"], "月光洒在青石板路上，他停下脚步。" * 50)
+        self.assertEqual(self.archive.get("chapter_1", 0)["content"], "月光洒在青石板路上。" * 50)
+        self.assertEqual(self.archive.get("chapter_2")["chapter_title"], "第2章")
+        self.assertIsNone(self.archive.get("chapter_3"))
+        self.assertTrue(self.dict_path.exists())
+
+    def test_reopen_reads_same_data(self):
+        """测试重新打开归档后数据一致"""
+        self.archive.append("chapter_1", _entry("重复的句子。" * 100))
+        reopened = DraftArchive(self.legacy_path, self.dict_path)
+        all_drafts = reopened.read_all()
+        self.assertEqual(list(all_drafts.keys()), ["chapter_1"])
+        self.assertEqual(all_drafts["chapter_1"][0]["content"], "重复的句子。" * 100)
+        self.assertNotIn("content", reopened.list_entries()["chapter_1"][0])
+
+    def test_compression_smaller_than_json(self):
+        """测试近似草稿的压缩效果"""
+        base = "他推开门，看见窗外的雨一直在下，街道上没有一个行人。" * 80
+        for i in range(5):
+            self.archive.append("chapter_1", _entry(base + str(i)))
+        raw_size = len(json.dumps({"chapter_1": [_entry(base)] * 5}, ensure_ascii=False).encode('utf-8'))
+        self.assertLess(self.archive.stats()["bytes"], raw_size / 5)
+
+    def test_import_legacy(self):
+        """测试导入旧版JSON草稿文件"""
+        legacy = {"chapter_1": [_entry("旧版草稿一"), _entry("旧版草稿二")]}
+        with self.legacy_path.open('w', encoding='utf-8') as f:
+            json.dump(legacy, f, ensure_ascii=False)
+
+        self.assertEqual(self.archive.import_legacy(), 2)
+        self.assertFalse(self.legacy_path.exists())
+        self.assertEqual(self.archive.read_chapter("chapter_1")[1]["content"], "旧版草稿二")
+
+    def test_empty_first_draft_does_not_block_dictionary(self):
+        """测试第一条草稿为空（无法训练字典）时，之后的草稿仍可写入并读取"""
+        self.archive.append("chapter_1", _entry(""))
+        self.archive.append("chapter_1", _entry("月光洒在青石板路上。" * 50))
+        reopened = DraftArchive(self.legacy_path, self.dict_path)
+        reopened.append("chapter_2", _entry("第二章。" * 30))
+        self.assertEqual([e["content"] for e in reopened.read_chapter("chapter_1")], ["", "月光洒在青石板路上。" * 50])
+        self.assertNotIn("plain", reopened.get("chapter_1", 0))
+        self.assertTrue(self.dict_path.exists())
+
+    def test_interrupted_import_is_not_repeated(self):
+        """测试导入后删除旧文件前中断，再次导入不会重复追加条目"""
+        legacy = {"chapter_1": [_entry("旧版草稿一"), _entry("旧版草稿二")]}
+        with self.legacy_path.open('w', encoding='utf-8') as f:
+            json.dump(legacy, f, ensure_ascii=False)
+
+        with patch.object(Path, "unlink", side_effect=OSError("中断")):
+            with self.assertRaises(OSError):
+                self.archive.import_legacy()
+        self.assertTrue(self.legacy_path.exists())
+
+        self.assertEqual(DraftArchive(self.legacy_path, self.dict_path).import_legacy(), 0)
+        self.assertFalse(self.legacy_path.exists())
+        self.assertEqual(len(self.archive.read_chapter("chapter_1")), 2)
+
+    def test_train_dictionary_limits_size(self):
+        """测试字典大小受限"""
+        zdict = train_dictionary(["字" * 50000, "词" * 50000], size=1024)
+        self.assertLessEqual(len(zdict), 1024)
+        self.assertEqual(train_dictionary([]), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
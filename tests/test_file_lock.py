@@ -0,0 +1,124 @@
+"""
+Unit tests for file_lock module
+"""
+
+import unittest
+import tempfile
+import shutil
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_lock
+from file_lock import FileLock, FileLockTimeout
+
+
+def _add_characters(project_dir, worker, count):
+    """子进程：向同一项目追加角色"""
+    from data_manager import DataManager
+    dm = DataManager(Path(project_dir))
+    for i in range(count):
+        dm.add_character(f"角色{worker}_{i}", "描述")
+
+
+class TestFileLock(unittest.TestCase):
+    """测试跨进程文件锁"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.lock_path = self.test_dir / ".lock"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_reentrant_and_exclusive(self):
+        """测试同一实例可重入，另一实例等待超时"""
+        lock = FileLock(self.lock_path)
+        other = FileLock(self.lock_path, timeout=0.1)
+        with lock:
+            with lock:
+                self.assertTrue(lock.is_locked)
+            with self.assertRaises(FileLockTimeout):
+                other.acquire()
+            self.assertIn(str(os.getpid()), lock.owner())
+        self.assertFalse(lock.is_locked)
+        with other:
+            self.assertTrue(other.is_locked)
+
+    def test_stale_lock_without_fcntl(self):
+        """测试无fcntl时清除已退出进程留下的锁文件"""
+        with patch.object(file_lock, 'fcntl', None):
+            self.lock_path.write_text(f"999999999 {socket.gethostname()} {time.time():.0f}\n", encoding='utf-8')
+            lock = FileLock(self.lock_path, timeout=1)
+            with lock:
+                self.assertIn(str(os.getpid()), lock.owner())
+            self.assertFalse(self.lock_path.exists())
+
+            self.lock_path.write_text(f"{os.getpid()} {socket.gethostname()} {time.time():.0f}\n", encoding='utf-8')
+            with self.assertRaises(FileLockTimeout):
+                FileLock(self.lock_path, timeout=0.1).acquire()
+
+    @unittest.skipUnless(file_lock.fcntl, "需要fcntl")
+    def test_concurrent_processes_do_not_lose_updates(self):
+        """测试多个进程同时读改写同一项目文件不丢失更新"""
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_add_characters, args=(str(self.test_dir), w, 10)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(timeout=30)
+
+        from data_manager import DataManager
+        self.assertEqual(len(DataManager(self.test_dir).read_characters()), 40)
+
+
+class TestSharedProjectInstances(unittest.TestCase):
+    """测试同一项目上的多个DataManager实例"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_draft_and_revision_indexes_are_reloaded(self):
+        """测试实例交替追加草稿和记录修订时不覆盖对方的索引"""
+        from data_manager import DataManager
+        a, b = DataManager(self.test_dir), DataManager(self.test_dir)
+        for dm, stamp in ((a, "t1"), (b, "t2"), (a, "t3")):
+            dm.append_draft("refined_drafts", 1, {"timestamp": stamp, "content": f"草稿{stamp}" * 50})
+            dm.set_novel_chapter(1, "第1章", f"正文{stamp}" * 50)
+        self.assertEqual([d["timestamp"] for d in a.read_drafts("refined_drafts", 1)], ["t1", "t2", "t3"])
+        self.assertEqual(len(b.list_revisions(b.chapter_revision_key(1))), 3)
+        self.assertEqual(a.read_revision(a.chapter_revision_key(1)), "正文t3" * 50)
+
+    @unittest.skipUnless(file_lock.fcntl, "需要fcntl")
+    def test_recovery_does_not_replay_running_commit(self):
+        """测试其他进程提交事务（持有写入锁）时，新打开的实例不处理其事务日志"""
+        from config import LOCK_CONFIG
+        from data_manager import DataManager
+        meta_dir = self.test_dir / "meta"
+        DataManager(self.test_dir)
+        pending = meta_dir / "characters.json.txn"
+        pending.write_text("{}", encoding='utf-8')
+        journal = meta_dir / ".transaction.journal"
+        journal.write_text(f'[["{pending}", "{meta_dir / "characters.json"}"]]', encoding='utf-8')
+
+        with FileLock(meta_dir / ".lock"), patch.dict(LOCK_CONFIG, {"timeout": 0.1}):
+            DataManager(self.test_dir)
+            self.assertTrue(pending.exists())
+            self.assertTrue(journal.exists())
+        DataManager(self.test_dir)
+        self.assertFalse(journal.exists())
+        self.assertTrue((meta_dir / "characters.json").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Unit tests for file_watcher module
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from file_watcher import FileWatcher
+import json_codec
+
+
+def _touch_later(path, text):
+    """写入文件并保证修改时间与上一次不同"""
+    before = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text, encoding='utf-8')
+    if path.stat().st_mtime_ns == before:
+        os.utime(path, ns=(before + 1_000_000, before + 1_000_000))
+
+
+class TestFileWatcher(unittest.TestCase):
+    """测试轮询式文件监视"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.events = []
+        self.watcher = FileWatcher(interval=0.05)
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.test_dir)
+
+    def test_detects_added_modified_and_removed_files(self):
+        """测试发现新增、修改和删除的文件"""
+        existing = self.test_dir / "a.json"
+        existing.write_text("{}", encoding='utf-8')
+        self.watcher.watch(self.test_dir, self.events.append)
+        self.assertEqual(self.watcher.check(), {})
+
+        added = self.test_dir / "b.json"
+        added.write_text("{}", encoding='utf-8')
+        _touch_later(existing, '{"x": 1}')
+        self.watcher.check()
+        self.assertEqual(self.events, [[existing, added]])
+
+        added.unlink()
+        self.watcher.check()
+        self.assertEqual(self.events[-1], [added])
+
+    def test_ignores_lock_and_temporary_files(self):
+        """测试锁文件和临时文件不触发回调"""
+        self.watcher.watch(self.test_dir, self.events.append)
+        (self.test_dir / ".lock").write_text("1", encoding='utf-8')
+        (self.test_dir / "a.json.tmp").write_text("{}", encoding='utf-8')
+        self.watcher.check()
+        self.assertEqual(self.events, [])
+
+    def test_watches_single_file_and_unwatch(self):
+        """测试监视单个文件以及取消监视"""
+        prompts = self.test_dir / "prompts.json"
+        self.watcher.watch(prompts, self.events.append)
+        prompts.write_text("{}", encoding='utf-8')
+        self.watcher.check()
+        self.assertEqual(self.events, [[prompts]])
+
+        self.watcher.unwatch(prompts)
+        _touch_later(prompts, '{"a": 1}')
+        self.watcher.check()
+        self.assertEqual(len(self.events), 1)
+
+    def test_background_thread_reports_changes(self):
+        """测试后台线程发现修改"""
+        target = self.test_dir / "a.json"
+        self.watcher.watch(target, self.events.append)
+        self.watcher.start()
+        target.write_text("{}", encoding='utf-8')
+        deadline = time.monotonic() + 2
+        while not self.events and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.events, [[target]])
+
+
+    def test_failed_callback_is_retried(self):
+        """测试回调出错（如等待写入锁超时）时下次扫描重新通知"""
+        target = self.test_dir / "a.json"
+        attempts = []
+
+        def callback(paths):
+            attempts.append(paths)
+            if len(attempts) == 1:
+                raise TimeoutError("锁超时")
+            self.events.append(paths)
+
+        self.watcher.watch(target, callback)
+        target.write_text("{}", encoding='utf-8')
+        self.watcher.check()
+        self.assertEqual(self.events, [])
+        self.watcher.check()
+        self.assertEqual(self.events, [[target]])
+        self.watcher.check()
+        self.assertEqual(self.events, [[target]])
+
+
+class TestExternalChangeInvalidation(unittest.TestCase):
+    """测试DataManager区分自身写入和外部修改"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.dm = DataManager(self.test_dir)
+        self.watcher = FileWatcher()
+        self.reported = []
+        self.watcher.watch(
+            self.dm.file_paths["meta_dir"],
+            lambda paths: self.reported.append(self.dm.invalidate_external_changes(paths))
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_own_writes_are_not_external(self):
+        """测试本进程写入的数据文件不被当作外部修改"""
+        self.dm.add_character("林舟", "主角")
+        self.watcher.check()
+        self.assertNotIn(self.dm.file_paths["characters"], [p for paths in self.reported for p in paths])
+
+    def test_derived_files_written_by_own_process_are_not_external(self):
+        """测试状态清单、章节索引、格式版本、占用记录和草稿归档等派生文件的写入不被当作外部修改"""
+        self.watcher.check()
+        self.dm.add_character("林舟", "主角")
+        self.dm.set_novel_chapter(1, "第1章", "正文" * 100)
+        self.dm.append_draft("initial_drafts", 1, {"timestamp": "t1", "content": "草稿" * 100})
+        self.dm.append_history_entry("critiques", 1, {"timestamp": "t1"})
+        self.watcher.check()
+        self.assertEqual([p for paths in self.reported for p in paths], [])
+
+    def test_external_edit_refreshes_caches(self):
+        """测试外部修改后状态和上下文缓存读取到新内容"""
+        self.dm.set_novel_chapter(1, "第1章", "旧内容")
+        self.dm.get_project_status_details()
+        self.dm.get_context_info()
+        self.watcher.check()
+
+        path = self.dm.file_paths["characters"]
+        _touch_later(path, json_codec.dumps({"苏晚": {"description": "外部添加"}}, pretty=True).decode('utf-8'))
+        novel_path = self.dm.file_paths["novel_text"]
+        novel = self.dm.read_json_file(novel_path)
+        novel["chapters"]["chapter_1"]["content"] = "外部修改的内容"
+        # 模拟另一个进程以相同格式写入
+        _touch_later(novel_path, self.dm._dumps(novel_path, novel).decode('utf-8'))
+        self.watcher.check()
+
+        external = [p for paths in self.reported for p in paths]
+        self.assertIn(path, external)
+        self.assertIn(novel_path, external)
+        self.assertIsNone(self.dm._status_cache)
+        self.assertIn("苏晚", self.dm.get_characters_info_string())
+        self.assertTrue(self.dm._chapter_index.is_valid())
+        self.assertEqual(self.dm.get_novel_chapter(1)["content"], "外部修改的内容")
+
+    def test_external_schema_change_reloads_schema(self):
+        """测试外部修改schema.json后重新加载"""
+        self.dm.get_schema_version()
+        schema_path = self.dm.file_paths["schema"]
+        _touch_later(schema_path, json_codec.dumps({"schema_version": 0, "files": {}}).decode('utf-8'))
+        self.watcher.check()
+        self.assertIsNone(self.dm._schema)
+
+
+if __name__ == '__main__':
+    unittest.main()
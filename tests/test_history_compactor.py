@@ -0,0 +1,85 @@
+"""
+Unit tests for history_compactor module
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from history_compactor import HistoryCompactor, RetentionPolicy
+
+NOW = datetime(2025, 6, 1)
+
+
+def _draft(day, content):
+    return {
+        "timestamp": datetime(2025, 5, day).isoformat(),
+        "chapter_title": "第1章",
+        "content": content,
+        "word_count": len(content)
+    }
+
+
+class TestRetentionPolicy(unittest.TestCase):
+    """测试保留策略"""
+
+    def test_keep_last_and_days(self):
+        """测试按数量和按时间保留"""
+        entries = [{"timestamp": datetime(2025, 5, d).isoformat()} for d in (1, 2, 3, 28, 29)]
+        policy = RetentionPolicy(keep_last=1, keep_days=5)
+        self.assertEqual(policy.select(entries, set(), NOW), [False, False, False, True, True])
+
+    def test_protected_always_kept(self):
+        """测试当前版本始终保留"""
+        entries = [{"timestamp": "a"}, {"timestamp": "b"}, {"timestamp": "c"}]
+        policy = RetentionPolicy(keep_last=1, keep_days=0)
+        self.assertEqual(policy.select(entries, {"a"}, NOW), [True, False, True])
+
+    def test_inactive_policy_keeps_everything(self):
+        """测试策略关闭时不清理"""
+        policy = RetentionPolicy(keep_last=0, keep_days=0)
+        self.assertFalse(policy.is_active)
+        self.assertEqual(policy.select([{}, {}], set(), NOW), [True, True])
+
+
+class TestHistoryCompactor(unittest.TestCase):
+    """测试生成历史清理"""
+
+    def setUp(self):
+        self.project_path = Path(tempfile.mkdtemp())
+        self.dm = DataManager(self.project_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.project_path)
+
+    def test_compact_drafts_and_critiques(self):
+        """测试清理草稿归档与批评记录，并保留当前正文对应的版本"""
+        for day in range(1, 6):
+            draft = _draft(day, f"第{day}版正文内容。" * 20)
+            self.dm.append_draft("initial_drafts", 1, draft)
+            self.dm.append_history_entry("critiques", 1, {"timestamp": draft["timestamp"], "critique_data": {}})
+        self.dm.set_novel_chapter(1, "第1章", "第2版正文内容。" * 20)
+
+        compactor = HistoryCompactor(self.dm, RetentionPolicy(keep_last=1, keep_days=0))
+        result = compactor.compact(now=NOW)
+
+        self.assertEqual(result["initial_drafts"], (5, 2))
+        self.assertEqual(result["critiques"], (5, 2))
+        contents = [d["content"] for d in self.dm.read_drafts("initial_drafts", 1)]
+        self.assertEqual(contents, ["第2版正文内容。" * 20, "第5版正文内容。" * 20])
+
+        # 压缩后仍可继续追加
+        self.dm.append_draft("initial_drafts", 1, _draft(6, "新的草稿"))
+        self.assertEqual(self.dm.get_latest_draft("initial_drafts", 1)["content"], "新的草稿")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Unit tests for json_codec module
+"""
+
+import unittest
+import json
+import os
+import sys
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+
+SAMPLE = {
+    "chapters": {
+        "chapter_1": {"title": "第1章", "content": "他说：\"走吧。\"\n夜色渐深。", "word_count": 12},
+        "chapter_2": {"title": "第2章", "content": "", "tags": [], "extra": {}}
+    },
+    "ratio": 0.5,
+    "flag": None
+}
+
+
+class TestJsonCodec(unittest.TestCase):
+    """测试JSON编解码层"""
+
+    def test_roundtrip_all_formats(self):
+        """测试紧凑与缩进格式都能还原数据，且中文不被转义"""
+        for pretty in (False, True):
+            payload = json_codec.dumps(SAMPLE, pretty)
+            self.assertIsInstance(payload, bytes)
+            self.assertIn("夜色".encode('utf-8'), payload)
+            self.assertEqual(json_codec.loads(payload), SAMPLE)
+            self.assertEqual(json.loads(payload.decode('utf-8')), SAMPLE)
+
+    def test_fast_backend_matches_stdlib_layout(self):
+        """测试加速实现与标准库回退的输出字节一致（章节偏移索引依赖固定格式）"""
+        if json_codec.BACKEND == "json":
+            self.skipTest("未安装加速JSON库")
+        for pretty in (False, True):
+            fast = json_codec.dumps(SAMPLE, pretty)
+            with patch.object(json_codec, 'BACKEND', 'json'):
+                fallback = json_codec.dumps(SAMPLE, pretty)
+            self.assertEqual(fast, fallback)
+
+    def test_invalid_input_raises_value_error(self):
+        """测试格式错误统一抛出ValueError"""
+        with self.assertRaises(ValueError):
+            json_codec.loads(b"{not json")
+
+
+if __name__ == '__main__':
+    unittest.main()
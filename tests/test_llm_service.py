@@ -70,14 +70,13 @@ class TestLLMService(unittest.TestCase):
         mock_openai.assert_called()
         mock_async_openai.assert_called()
 
-    def test_get_prompts_path_multi_project_mode(self):
-        """测试在多项目模式下_get_prompts_path的行为"""
+    def test_load_prompts_applies_project_overrides(self):
+        """测试在多项目模式下加载全局提示词并应用项目覆盖"""
         with tempfile.TemporaryDirectory() as tmpdir:
             project_path = Path(tmpdir)
-            project_prompts_path = project_path / 'prompts.json'
             
-            # 模拟项目prompts文件
-            with open(project_prompts_path, 'w', encoding='utf-8') as f:
+            # 模拟项目只保存了修改过的提示词
+            with open(project_path / 'prompts.override.json', 'w', encoding='utf-8') as f:
                 json.dump({"test": "project_prompt"}, f)
 
             # 模拟 project_data_manager
@@ -87,20 +86,69 @@ class TestLLMService(unittest.TestCase):
             # 我们需要模拟 'project_data_manager.project_data_manager.get_data_manager'
             # 因为在 llm_service.py 中是这样导入的
             with patch('project_data_manager.project_data_manager.get_data_manager', return_value=mock_data_manager):
-                # 创建一个新的LLMService实例以触发路径加载
                 # 我们需要绕过构造函数中的 _load_prompts 和 _initialize_clients
                 with patch.object(LLMService, '_load_prompts'), patch.object(LLMService, '_initialize_clients'):
                     service = LLMService()
                 
-                # 直接调用私有方法进行测试
-                returned_path = service._get_prompts_path()
+                # 断言使用的是项目路径
+                self.assertEqual(service._get_project_path(), project_path)
                 
-                # 断言返回的路径是项目路径，而不是根路径
-                self.assertEqual(returned_path, project_prompts_path)
-                
-                # 验证加载的内容是否也正确
-                service._load_prompts() # 重新加载
+                # 项目覆盖与全局提示词合并，且没有向项目复制整份prompts.json
+                service._load_prompts()
                 self.assertEqual(service.prompts.get("test"), "project_prompt")
+                self.assertIn("novel_chapter", service.prompts)
+                self.assertFalse((project_path / 'prompts.json').exists())
+
+
+class TestRefinementPersistence(unittest.TestCase):
+    """测试反思修正流程的中间数据写入开始生成时的项目"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        with patch.object(LLMService, '_load_prompts'), patch.object(LLMService, '_initialize_clients'):
+            self.service = LLMService()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_project_switch_before_queue_drains(self):
+        """测试写入排队期间切换项目，草稿和批评仍写入原项目"""
+        import asyncio
+        import threading
+        from data_manager import DataManager
+        from persistence_queue import PersistenceQueue
+
+        book_a, book_b = DataManager(self.temp_dir / "a"), DataManager(self.temp_dir / "b")
+        current = {"dm": book_a}
+        queue = PersistenceQueue(maxsize=8)
+        release = threading.Event()
+        queue.submit(release.wait, 5)
+
+        async def fake_generate(*args, **kwargs):
+            return "正文内容"
+
+        async def fake_critique(*args, **kwargs):
+            return json.dumps({"issues": [], "priority_fixes": []})
+
+        self.service.generate_novel_chapter_async = fake_generate
+        self.service.generate_novel_critique_async = fake_critique
+        self.service.generate_novel_refinement_async = fake_generate
+        with patch('llm_service.persistence_queue', queue), \
+                patch('project_data_manager.project_data_manager.get_data_manager', side_effect=lambda: current["dm"]):
+            asyncio.run(self.service.generate_novel_chapter_with_refinement_async(
+                {"id": "ch-1", "title": "第1章"}, {"summary": "概要"}, 1, ""
+            ))
+            current["dm"] = book_b
+            release.set()
+            self.assertTrue(queue.flush(timeout=5))
+        queue.shutdown(timeout=2)
+
+        self.assertEqual(len(book_a.read_drafts("initial_drafts", "ch-1")), 1)
+        self.assertEqual(len(book_a.read_drafts("refined_drafts", "ch-1")), 1)
+        self.assertIn("ch-1", book_a.read_history("critiques"))
+        self.assertIn("ch-1", book_a.read_history("refinement_history"))
+        self.assertEqual(book_b.read_drafts("initial_drafts"), {})
+        self.assertEqual(book_b.read_history("critiques"), {})
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Unit tests for migrate_to_multi_project module
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+import migrate_to_multi_project as migration
+from migrate_to_multi_project import MigrationEngine, JOURNAL_NAME
+from project_manager import ProjectManager
+
+
+class TestMigrationEngine(unittest.TestCase):
+    """测试并行、校验、可续传的旧数据迁移"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.pm = ProjectManager(base_dir=self.temp_dir / "app")
+        self.engine = MigrationEngine(self.pm, workers=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _legacy(self, name, novel_name, chapters=3):
+        root = self.temp_dir / name
+        meta = root / "meta"
+        meta.mkdir(parents=True)
+        json_codec.dump_file(meta / "theme_one_line.json", {"novel_name": novel_name, "theme": "主题"})
+        json_codec.dump_file(meta / "novel_text.json", {"chapters": {
+            f"chapter_{i}": {"title": f"第{i}章", "content": "正文" * 1000} for i in range(1, chapters + 1)
+        }})
+        (meta / ".lock").write_text("")
+        snapshot = root / "meta_backup" / "snapshots" / "s1"
+        objects = root / "meta_backup" / "objects"
+        snapshot.mkdir(parents=True)
+        objects.mkdir(parents=True)
+        (objects / "abc").write_text("快照内容", encoding='utf-8')
+        os.link(objects / "abc", snapshot / "theme_one_line.json")
+        return root
+
+    def test_parallel_migration_of_many_directories(self):
+        """测试多个目录一起迁移，锁文件不迁移，硬链接只复制一次"""
+        sources = [(self._legacy(f"old{i}", f"小说{i}"), migration.get_legacy_project_name(self.temp_dir / f"old{i}"))
+                   for i in range(3)]
+        report = self.engine.migrate(sources)
+
+        self.assertTrue(report.ok)
+        self.assertEqual([r.project for r in report.results], ["小说0", "小说1", "小说2"])
+        for r in report.results:
+            self.assertEqual((r.files, r.copied, r.linked), (4, 3, 1))
+        target = self.pm.projects_dir / "小说1"
+        self.assertEqual(
+            json_codec.load_file(target / "meta" / "novel_text.json"),
+            json_codec.load_file(self.temp_dir / "old1" / "meta" / "novel_text.json")
+        )
+        self.assertFalse((target / "meta" / ".lock").exists())
+        self.assertEqual(
+            (target / "meta_backup" / "objects" / "abc").stat().st_ino,
+            (target / "meta_backup" / "snapshots" / "s1" / "theme_one_line.json").stat().st_ino
+        )
+        summary = report.to_dict()
+        self.assertEqual(summary["files_copied"], 12)
+        self.assertGreater(summary["mb_per_second"], 0)
+
+        # 已完成的目录不会再次迁移
+        again = self.engine.migrate(sources)
+        self.assertEqual([r.status for r in again.results], ["already"] * 3)
+        self.assertEqual(self.pm.count_projects(), 3)
+
+    def test_resume_after_failure_copies_only_remaining_files(self):
+        """测试中断（校验失败）后再次运行只复制未完成的文件，并继续使用同一项目"""
+        root = self._legacy("old", "续传")
+        real_copy = migration.copy_verified
+
+        def flaky_copy(source, target):
+            if source.name == "novel_text.json":
+                raise migration.MigrationError(f"校验失败: {source}")
+            return real_copy(source, target)
+
+        with patch.object(migration, "copy_verified", flaky_copy):
+            report = self.engine.migrate([(root, "续传")])
+        self.assertFalse(report.ok)
+        self.assertEqual(len(report.results[0].failed), 1)
+
+        report = self.engine.migrate([(root, "续传")])
+        result = report.results[0]
+        self.assertEqual(result.status, "done")
+        self.assertEqual(result.project, "续传")
+        self.assertEqual((result.copied, result.resumed), (1, 3))
+        self.assertTrue(json_codec.load_file(self.pm.projects_dir / "续传" / JOURNAL_NAME)["completed"])
+
+    def test_name_taken_by_other_project(self):
+        """测试名称被无关项目占用时使用新名称"""
+        self.assertTrue(self.pm.create_project("重名"))
+        report = self.engine.migrate([(self._legacy("old", "重名"), "重名")])
+        self.assertEqual(report.results[0].project, "重名-2")
+
+
+if __name__ == '__main__':
+    unittest.main()
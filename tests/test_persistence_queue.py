@@ -0,0 +1,93 @@
+"""
+Unit tests for persistence_queue module
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistence_queue import PersistenceQueue
+
+
+class TestPersistenceQueue(unittest.TestCase):
+    """测试异步持久化队列"""
+
+    def setUp(self):
+        self.queue = PersistenceQueue(maxsize=2)
+        self.written = []
+
+    def tearDown(self):
+        self.queue.shutdown(timeout=2)
+
+    def test_writes_run_in_order_on_writer_thread(self):
+        """测试写入按提交顺序在写入线程中执行"""
+        def write(value):
+            self.written.append((value, threading.current_thread().name))
+
+        for i in range(5):
+            self.queue.submit(write, i)
+        self.assertTrue(self.queue.flush(timeout=2))
+        self.assertEqual([v for v, _ in self.written], list(range(5)))
+        self.assertTrue(all(name == "persistence-writer" for _, name in self.written))
+        self.assertEqual(self.queue.pending, 0)
+
+    def test_async_submit_applies_backpressure_without_blocking_loop(self):
+        """测试队列满时异步提交等待，但事件循环中的其他协程继续运行"""
+        release = threading.Event()
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def producer():
+            self.queue.submit(release.wait)
+            for i in range(4):
+                await self.queue.submit_async(self.written.append, i)
+            return time.monotonic()
+
+        async def main():
+            threading.Timer(0.1, release.set).start()
+            start = time.monotonic()
+            finished, _ = await asyncio.gather(producer(), ticker())
+            return finished - start
+
+        elapsed = asyncio.run(main())
+        # 写入线程被阻塞时生产者必须等待，而计时协程照常执行
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertEqual(len(ticks), 5)
+        self.assertTrue(self.queue.flush(timeout=2))
+        self.assertEqual(self.written, [0, 1, 2, 3])
+
+    def test_errors_recorded_and_later_writes_continue(self):
+        """测试写入出错只记录，不影响后续写入"""
+        def fail():
+            raise IOError("磁盘已满")
+
+        self.queue.submit(fail)
+        self.queue.submit(self.written.append, "ok")
+        self.queue.flush(timeout=2)
+        self.assertEqual(self.written, ["ok"])
+        self.assertEqual(self.queue.errors[0][0], "fail")
+
+    def test_shutdown_drains_pending_writes(self):
+        """测试停止前写完所有已提交的数据"""
+        def slow_write(value):
+            time.sleep(0.02)
+            self.written.append(value)
+
+        for i in range(3):
+            self.queue.submit(slow_write, i)
+        self.assertTrue(self.queue.shutdown(timeout=2))
+        self.assertEqual(self.written, [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for project_archive module
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+import project_archive
+from project_archive import ArchiveError, MANIFEST_NAME
+from project_manager import ProjectManager
+
+
+class TestProjectArchive(unittest.TestCase):
+    """测试项目归档的导出与导入"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.pm = ProjectManager(base_dir=self.temp_dir / "app")
+        self.assertTrue(self.pm.create_project("book", "我的小说", "描述"))
+        self.project = self.pm.get_project_path("book")
+        json_codec.dump_file(self.project / "meta" / "novel_text.json", {"chapter_1": {"content": "正文" * 1000}})
+        (self.project / "meta" / "drafts.pack").write_bytes(os.urandom(3 * project_archive.CHUNK_SIZE + 7))
+        (self.project / "meta" / "novel_text.idx").write_text("{}", encoding='utf-8')
+        (self.project / "meta" / ".lock").write_text("", encoding='utf-8')
+        (self.project / "meta_backup" / "snapshots").mkdir()
+        json_codec.dump_file(self.project / "prompts.override.json", {"a": {"base_prompt": "项目A"}})
+        self.archive = self.temp_dir / "book.zip"
+
+    def tearDown(self):
+        self.pm.registry.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip_zip(self):
+        """测试导出后导入得到相同的文件，跳过锁、可重建索引和快照"""
+        self.assertTrue(self.pm.export_project("book", self.archive))
+        with zipfile.ZipFile(self.archive) as zf:
+            names = set(zf.namelist())
+        self.assertIn(MANIFEST_NAME, names)
+        self.assertIn("meta/drafts.pack", names)
+        self.assertNotIn("meta/novel_text.idx", names)
+        self.assertNotIn("meta/.lock", names)
+        self.assertFalse(any(name.startswith("meta_backup") for name in names))
+
+        self.assertEqual(self.pm.import_project(self.archive, "copy"), "copy")
+        copy_path = self.pm.get_project_path("copy")
+        for rel in ("meta/novel_text.json", "meta/drafts.pack", "prompts.override.json"):
+            self.assertEqual((copy_path / rel).read_bytes(), (self.project / rel).read_bytes())
+        self.assertTrue((copy_path / "meta_backup").is_dir())
+        info = self.pm.get_project_info("copy")
+        self.assertEqual(info.display_name, "我的小说")
+        self.assertEqual(json_codec.load_file(copy_path / "project_info.json")["name"], "copy")
+
+    def test_import_rejects_existing_name_and_corruption(self):
+        """测试名称冲突或校验失败时不留下任何项目目录"""
+        self.assertTrue(self.pm.export_project("book", self.archive))
+        self.assertIsNone(self.pm.import_project(self.archive))
+
+        corrupted = self.temp_dir / "corrupted.zip"
+        with zipfile.ZipFile(self.archive) as source, zipfile.ZipFile(corrupted, 'w') as target:
+            for info in source.infolist():
+                data = source.read(info)
+                if info.filename == "meta/novel_text.json":
+                    data = data.replace("正文".encode('utf-8'), "改动".encode('utf-8'), 1)
+                target.writestr(info.filename, data)
+        self.assertIsNone(self.pm.import_project(corrupted, "broken"))
+        self.assertFalse((self.pm.projects_dir / "broken").exists())
+        self.assertEqual(sorted(p.name for p in self.pm.projects_dir.iterdir()), ["book"])
+
+    def test_unsafe_paths_rejected(self):
+        """测试拒绝包含 .. 的条目"""
+        evil = self.temp_dir / "evil.zip"
+        with zipfile.ZipFile(evil, 'w') as zf:
+            zf.writestr("../escape.txt", "x")
+        with self.assertRaises(ArchiveError):
+            project_archive.import_project(evil, self.pm.projects_dir, lambda m: self.temp_dir / "x")
+        self.assertFalse((self.pm.projects_dir.parent / "escape.txt").exists())
+
+    @unittest.skipIf(project_archive.zstandard is None, "未安装 zstandard")
+    def test_round_trip_tar_zst(self):
+        """测试 tar.zst 格式的导出与导入"""
+        archive = self.temp_dir / "book.tar.zst"
+        self.assertTrue(self.pm.export_project("book", archive))
+        self.assertEqual(project_archive.read_manifest(archive)["project"]["name"], "book")
+        self.assertEqual(self.pm.import_project(archive, "copy"), "copy")
+        self.assertEqual(
+            (self.pm.get_project_path("copy") / "meta" / "drafts.pack").read_bytes(),
+            (self.project / "meta" / "drafts.pack").read_bytes()
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
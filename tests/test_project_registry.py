@@ -0,0 +1,124 @@
+"""
+Unit tests for project_registry module
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+from project_registry import ProjectRegistry
+from project_manager import ProjectManager
+
+
+class TestProjectRegistry(unittest.TestCase):
+    """测试SQLite项目注册表"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.registry = ProjectRegistry(self.temp_dir / "projects.db")
+        for i in range(5):
+            self.registry.put({
+                "name": f"p{i}", "display_name": f"小说{i}",
+                "created_at": f"2024-01-0{i + 1}T00:00:00", "last_accessed": f"2024-02-0{5 - i}T00:00:00"
+            })
+
+    def tearDown(self):
+        self.registry.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_paginated_sorted_listing(self):
+        """测试按字段排序的分页查询"""
+        self.assertEqual(self.registry.count(), 5)
+        self.assertEqual([r["name"] for r in self.registry.page(0, 2)], ["p0", "p1"])
+        self.assertEqual([r["name"] for r in self.registry.page(2, 2)], ["p2", "p3"])
+        self.assertEqual([r["name"] for r in self.registry.page(4, 2)], ["p4"])
+        self.assertEqual(
+            [r["name"] for r in self.registry.page(0, 2, sort_by="created_at")], ["p4", "p3"]
+        )
+        self.assertEqual(
+            [r["name"] for r in self.registry.page(0, None, sort_by="name", descending=False)],
+            ["p0", "p1", "p2", "p3", "p4"]
+        )
+        with self.assertRaises(ValueError):
+            self.registry.page(sort_by="name; DROP TABLE projects")
+
+    def test_touch_update_and_remove(self):
+        """测试更新访问时间、修改字段和删除"""
+        self.assertTrue(self.registry.touch("p4", "2024-03-01T00:00:00"))
+        self.assertEqual(self.registry.page(0, 1)[0]["name"], "p4")
+        self.assertFalse(self.registry.touch("missing"))
+
+        record = self.registry.update("p1", description="新描述")
+        self.assertEqual(record["description"], "新描述")
+        self.assertEqual(record["display_name"], "小说1")
+        self.assertIsNone(self.registry.update("missing", description="x"))
+
+        self.assertTrue(self.registry.remove("p1"))
+        self.assertIsNone(self.registry.get("p1"))
+        self.assertEqual(self.registry.count(), 4)
+
+    def test_import_keeps_existing_records(self):
+        """测试导入时跳过已存在的项目"""
+        added = self.registry.import_records([
+            {"name": "p0", "display_name": "覆盖"},
+            {"name": "new", "description": "导入"},
+        ])
+        self.assertEqual(added, 1)
+        self.assertEqual(self.registry.get("p0")["display_name"], "小说0")
+        self.assertEqual(self.registry.get("new")["display_name"], "new")
+
+
+class TestProjectManagerRegistry(unittest.TestCase):
+    """测试项目管理器使用注册表"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_legacy_config_projects_are_imported(self):
+        """测试旧版本 config.json 中的项目列表迁移到注册表"""
+        (self.temp_dir / "projects" / "old").mkdir(parents=True)
+        json_codec.dump_file(self.temp_dir / "config.json", {
+            "version": "1.0", "active_project": "old",
+            "projects": {"old": {"name": "old", "display_name": "旧项目", "last_accessed": "2024-01-01T00:00:00"}}
+        }, pretty=True)
+
+        pm = ProjectManager(base_dir=self.temp_dir)
+        self.assertEqual([p.display_name for p in pm.list_projects()], ["旧项目"])
+        self.assertEqual(pm.get_active_project(), "old")
+        self.assertNotIn("projects", json_codec.load_file(self.temp_dir / "config.json"))
+
+        # 再次启动不会重复导入
+        self.assertEqual(ProjectManager(base_dir=self.temp_dir).count_projects(), 1)
+
+    def test_switch_and_delete_keep_registry_in_sync(self):
+        """测试切换项目更新访问时间、删除项目后选择最近访问的项目"""
+        pm = ProjectManager(base_dir=self.temp_dir)
+        for name in ("a", "b", "c"):
+            self.assertTrue(pm.create_project(name, f"书{name}"))
+        self.assertEqual(pm.get_active_project(), "a")
+
+        self.assertTrue(pm.set_active_project("c"))
+        self.assertTrue(pm.set_active_project("b"))
+        self.assertEqual([p.name for p in pm.list_projects_page(0, 2)], ["b", "c"])
+        self.assertEqual(pm.count_projects(), 3)
+
+        self.assertTrue(pm.update_project_info("b", description="修改后"))
+        self.assertEqual(pm.get_project_info("b").description, "修改后")
+
+        self.assertTrue(pm.delete_project("b"))
+        self.assertEqual(pm.get_active_project(), "c")
+        self.assertIsNone(pm.get_project_info("b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for prompt_layers module
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prompt_layers
+from prompt_layers import PromptResolver, merge_layers, diff_layers, OVERRIDE_NAME, LEGACY_NAME
+
+
+def _dump(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    # 保证修改时间变化
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+
+class TestPromptLayers(unittest.TestCase):
+    """测试分层提示词"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.defaults = self.temp_dir / "prompts.default.json"
+        self.global_path = self.temp_dir / "prompts.json"
+        self.project = self.temp_dir / "book"
+        self.project.mkdir()
+        _dump(self.defaults, {
+            "a": {"base_prompt": "默认A", "user_prompt_template": "{base_prompt}\n{user_prompt}"},
+            "b": {"base_prompt": "默认B"}
+        })
+        _dump(self.global_path, {"a": {"base_prompt": "全局A"}, "c": {"base_prompt": "全局C"}})
+        self.resolver = PromptResolver(self.defaults, self.global_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_merge_and_diff_round_trip(self):
+        """测试逐项合并与差异计算"""
+        base = {"a": {"x": 1, "y": 2}, "b": 1}
+        full = {"a": {"x": 1, "y": 3}, "b": 1, "c": 4}
+        delta = diff_layers(base, full)
+        self.assertEqual(delta, {"a": {"y": 3}, "c": 4})
+        self.assertEqual(merge_layers(base, delta), full)
+
+    def test_layers_resolve_in_order(self):
+        """测试内置默认 → 全局 → 项目覆盖的合并顺序"""
+        _dump(self.project / OVERRIDE_NAME, {"c": {"base_prompt": "项目C"}})
+        resolved = self.resolver.resolve(self.project)
+        self.assertEqual(resolved["a"]["base_prompt"], "全局A")
+        self.assertIn("user_prompt_template", resolved["a"])
+        self.assertEqual(resolved["b"]["base_prompt"], "默认B")
+        self.assertEqual(resolved["c"]["base_prompt"], "项目C")
+
+    def test_cached_until_a_layer_changes(self):
+        """测试各层未变化时不重新读取，全局修改立即对项目生效"""
+        first = self.resolver.resolve(self.project)
+        with patch.object(prompt_layers, "_load_json", side_effect=AssertionError("不应重新读取")):
+            self.assertIs(self.resolver.resolve(self.project), first)
+
+        _dump(self.global_path, {"a": {"base_prompt": "新全局A"}})
+        self.assertEqual(self.resolver.resolve(self.project)["a"]["base_prompt"], "新全局A")
+
+    def test_save_stores_only_changed_prompts(self):
+        """测试项目只保存与全局不同的项，重置后恢复全局"""
+        prompts = self.resolver.project_prompts(self.project)
+        prompts["b"]["base_prompt"] = "项目B"
+        self.resolver.save_project_prompts(self.project, prompts)
+
+        with open(self.project / OVERRIDE_NAME, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"b": {"base_prompt": "项目B"}})
+        self.assertEqual(self.resolver.resolve(self.project)["b"]["base_prompt"], "项目B")
+
+        self.resolver.reset_project(self.project)
+        self.assertEqual(self.resolver.resolve(self.project)["b"]["base_prompt"], "默认B")
+
+    def test_legacy_copy_without_base_keeps_differences(self):
+        """测试没有基准的旧版副本中与全局不同的项作为覆盖"""
+        legacy = merge_layers(self.resolver.base_prompts(), {"b": {"base_prompt": "旧副本B"}})
+        _dump(self.project / LEGACY_NAME, legacy)
+        self.assertEqual(self.resolver.load_overrides(self.project), {"b": {"base_prompt": "旧副本B"}})
+
+        _dump(self.global_path, {"a": {"base_prompt": "新全局A"}, "c": {"base_prompt": "全局C"}})
+        # 旧副本中的 a 与复制时的全局相同，但没有基准时无法区分，仍按副本保留
+        self.assertEqual(self.resolver.resolve(self.project)["a"]["base_prompt"], "全局A")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Unit tests for revision_store module
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from revision_store import RevisionStore, apply_delta, compute_delta
+
+BASE = "".join(f"第{i}句，风从山谷里吹来，带着潮湿的草木气息。\n" for i in range(200))
+
+
+def _edit(text, n):
+    """替换其中一句，模拟一次修改"""
+    return text.replace(f"第{n}句，风从山谷里吹来", f"第{n}句，雨从山谷里落下")
+
+
+class TestRevisionStore(unittest.TestCase):
+    """测试增量修订历史"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.store = RevisionStore(self.test_dir / "revisions.pack", keyframe_interval=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_delta_roundtrip(self):
+        """测试增量计算与应用"""
+        for base, target in [("", "新文本。"), ("旧文本。", ""), ("甲。乙。丙。", "甲。丁。丙。戊"), (BASE, _edit(BASE, 7))]:
+            self.assertEqual(apply_delta(base, compute_delta(base, target)), target)
+
+    def test_reconstruct_every_version(self):
+        """测试重建任意版本，并定期保存关键帧"""
+        versions = [BASE]
+        for n in range(1, 10):
+            versions.append(_edit(versions[-1], n))
+        for text in versions:
+            self.store.record("novel_text/chapter_1", text)
+
+        reopened = RevisionStore(self.test_dir / "revisions.pack", keyframe_interval=4)
+        for i, text in enumerate(versions):
+            self.assertEqual(reopened.get("novel_text/chapter_1", i), text)
+        self.assertEqual(reopened.get("novel_text/chapter_1"), versions[-1])
+        self.assertIsNone(reopened.get("novel_text/chapter_1", 99))
+
+        stats = reopened.stats()
+        self.assertEqual(stats["revisions"], 10)
+        self.assertEqual(stats["keyframes"], 3)
+        self.assertLess(stats["bytes"], stats["full_bytes"] / 10)
+
+    def test_unchanged_text_not_recorded(self):
+        """测试内容未变化时不新增版本"""
+        self.assertEqual(self.store.record("story_outline", "大纲"), 0)
+        self.assertIsNone(self.store.record("story_outline", "大纲"))
+        self.assertEqual(self.store.record("story_outline", "新大纲", {"title": "t"}), 1)
+        self.assertEqual(self.store.list_revisions("story_outline")[1]["meta"], {"title": "t"})
+
+
+if __name__ == '__main__':
+    unittest.main()
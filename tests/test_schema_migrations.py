@@ -0,0 +1,112 @@
+"""
+Unit tests for schema_migrations module
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_lock
+from config import LOCK_CONFIG
+from data_manager import DataManager
+from file_lock import FileLock
+from schema_migrations import current_version, migrate_project, pending_migrations, start_background_migration
+
+
+class TestSchemaMigrations(unittest.TestCase):
+    """测试数据格式版本与懒迁移"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.meta_dir = self.test_dir / "meta"
+        self.meta_dir.mkdir()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write_legacy(self, name, data):
+        with (self.meta_dir / name).open('w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def _read_raw(self, name):
+        with (self.meta_dir / name).open('r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_pending_migrations_ordered(self):
+        """测试按版本号返回未应用的步骤"""
+        steps = pending_migrations("theme_one_line", 0)
+        self.assertTrue(steps)
+        self.assertEqual(steps, sorted(steps, key=lambda m: m.version))
+        self.assertEqual(pending_migrations("theme_one_line", current_version()), [])
+
+    def test_lazy_migration_on_first_read(self):
+        """测试首次读取时迁移旧的字符串主题并写回"""
+        self._write_legacy("theme_one_line.json", "旧版的一句话主题")
+        dm = DataManager(self.test_dir)
+        self.assertEqual(dm.get_schema_version("theme_one_line"), 0)
+
+        self.assertEqual(dm.read_theme_one_line(), {"theme": "旧版的一句话主题"})
+        self.assertEqual(self._read_raw("theme_one_line.json"), {"theme": "旧版的一句话主题"})
+        self.assertEqual(dm.get_schema_version("theme_one_line"), current_version())
+        # 其他文件尚未迁移，项目版本保持不变
+        self.assertEqual(DataManager(self.test_dir).get_schema_version(), 0)
+
+    @unittest.skipUnless(file_lock.fcntl, "需要fcntl")
+    def test_read_while_locked_migrates_in_memory(self):
+        """测试其他进程持有写入锁时读取返回内存中迁移后的数据，不写回，之后读取时再迁移"""
+        self._write_legacy("theme_one_line.json", "旧版的一句话主题")
+        with FileLock(self.meta_dir / ".lock"), patch.dict(LOCK_CONFIG, {"timeout": 0.1}):
+            dm = DataManager(self.test_dir)
+            self.assertEqual(dm.read_theme_one_line(), {"theme": "旧版的一句话主题"})
+            self.assertEqual(json.loads(dm.read_file_bytes(dm.file_paths["theme_one_line"])),
+                             {"theme": "旧版的一句话主题"})
+            self.assertEqual(self._read_raw("theme_one_line.json"), "旧版的一句话主题")
+            self.assertEqual(dm.get_schema_version("theme_one_line"), 0)
+
+        self.assertEqual(dm.read_theme_one_line(), {"theme": "旧版的一句话主题"})
+        self.assertEqual(self._read_raw("theme_one_line.json"), {"theme": "旧版的一句话主题"})
+        self.assertEqual(dm.get_schema_version("theme_one_line"), current_version())
+
+    def test_chapter_outline_ids_keep_legacy_keys(self):
+        """测试分章细纲分配的ID沿用旧的 chapter_N 键，order按位置重新编号"""
+        self._write_legacy("chapter_outline.json", {"chapters": [
+            {"title": "起", "outline": "开端"},
+            {"title": "承", "outline": "发展", "chapter_number": 5}
+        ]})
+        chapters = DataManager(self.test_dir).read_chapter_outline()
+        self.assertEqual([ch["id"] for ch in chapters], ["chapter_1", "chapter_5"])
+        self.assertEqual([ch["order"] for ch in chapters], [1, 2])
+
+    def test_migrate_all_bumps_project_version(self):
+        """测试批量迁移后项目版本升级到最新"""
+        self._write_legacy("theme_one_line.json", "主题")
+        dm = DataManager(self.test_dir)
+        results = migrate_project(dm)
+        self.assertTrue(results["theme_one_line"])
+        self.assertEqual(DataManager(self.test_dir).get_schema_version(), current_version())
+        self.assertFalse(any(migrate_project(dm).values()))
+
+    def test_background_migration(self):
+        """测试后台迁移多个项目"""
+        self._write_legacy("theme_one_line.json", "主题")
+        results = []
+        start_background_migration([self.test_dir], results.append).join(timeout=5)
+        self.assertTrue(results[0][str(self.test_dir)]["theme_one_line"])
+
+    def test_new_writes_marked_current(self):
+        """测试通过DataManager写入的文件直接标记为最新版本"""
+        dm = DataManager(self.test_dir)
+        dm.write_theme_one_line("新主题")
+        self.assertEqual(dm.get_schema_version("theme_one_line"), current_version())
+
+
+if __name__ == '__main__':
+    unittest.main()
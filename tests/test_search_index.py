@@ -0,0 +1,131 @@
+"""
+Unit tests for search_index module
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec
+from data_manager import DataManager
+from project_manager import ProjectManager
+from search_index import SearchIndex, index_terms, query_terms, make_snippet
+
+
+class TestTokenizer(unittest.TestCase):
+    """测试中文bigram切分"""
+
+    def test_index_and_query_terms(self):
+        """测试文档词项包含bigram与段末单字，查询只用bigram"""
+        self.assertEqual(index_terms("宝玉来了 Hello"), ["宝玉", "玉来", "来了", "了", "hello"])
+        self.assertEqual(query_terms("宝玉来"), ["宝玉", "玉来"])
+        self.assertEqual(query_terms("玉"), ["玉"])
+        self.assertEqual(query_terms("，。"), [])
+
+    def test_snippet_centers_on_match(self):
+        """测试片段截取匹配位置附近的内容"""
+        content = "甲" * 50 + "宝玉" + "乙" * 50
+        snippet = make_snippet(content, "宝玉", width=10)
+        self.assertIn("宝玉", snippet)
+        self.assertTrue(snippet.startswith("…") and snippet.endswith("…"))
+
+
+class TestSearchIndex(unittest.TestCase):
+    """测试倒排索引的更新与搜索"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.index = SearchIndex(self.temp_dir / "search.db")
+        self.index.update_source("red", "novel_text", {"chapters": {
+            "c1": {"title": "初入贾府", "content": "黛玉初到贾府，见了宝玉。"},
+            "c2": {"title": "宝玉挨打", "content": "宝玉挨了父亲一顿打，宝玉卧床不起。"},
+        }})
+        self.index.update_source("red", "characters", {"林黛玉": {"description": "多愁善感，住在潇湘馆。"}})
+        self.index.update_source("west", "chapter_summary", {"summaries": {
+            "c1": {"title": "石猴出世", "summary": "花果山上一块仙石孕育出石猴。"}
+        }})
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_search_ranks_hits_across_projects(self):
+        """测试跨项目搜索、排序和按项目过滤"""
+        hits = self.index.search("宝玉")
+        self.assertEqual([hit.key for hit in hits], ["c2", "c1"])
+        self.assertTrue(all(hit.exact for hit in hits))
+        self.assertIn("宝玉", hits[0].snippet)
+
+        self.assertEqual([(h.project, h.source) for h in self.index.search("石猴")], [("west", "chapter_summary")])
+        self.assertEqual(self.index.search("石猴", project="red"), [])
+        self.assertEqual(self.index.search("孙悟空"), [])
+
+    def test_single_character_and_exact_phrase(self):
+        """测试单字查询不漏掉段末的字，完整包含查询文本的结果排在前面"""
+        self.assertEqual({hit.key for hit in self.index.search("馆")}, {"林黛玉"})
+        self.assertEqual({hit.key for hit in self.index.search("黛")}, {"c1", "林黛玉"})
+
+        # 两个词项都出现但不相邻的文档排在完整匹配之后
+        self.index.update_source("x", "story_outline", {"outline": "宝玉去了，玉来了，宝玉又去了，玉来了。"})
+        self.index.update_source("y", "story_outline", {"outline": "宝玉来了。"})
+        hits = self.index.search("宝玉来")
+        self.assertEqual([(hit.project, hit.exact) for hit in hits], [("y", True), ("x", False)])
+
+    def test_incremental_update_and_removal(self):
+        """测试只重新索引变化的条目，删除的条目和项目不再出现"""
+        changed = self.index.update_source("red", "novel_text", {"chapters": {
+            "c1": {"title": "初入贾府", "content": "黛玉初到贾府，见了宝玉。"},
+            "c3": {"title": "新章", "content": "刘姥姥进大观园。"},
+        }})
+        self.assertEqual(changed, 1)
+        self.assertEqual([hit.key for hit in self.index.search("宝玉")], ["c1"])
+        self.assertEqual(len(self.index.search("大观园")), 1)
+
+        self.index.remove_project("red")
+        self.assertEqual(self.index.search("宝玉"), [])
+        self.assertEqual(self.index.stats()["projects"], 1)
+
+
+class TestSearchIndexIntegration(unittest.TestCase):
+    """测试数据写入和项目管理与索引同步"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.pm = ProjectManager(base_dir=self.temp_dir)
+
+    def tearDown(self):
+        self.pm.search_index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_data_manager_writes_update_index(self):
+        """测试DataManager写入后立即可以搜索，且刷新时不重复索引"""
+        self.assertTrue(self.pm.create_project("book", "书"))
+        dm = DataManager(self.pm.get_project_path("book"))
+        dm.attach_search_index(self.pm.search_index, "book")
+        dm.write_json_file(dm.file_paths["story_outline"], {"outline": "少年离家闯荡江湖。"})
+
+        self.assertEqual([hit.source for hit in self.pm.search_index.search("江湖")], ["story_outline"])
+        self.assertEqual(self.pm.refresh_search_index(), 0)
+
+    def test_refresh_picks_up_external_changes_and_deleted_projects(self):
+        """测试刷新时索引外部修改的文件并删除已删除项目的索引"""
+        for name in ("a", "b"):
+            self.assertTrue(self.pm.create_project(name, name))
+        json_codec.dump_file(self.pm.get_project_path("a") / "meta" / "items.json", {
+            "青龙剑": {"description": "削铁如泥的宝剑"}
+        })
+        self.assertEqual(self.pm.refresh_search_index(), 1)
+        self.assertEqual([hit.project for hit in self.pm.search_index.search("宝剑")], ["a"])
+
+        self.assertTrue(self.pm.delete_project("a"))
+        self.assertEqual(self.pm.search_index.search("宝剑"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
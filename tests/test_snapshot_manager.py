@@ -0,0 +1,98 @@
+"""
+Unit tests for snapshot_manager module
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+from snapshot_manager import SnapshotManager
+
+
+class TestSnapshotManager(unittest.TestCase):
+    """测试增量快照"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.dm = DataManager(self.test_dir)
+        self.manager = self.dm.get_snapshot_manager()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_incremental_snapshot_dedupes_unchanged_files(self):
+        """测试未修改的文件在快照间共享同一对象"""
+        self.dm.add_character("林舟", "主角")
+        self.dm.set_novel_chapter(1, "第1章", "正文" * 1000)
+        first = self.dm.create_snapshot("第一次")
+        self.assertGreater(first["new_objects"], 0)
+
+        self.dm.add_character("苏晚", "配角")
+        second = self.dm.create_snapshot("第二次")
+        self.assertNotEqual(first["id"], second["id"])
+        self.assertEqual(first["files"]["novel_text.json"]["sha256"], second["files"]["novel_text.json"]["sha256"])
+        self.assertLess(second["new_bytes"], first["new_bytes"])
+        self.assertNotIn("novel_text.idx", second["files"])
+        self.assertNotIn(".lock", second["files"])
+
+        # 快照目录中的文件是指向同一对象的硬链接
+        linked = self.test_dir / "meta_backup" / "snapshots" / first["id"] / "novel_text.json"
+        self.assertTrue(linked.exists())
+
+        # 内容没有变化时不创建新快照
+        self.assertEqual(self.dm.create_snapshot("重复")["id"], second["id"])
+
+    def test_restore_snapshot(self):
+        """测试一步恢复，并删除快照之后新增的文件"""
+        self.dm.set_novel_chapter(1, "第1章", "原始正文")
+        snapshot = self.dm.create_snapshot()
+        self.dm.set_novel_chapter(1, "第1章", "被覆盖的正文")
+        self.dm.write_story_outline("新大纲")
+
+        self.assertTrue(self.dm.restore_snapshot(snapshot["id"]))
+        self.assertEqual(self.dm.get_novel_chapter(1)["content"], "原始正文")
+        self.assertEqual(self.dm.read_story_outline(), "")
+        self.assertEqual(len(self.dm.list_snapshots()), 2)
+        self.assertFalse(self.dm.restore_snapshot("不存在"))
+
+    def test_prune_runs_under_write_lock(self):
+        """测试自动清理和回收对象与创建快照在同一次写入锁内完成"""
+        self.dm.set_novel_chapter(1, "第1章", "正文")
+        locked = []
+        original = SnapshotManager.collect_garbage
+
+        def collect_garbage(manager):
+            locked.append(self.dm._write_lock.is_locked)
+            return original(manager)
+
+        with patch("data_manager.SNAPSHOT_CONFIG", {"keep": 1}), \
+                patch.object(SnapshotManager, "collect_garbage", collect_garbage):
+            self.dm.create_snapshot("第一次")
+            self.dm.set_novel_chapter(1, "第1章", "修改")
+            self.dm.create_snapshot("第二次")
+        self.assertEqual(locked, [True])
+        self.assertEqual(len(self.dm.list_snapshots()), 1)
+
+    def test_prune_collects_unreferenced_objects(self):
+        """测试清理旧快照时删除不再引用的对象"""
+        for i in range(3):
+            self.dm.write_story_outline(f"大纲版本{i}")
+            self.dm.create_snapshot(prune=False)
+        self.assertEqual(self.manager.prune(1), 2)
+        stats = self.manager.stats()
+        self.assertEqual(stats["snapshots"], 1)
+        objects = list((self.test_dir / "meta_backup" / "objects").glob("*/*"))
+        referenced = {e["sha256"] for e in self.manager.list_snapshots()[0]["files"].values()}
+        self.assertEqual({p.name for p in objects}, referenced)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Unit tests for sync_prompts module
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sync_prompts
+from sync_prompts import merge_prompts, sync_project
+from prompt_layers import (
+    PromptResolver, OVERRIDE_NAME, LEGACY_NAME, LEGACY_BASE_NAME, LEGACY_BACKUP_NAME
+)
+
+
+def _dump(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestMergePrompts(unittest.TestCase):
+    """测试提示词三方合并"""
+
+    def test_takes_upstream_changes_and_keeps_customisations(self):
+        """测试未修改的项随源文件更新，自定义的项保留"""
+        base = {"a": {"base_prompt": "A1"}, "b": {"base_prompt": "B1"}, "old": {"base_prompt": "O"}}
+        ours = {"a": {"base_prompt": "A-自定义"}, "b": {"base_prompt": "B1"}, "old": {"base_prompt": "O"}}
+        theirs = {"a": {"base_prompt": "A1"}, "b": {"base_prompt": "B2"}, "new": {"base_prompt": "N"}}
+
+        merged, conflicts = merge_prompts(base, ours, theirs)
+        self.assertEqual(merged, {
+            "a": {"base_prompt": "A-自定义"}, "b": {"base_prompt": "B2"}, "new": {"base_prompt": "N"}
+        })
+        self.assertEqual(conflicts, [])
+
+    def test_conflict_keeps_project_version(self):
+        """测试双方都修改的项保留项目版本并报告冲突"""
+        base = {"a": {"base_prompt": "A1", "note": "x"}}
+        ours = {"a": {"base_prompt": "A-自定义", "note": "x"}}
+        theirs = {"a": {"base_prompt": "A2", "note": "y"}}
+
+        merged, conflicts = merge_prompts(base, ours, theirs)
+        self.assertEqual(merged, {"a": {"base_prompt": "A-自定义", "note": "y"}})
+        self.assertEqual(conflicts, ["a.base_prompt"])
+
+
+class TestSyncProject(unittest.TestCase):
+    """测试把项目中的整份副本转换为覆盖文件"""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.defaults = self.temp_dir / "prompts.default.json"
+        self.source = self.temp_dir / "prompts.json"
+        self.project = self.temp_dir / "projects" / "book"
+        self.project.mkdir(parents=True)
+        _dump(self.defaults, {})
+        _dump(self.source, {"a": {"base_prompt": "A1"}, "b": {"base_prompt": "B1"}})
+        self.resolver = PromptResolver(self.defaults, self.source)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _sync(self, dry_run=False):
+        return sync_project(self.project, self.resolver, dry_run=dry_run)
+
+    def test_identical_copy_is_removed(self):
+        """测试与全局相同的副本直接删除，没有副本的项目无需处理"""
+        self.assertEqual(self._sync()["action"], "layered")
+        shutil.copy2(self.source, self.project / LEGACY_NAME)
+        self.assertEqual(self._sync()["action"], "removed")
+        self.assertFalse((self.project / LEGACY_NAME).exists())
+        self.assertFalse((self.project / OVERRIDE_NAME).exists())
+
+    def test_convert_with_base_and_dry_run(self):
+        """测试以复制时的基准转换，只保留项目自定义的项；试运行不写入文件"""
+        _dump(self.project / LEGACY_BASE_NAME, {"a": {"base_prompt": "A1"}, "b": {"base_prompt": "B0"}})
+        _dump(self.project / LEGACY_NAME, {"a": {"base_prompt": "A-自定义"}, "b": {"base_prompt": "B0"}})
+
+        result = self._sync(dry_run=True)
+        self.assertEqual((result["action"], result["overrides"]), ("converted", ["a"]))
+        self.assertTrue((self.project / LEGACY_NAME).exists())
+
+        self._sync()
+        self.assertEqual(_load(self.project / OVERRIDE_NAME), {"a": {"base_prompt": "A-自定义"}})
+        self.assertTrue((self.project / LEGACY_BACKUP_NAME).exists())
+        self.assertFalse((self.project / LEGACY_NAME).exists())
+        # 项目未修改的 b 跟随全局
+        self.assertEqual(self.resolver.resolve(self.project)["b"]["base_prompt"], "B1")
+
+    def test_report_counts_actions(self):
+        """测试并行处理所有项目并写出JSON报告"""
+        other = self.temp_dir / "projects" / "other"
+        other.mkdir()
+        shutil.copy2(self.source, other / LEGACY_NAME)
+        report_path = self.temp_dir / "report.json"
+
+        with patch.object(sync_prompts, "get_projects_dir", return_value=self.temp_dir / "projects"):
+            self.assertTrue(sync_prompts.sync_prompts_to_projects(
+                report_path=report_path, workers=2, resolver=self.resolver
+            ))
+
+        report = _load(report_path)
+        self.assertEqual(report["counts"], {"layered": 1, "removed": 1})
+        self.assertEqual({r["project"] for r in report["projects"]}, {"book", "other"})
+
+
+if __name__ == '__main__':
+    unittest.main()
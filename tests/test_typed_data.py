@@ -0,0 +1,112 @@
+"""
+Unit tests for typed_data module
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import typed_data
+from data_manager import DataManager
+from models import NovelChapter, ProjectData
+
+
+class TestTypedDataView(unittest.TestCase):
+    """测试类型化数据视图"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.dm = DataManager(self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_project_data_snapshot(self):
+        """测试从项目文件组装ProjectData"""
+        self.dm.write_theme_one_line({"novel_name": "夜行", "theme": "一个人的旅途"})
+        self.dm.write_story_outline("故事大纲")
+        self.dm.add_character("林舟", "主角")
+        self.dm.write_chapter_outline([{"title": "起", "outline": "开端"}])
+        self.dm.set_chapter_summary(1, "起", "概要")
+        self.dm.set_novel_chapter(1, "起", "第一章正文")
+
+        project = self.dm.typed.project_data()
+        self.assertIsInstance(project, ProjectData)
+        self.assertEqual(project.theme_one_line.theme, "一个人的旅途")
+        self.assertEqual(project.story_outline.title, "夜行")
+        self.assertEqual(project.chapter_outline.chapters[0].order, 1)
+        self.assertEqual(project.world_settings.characters["林舟"].description, "主角")
+        self.assertEqual(project.chapter_summaries[1].summary, "概要")
+        self.assertEqual(project.total_word_count, 5)
+        self.assertFalse(project.completion_status["theme_paragraph"])
+
+    def test_snapshot_cached_until_file_changes(self):
+        """测试文件未变化时复用快照，只重新解析变化的文件"""
+        self.dm.add_character("林舟", "主角")
+        self.dm.set_novel_chapter(1, "起", "正文")
+        first = self.dm.typed.project_data()
+        with patch("typed_data._parse", wraps=typed_data._parse) as parse:
+            self.assertEqual(self.dm.typed.project_data(), first)
+            self.assertEqual(parse.call_count, 0)
+
+            self.dm.set_novel_chapter(2, "承", "第二章")
+            second = self.dm.typed.project_data()
+            self.assertEqual(sorted(second.novel_chapters), [1, 2])
+            self.assertEqual(parse.call_count, 1)
+
+    def test_returned_models_do_not_share_cache(self):
+        """测试修改返回的模型不影响缓存"""
+        self.dm.add_character("林舟", "主角")
+        self.dm.set_novel_chapter(1, "起", "正文")
+        project = self.dm.typed.project_data()
+        project.novel_chapters[1].content = "被调用方修改"
+        project.world_settings.characters.clear()
+        self.dm.typed.characters()["林舟"].description = "被调用方修改"
+
+        again = self.dm.typed.project_data()
+        self.assertEqual(again.novel_chapters[1].content, "正文")
+        self.assertEqual(again.world_settings.characters["林舟"].description, "主角")
+
+    def test_story_outline_title_follows_rename(self):
+        """测试小说改名后故事大纲的标题随之更新"""
+        self.dm.write_theme_one_line({"novel_name": "夜行", "theme": "主题"})
+        self.dm.write_story_outline("故事大纲")
+        self.assertEqual(self.dm.typed.story_outline().title, "夜行")
+        self.dm.write_theme_one_line({"novel_name": "晨归", "theme": "主题"})
+        self.assertEqual(self.dm.typed.story_outline().title, "晨归")
+
+    def test_legacy_theme_and_missing_word_count(self):
+        """测试纯字符串主题和缺少字数的章节"""
+        self.dm.write_json_file(self.dm.get_path("theme_one_line"), "旧版主题")
+        self.dm.write_novel_chapters({"chapter_3": {"title": "转", "content": "四个汉字"}})
+        self.assertEqual(self.dm.typed.theme_one_line().theme, "旧版主题")
+        chapter = self.dm.typed.novel_chapter(3)
+        self.assertIsInstance(chapter, NovelChapter)
+        self.assertEqual(chapter.word_count, 4)
+        self.assertIsNone(self.dm.typed.novel_chapter(9))
+
+    def test_invalid_data_raises_value_error(self):
+        """测试数据不符合模型时抛出ValueError"""
+        self.dm.write_novel_chapters({"chapter_1": {"title": "起", "content": ["不是字符串"]}})
+        with self.assertRaises(ValueError):
+            self.dm.typed.novel_chapters()
+
+    def test_reads_staged_data_in_transaction(self):
+        """测试事务中读取暂存内容"""
+        with self.dm.transaction():
+            self.dm.set_novel_chapter(1, "起", "暂存正文")
+            self.assertEqual(self.dm.typed.novel_chapters()[1].content, "暂存正文")
+        with patch.object(self.dm, 'read_file_bytes', wraps=self.dm.read_file_bytes) as reader:
+            self.assertEqual(self.dm.typed.novel_chapters()[1].content, "暂存正文")
+            reader.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
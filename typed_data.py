@@ -0,0 +1,301 @@
+"""
+类型化数据访问 - 通过 models.py 中的Pydantic模型读取项目数据（可选接口）
+
+DataManager 的常规接口返回原始字典；需要类型安全时使用 dm.typed：
+    chapters = dm.typed.novel_chapters()     # Dict[int, NovelChapter]
+    project = dm.typed.project_data()        # ProjectData 快照
+
+文件内容以字节直接交给 pydantic 解析（model_validate_json / TypeAdapter.validate_json），
+不经过中间字典。每个文件的解析结果按 DataManager 的文件版本缓存，ProjectData 在首次
+访问时组装，之后只重新解析发生变化的文件。数据不符合模型时抛出ValueError。
+
+返回的模型是缓存内容的深拷贝，调用方可以随意修改而不影响缓存。
+"""
+
+import copy
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+from models import (
+    Chapter, ChapterOutline, ChapterSummary, Character, Item, Location, NovelChapter,
+    ProjectData, StoryOutline, ThemeOneLine, ThemeParagraph, WorldSettings
+)
+
+
+# ===== 磁盘文件格式 =====
+class _Record(BaseModel):
+    """磁盘记录：忽略未知字段"""
+    model_config = ConfigDict(extra="ignore")
+
+
+class _EntityRecord(_Record):
+    description: str = ""
+    created_at: Optional[datetime] = None
+
+
+class _ThemeFile(_Record):
+    theme: str = ""
+    novel_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class _ThemeParagraphFile(_Record):
+    theme_paragraph: str = ""
+    created_at: Optional[datetime] = None
+
+
+class _StoryOutlineFile(_Record):
+    outline: str = ""
+    word_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class _OutlineRecord(_Record):
+    id: Optional[str] = None
+    title: str = ""
+    outline: str = ""
+    order: Optional[int] = None
+    chapter_number: Optional[int] = None
+
+
+class _ChapterOutlineFile(_Record):
+    chapters: List[_OutlineRecord] = Field(default_factory=list)
+    created_at: Optional[datetime] = None
+
+
+class _SummaryRecord(_Record):
+    title: str = ""
+    summary: str = ""
+    word_count: Optional[int] = None
+
+
+class _SummaryFile(_Record):
+    summaries: Dict[str, _SummaryRecord] = Field(default_factory=dict)
+
+
+class _NovelRecord(_Record):
+    title: str = ""
+    content: str = ""
+    word_count: Optional[int] = None
+
+
+class _NovelTextFile(_Record):
+    chapters: Dict[str, _NovelRecord] = Field(default_factory=dict)
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp) -> TypeAdapter:
+    """按类型缓存TypeAdapter（构建成本较高，只构建一次）"""
+    return TypeAdapter(tp)
+
+
+def _parse(payload: bytes, tp) -> Any:
+    """从字节解析磁盘格式"""
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return tp.model_validate_json(payload)
+    return _adapter(tp).validate_json(payload)
+
+
+def _timestamped(created_at: Optional[datetime], **fields) -> Dict[str, Any]:
+    """文件中有时间戳时沿用，否则交给模型的默认值"""
+    if created_at is not None:
+        fields["created_at"] = created_at
+    return fields
+
+
+class TypedDataView:
+    """DataManager的类型化只读视图"""
+
+    PROJECT_FILES = (
+        "theme_one_line", "theme_paragraph", "story_outline", "chapter_outline",
+        "characters", "locations", "items", "chapter_summary", "novel_text"
+    )
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        # 缓存项 -> (文件版本, 转换结果)
+        self._cache = {}
+        self._project_cache = None
+        self._lock = threading.RLock()
+
+    def _load(self, key: str, tp, convert: Callable[[Any], Any], empty: Any, slot: Optional[str] = None,
+              depends: Tuple[str, ...] = ()) -> Any:
+        """
+        读取并解析一个文件，结果按文件版本缓存；事务中读取暂存内容且不缓存
+
+        同一文件有多种转换结果时用slot区分缓存项；转换还依赖其他文件时列在depends中。
+        """
+        dm = self.data_manager
+        file_path = dm.get_path(key)
+        if any(dm.is_staged(dm.get_path(k)) for k in (key,) + depends):
+            return self._convert(key, dm.read_file_bytes(file_path), tp, convert, empty)
+
+        with self._lock:
+            version = tuple(dm._file_version(k) for k in (key,) + depends)
+            cached = self._cache.get(slot or key)
+            if cached is None or cached[0] != version:
+                value = self._convert(key, dm.read_file_bytes(file_path), tp, convert, empty)
+                cached = (version, value)
+                self._cache[slot or key] = cached
+            return copy.deepcopy(cached[1])
+
+    @staticmethod
+    def _convert(key, payload, tp, convert, empty):
+        if not payload:
+            return empty
+        try:
+            return convert(_parse(payload, tp))
+        except ValidationError as e:
+            raise ValueError(f"{key} 数据验证失败: {e}") from e
+
+    # ===== 单个文件 =====
+    def theme_one_line(self) -> Optional[ThemeOneLine]:
+        """一句话主题（兼容纯字符串的旧格式）"""
+        def convert(data):
+            if isinstance(data, str):
+                return ThemeOneLine(theme=data) if data else None
+            if not data.theme:
+                return None
+            return ThemeOneLine(**_timestamped(data.created_at, theme=data.theme))
+
+        return self._load("theme_one_line", Union[str, _ThemeFile], convert, None)
+
+    def novel_name(self) -> str:
+        """小说名称（未设置时为空字符串）"""
+        def convert(data):
+            return (data.novel_name or "") if isinstance(data, _ThemeFile) else ""
+
+        return self._load("theme_one_line", Union[str, _ThemeFile], convert, "", slot="novel_name")
+
+    def theme_paragraph(self) -> Optional[ThemeParagraph]:
+        """段落主题"""
+        def convert(data):
+            if not data.theme_paragraph:
+                return None
+            return ThemeParagraph(**_timestamped(data.created_at, theme=data.theme_paragraph))
+
+        return self._load("theme_paragraph", _ThemeParagraphFile, convert, None)
+
+    def story_outline(self) -> Optional[StoryOutline]:
+        """故事大纲（标题取自小说名称）"""
+        def convert(data):
+            if not data.outline:
+                return None
+            return StoryOutline(**_timestamped(
+                data.created_at, title=self.novel_name(), outline=data.outline, word_count=data.word_count
+            ))
+
+        return self._load("story_outline", _StoryOutlineFile, convert, None, depends=("theme_one_line",))
+
+    def chapter_outline(self) -> Optional[ChapterOutline]:
+        """分章细纲（缺少序号的章节按位置编号）"""
+        def convert(data):
+            if not data.chapters:
+                return None
+            chapters = [
+                Chapter(id=ch.id, title=ch.title, outline=ch.outline, order=ch.order or ch.chapter_number or i)
+                for i, ch in enumerate(data.chapters, 1)
+            ]
+            return ChapterOutline(**_timestamped(data.created_at, chapters=chapters, total_chapters=len(chapters)))
+
+        return self._load("chapter_outline", _ChapterOutlineFile, convert, None)
+
+    def _entities(self, key: str, model) -> Dict[str, Any]:
+        def convert(data):
+            return {
+                name: model(**_timestamped(record.created_at, name=name, description=record.description))
+                for name, record in data.items()
+            }
+
+        return self._load(key, Dict[str, _EntityRecord], convert, {})
+
+    def characters(self) -> Dict[str, Character]:
+        """角色"""
+        return self._entities("characters", Character)
+
+    def locations(self) -> Dict[str, Location]:
+        """场景"""
+        return self._entities("locations", Location)
+
+    def items(self) -> Dict[str, Item]:
+        """道具"""
+        return self._entities("items", Item)
+
+    def world_settings(self) -> WorldSettings:
+        """世界设定"""
+        return WorldSettings.model_construct(
+            characters=self.characters(), locations=self.locations(), items=self.items()
+        )
+
+    def chapter_summaries(self) -> Dict[int, ChapterSummary]:
+        """章节概要，按细纲中的章节编号索引（已从细纲删除的章节不包含在内）"""
+        def convert(data):
+            summaries = {}
+            for chapter_key, record in data.summaries.items():
+                num = self.data_manager.chapter_number(chapter_key)
+                if num is not None:
+                    summaries[num] = ChapterSummary(
+                        chapter_num=num, title=record.title, summary=record.summary,
+                        word_count=record.word_count if record.word_count is not None else len(record.summary)
+                    )
+            return summaries
+
+        return self._load("chapter_summary", _SummaryFile, convert, {}, depends=("chapter_outline",))
+
+    @staticmethod
+    def _novel_chapter(num: int, record: _NovelRecord) -> NovelChapter:
+        return NovelChapter(
+            chapter_num=num, title=record.title, content=record.content, word_count=record.word_count
+        )
+
+    def novel_chapters(self) -> Dict[int, NovelChapter]:
+        """小说正文，按细纲中的章节编号索引（已从细纲删除的章节不包含在内）"""
+        def convert(data):
+            chapters = {}
+            for chapter_key, record in data.chapters.items():
+                num = self.data_manager.chapter_number(chapter_key)
+                if num is not None:
+                    chapters[num] = self._novel_chapter(num, record)
+            return chapters
+
+        return self._load("novel_text", _NovelTextFile, convert, {}, depends=("chapter_outline",))
+
+    def novel_chapter(self, chapter_num: int) -> Optional[NovelChapter]:
+        """单个章节（通过偏移索引读取，不解析整本小说）"""
+        chapter = self.data_manager.get_novel_chapter(chapter_num)
+        if not chapter:
+            return None
+        try:
+            record = _NovelRecord.model_validate(chapter)
+        except ValidationError as e:
+            raise ValueError(f"novel_text 数据验证失败: {e}") from e
+        return self._novel_chapter(int(chapter_num), record)
+
+    # ===== 项目快照 =====
+    def project_data(self) -> ProjectData:
+        """
+        组装ProjectData快照
+
+        各部分已分别验证，这里用model_construct组装而不再整体验证；
+        所有项目文件都未变化时直接返回上次的快照。
+        """
+        dm = self.data_manager
+        with self._lock:
+            staged = any(dm.is_staged(dm.get_path(key)) for key in self.PROJECT_FILES)
+            versions = tuple(dm._file_version(key) for key in self.PROJECT_FILES)
+            if not staged and self._project_cache is not None and self._project_cache[0] == versions:
+                return copy.deepcopy(self._project_cache[1])
+            project = ProjectData.model_construct(
+                theme_one_line=self.theme_one_line(),
+                theme_paragraph=self.theme_paragraph(),
+                story_outline=self.story_outline(),
+                chapter_outline=self.chapter_outline(),
+                world_settings=self.world_settings(),
+                chapter_summaries=self.chapter_summaries(),
+                novel_chapters=self.novel_chapters(),
+            )
+            if not staged:
+                self._project_cache = (versions, copy.deepcopy(project))
+            return project
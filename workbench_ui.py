@@ -5,6 +5,8 @@ from export_ui import handle_novel_export
 from project_manager import project_manager
 from rich.panel import Panel
 from datetime import datetime
+from history_compactor import HistoryCompactor, format_compaction_result
+from disk_usage import format_size
 
 def show_workbench():
     """显示项目工作台菜单"""
@@ -24,6 +26,8 @@ def show_workbench():
                 "开始 / 继续创作",
                 "查看项目概览",
                 "导出小说",
+                "清理生成历史",
+                "备份与恢复",
                 "返回项目管理"
             ]
             
@@ -35,6 +39,10 @@ def show_workbench():
                 show_project_overview()
             elif choice == '3':
                 handle_novel_export()
+            elif choice == '4':
+                compact_generation_history()
+            elif choice == '5':
+                manage_snapshots()
             elif choice == '0':
                 break
     
@@ -82,3 +90,89 @@ def show_project_overview():
         ui.print_warning("无法获取项目进度。")
         
     ui.pause()
+
+def compact_generation_history():
+    """在后台按保留策略清理当前项目的生成历史"""
+    dm = project_data_manager.get_data_manager()
+    if not dm:
+        return
+
+    compactor = HistoryCompactor(dm)
+    if not compactor.policy.is_active:
+        ui.print_warning("保留策略未启用（HISTORY_KEEP_LAST 与 HISTORY_KEEP_DAYS 均为0）。")
+        ui.pause()
+        return
+
+    ui.print_info(
+        f"保留策略：每章保留最近 {compactor.policy.keep_last} 条，"
+        f"以及 {compactor.policy.keep_days} 天内的记录；当前正文对应的版本始终保留。"
+    )
+    if not ui.confirm("确定要清理批评、修正历史和草稿记录吗？", default=False):
+        ui.print_warning("操作已取消。")
+        ui.pause()
+        return
+
+    def on_done(result):
+        console.print(Panel(format_compaction_result(result), title="生成历史清理完成", border_style="green"))
+
+    compactor.start_background(on_done)
+    ui.print_success("清理已在后台开始，完成后会显示结果。")
+    ui.pause()
+
+def manage_snapshots():
+    """创建快照，或把项目数据恢复到某个快照"""
+    dm = project_data_manager.get_data_manager()
+    if not dm:
+        return
+
+    while True:
+        stats = dm.get_snapshot_manager().stats()
+        ui.print_info(
+            f"\n已有 {stats['snapshots']} 个快照，"
+            f"实际占用 {format_size(stats['stored_bytes'])}（未去重时为 {format_size(stats['logical_bytes'])}）"
+        )
+        action = ui.display_menu("备份与恢复:", ["立即创建快照", "恢复到快照", "返回"])
+
+        if action == '1':
+            snapshot = dm.create_snapshot("手动备份")
+            ui.print_success(
+                f"快照 {snapshot['id']} 已创建，新增 {snapshot['new_objects']} 个文件 "
+                f"({format_size(snapshot['new_bytes'])})"
+            )
+            ui.pause()
+        elif action == '2':
+            restore_snapshot(dm)
+        elif action == '0':
+            break
+
+def restore_snapshot(dm):
+    """选择快照并恢复"""
+    snapshots = dm.list_snapshots()
+    if not snapshots:
+        ui.print_warning("还没有任何快照。")
+        ui.pause()
+        return
+
+    titles = []
+    for snapshot in snapshots:
+        try:
+            created_at = datetime.fromisoformat(snapshot["created_at"]).strftime('%Y-%m-%d %H:%M:%S')
+        except (ValueError, TypeError, KeyError):
+            created_at = snapshot.get("id", "")
+        titles.append(f"{created_at}  {snapshot.get('reason') or '无说明'}  ({len(snapshot['files'])} 个文件)")
+
+    choice = ui.display_menu("请选择要恢复的快照（最新在前）:", titles + ["返回"])
+    if choice == '0' or not (choice and choice.isdigit()) or not 1 <= int(choice) <= len(snapshots):
+        return
+
+    snapshot = snapshots[int(choice) - 1]
+    if not ui.confirm("恢复会覆盖当前项目数据（恢复前会自动备份当前状态），确定吗？", default=False):
+        ui.print_warning("操作已取消。")
+        ui.pause()
+        return
+
+    if dm.restore_snapshot(snapshot["id"]):
+        ui.print_success(f"已恢复到快照 {snapshot['id']}。")
+    else:
+        ui.print_error("恢复失败：快照不存在。")
+    ui.pause()
@@ -21,6 +21,18 @@ def _sanitize_chapters(chapters):
             ch['order'] = i + 1
     return chapters
 
+def _chapter_label(dm, chapter_key, title):
+    """章节在菜单中的显示文本（按细纲中的当前位置编号）"""
+    number = dm.chapter_number(chapter_key)
+    return f"第{number}章: {title}" if number else f"(已从细纲删除) {title}"
+
+def _novel_chapter_choices(dm, novel_chapters):
+    """按细纲顺序排列已有正文的章节，返回 [(章节键, 标题)]"""
+    return [
+        (key, novel_chapters[key].get('title', '无标题'))
+        for key in dm.sorted_chapter_keys(novel_chapters)
+    ]
+
 # This file now contains the main creative workflow, moved from meta_novel_cli.py
 
 # --- Getters ---
@@ -320,7 +332,7 @@ def handle_chapter_outline():
         status = f"已有 {len(chapters)} 章" if chapters else "未设置"
         ui.print_info(f"\n当前分章细纲状态: {status}")
 
-        options = ["查看所有章节细纲", "生成新的分章细纲", "编辑指定章节", "删除指定章节", "全部删除", "返回"]
+        options = ["查看所有章节细纲", "生成新的分章细纲", "编辑指定章节", "插入新章节", "调整章节顺序", "删除指定章节", "全部删除", "返回"]
         action = ui.display_menu("分章细纲管理:", options)
 
         if action == "1":
@@ -330,8 +342,12 @@ def handle_chapter_outline():
         elif action == "3":
             edit_chapter_outline(dm, chapters)
         elif action == "4":
-            delete_single_chapter_outline(dm, chapters)
+            insert_chapter_outline(dm, chapters)
         elif action == "5":
+            move_chapter_outline(dm, chapters)
+        elif action == "6":
+            delete_single_chapter_outline(dm, chapters)
+        elif action == "7":
             delete_all_chapter_outlines(dm)
         elif action == "0":
             break
@@ -360,6 +376,7 @@ def generate_chapter_outline(dm, current_chapters):
             ui.print_warning("操作已取消。")
             ui.pause()
             return
+        dm.auto_snapshot("重新生成分章细纲前")
             
     # 检查前置条件
     story_outline = dm.read_story_outline()
@@ -458,6 +475,52 @@ def edit_chapter_outline(dm, chapters):
             ui.print_warning("无效的选择。")
     ui.pause()
 
+def _choose_position(prompt_text, max_position):
+    """输入1到max_position之间的位置，无效时返回None"""
+    position_str = ui.prompt(prompt_text, default=str(max_position))
+    if position_str and position_str.strip().isdigit() and 1 <= int(position_str) <= max_position:
+        return int(position_str)
+    ui.print_warning("无效的位置。")
+    return None
+
+def insert_chapter_outline(dm, chapters):
+    """在指定位置插入新章节，已有章节的概要和正文不受影响"""
+    position = _choose_position(f"请输入插入位置 (1-{len(chapters) + 1}):", len(chapters) + 1)
+    if position is None:
+        ui.pause()
+        return
+
+    title = ui.prompt("请输入章节标题:")
+    outline = ui.prompt("请输入章节大纲:", multiline=True)
+    if not title or not outline:
+        ui.print_warning("标题或大纲不能为空，未作修改。")
+    elif dm.insert_chapter_outline(position, title, outline):
+        ui.print_success(f"已插入为第{position}章。")
+    else:
+        ui.print_error("插入章节失败。")
+    ui.pause()
+
+def move_chapter_outline(dm, chapters):
+    """调整章节顺序，只改写细纲"""
+    if len(chapters) < 2:
+        ui.print_warning("章节数不足，无需调整顺序。")
+        ui.pause()
+        return
+
+    chapter_titles = [f"第{ch['order']}章: {ch.get('title', '无标题')}" for ch in chapters]
+    choice_str = ui.display_menu("请选择要移动的章节:", chapter_titles + ["返回"])
+    if choice_str == '0' or not (choice_str and choice_str.isdigit()) or not 1 <= int(choice_str) <= len(chapters):
+        return
+
+    chapter = chapters[int(choice_str) - 1]
+    position = _choose_position(f"请输入新位置 (1-{len(chapters)}):", len(chapters))
+    if position is not None:
+        if dm.move_chapter_outline(dm.chapter_key(chapter), position):
+            ui.print_success(f"'{chapter.get('title')}' 已移动到第{position}章。")
+        else:
+            ui.print_error("调整顺序失败。")
+    ui.pause()
+
 def delete_single_chapter_outline(dm, chapters):
     if not chapters:
         ui.print_warning("没有可删除的章节。")
@@ -474,11 +537,8 @@ def delete_single_chapter_outline(dm, chapters):
         choice_idx = int(choice_str) - 1
         if 0 <= choice_idx < len(chapters):
             if ui.confirm(f"确定要删除 '{chapters[choice_idx].get('title')}' 吗？"):
-                chapters.pop(choice_idx)
-                # Re-order remaining chapters
-                for i, ch in enumerate(chapters):
-                    ch['order'] = i + 1
-                dm.write_chapter_outline(chapters)
+                # 其余章节的ID不变，概要和正文保持对应
+                dm.remove_chapter_outline(dm.chapter_key(chapters[choice_idx]))
                 ui.print_success("章节已删除。")
             else:
                 ui.print_warning("操作已取消。")
@@ -493,6 +553,7 @@ def delete_all_chapter_outlines(dm):
         return
 
     if ui.confirm("警告：这将删除所有章节细纲，确定吗？"):
+        dm.auto_snapshot("删除全部分章细纲前")
         dm.delete_chapter_outline()
         ui.print_success("所有章节细纲已删除。")
     else:
@@ -528,7 +589,7 @@ def handle_chapter_summary():
         action = ui.display_menu("章节概要管理:", options)
 
         if action == "1":
-            view_chapter_summaries(chapters, summaries)
+            view_chapter_summaries(dm, chapters, summaries)
         elif action == "2":
             generate_all_summaries(dm, chapters, summaries)
         elif action == "3":
@@ -538,7 +599,7 @@ def handle_chapter_summary():
         elif action == "0":
             break
 
-def view_chapter_summaries(chapters, summaries):
+def view_chapter_summaries(dm, chapters, summaries):
     if not chapters:
         ui.print_warning("尚未创建任何分章细纲，无法查看概要。")
         ui.pause()
@@ -549,8 +610,7 @@ def view_chapter_summaries(chapters, summaries):
         order = chapter_data.get("order", i + 1)
         title = chapter_data.get("title", f"第{order}章")
         
-        summary_key = f"chapter_{order}"
-        summary_content = summaries.get(summary_key, {}).get("summary", "尚未生成")
+        summary_content = summaries.get(dm.chapter_key(chapter_data), {}).get("summary", "尚未生成")
         
         ui.print_panel(summary_content, title=title)
 
@@ -561,9 +621,8 @@ def view_chapter_summaries(chapters, summaries):
 
 def generate_all_summaries(dm, chapters, summaries):
     chapters_to_generate = []
-    for i, ch in enumerate(chapters):
-        order = ch.get("order", i + 1)
-        if f"chapter_{order}" not in summaries:
+    for ch in chapters:
+        if dm.chapter_key(ch) not in summaries:
             chapters_to_generate.append(ch)
 
     if not chapters_to_generate:
@@ -581,6 +640,8 @@ def generate_all_summaries(dm, chapters, summaries):
         ui.pause()
         return
     
+    dm.auto_snapshot("批量生成章节概要前")
+    
     # 获取上下文信息
     context = dm.get_context_info()
     user_prompt = ""  # 批量生成暂时不支持用户自定义提示
@@ -605,7 +666,7 @@ def generate_all_summaries(dm, chapters, summaries):
             )
             
             if summary:
-                results[f"chapter_{order}"] = {
+                results[dm.chapter_key(chapter)] = {
                     "title": title,
                     "summary": summary
                 }
@@ -620,8 +681,12 @@ def generate_all_summaries(dm, chapters, summaries):
         
 
     if results:
-        new_summaries = {**summaries, **results}
-        dm.write_chapter_summaries(new_summaries)
+        # 在事务中重新读取最新概要再合并，避免覆盖生成期间的其他修改
+        with dm.transaction():
+            latest_summaries = dm.read_chapter_summaries()
+            latest_summaries.update(results)
+            dm.write_chapter_summaries(latest_summaries)
+        summaries.update(results)
         ui.print_success(f"已成功生成 {len(results)} 个概要并保存。")
         if failed_chapters:
             ui.print_warning(f"失败的章节: {failed_chapters}")
@@ -633,9 +698,8 @@ def generate_single_summary(dm, chapters, summaries):
     """Handles the UI for generating or updating a summary for a single chapter."""
     chapter_titles = []
     for ch in chapters:
-        order = ch.get('order')
         title = ch.get('title', '无标题')
-        status = "已生成" if f"chapter_{order}" in summaries else "未生成"
+        status = "已生成" if dm.chapter_key(ch) in summaries else "未生成"
         chapter_titles.append(f"({status}) {title}")
 
     choice_str = ui.display_menu("请选择要生成/修改概要的章节:", chapter_titles + ["返回"])
@@ -649,7 +713,7 @@ def generate_single_summary(dm, chapters, summaries):
         choice_idx = int(choice_str) - 1
         if 0 <= choice_idx < len(chapters):
             chapter = chapters[choice_idx]
-            chapter_key = f"chapter_{chapter['order']}"
+            chapter_key = dm.chapter_key(chapter)
             context = dm.get_context_info()
 
             # Confirm if overwriting an existing summary, or offer to edit.
@@ -716,7 +780,8 @@ def delete_single_summary(dm, summaries):
         ui.pause()
         return
 
-    summary_titles = [f"第{k.split('_')[1]}章: {v.get('title', '无标题')}" for k, v in summaries.items()]
+    summary_keys = dm.sorted_chapter_keys(summaries)
+    summary_titles = [_chapter_label(dm, key, summaries[key].get('title', '无标题')) for key in summary_keys]
     choice_str = ui.display_menu("请选择要删除的概要:", summary_titles + ["返回"])
 
     if choice_str == '0':
@@ -724,10 +789,8 @@ def delete_single_summary(dm, summaries):
 
     if choice_str and choice_str.isdigit():
         choice_idx = int(choice_str) - 1
-        # Note: This way of getting the key is fragile. A better way would be to pass a list of keys.
-        # For now, this will work if the list order is preserved.
-        if 0 <= choice_idx < len(summaries):
-            key_to_delete = list(summaries.keys())[choice_idx]
+        if 0 <= choice_idx < len(summary_keys):
+            key_to_delete = summary_keys[choice_idx]
             if ui.confirm(f"确定要删除 '{summaries[key_to_delete].get('title')}' 的概要吗？"):
                 del summaries[key_to_delete]
                 dm.write_chapter_summaries(summaries)
@@ -747,7 +810,8 @@ def handle_novel_generation():
     while True:
         chapters = _sanitize_chapters(dm.read_chapter_outline())
         summaries = dm.read_chapter_summaries()
-        novel_chapters = dm.read_novel_chapters()
+        # 只读取章节标题和字数，正文在查看或编辑时按需加载
+        novel_chapters = dm.list_novel_chapters()
 
         if not chapters or not summaries:
             ui.print_warning("请先完成分章细纲和章节概要的编辑。")
@@ -759,11 +823,11 @@ def handle_novel_generation():
         status = f"已生成 {completed_count}/{total_count} 章"
         ui.print_info(f"\n当前小说正文状态: {status}")
 
-        options = ["查看章节正文", "批量生成未完成章节", "生成/重新生成单个章节", "手动编辑章节正文", "删除单个章节", "返回"]
+        options = ["查看章节正文", "批量生成未完成章节", "生成/重新生成单个章节", "手动编辑章节正文", "删除单个章节", "历史版本", "返回"]
         action = ui.display_menu("小说正文生成管理:", options)
 
         if action == "1":
-            view_novel_chapter(chapters, novel_chapters)
+            view_novel_chapter(dm, novel_chapters)
         elif action == "2":
             generate_all_novel_chapters(dm, chapters, summaries, novel_chapters)
         elif action == "3":
@@ -772,17 +836,19 @@ def handle_novel_generation():
             edit_novel_chapter(dm, chapters, novel_chapters)
         elif action == "5":
             delete_novel_chapter(dm, chapters, novel_chapters)
+        elif action == "6":
+            handle_chapter_revisions(dm, novel_chapters)
         elif action == "0":
             break
 
-def view_novel_chapter(chapters, novel_chapters):
+def view_novel_chapter(dm, novel_chapters):
     if not novel_chapters:
         ui.print_warning("尚无任何章节正文。")
         ui.pause()
         return
 
-    chapter_map = {int(k.split('_')[1]): v.get('title', f"第{k.split('_')[1]}章") for k, v in novel_chapters.items()}
-    chapter_titles = [f"第{order}章: {title}" for order, title in sorted(chapter_map.items())]
+    choices = _novel_chapter_choices(dm, novel_chapters)
+    chapter_titles = [_chapter_label(dm, key, title) for key, title in choices]
     
     choice_str = ui.display_menu("请选择要查看的章节:", chapter_titles + ["返回"])
     
@@ -791,10 +857,8 @@ def view_novel_chapter(chapters, novel_chapters):
     
     if choice_str and choice_str.isdigit():
         choice_idx = int(choice_str) - 1
-        sorted_orders = sorted(chapter_map.keys())
-        if 0 <= choice_idx < len(sorted_orders):
-            order = sorted_orders[choice_idx]
-            chapter_data = novel_chapters.get(f"chapter_{order}")
+        if 0 <= choice_idx < len(choices):
+            chapter_data = dm.get_novel_chapter(choices[choice_idx][0])
             if chapter_data:
                 ui.print_panel(chapter_data.get('content', '无内容'), title=chapter_data.get('title', ''))
         else:
@@ -804,7 +868,7 @@ def view_novel_chapter(chapters, novel_chapters):
 def generate_all_novel_chapters(dm, chapters, summaries, novel_chapters):
     # Implementation for batch generation, adapted from old cli
     context = dm.get_context_info()
-    chapters_to_generate = [ch for ch in chapters if f"chapter_{ch['order']}" not in novel_chapters]
+    chapters_to_generate = [ch for ch in chapters if dm.chapter_key(ch) not in novel_chapters]
     
     if not chapters_to_generate:
         ui.print_info("所有章节正文均已生成。")
@@ -815,6 +879,8 @@ def generate_all_novel_chapters(dm, chapters, summaries, novel_chapters):
         ui.print_warning("操作已取消。")
         return
 
+    dm.auto_snapshot("批量生成章节正文前")
+
     user_prompt = ui.prompt("请输入您的额外要求或指导（直接回车跳过）:")
 
     # 同步顺序生成所有章节
@@ -831,14 +897,14 @@ def generate_all_novel_chapters(dm, chapters, summaries, novel_chapters):
         try:
             content = llm_service.generate_novel_chapter_with_refinement(
                 chapter, 
-                summaries.get(f"chapter_{order}"), 
+                summaries.get(dm.chapter_key(chapter)), 
                 order, 
                 context, 
                 user_prompt
             )
             
             if content:
-                results[f"chapter_{order}"] = {
+                results[dm.chapter_key(chapter)] = {
                     "title": title, 
                     "content": content, 
                     "word_count": len(content)
@@ -854,8 +920,11 @@ def generate_all_novel_chapters(dm, chapters, summaries, novel_chapters):
         
 
     if results:
-        updated_chapters = {**novel_chapters, **results}
-        dm.write_novel_chapters(updated_chapters)
+        # 在事务中重新读取最新正文再合并，避免覆盖生成期间的其他修改
+        with dm.transaction():
+            latest_chapters = dm.read_novel_chapters()
+            latest_chapters.update(results)
+            dm.write_novel_chapters(latest_chapters)
         ui.print_success(f"成功生成 {len(results)} 个章节。")
         if failed_chapters:
             ui.print_warning(f"失败章节: {failed_chapters}")
@@ -866,10 +935,8 @@ def generate_all_novel_chapters(dm, chapters, summaries, novel_chapters):
 
 def generate_single_novel_chapter(dm, chapters, summaries, novel_chapters):
     chapter_titles = []
-    for i, chapter_data in enumerate(chapters):
-        order = chapter_data.get('order', i + 1)
-        key = f"chapter_{order}"
-        status = "已生成" if key in novel_chapters else "未生成"
+    for chapter_data in chapters:
+        status = "已生成" if dm.chapter_key(chapter_data) in novel_chapters else "未生成"
         title = chapter_data.get('title', '无标题')
         chapter_titles.append(f"({status}) {title}")
 
@@ -883,7 +950,7 @@ def generate_single_novel_chapter(dm, chapters, summaries, novel_chapters):
         if 0 <= choice_idx < len(chapters):
             chapter = chapters[choice_idx]
             order = chapter.get('order', choice_idx + 1)
-            chapter_key = f"chapter_{order}"
+            chapter_key = dm.chapter_key(chapter)
 
             if chapter_key in novel_chapters and not ui.confirm("该章节已有正文，是否覆盖？"):
                 return
@@ -902,8 +969,7 @@ def generate_single_novel_chapter(dm, chapters, summaries, novel_chapters):
             )
 
             if content:
-                novel_chapters[chapter_key] = {"title": chapter.get('title', '无标题'), "content": content, "word_count": len(content)}
-                dm.write_novel_chapters(novel_chapters)
+                dm.set_novel_chapter(chapter_key, chapter.get('title', '无标题'), content)
                 ui.print_success("章节正文已生成并保存。")
             else:
                 ui.print_error("章节生成失败。")
@@ -918,8 +984,8 @@ def edit_novel_chapter(dm, chapters, novel_chapters):
         ui.print_warning("没有可编辑的章节。")
         return
 
-    chapter_map = {int(k.split('_')[1]): v.get('title', f"第{k.split('_')[1]}章") for k, v in novel_chapters.items()}
-    chapter_titles = [f"第{order}章: {title}" for order, title in sorted(chapter_map.items())]
+    choices = _novel_chapter_choices(dm, novel_chapters)
+    chapter_titles = [_chapter_label(dm, key, title) for key, title in choices]
 
     choice_str = ui.display_menu("请选择要编辑的章节:", chapter_titles + ["返回"])
 
@@ -928,17 +994,13 @@ def edit_novel_chapter(dm, chapters, novel_chapters):
 
     if choice_str and choice_str.isdigit():
         choice_idx = int(choice_str) - 1
-        sorted_orders = sorted(chapter_map.keys())
-        if 0 <= choice_idx < len(sorted_orders):
-            order = sorted_orders[choice_idx]
-            chapter_key = f"chapter_{order}"
-            current_content = novel_chapters[chapter_key].get('content', '')
+        if 0 <= choice_idx < len(choices):
+            chapter_key, title = choices[choice_idx]
+            current_content = dm.get_novel_chapter(chapter_key).get('content', '')
             
             edited_content = ui.prompt("请编辑章节正文:", default=current_content, multiline=True)
             if edited_content and edited_content.strip() != current_content:
-                novel_chapters[chapter_key]['content'] = edited_content
-                novel_chapters[chapter_key]['word_count'] = len(edited_content)
-                dm.write_novel_chapters(novel_chapters)
+                dm.set_novel_chapter(chapter_key, title, edited_content)
                 ui.print_success("章节已更新。")
             else:
                 ui.print_warning("内容未修改。")
@@ -947,13 +1009,65 @@ def edit_novel_chapter(dm, chapters, novel_chapters):
     ui.pause()
 
 
+def handle_chapter_revisions(dm, novel_chapters):
+    """查看章节正文的历史版本，并可恢复为当前正文"""
+    if not novel_chapters:
+        ui.print_warning("尚无任何章节正文。")
+        ui.pause()
+        return
+
+    choices = _novel_chapter_choices(dm, novel_chapters)
+    chapter_titles = [_chapter_label(dm, key, title) for key, title in choices]
+
+    choice_str = ui.display_menu("请选择章节:", chapter_titles + ["返回"])
+    if choice_str == '0' or not (choice_str and choice_str.isdigit()):
+        return
+    choice_idx = int(choice_str) - 1
+    if not 0 <= choice_idx < len(choices):
+        ui.print_warning("无效的选择。")
+        ui.pause()
+        return
+
+    chapter_key, chapter_title = choices[choice_idx]
+    document = dm.chapter_revision_key(chapter_key)
+    revisions = dm.list_revisions(document)
+    if not revisions:
+        ui.print_warning("该章节还没有历史版本。")
+        ui.pause()
+        return
+
+    revision_titles = [
+        f"版本 {r['revision'] + 1} - {r['timestamp'][:19].replace('T', ' ')} ({r['size']}字)"
+        for r in reversed(revisions)
+    ]
+    version_str = ui.display_menu("请选择版本（最新在前）:", revision_titles + ["返回"])
+    if version_str == '0' or not (version_str and version_str.isdigit()):
+        return
+    version_idx = int(version_str) - 1
+    if not 0 <= version_idx < len(revisions):
+        ui.print_warning("无效的选择。")
+        ui.pause()
+        return
+
+    revision = revisions[-1 - version_idx]
+    content = dm.read_revision(document, revision["revision"])
+    ui.print_panel(content, title=f"{chapter_title} - 版本 {revision['revision'] + 1}")
+    if revision["revision"] != revisions[-1]["revision"] and ui.confirm("是否恢复为此版本？"):
+        title = revision["meta"].get("title") or chapter_title
+        if dm.set_novel_chapter(chapter_key, title, content):
+            ui.print_success("已恢复为所选版本。")
+        else:
+            ui.print_error("恢复失败。")
+    ui.pause()
+
+
 def delete_novel_chapter(dm, chapters, novel_chapters):
     if not novel_chapters:
         ui.print_warning("没有可删除的章节。")
         return
 
-    chapter_map = {int(k.split('_')[1]): v.get('title', f"第{k.split('_')[1]}章") for k, v in novel_chapters.items()}
-    chapter_titles = [f"第{order}章: {title}" for order, title in sorted(chapter_map.items())]
+    choices = _novel_chapter_choices(dm, novel_chapters)
+    chapter_titles = [_chapter_label(dm, key, title) for key, title in choices]
 
     choice_str = ui.display_menu("请选择要删除的章节:", chapter_titles + ["返回"])
     
@@ -962,14 +1076,11 @@ def delete_novel_chapter(dm, chapters, novel_chapters):
     
     if choice_str and choice_str.isdigit():
         choice_idx = int(choice_str) - 1
-        sorted_orders = sorted(chapter_map.keys())
-        if 0 <= choice_idx < len(sorted_orders):
-            order = sorted_orders[choice_idx]
-            chapter_key = f"chapter_{order}"
+        if 0 <= choice_idx < len(choices):
+            chapter_key, title = choices[choice_idx]
             
-            if ui.confirm(f"确定要删除 '{chapter_map[order]}' 的正文吗？"):
-                del novel_chapters[chapter_key]
-                dm.write_novel_chapters(novel_chapters)
+            if ui.confirm(f"确定要删除 '{title}' 的正文吗？"):
+                dm.delete_novel_chapter(chapter_key)
                 ui.print_success("章节正文已删除。")
             else:
                 ui.print_warning("操作已取消。")